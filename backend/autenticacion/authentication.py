@@ -0,0 +1,87 @@
+"""
+Autenticación JWT con una sola validación del token por petición.
+
+JWTAuthenticationMiddleware valida el token y guarda el resultado en la
+petición; JWTAutenticacionCacheada (la clase de autenticación de DRF) lo
+reutiliza en lugar de volver a decodificar el token y consultar el usuario.
+
+El usuario se obtiene de la caché AUTH_USUARIO_CACHE_ALIAS junto con sus
+perfiles de investigador y participante (select_related), durante
+AUTH_USUARIO_CACHE_SEGUNDOS. Las señales de autenticacion/signals.py eliminan
+la entrada al guardar o borrar el usuario o sus perfiles (cambio de rol,
+contraseña, desactivación...). Con la caché LocMem la invalidación solo
+alcanza al proceso que hizo el cambio; en el resto la entrada caduca con el
+TTL, por eso debe ser corto.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Atributo de la HttpRequest donde el middleware deja (usuario, token validado)
+ATRIBUTO_AUTENTICACION = '_autenticacion_jwt'
+
+
+def _cache():
+    return caches[settings.AUTH_USUARIO_CACHE_ALIAS]
+
+
+def clave_usuario(usuario_id):
+    return f'usuario_autenticado:{usuario_id}'
+
+
+def invalidar_usuario(usuario_id):
+    _cache().delete(clave_usuario(usuario_id))
+
+
+def obtener_usuario(usuario_id):
+    """Usuario con sus perfiles cargados, desde la caché si está. None si no existe."""
+    cache = _cache()
+    clave = clave_usuario(usuario_id)
+    usuario = cache.get(clave)
+    if usuario is None:
+        usuario = get_user_model().objects.select_related(
+            'perfil_investigador', 'perfil_participante'
+        ).filter(**{api_settings.USER_ID_FIELD: usuario_id}).first()
+        if usuario is None:
+            return None
+        cache.set(clave, usuario, settings.AUTH_USUARIO_CACHE_SEGUNDOS)
+    return usuario
+
+
+class JWTAutenticacionCacheada(JWTAuthentication):
+    """JWTAuthentication que reutiliza la validación del middleware y cachea el usuario"""
+
+    def authenticate(self, request):
+        peticion = getattr(request, '_request', request)
+        autenticado = getattr(peticion, ATRIBUTO_AUTENTICACION, None)
+        if autenticado is not None:
+            return autenticado
+
+        autenticado = super().authenticate(request)
+        if autenticado is not None:
+            setattr(peticion, ATRIBUTO_AUTENTICACION, autenticado)
+        return autenticado
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        usuario = obtener_usuario(usuario_id)
+        if usuario is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not usuario.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(usuario.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return usuario
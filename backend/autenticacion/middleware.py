@@ -1,11 +1,9 @@
 from django.http import JsonResponse
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import AccessToken
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import JWTAutenticacionCacheada
+from .sanitizacion import sanitizar, ATRIBUTO_EXCLUSION, TODOS_LOS_CAMPOS
 from django.utils.deprecation import MiddlewareMixin
-import html
 import json
-import re
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -16,18 +14,11 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
             return None
             
         try:
-            # Extraer el token
-            token = auth_header.split(' ')[1]
-            
-            # Validar el token
-            jwt_auth = JWTAuthentication()
-            validated_token = jwt_auth.get_validated_token(token)
-            
-            # Obtener el usuario
-            user = jwt_auth.get_user(validated_token)
-            
-            # Asignar el usuario a la solicitud
-            request.user = user
+            # Validar el token y obtener el usuario (cacheado). El resultado queda
+            # guardado en la petición y DRF lo reutiliza sin volver a validarlo
+            autenticado = JWTAutenticacionCacheada().authenticate(request)
+            if autenticado is not None:
+                request.user = autenticado[0]
             
         except (InvalidToken, TokenError) as e:
             return JsonResponse({
@@ -44,32 +35,31 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
         return None 
 
 class DataSanitizationMiddleware(MiddlewareMixin):
-    def sanitize_value(self, value):
-        if isinstance(value, str):
-            # Escapar HTML
-            value = html.escape(value)
-            # Remover posibles scripts
-            value = re.sub(r'<script.*?>.*?</script>', '', value, flags=re.DOTALL)
-            # Remover otros patrones potencialmente peligrosos
-            value = re.sub(r'javascript:', '', value, flags=re.IGNORECASE)
-            value = re.sub(r'on\w+\s*=', '', value, flags=re.IGNORECASE)
-            return value
-        elif isinstance(value, dict):
-            return {k: self.sanitize_value(v) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [self.sanitize_value(item) for item in value]
-        return value
+    """
+    Sanitiza los datos de POST/PUT/PATCH antes de llegar a la vista (ver
+    autenticacion/sanitizacion.py). Se hace en process_view para poder
+    respetar las exclusiones declaradas con @sin_sanitizar.
+    """
 
-    def process_request(self, request):
-        if request.method in ['POST', 'PUT', 'PATCH']:
-            try:
-                if request.content_type == 'application/json':
-                    if request.body:
-                        data = json.loads(request.body)
-                        sanitized_data = self.sanitize_value(data)
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('POST', 'PUT', 'PATCH'):
+            return None
+
+        excluidos = getattr(view_func, ATRIBUTO_EXCLUSION, frozenset())
+        if TODOS_LOS_CAMPOS in excluidos:
+            return None
+
+        try:
+            if request.content_type == 'application/json':
+                if request.body:
+                    data = json.loads(request.body)
+                    sanitized_data = sanitizar(data, excluidos)
+                    # Solo se vuelve a codificar el cuerpo si algo ha cambiado
+                    if sanitized_data is not data:
                         request._body = json.dumps(sanitized_data).encode('utf-8')
-                elif request.POST:
-                    request.POST = self.sanitize_value(request.POST.dict())
-            except json.JSONDecodeError:
-                return JsonResponse({'error': 'Invalid JSON data'}, status=400)
-        return None 
\ No newline at end of file
+            elif request.POST:
+                # Las vistas modifican request.data, así que POST se sustituye por un dict mutable
+                request.POST = sanitizar(request.POST.dict(), excluidos)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+        return None
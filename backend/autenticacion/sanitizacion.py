@@ -0,0 +1,105 @@
+"""
+Sanitización de los datos de entrada (usada por DataSanitizationMiddleware).
+
+Cada texto se escapa con html.escape y se le quitan los prefijos
+`javascript:` y los atributos de evento (`onclick=`...). Como la mayoría de
+los textos no contienen nada de eso, primero se comprueba con una única
+expresión precompilada si el texto puede cambiar y solo entonces se aplica la
+transformación completa.
+
+Las estructuras se recorren de forma iterativa (sin recursión) y solo se
+copian los contenedores que están en el camino de un texto modificado; si
+nada cambia se devuelve el mismo objeto, lo que permite al middleware no
+volver a codificar el cuerpo de la petición.
+
+Los endpoints pueden excluirse de la sanitización, completos o solo algunos
+campos, con el decorador `sin_sanitizar`.
+"""
+import html
+import re
+
+# Un texto sin ninguno de estos patrones no cambia al sanitizarlo
+_PUEDE_CAMBIAR = re.compile(r'[&<>"\']|javascript:|on\w+\s*=', re.IGNORECASE)
+_JAVASCRIPT = re.compile(r'javascript:', re.IGNORECASE)
+_ATRIBUTO_EVENTO = re.compile(r'on\w+\s*=', re.IGNORECASE)
+
+# Atributo que sin_sanitizar añade a la vista
+ATRIBUTO_EXCLUSION = 'sanitizacion_excluida'
+TODOS_LOS_CAMPOS = '*'
+
+
+def _transformar(texto):
+    # Tras html.escape ya no quedan etiquetas <script>, así que no hace falta buscarlas
+    texto = html.escape(texto)
+    texto = _JAVASCRIPT.sub('', texto)
+    return _ATRIBUTO_EVENTO.sub('', texto)
+
+
+def sanitizar_texto(texto):
+    if not _PUEDE_CAMBIAR.search(texto):
+        return texto
+    return _transformar(texto)
+
+
+def _copia(contenedor):
+    return dict(contenedor) if isinstance(contenedor, dict) else list(contenedor)
+
+
+def sanitizar(datos, campos_excluidos=frozenset()):
+    """
+    Devuelve `datos` con los textos sanitizados. Los valores de las claves de
+    `campos_excluidos` (a cualquier profundidad) se dejan tal cual. Si no
+    cambia nada devuelve el mismo objeto.
+    """
+    if isinstance(datos, str):
+        return sanitizar_texto(datos)
+    if not isinstance(datos, (dict, list)):
+        return datos
+
+    # Primera pasada: localizar los textos que cambian (ruta de claves y valor nuevo)
+    cambios = []
+    pendientes = [((), datos)]
+    while pendientes:
+        ruta, contenedor = pendientes.pop()
+        elementos = contenedor.items() if isinstance(contenedor, dict) else enumerate(contenedor)
+        for clave, valor in elementos:
+            if clave in campos_excluidos:
+                continue
+            if isinstance(valor, str):
+                if _PUEDE_CAMBIAR.search(valor):
+                    cambios.append((ruta + (clave,), _transformar(valor)))
+            elif isinstance(valor, (dict, list)):
+                pendientes.append((ruta + (clave,), valor))
+
+    if not cambios:
+        return datos
+
+    # Segunda pasada: copiar solo los contenedores del camino de cada cambio
+    resultado = _copia(datos)
+    copias = {(): resultado}
+    for ruta, nuevo in cambios:
+        contenedor = resultado
+        for profundidad in range(1, len(ruta)):
+            parcial = ruta[:profundidad]
+            if parcial not in copias:
+                copias[parcial] = _copia(contenedor[ruta[profundidad - 1]])
+                contenedor[ruta[profundidad - 1]] = copias[parcial]
+            contenedor = copias[parcial]
+        contenedor[ruta[-1]] = nuevo
+    return resultado
+
+
+def sin_sanitizar(*campos):
+    """
+    Excluye una vista de la sanitización. Sin argumentos se excluye la vista
+    completa; con nombres de campo solo esos campos. Debe ir por encima de
+    @api_view:
+
+        @sin_sanitizar('contenido_url')
+        @api_view(['POST'])
+        def vista(request): ...
+    """
+    def decorador(vista):
+        setattr(vista, ATRIBUTO_EXCLUSION, frozenset(campos) or frozenset([TODOS_LOS_CAMPOS]))
+        return vista
+    return decorador
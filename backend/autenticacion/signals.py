@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from usuario.models import Usuario, Investigador, Participante
+from .authentication import invalidar_usuario
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def usuario_modificado(sender, instance, **kwargs):
+    # Rol, contraseña, is_active... cualquier cambio descarta el usuario cacheado
+    invalidar_usuario(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Investigador)
+@receiver([post_save, post_delete], sender=Participante)
+def perfil_modificado(sender, instance, **kwargs):
+    invalidar_usuario(instance.usuario_id)
@@ -0,0 +1,119 @@
+"""
+Benchmark de la autenticación JWT.
+
+Mide peticiones/segundo contra un endpoint autenticado que no hace nada,
+pasando por todo el stack de middlewares:
+
+- anterior: JWTAuthenticationMiddleware y la JWTAuthentication de DRF
+  validan el token y consultan el usuario cada uno por su lado.
+- actual: el token se valida una vez por petición y el usuario sale de la
+  caché (JWTAutenticacionCacheada).
+
+    python -m benchmarks.autenticacion_jwt --peticiones 2000
+"""
+import argparse
+from django.utils.deprecation import MiddlewareMixin
+from .entorno import preparar_django, medir
+
+MIDDLEWARE_ACTUAL = 'autenticacion.middleware.JWTAuthenticationMiddleware'
+MIDDLEWARE_ANTERIOR = 'benchmarks.autenticacion_jwt.JWTAuthenticationMiddlewareAnterior'
+
+
+class JWTAuthenticationMiddlewareAnterior(MiddlewareMixin):
+    """Implementación anterior del middleware, conservada como referencia para el benchmark."""
+
+    def process_request(self, request):
+        from django.http import JsonResponse
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not auth_header.startswith('Bearer '):
+            return None
+        try:
+            token = auth_header.split(' ')[1]
+            jwt_auth = JWTAuthentication()
+            validated_token = jwt_auth.get_validated_token(token)
+            request.user = jwt_auth.get_user(validated_token)
+        except (InvalidToken, TokenError) as e:
+            return JsonResponse({'error': 'Token inválido o expirado', 'detail': str(e)}, status=401)
+        except Exception as e:
+            return JsonResponse({'error': 'Error de autenticación', 'detail': str(e)}, status=401)
+        return None
+
+
+def crear_urls():
+    """URLconf con el endpoint vacío autenticado de cada forma."""
+    from django.urls import path
+    from rest_framework.decorators import api_view, authentication_classes, permission_classes
+    from rest_framework.permissions import IsAuthenticated
+    from rest_framework.response import Response
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from autenticacion.authentication import JWTAutenticacionCacheada
+
+    @api_view(['GET'])
+    @authentication_classes([JWTAuthentication])
+    @permission_classes([IsAuthenticated])
+    def vacio_anterior(request):
+        return Response({'id': request.user.id})
+
+    @api_view(['GET'])
+    @authentication_classes([JWTAutenticacionCacheada])
+    @permission_classes([IsAuthenticated])
+    def vacio(request):
+        return Response({'id': request.user.id})
+
+    class Urls:
+        urlpatterns = [
+            path('anterior/', vacio_anterior),
+            path('actual/', vacio),
+        ]
+
+    return Urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--peticiones', type=int, default=2000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    preparar_django()
+    from django.conf import settings
+    from django.test import Client, override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from tests.utils.helpers import create_test_user
+    from usuario.models import Participante
+
+    usuario = create_test_user(username='benchmark_jwt', email='benchmark_jwt@example.com')
+    Participante.objects.create(usuario=usuario)
+    cabecera = f'Bearer {RefreshToken.for_user(usuario).access_token}'
+
+    configuraciones = {
+        'anterior': (
+            [MIDDLEWARE_ANTERIOR if m == MIDDLEWARE_ACTUAL else m for m in settings.MIDDLEWARE],
+            '/anterior/'
+        ),
+        'actual': (settings.MIDDLEWARE, '/actual/'),
+    }
+
+    resultados = {}
+    for nombre, (middleware, url) in configuraciones.items():
+        with override_settings(ROOT_URLCONF=crear_urls(), MIDDLEWARE=middleware):
+            cliente = Client(HTTP_AUTHORIZATION=cabecera)
+            if cliente.get(url).status_code != 200:
+                raise SystemExit(f'El endpoint {nombre} no responde 200')
+            tiempo, consultas, _ = medir(
+                lambda: [cliente.get(url) for _ in range(args.peticiones)],
+                repeticiones=args.repeticiones
+            )
+        resultados[nombre] = (tiempo, consultas / args.peticiones)
+
+    print(f'{"Autenticación":<16}{"Consultas/petición":>20}{"Peticiones/s":>16}')
+    for nombre, (tiempo, consultas) in resultados.items():
+        print(f'{nombre:<16}{consultas:>20.1f}{args.peticiones / tiempo:>16.0f}')
+    print(f'Aceleración: x{resultados["anterior"][0] / resultados["actual"][0]:.2f}')
+
+
+if __name__ == '__main__':
+    main()
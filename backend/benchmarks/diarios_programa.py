@@ -0,0 +1,155 @@
+"""
+Benchmark de los conteos de diarios por programa.
+
+Compara las consultas anteriores, que filtraban DiarioSesion por
+sesion__programa y sumaban sesion__duracion_estimada (JOIN con Sesion), con
+las actuales sobre la copia de programa y duración guardada en el diario:
+
+- programa: total de diarios y minutos de un programa (estadísticas).
+- participantes: diarios, minutos y última actividad por participante de un
+  programa (calcular_progreso_esperado).
+- investigador: diarios de cada programa en una subconsulta (dashboard).
+
+    python -m benchmarks.diarios_programa --diarios 1000000
+"""
+import argparse
+import random
+from datetime import date
+from .entorno import preparar_django, medir
+
+PROGRAMAS = 10
+SESIONES_POR_PROGRAMA = 10
+
+
+def crear_datos(num_diarios, semilla=0, lote=50000):
+    """Crea PROGRAMAS programas de SESIONES_POR_PROGRAMA sesiones y unos `num_diarios` diarios"""
+    from usuario.models import Usuario, Investigador, Participante
+    from programa.models import Programa
+    from sesion.models import Sesion, DiarioSesion
+    from config.enums import RoleUsuario
+
+    aleatorio = random.Random(semilla)
+    usuario_investigador = Usuario.objects.create_user(
+        username='benchmark_investigador',
+        email='benchmark_investigador@example.com',
+        password='benchmark',
+        nombre='Bench',
+        apellidos='Mark',
+        role=RoleUsuario.INVESTIGADOR
+    )
+    investigador = Investigador.objects.create(usuario=usuario_investigador, experienciaInvestigacion='si')
+    programas = [
+        Programa.objects.create(
+            nombre=f'Programa {i}', descripcion='Benchmark', duracion_semanas=SESIONES_POR_PROGRAMA, creado_por=investigador
+        )
+        for i in range(PROGRAMAS)
+    ]
+    sesiones = Sesion.objects.bulk_create([
+        Sesion(programa=programa, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=aleatorio.randint(5, 45))
+        for programa in programas
+        for semana in range(1, SESIONES_POR_PROGRAMA + 1)
+    ])
+
+    # Cada participante completa todas las sesiones de todos los programas
+    num_participantes = max(1, num_diarios // len(sesiones))
+    usuarios = Usuario.objects.bulk_create([
+        Usuario(
+            username=f'benchmark_{i}',
+            email=f'benchmark_{i}@example.com',
+            password='!',
+            role=RoleUsuario.PARTICIPANTE,
+            fechaNacimiento=date(1990, 1, 1)
+        )
+        for i in range(num_participantes)
+    ], batch_size=5000)
+    participantes = Participante.objects.bulk_create(
+        [Participante(usuario=usuario) for usuario in usuarios], batch_size=5000
+    )
+
+    diarios = []
+    for participante in participantes:
+        for sesion in sesiones:
+            diarios.append(DiarioSesion(participante=participante, sesion=sesion, valoracion=aleatorio.randint(1, 5)))
+        if len(diarios) >= lote:
+            DiarioSesion.objects.bulk_create(diarios, batch_size=5000)
+            diarios = []
+    DiarioSesion.objects.bulk_create(diarios, batch_size=5000)
+    return programas
+
+
+def consultas(programa):
+    """{nombre: (función anterior, función actual)}"""
+    from django.db.models import Count, Max, OuterRef, Sum
+    from programa.agregaciones import subconsulta_conteo
+    from programa.models import Programa
+    from sesion.models import DiarioSesion
+
+    def por_participante(filtro, programa_campo, duracion):
+        return list(
+            DiarioSesion.objects.filter(**{filtro: programa}).order_by().values(programa_campo, 'participante').annotate(
+                total=Count('pk'), minutos=Sum(duracion), ultima=Max('fecha_creacion')
+            )
+        )
+
+    def investigador(filtro, campo):
+        return list(Programa.objects.filter(creado_por=programa.creado_por).annotate(
+            num_diarios=subconsulta_conteo(DiarioSesion.objects.filter(**{filtro: OuterRef('pk')}), campo)
+        ).values_list('pk', 'num_diarios'))
+
+    return {
+        'programa': (
+            lambda: DiarioSesion.objects.filter(sesion__programa=programa).aggregate(
+                total=Count('pk'), minutos=Sum('sesion__duracion_estimada')
+            ),
+            lambda: DiarioSesion.objects.filter(programa=programa).aggregate(
+                total=Count('pk'), minutos=Sum('duracion_estimada')
+            ),
+        ),
+        'participantes': (
+            lambda: por_participante('sesion__programa', 'sesion__programa', 'sesion__duracion_estimada'),
+            lambda: por_participante('programa', 'programa', 'duracion_estimada'),
+        ),
+        'investigador': (
+            lambda: investigador('sesion__programa', 'sesion__programa'),
+            lambda: investigador('programa', 'programa'),
+        ),
+    }
+
+
+def normalizar(resultado):
+    """Resultados comparables entre las dos versiones (las claves de agrupación cambian de nombre)"""
+    if isinstance(resultado, dict):
+        return sorted(resultado.values())
+    return sorted(tuple(sorted(map(str, fila.values())) if isinstance(fila, dict) else fila) for fila in resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--diarios', type=int, default=1000000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    preparar_django()
+    from django.db import connection
+    from sesion.models import DiarioSesion
+
+    print(f'Creando unos {args.diarios} diarios...')
+    programas = crear_datos(args.diarios)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f'{DiarioSesion.objects.count()} diarios en {len(programas)} programas')
+
+    print(f'{"Consulta":<16}{"Anterior (ms)":>16}{"Actual (ms)":>14}{"Aceleración":>14}')
+    for nombre, (anterior, actual) in consultas(programas[0]).items():
+        tiempo_anterior, _, resultado_anterior = medir(anterior, repeticiones=args.repeticiones)
+        tiempo_actual, _, resultado_actual = medir(actual, repeticiones=args.repeticiones)
+        if normalizar(resultado_anterior) != normalizar(resultado_actual):
+            raise SystemExit(f'Resultados distintos en {nombre}')
+        print(
+            f'{nombre:<16}{tiempo_anterior * 1000:>16.1f}{tiempo_actual * 1000:>14.1f}'
+            f'{tiempo_anterior / tiempo_actual:>13.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
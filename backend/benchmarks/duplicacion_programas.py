@@ -0,0 +1,119 @@
+"""
+Benchmark de la duplicación de programas.
+
+Compara la duplicación anterior de programa_duplicar (create del programa,
+save() por sesión y cuestionario y Programa.save() final, sin transacción)
+con duplicar_programas, que copia una biblioteca de programas con un
+bulk_create por tabla en una transacción.
+
+    python -m benchmarks.duplicacion_programas --programas 20 --semanas 52
+"""
+import argparse
+from .entorno import preparar_django, medir
+
+
+def crear_datos(num_programas, semanas):
+    """Crea un investigador con `num_programas` programas de `semanas` sesiones y cuestionarios pre/post"""
+    from usuario.models import Usuario, Investigador
+    from programa.models import Programa
+    from sesion.models import Sesion
+    from cuestionario.models import Cuestionario
+    from config.enums import RoleUsuario, MomentoCuestionario
+
+    usuario = Usuario.objects.create_user(
+        username='benchmark_investigador',
+        email='benchmark_investigador@example.com',
+        password='benchmark',
+        nombre='Bench',
+        apellidos='Mark',
+        role=RoleUsuario.INVESTIGADOR
+    )
+    investigador = Investigador.objects.create(usuario=usuario, experienciaInvestigacion='si')
+    programas = []
+    for i in range(num_programas):
+        programa = Programa.objects.create(
+            nombre=f'Plantilla {i}', descripcion='Benchmark', duracion_semanas=semanas, creado_por=investigador
+        )
+        Sesion.objects.bulk_create([
+            Sesion(programa=programa, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=15,
+                   contenido_audio=f'audio/plantilla_{i}_{semana}.mp3')
+            for semana in range(1, semanas + 1)
+        ])
+        for momento in (MomentoCuestionario.PRE, MomentoCuestionario.POST):
+            setattr(programa, f'cuestionario_{momento}', Cuestionario.objects.create(
+                programa=programa, momento=momento, tipo_cuestionario='personalizado', titulo=momento,
+                preguntas=[{'id': n, 'tipo': 'texto', 'texto': f'Pregunta {n}'} for n in range(20)]
+            ))
+        programa.save()
+        programas.append(programa)
+    return investigador, programas
+
+
+def duplicar_uno_a_uno(programas, investigador):
+    """Implementación anterior de programa_duplicar, aplicada a cada programa"""
+    from programa.models import Programa
+    from config.enums import EstadoPublicacion
+
+    copias = []
+    for programa_original in programas:
+        programa_original = Programa.objects.get(pk=programa_original.pk)
+        programa_duplicado = Programa.objects.create(
+            nombre=f"Copia de {programa_original.nombre}",
+            descripcion=programa_original.descripcion,
+            tipo_contexto=programa_original.tipo_contexto,
+            enfoque_metodologico=programa_original.enfoque_metodologico,
+            poblacion_objetivo=programa_original.poblacion_objetivo,
+            duracion_semanas=programa_original.duracion_semanas,
+            tiene_cuestionarios=programa_original.tiene_cuestionarios,
+            tiene_diarios=programa_original.tiene_diarios,
+            creado_por=investigador,
+            estado_publicacion=EstadoPublicacion.BORRADOR
+        )
+        for sesion in programa_original.sesiones.all():
+            sesion.pk = None
+            sesion.programa = programa_duplicado
+            sesion.save()
+        for campo in ('cuestionario_pre', 'cuestionario_post'):
+            cuestionario = getattr(programa_original, campo)
+            if programa_original.tiene_cuestionarios and cuestionario:
+                cuestionario.pk = None
+                cuestionario.programa = programa_duplicado
+                cuestionario.save()
+                setattr(programa_duplicado, campo, cuestionario)
+        programa_duplicado.save()
+        copias.append(programa_duplicado)
+    return copias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--programas', type=int, default=20)
+    parser.add_argument('--semanas', type=int, default=52)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    preparar_django()
+    from programa.duplicacion import duplicar_programas
+    from sesion.models import Sesion
+
+    investigador, programas = crear_datos(args.programas, args.semanas)
+    print(f'{len(programas)} programas de {args.semanas} sesiones')
+
+    tiempo_anterior, consultas_anterior, copias_anterior = medir(
+        lambda: duplicar_uno_a_uno(programas, investigador), repeticiones=args.repeticiones
+    )
+    tiempo_actual, consultas_actual, copias_actual = medir(
+        lambda: duplicar_programas(programas, investigador), repeticiones=args.repeticiones
+    )
+    sesiones = [Sesion.objects.filter(programa__in=copias).count() for copias in (copias_anterior, copias_actual)]
+    if sesiones[0] != sesiones[1]:
+        raise SystemExit('Número de sesiones copiadas distinto')
+
+    print(f'{"Versión":<14}{"Tiempo (ms)":>14}{"Consultas":>12}')
+    print(f'{"Uno a uno":<14}{tiempo_anterior * 1000:>14.1f}{consultas_anterior:>12}')
+    print(f'{"En bloque":<14}{tiempo_actual * 1000:>14.1f}{consultas_actual:>12}')
+    print(f'Aceleración: {tiempo_anterior / tiempo_actual:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
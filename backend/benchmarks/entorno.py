@@ -0,0 +1,47 @@
+"""
+Utilidades comunes de los benchmarks.
+
+Los benchmarks usan la configuración de tests (SQLite en memoria) para no
+tocar la base de datos real. Se ejecutan desde backend/, por ejemplo:
+
+    python -m benchmarks.exportacion_participantes --participantes 10000
+"""
+import os
+import time
+
+
+def preparar_django():
+    """Configura Django y crea una base de datos de pruebas vacía."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.test_settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def medir(funcion, repeticiones=3):
+    """
+    Ejecuta `funcion` varias veces. Devuelve (mejor tiempo en segundos,
+    número de consultas SQL de la última ejecución, último resultado).
+    """
+    from django.db import connection
+
+    mejor = None
+    resultado = None
+    consultas = []
+
+    def registrar_consulta(execute, sql, params, many, context):
+        consultas.append(sql)
+        return execute(sql, params, many, context)
+
+    for _ in range(repeticiones):
+        consultas.clear()
+        with connection.execute_wrapper(registrar_consulta):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, len(consultas), resultado
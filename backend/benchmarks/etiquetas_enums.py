@@ -0,0 +1,99 @@
+"""
+Benchmark de las etiquetas de los enums.
+
+Serializa N participantes con ParticipanteSerializer (tres campos *_display
+por fila) comparando los get_*_display anteriores, que construían
+dict(Enum.choices) y traducían la etiqueta en cada llamada, con el registro
+precalculado de config.enums.
+
+    python -m benchmarks.etiquetas_enums --participantes 10000
+"""
+import argparse
+import random
+from contextlib import ExitStack
+from unittest import mock
+from .entorno import preparar_django, medir
+
+
+def displays_anteriores():
+    """Implementación anterior de los get_*_display, conservada como referencia para el benchmark."""
+    from config.enums import Genero, NivelEducativo, ExperienciaMindfulness
+    from usuario.models import Usuario, Participante
+
+    def get_genero_display(self):
+        return dict(Genero.choices).get(self.genero, self.genero)
+
+    def get_nivel_educativo_display(self):
+        return dict(NivelEducativo.choices).get(self.nivelEducativo, self.nivelEducativo)
+
+    def get_experiencia_mindfulness_display(self):
+        return dict(ExperienciaMindfulness.choices).get(self.experienciaMindfulness, self.experienciaMindfulness)
+
+    pila = ExitStack()
+    pila.enter_context(mock.patch.object(Usuario, 'get_genero_display', get_genero_display))
+    pila.enter_context(mock.patch.object(Usuario, 'get_nivel_educativo_display', get_nivel_educativo_display))
+    pila.enter_context(mock.patch.object(
+        Participante, 'get_experiencia_mindfulness_display', get_experiencia_mindfulness_display
+    ))
+    return pila
+
+
+def crear_participantes(num_participantes, semilla=0):
+    from usuario.models import Usuario, Participante
+    from config.enums import RoleUsuario, Genero, NivelEducativo, ExperienciaMindfulness
+
+    aleatorio = random.Random(semilla)
+    usuarios = Usuario.objects.bulk_create([
+        Usuario(
+            username=f'benchmark_{i}',
+            email=f'benchmark_{i}@example.com',
+            password='!',
+            nombre='Participante',
+            apellidos=str(i),
+            role=RoleUsuario.PARTICIPANTE,
+            genero=aleatorio.choice(Genero.values),
+            nivelEducativo=aleatorio.choice(NivelEducativo.values)
+        )
+        for i in range(num_participantes)
+    ], batch_size=1000)
+    Participante.objects.bulk_create([
+        Participante(usuario=usuario, experienciaMindfulness=aleatorio.choice(ExperienciaMindfulness.values))
+        for usuario in usuarios
+    ], batch_size=1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participantes', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    preparar_django()
+    from django.utils import translation
+    from usuario.models import Participante
+    from usuario.serializers import ParticipanteSerializer
+
+    print(f'Creando {args.participantes} participantes...')
+    crear_participantes(args.participantes)
+    # Las filas se cargan una vez: se mide solo la serialización
+    participantes = list(Participante.objects.select_related('usuario').order_by('id'))
+
+    def serializar():
+        return ParticipanteSerializer(participantes, many=True).data
+
+    with translation.override('es'):
+        with displays_anteriores():
+            tiempo_anterior, _, datos_anterior = medir(serializar, repeticiones=args.repeticiones)
+        tiempo_actual, _, datos_actual = medir(serializar, repeticiones=args.repeticiones)
+
+    if datos_anterior != datos_actual:
+        raise SystemExit('Las dos implementaciones generan resultados distintos')
+
+    print(f'{"Etiquetas":<12}{"Segundos":>12}{"Filas/s":>12}')
+    for nombre, tiempo in (('anterior', tiempo_anterior), ('actual', tiempo_actual)):
+        print(f'{nombre:<12}{tiempo:>12.3f}{args.participantes / tiempo:>12.0f}')
+    print(f'Aceleración: x{tiempo_anterior / tiempo_actual:.2f}')
+
+
+if __name__ == '__main__':
+    main()
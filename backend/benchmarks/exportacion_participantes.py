@@ -0,0 +1,213 @@
+"""
+Benchmark de la exportación de participantes.
+
+Compara filas/segundo de filas_participantes (carga en bloque) con la
+implementación anterior, que hacía seis consultas por participante y
+reconstruía los mapas de etiquetas de los enums en cada fila.
+
+    python -m benchmarks.exportacion_participantes --participantes 10000
+"""
+import argparse
+import random
+from datetime import date, datetime
+from .entorno import preparar_django, medir
+
+
+def filas_participantes_anterior(programa):
+    """Implementación anterior (N+1), conservada como referencia para el benchmark."""
+    from programa.models import InscripcionPrograma
+    from sesion.models import DiarioSesion
+    from cuestionario.models import RespuestaCuestionario
+    from config.enums import Genero, NivelEducativo, ExperienciaMindfulness, EstadoInscripcion
+
+    inscripciones = InscripcionPrograma.objects.filter(
+        programa=programa
+    ).select_related('participante__usuario').order_by('-fecha_inicio', 'id')
+
+    total_sesiones = programa.sesiones.count()
+    total_cuestionarios = 2 if programa.tiene_cuestionarios else 0
+
+    for inscripcion in inscripciones.iterator(chunk_size=2000):
+        participante = inscripcion.participante
+        usuario = participante.usuario
+
+        edad = None
+        if usuario.fechaNacimiento:
+            edad = (datetime.now().date() - usuario.fechaNacimiento).days // 365
+
+        genero_display = str(dict(Genero.choices).get(usuario.genero, usuario.genero))
+        nivel_educativo_display = str(dict(NivelEducativo.choices).get(usuario.nivelEducativo, usuario.nivelEducativo))
+        experiencia_mindfulness_display = str(dict(ExperienciaMindfulness.choices).get(participante.experienciaMindfulness, participante.experienciaMindfulness))
+        estado_inscripcion_display = str(dict(EstadoInscripcion.choices).get(inscripcion.estado_inscripcion, inscripcion.estado_inscripcion))
+
+        sesiones_completadas = DiarioSesion.objects.filter(sesion__programa=programa, participante=participante).count()
+
+        minutos_practica = 0
+        diarios = DiarioSesion.objects.filter(sesion__programa=programa, participante=participante).select_related('sesion')
+        for diario in diarios:
+            if diario.sesion.duracion_estimada:
+                minutos_practica += diario.sesion.duracion_estimada
+
+        cuestionarios_completados = 0
+        if programa.cuestionario_pre:
+            if RespuestaCuestionario.objects.filter(cuestionario=programa.cuestionario_pre, participante=participante).exists():
+                cuestionarios_completados += 1
+        if programa.cuestionario_post:
+            if RespuestaCuestionario.objects.filter(cuestionario=programa.cuestionario_post, participante=participante).exists():
+                cuestionarios_completados += 1
+
+        ultima_actividad = None
+        ultimo_diario = DiarioSesion.objects.filter(
+            sesion__programa=programa, participante=participante
+        ).order_by('-fecha_creacion').first()
+        ultima_respuesta = RespuestaCuestionario.objects.filter(
+            cuestionario__programa=programa, participante=participante
+        ).order_by('-fecha_respuesta').first()
+        if ultimo_diario and ultima_respuesta:
+            ultima_actividad = max(ultimo_diario.fecha_creacion, ultima_respuesta.fecha_respuesta)
+        elif ultimo_diario:
+            ultima_actividad = ultimo_diario.fecha_creacion
+        elif ultima_respuesta:
+            ultima_actividad = ultima_respuesta.fecha_respuesta
+
+        yield {
+            'id_participante': f"P{participante.id}",
+            'genero': genero_display,
+            'edad': f"{edad} años" if edad is not None else 'No especificado',
+            'ocupacion': str(usuario.ocupacion) if usuario.ocupacion else 'No especificado',
+            'nivel_educativo': nivel_educativo_display,
+            'ubicacion': str(usuario.ubicacion) if usuario.ubicacion else 'No especificado',
+            'experiencia_mindfulness': experiencia_mindfulness_display,
+            'condiciones_salud': str(participante.condicionesSalud) if participante.condicionesSalud else 'No especificado',
+            'estado_programa': estado_inscripcion_display,
+            'sesiones_completadas': f"{sesiones_completadas} / {total_sesiones}",
+            'cuestionarios_completados': f"{cuestionarios_completados} / {total_cuestionarios}",
+            'minutos_practica': f"{minutos_practica} min",
+            'ultima_actividad': ultima_actividad.strftime('%Y-%m-%d %H:%M') if ultima_actividad else 'N/A'
+        }
+
+
+def crear_datos(num_participantes, semanas=8, semilla=0):
+    """Crea un programa con `num_participantes` inscritos, diarios y respuestas pre/post."""
+    from usuario.models import Usuario, Investigador, Participante
+    from programa.models import Programa, InscripcionPrograma
+    from sesion.models import Sesion, DiarioSesion
+    from cuestionario.models import Cuestionario, RespuestaCuestionario
+    from config.enums import (
+        RoleUsuario, Genero, NivelEducativo, ExperienciaMindfulness,
+        EstadoInscripcion, MomentoCuestionario
+    )
+
+    aleatorio = random.Random(semilla)
+
+    usuario_investigador = Usuario.objects.create_user(
+        username='benchmark_investigador',
+        email='benchmark_investigador@example.com',
+        password='benchmark',
+        nombre='Bench',
+        apellidos='Mark',
+        role=RoleUsuario.INVESTIGADOR
+    )
+    investigador = Investigador.objects.create(usuario=usuario_investigador, experienciaInvestigacion='si')
+    programa = Programa.objects.create(
+        nombre='Programa benchmark',
+        descripcion='Programa para benchmarks',
+        duracion_semanas=semanas,
+        creado_por=investigador
+    )
+    sesiones = Sesion.objects.bulk_create([
+        Sesion(programa=programa, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=10 + semana)
+        for semana in range(1, semanas + 1)
+    ])
+    preguntas = [{'id': 1, 'tipo': 'texto', 'texto': '¿Cómo estás?'}]
+    cuestionario_pre = Cuestionario.objects.create(
+        programa=programa, momento=MomentoCuestionario.PRE, titulo='Pre', preguntas=preguntas
+    )
+    cuestionario_post = Cuestionario.objects.create(
+        programa=programa, momento=MomentoCuestionario.POST, titulo='Post', preguntas=preguntas
+    )
+    Programa.objects.filter(pk=programa.pk).update(
+        cuestionario_pre=cuestionario_pre,
+        cuestionario_post=cuestionario_post
+    )
+    programa.refresh_from_db()
+
+    usuarios = Usuario.objects.bulk_create([
+        Usuario(
+            username=f'benchmark_{i}',
+            email=f'benchmark_{i}@example.com',
+            password='!',
+            nombre='Participante',
+            apellidos=str(i),
+            role=RoleUsuario.PARTICIPANTE,
+            genero=aleatorio.choice(Genero.values),
+            nivelEducativo=aleatorio.choice(NivelEducativo.values),
+            fechaNacimiento=date(aleatorio.randint(1950, 2005), 1, 1) if aleatorio.random() < 0.8 else None,
+            ocupacion=aleatorio.choice(['', 'Docente', 'Ingeniería']),
+            ubicacion=aleatorio.choice(['', 'Sevilla', 'Madrid'])
+        )
+        for i in range(num_participantes)
+    ], batch_size=1000)
+    participantes = Participante.objects.bulk_create([
+        Participante(
+            usuario=usuario,
+            experienciaMindfulness=aleatorio.choice(ExperienciaMindfulness.values),
+            condicionesSalud=aleatorio.choice(['', 'Ninguna'])
+        )
+        for usuario in usuarios
+    ], batch_size=1000)
+    InscripcionPrograma.objects.bulk_create([
+        InscripcionPrograma(
+            programa=programa,
+            participante=participante,
+            estado_inscripcion=aleatorio.choice(EstadoInscripcion.values)
+        )
+        for participante in participantes
+    ], batch_size=1000)
+
+    diarios = []
+    respuestas = []
+    for participante in participantes:
+        for sesion in sesiones[:aleatorio.randint(0, semanas)]:
+            diarios.append(DiarioSesion(participante=participante, sesion=sesion, valoracion=aleatorio.randint(1, 5)))
+        if aleatorio.random() < 0.9:
+            respuestas.append(RespuestaCuestionario(cuestionario=cuestionario_pre, participante=participante, respuestas={}))
+        if aleatorio.random() < 0.5:
+            respuestas.append(RespuestaCuestionario(cuestionario=cuestionario_post, participante=participante, respuestas={}))
+    DiarioSesion.objects.bulk_create(diarios, batch_size=1000)
+    RespuestaCuestionario.objects.bulk_create(respuestas, batch_size=1000)
+
+    return programa
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participantes', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    preparar_django()
+    from programa.api.exportacion import filas_participantes
+
+    print(f'Creando {args.participantes} participantes...')
+    programa = crear_datos(args.participantes)
+
+    # La implementación anterior es mucho más lenta; basta con una repetición
+    tiempo_anterior, consultas_anterior, filas_anterior = medir(
+        lambda: list(filas_participantes_anterior(programa)), repeticiones=1
+    )
+    tiempo_nueva, consultas_nueva, filas_nueva = medir(
+        lambda: list(filas_participantes(programa)), repeticiones=args.repeticiones
+    )
+    if filas_anterior != filas_nueva:
+        raise SystemExit('Las dos implementaciones generan filas distintas')
+
+    filas = len(filas_nueva)
+    print(f'{"Implementación":<16}{"Consultas":>12}{"Segundos":>12}{"Filas/s":>14}')
+    print(f'{"anterior":<16}{consultas_anterior:>12}{tiempo_anterior:>12.2f}{filas / tiempo_anterior:>14.0f}')
+    print(f'{"carga en bloque":<16}{consultas_nueva:>12}{tiempo_nueva:>12.2f}{filas / tiempo_nueva:>14.0f}')
+    print(f'Aceleración: x{tiempo_anterior / tiempo_nueva:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de la inscripción de una cohorte de participantes.
+
+Compara la inscripción uno a uno de programa_enrolar (exists, create,
+calcular_fecha_fin y participantes.add por participante, con sus señales)
+con inscribir_participantes, que trabaja por lotes con bulk_create. Cada
+versión inscribe la misma cohorte en un programa distinto.
+
+    python -m benchmarks.inscripcion_masiva --participantes 5000
+"""
+import argparse
+from datetime import date
+from .entorno import preparar_django, medir
+
+
+def crear_datos(num_participantes):
+    """Crea un investigador, dos programas publicados y `num_participantes` participantes"""
+    from usuario.models import Usuario, Investigador, Participante
+    from programa.models import Programa
+    from config.enums import RoleUsuario, EstadoPublicacion
+
+    usuario_investigador = Usuario.objects.create_user(
+        username='benchmark_investigador',
+        email='benchmark_investigador@example.com',
+        password='benchmark',
+        nombre='Bench',
+        apellidos='Mark',
+        role=RoleUsuario.INVESTIGADOR
+    )
+    investigador = Investigador.objects.create(usuario=usuario_investigador, experienciaInvestigacion='si')
+    programas = [
+        Programa.objects.create(nombre=f'Programa {i}', descripcion='Benchmark', duracion_semanas=8, creado_por=investigador)
+        for i in range(2)
+    ]
+    Programa.objects.update(estado_publicacion=EstadoPublicacion.PUBLICADO)
+
+    usuarios = Usuario.objects.bulk_create([
+        Usuario(
+            username=f'benchmark_{i}',
+            email=f'benchmark_{i}@example.com',
+            password='!',
+            role=RoleUsuario.PARTICIPANTE,
+            fechaNacimiento=date(1990, 1, 1)
+        )
+        for i in range(num_participantes)
+    ], batch_size=5000)
+    Participante.objects.bulk_create([Participante(usuario=usuario) for usuario in usuarios], batch_size=5000)
+    return programas, [usuario.email for usuario in usuarios]
+
+
+def inscribir_uno_a_uno(programa, emails):
+    """Implementación anterior: el flujo de programa_enrolar por cada participante"""
+    from programa.models import InscripcionPrograma
+    from usuario.models import Participante
+    from config.enums import EstadoInscripcion
+
+    inscritos = 0
+    for email in emails:
+        participante = Participante.objects.get(usuario__email=email)
+        if InscripcionPrograma.objects.filter(
+            participante=participante,
+            estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        ).exists():
+            continue
+        inscripcion = InscripcionPrograma.objects.create(
+            programa=programa,
+            participante=participante,
+            estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        )
+        inscripcion.calcular_fecha_fin()
+        programa.participantes.add(participante)
+        inscritos += 1
+    return inscritos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--participantes', type=int, default=5000)
+    parser.add_argument('--lote', type=int, default=1000)
+    args = parser.parse_args()
+
+    preparar_django()
+    from programa.inscripcion_masiva import inscribir_participantes
+    from programa.models import InscripcionPrograma
+
+    programas, emails = crear_datos(args.participantes)
+
+    # Las dos versiones inscriben en programas distintos; la cohorte queda en
+    # progreso en el primero, así que se retira antes de medir la segunda
+    tiempo_anterior, consultas_anterior, inscritos = medir(lambda: inscribir_uno_a_uno(programas[0], emails), repeticiones=1)
+    InscripcionPrograma.objects.all().delete()
+    tiempo_actual, consultas_actual, informe = medir(
+        lambda: inscribir_participantes(programas[1], emails, tamano_lote=args.lote), repeticiones=1
+    )
+    if not inscritos == informe['resumen']['inscrito'] == args.participantes:
+        raise SystemExit('Número de inscripciones distinto')
+
+    print(f'{"Versión":<14}{"Tiempo (s)":>12}{"Consultas":>12}{"Filas/s":>12}')
+    for nombre, tiempo, consultas in (
+        ('Uno a uno', tiempo_anterior, consultas_anterior),
+        ('Por lotes', tiempo_actual, consultas_actual),
+    ):
+        print(f'{nombre:<14}{tiempo:>12.2f}{consultas:>12}{args.participantes / tiempo:>12.0f}')
+    print(f'Aceleración: {tiempo_anterior / tiempo_actual:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
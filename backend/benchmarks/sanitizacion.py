@@ -0,0 +1,104 @@
+"""
+Micro-benchmark de DataSanitizationMiddleware.
+
+Compara el middleware anterior (reconstruye todo el JSON aplicando
+html.escape y tres re.sub sin compilar a cada texto y lo vuelve a codificar
+siempre) con el actual, para cuerpos JSON de 1 KB a 5 MB con forma de
+cuestionario. Se mide un cuerpo limpio y otro con un 5 % de textos que sí hay
+que sanitizar, y se comprueba que ambos generan el mismo resultado.
+
+    python -m benchmarks.sanitizacion
+"""
+import argparse
+import html
+import json
+import random
+import re
+import time
+
+TAMANOS = [('1 KB', 1 << 10), ('100 KB', 100 << 10), ('1 MB', 1 << 20), ('5 MB', 5 << 20)]
+
+
+def sanitize_value_anterior(value):
+    """Implementación anterior, conservada como referencia para el benchmark."""
+    if isinstance(value, str):
+        value = html.escape(value)
+        value = re.sub(r'<script.*?>.*?</script>', '', value, flags=re.DOTALL)
+        value = re.sub(r'javascript:', '', value, flags=re.IGNORECASE)
+        value = re.sub(r'on\w+\s*=', '', value, flags=re.IGNORECASE)
+        return value
+    elif isinstance(value, dict):
+        return {k: sanitize_value_anterior(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [sanitize_value_anterior(item) for item in value]
+    return value
+
+
+def procesar_anterior(cuerpo):
+    return json.dumps(sanitize_value_anterior(json.loads(cuerpo))).encode('utf-8')
+
+
+def procesar_actual(cuerpo):
+    from autenticacion.sanitizacion import sanitizar
+
+    datos = json.loads(cuerpo)
+    sanitizados = sanitizar(datos)
+    if sanitizados is datos:
+        return cuerpo
+    return json.dumps(sanitizados).encode('utf-8')
+
+
+def crear_cuerpo(tamano, proporcion_sucios, semilla=0):
+    """Cuestionario con preguntas de texto hasta alcanzar `tamano` bytes"""
+    aleatorio = random.Random(semilla)
+    palabras = ['atención', 'respiración', 'calma', 'semana', 'práctica', 'cuerpo', 'mente', 'sesión']
+    preguntas = []
+    cuerpo = b''
+    while len(cuerpo) < tamano:
+        for _ in range(max(1, len(preguntas))):
+            texto = ' '.join(aleatorio.choice(palabras) for _ in range(12))
+            if aleatorio.random() < proporcion_sucios:
+                texto += ' <b onclick="x()">"importante" & urgente</b>'
+            preguntas.append({
+                'id': len(preguntas) + 1,
+                'tipo': 'texto',
+                'texto': texto,
+                'opciones': [{'valor': i, 'etiqueta': aleatorio.choice(palabras)} for i in range(3)]
+            })
+        cuerpo = json.dumps({'titulo': 'Cuestionario', 'preguntas': preguntas}).encode('utf-8')
+    return cuerpo
+
+
+def mejor_tiempo(funcion, cuerpo, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(cuerpo)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"Cuerpo":<10}{"Sucios":>8}{"Anterior MB/s":>16}{"Actual MB/s":>14}{"Aceleración":>14}')
+    for nombre, tamano in TAMANOS:
+        for proporcion in (0, 0.05):
+            cuerpo = crear_cuerpo(tamano, proporcion)
+            if json.loads(procesar_anterior(cuerpo)) != json.loads(procesar_actual(cuerpo)):
+                raise SystemExit('Las dos implementaciones generan resultados distintos')
+
+            megas = len(cuerpo) / (1 << 20)
+            anterior = mejor_tiempo(procesar_anterior, cuerpo, args.repeticiones)
+            actual = mejor_tiempo(procesar_actual, cuerpo, args.repeticiones)
+            print(
+                f'{nombre:<10}{proporcion:>8.0%}{megas / anterior:>16.1f}'
+                f'{megas / actual:>14.1f}{anterior / actual:>13.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de las versiones comprimidas del audio de las sesiones.
+
+Genera un WAV de `--minutos` minutos (44,1 kHz, 16 bits, estéreo, como los
+que exportan los editores de audio), crea sus versiones con ffmpeg y compara
+los bytes que descarga un participante para completar la sesión con el
+original y con la versión recomendada para distintos clientes.
+Necesita ffmpeg y ffprobe en el PATH.
+
+    python -m benchmarks.versiones_medios --minutos 45
+"""
+import argparse
+import array
+import math
+import os
+import random
+import tempfile
+import time
+import wave
+from .entorno import preparar_django
+
+FRECUENCIA = 44100
+
+# (descripción, preferencias del cliente para elegir_version)
+CLIENTES = [
+    ('Sin pistas', {}),
+    ('Save-Data: on', {'ahorro_datos': True}),
+    ('Downlink: 10', {'ancho_banda_mbps': 10.0}),
+    ('?calidad=alta', {'calidad': 'alta'}),
+]
+
+
+def crear_wav(ruta, minutos, semilla=0):
+    """Voz simulada: tono modulado con ruido, un segundo que se repite"""
+    aleatorio = random.Random(semilla)
+    segundo = array.array('h', (
+        int(8000 * math.sin(2 * math.pi * 220 * (i // 2) / FRECUENCIA) * (1 + math.sin(i / 20000)) / 2
+            + aleatorio.gauss(0, 500))
+        for i in range(FRECUENCIA * 2)
+    )).tobytes()
+    with wave.open(ruta, 'wb') as archivo:
+        archivo.setnchannels(2)
+        archivo.setsampwidth(2)
+        archivo.setframerate(FRECUENCIA)
+        for _ in range(minutos * 60):
+            archivo.writeframes(segundo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutos', type=int, default=45)
+    args = parser.parse_args()
+
+    preparar_django()
+    from django.core.files.storage import default_storage
+    from django.test import override_settings
+    from sesion import versiones_medios
+    from sesion.models import Sesion, VersionMedio
+    from config.enums import EstadoVersionMedio
+
+    if not versiones_medios.ffmpeg_disponible():
+        raise SystemExit('Este benchmark necesita ffmpeg y ffprobe en el PATH')
+
+    with tempfile.TemporaryDirectory() as directorio, override_settings(MEDIA_ROOT=directorio):
+        nombre = 'audio/meditacion.wav'
+        os.makedirs(default_storage.path('audio'), exist_ok=True)
+        print(f'Generando {args.minutos} minutos de audio WAV...')
+        crear_wav(default_storage.path(nombre), args.minutos)
+        original = default_storage.size(nombre)
+
+        inicio = time.perf_counter()
+        versiones_medios.solicitar(Sesion(contenido_audio=nombre))
+        duracion = time.perf_counter() - inicio
+        versiones = list(VersionMedio.objects.filter(
+            archivo_origen=nombre, estado=EstadoVersionMedio.COMPLETADO
+        ).order_by('bitrate_kbps'))
+        if not versiones:
+            raise SystemExit(f'No se generaron versiones: {VersionMedio.objects.values_list("error", flat=True).first()}')
+        print(f'Versiones generadas en {duracion:.1f} s')
+
+        print(f'{"Cliente":<16}{"Versión":>12}{"MB por sesión":>16}{"Reducción":>12}')
+        print(f'{"(original)":<16}{"wav":>12}{original / 1e6:>16.1f}{"1.0x":>12}')
+        for descripcion, preferencias in CLIENTES:
+            version = versiones_medios.elegir_version(versiones, **preferencias)
+            print(
+                f'{descripcion:<16}{version.calidad:>12}{version.tamano_bytes / 1e6:>16.1f}'
+                f'{original / version.tamano_bytes:>11.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
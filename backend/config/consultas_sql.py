@@ -0,0 +1,102 @@
+"""
+Instrumentación de consultas SQL por petición.
+
+RegistroConsultas cuenta las consultas ejecutadas en la conexión por defecto,
+su tiempo total y las huellas repetidas (misma consulta con distintos
+parámetros, el síntoma típico de un N+1). Lo usan ConsultasSQLMiddleware, que
+añade el resumen como cabeceras de respuesta en DEBUG, y el plugin de tests
+tests/presupuesto_consultas.py.
+"""
+import re
+import time
+from collections import Counter
+from django.conf import settings
+from django.db import connection
+
+_LISTA_IN = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_NUMERO = re.compile(r'(?<![\w"])\d+(?![\w"])')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def huella_consulta(sql):
+    """Normaliza una consulta para agrupar las que solo difieren en los parámetros"""
+    sql = _LISTA_IN.sub('IN (...)', sql)
+    sql = _NUMERO.sub('N', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+class RegistroConsultas:
+    """
+    Context manager que registra las consultas ejecutadas en su interior:
+
+        with RegistroConsultas() as registro:
+            ...
+        registro.total, registro.tiempo_ms, registro.duplicadas
+    """
+
+    def __init__(self, conexion=None):
+        self.conexion = conexion or connection
+        self.consultas = []
+        self._contexto = None
+
+    def _registrar(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, time.perf_counter() - inicio))
+
+    def __enter__(self):
+        self._contexto = self.conexion.execute_wrapper(self._registrar)
+        self._contexto.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._contexto.__exit__(*exc_info)
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def tiempo_ms(self):
+        return sum(duracion for _, duracion in self.consultas) * 1000
+
+    @property
+    def duplicadas(self):
+        """Huellas ejecutadas más de una vez, de más a menos repetida: {huella: veces}"""
+        contador = Counter(huella_consulta(sql) for sql, _ in self.consultas)
+        return {huella: veces for huella, veces in contador.most_common() if veces > 1}
+
+    def resumen(self):
+        lineas = [f'{self.total} consultas en {self.tiempo_ms:.1f} ms']
+        for huella, veces in self.duplicadas.items():
+            lineas.append(f'  x{veces}  {huella}')
+        return '\n'.join(lineas)
+
+
+class ConsultasSQLMiddleware:
+    """
+    Con CONSULTAS_SQL_CABECERAS activo (por defecto igual a DEBUG) añade a cada respuesta:
+
+    - X-Consultas-SQL: número de consultas
+    - X-Tiempo-SQL-Ms: tiempo total en SQL
+    - X-Consultas-Duplicadas: consultas que repiten una huella ya ejecutada
+
+    Debe ir el primero en MIDDLEWARE para incluir las consultas del resto de middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.CONSULTAS_SQL_CABECERAS:
+            return self.get_response(request)
+
+        with RegistroConsultas() as registro:
+            response = self.get_response(request)
+
+        response['X-Consultas-SQL'] = str(registro.total)
+        response['X-Tiempo-SQL-Ms'] = f'{registro.tiempo_ms:.1f}'
+        response['X-Consultas-Duplicadas'] = str(sum(veces - 1 for veces in registro.duplicadas.values()))
+        return response
@@ -1,5 +1,16 @@
+"""
+Enums del dominio y registro de sus etiquetas.
+
+Las etiquetas de todos los enums de este módulo se reúnen al importarlo en
+mapas inmutables valor -> etiqueta. `etiquetas(Enum)` las devuelve ya
+convertidas a texto en el idioma activo: las traducciones diferidas
+(gettext_lazy) se resuelven una sola vez por enum e idioma, así que los
+get_*_display, los serializers y los exportadores no vuelven a construir
+dict(Enum.choices) ni a traducir en cada llamada.
+"""
+from types import MappingProxyType
 from django.db import models
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import get_language, gettext_lazy as _
 
 # Enums de Usuario
 class RoleUsuario(models.TextChoices):
@@ -66,6 +77,21 @@ class EstadoInscripcion(models.TextChoices):
     COMPLETADO = 'completado', 'Completado'
     ABANDONADO = 'abandonado', 'Abandonado'
 
+class ResultadoInscripcionMasiva(models.TextChoices):
+    INSCRITO = 'inscrito', 'Inscrito'
+    YA_INSCRITO = 'ya_inscrito', 'Ya inscrito en el programa'
+    EN_OTRO_PROGRAMA = 'en_otro_programa', 'Con otro programa en progreso'
+    NO_ENCONTRADO = 'no_encontrado', 'Participante no encontrado'
+    DUPLICADO = 'duplicado', 'Duplicado en la lista'
+    AMBIGUO = 'ambiguo', 'Coincide con varios participantes'
+    ERROR = 'error', 'Error'
+
+class EstadoTrabajoExportacion(models.TextChoices):
+    PENDIENTE = 'pendiente', 'Pendiente'
+    EN_PROCESO = 'en_proceso', 'En proceso'
+    COMPLETADO = 'completado', 'Completado'
+    ERROR = 'error', 'Error'
+
 # Enums de Sesión
 class EtiquetaPractica(models.TextChoices):
     BREATH = 'breath', 'Atención a la Respiración'
@@ -85,6 +111,16 @@ class TipoContenido(models.TextChoices):
     AUDIO = 'audio', 'Audio'
     VIDEO = 'video', 'Video'
 
+class EstadoVersionMedio(models.TextChoices):
+    PENDIENTE = 'pendiente', 'Pendiente'
+    EN_PROCESO = 'en_proceso', 'En proceso'
+    COMPLETADO = 'completado', 'Completado'
+    ERROR = 'error', 'Error'
+
+class EstadoSubidaMedio(models.TextChoices):
+    EN_CURSO = 'en_curso', 'En curso'
+    COMPLETADA = 'completada', 'Completada'
+
 class Escala(models.TextChoices):
     ESTADO_EMOCIONAL = 'estado_emocional', '¿Cómo te sientes emocionalmente en este momento? [1–5]'
     ESTRES_ACTUAL = 'estres_actual', '¿Cuánto estrés sientes ahora mismo? [0–10]'
@@ -108,3 +144,29 @@ class TipoPregunta(models.TextChoices):
     SELECT = 'select', 'Selección Única'
     CHECKBOX = 'checkbox', 'Múltiple Opción'
     CALIFICACION = 'calificacion', 'Calificación'
+
+
+# Registro de etiquetas: {enum: {valor: etiqueta (posiblemente diferida)}}
+_REGISTRO = MappingProxyType({
+    enum: MappingProxyType(dict(enum.choices))
+    for enum in list(globals().values())
+    if isinstance(enum, type) and issubclass(enum, models.Choices) and enum.__module__ == __name__
+})
+
+# Etiquetas ya resueltas como texto: {(enum, idioma): {valor: etiqueta}}
+_RESUELTAS = {}
+
+
+def etiquetas(enum):
+    """Mapa inmutable valor -> etiqueta (texto en el idioma activo) de `enum`"""
+    clave = (enum, get_language())
+    resueltas = _RESUELTAS.get(clave)
+    if resueltas is None:
+        resueltas = MappingProxyType({valor: str(etiqueta) for valor, etiqueta in _REGISTRO[enum].items()})
+        _RESUELTAS[clave] = resueltas
+    return resueltas
+
+
+def etiqueta(enum, valor):
+    """Etiqueta de `valor` en `enum`; el propio valor si no es una opción del enum"""
+    return etiquetas(enum).get(valor, valor)
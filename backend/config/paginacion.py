@@ -0,0 +1,25 @@
+"""
+Paginación por cursor de los listados.
+
+El cursor se basa en (fecha_creacion, id), columnas indexadas junto al filtro
+de cada listado, de modo que el coste de una página no depende de lo lejos que
+esté del principio (a diferencia de OFFSET). El tamaño de página por defecto es
+PAGINACION_TAMANO_PAGINA y el cliente puede pedir otro con ?page_size=.
+
+Los listados que ya existían devuelven la lista completa si la petición no
+incluye ?cursor= ni ?page_size=, para no romper a los clientes actuales.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class CursorFechaCreacionPagination(CursorPagination):
+    ordering = ('-fecha_creacion', '-id')
+    page_size = settings.PAGINACION_TAMANO_PAGINA
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def paginacion_solicitada(request, paginador_cls=CursorFechaCreacionPagination):
+    parametros = request.query_params
+    return paginador_cls.cursor_query_param in parametros or paginador_cls.page_size_query_param in parametros
@@ -0,0 +1,66 @@
+"""
+Seguimiento de los campos modificados de una instancia de modelo.
+
+Al cargar una instancia de la base de datos (y después de cada save()) se
+guarda una instantánea de sus columnas. campos_modificados() compara con ella
+sin consultar la base de datos, de modo que save() puede escribir solo las
+columnas que han cambiado y conocer el valor anterior de un campo (p. ej. el
+estado de publicación) sin volver a leer la fila.
+"""
+import copy
+
+# Valor de valor_cargado() para los campos que no están en la instantánea
+SIN_CARGAR = object()
+
+
+class SeguimientoCamposMixin:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._guardar_instantanea()
+        return instancia
+
+    def _guardar_instantanea(self, campos=None):
+        """Guarda el valor actual de `campos` (por defecto, de todos los no diferidos)"""
+        if campos is None:
+            diferidos = self.get_deferred_fields()
+            campos = [campo for campo in self._meta.concrete_fields if campo.attname not in diferidos]
+            self._valores_cargados = {}
+        valores = self.__dict__.setdefault('_valores_cargados', {})
+        for campo in campos:
+            valor = getattr(self, campo.attname)
+            # Copia de listas y diccionarios (JSONField) para detectar cambios en el sitio
+            valores[campo.attname] = copy.deepcopy(valor) if isinstance(valor, (dict, list)) else valor
+
+    def valor_cargado(self, campo):
+        """Valor de `campo` al cargar o guardar la instancia por última vez, o SIN_CARGAR"""
+        return getattr(self, '_valores_cargados', {}).get(self._meta.get_field(campo).attname, SIN_CARGAR)
+
+    def campos_modificados(self):
+        """
+        Nombres de los campos cuyo valor ha cambiado desde la instantánea.
+        Los campos sin instantánea (instancia no cargada de la base de datos
+        o campo diferido leído después) se consideran modificados.
+        """
+        cargados = getattr(self, '_valores_cargados', {})
+        diferidos = self.get_deferred_fields()
+        return [
+            campo.name for campo in self._meta.concrete_fields
+            if not campo.primary_key and campo.attname not in diferidos
+            and cargados.get(campo.attname, SIN_CARGAR) != getattr(self, campo.attname)
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        guardados = kwargs.get('update_fields')
+        self._guardar_instantanea(None if guardados is None else list(map(self._meta.get_field, guardados)))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None:
+            self._guardar_instantanea()
+        else:
+            # Carga de un campo diferido: el resto de cambios pendientes se conservan
+            self._guardar_instantanea([
+                campo for campo in map(self._meta.get_field, fields) if campo.concrete
+            ])
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.consultas_sql.ConsultasSQLMiddleware',  # Primero, para contar las consultas de todos los demás
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -124,7 +125,7 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'autenticacion.authentication.JWTAutenticacionCacheada',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
@@ -235,12 +236,83 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Archivos de las exportaciones: fuera de MEDIA_ROOT, que se sirve sin
+# autenticación, y solo accesibles con la vista de descarga (programa/almacenamiento.py)
+EXPORTACIONES_ROOT = os.getenv('EXPORTACIONES_ROOT', os.path.join(BASE_DIR, 'exportaciones'))
+
+# El audio y el vídeo de las sesiones se guardan por contenido (sesion/almacenamiento.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'medios': {'BACKEND': 'sesion.almacenamiento.AlmacenamientoContenido'},
+    'exportaciones': {'BACKEND': 'programa.almacenamiento.AlmacenamientoExportaciones'},
+}
+
 # File upload settings
 FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.MemoryFileUploadHandler',
     'django.core.files.uploadhandler.TemporaryFileUploadHandler',
 ]
 
+# Transmisión de audio y vídeo de las sesiones (sesion/transmision.py). Con un
+# prefijo (p. ej. '/media-protegido/', location `internal` de nginx con alias a
+# MEDIA_ROOT) Django solo comprueba permisos y el servidor web envía el archivo
+MEDIA_X_ACCEL_REDIRECT = os.getenv('MEDIA_X_ACCEL_REDIRECT')
+MEDIA_TAMANO_BLOQUE = 64 * 1024
+MEDIA_CACHE_SEGUNDOS = 60 * 60 * 24
+
+# Tamaño de página por defecto de los listados paginados por cursor (config/paginacion.py)
+PAGINACION_TAMANO_PAGINA = 20
+
+# Cabeceras X-Consultas-SQL / X-Tiempo-SQL-Ms / X-Consultas-Duplicadas (ver config/consultas_sql.py)
+CONSULTAS_SQL_CABECERAS = DEBUG
+
+# Caché (LocMem por defecto; con REDIS_URL se usa Redis y se comparte entre procesos)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+# Usuario autenticado (con sus perfiles) cacheado por id; TTL corto porque con
+# LocMem la invalidación no llega a otros procesos (ver autenticacion/authentication.py)
+AUTH_USUARIO_CACHE_ALIAS = 'default'
+AUTH_USUARIO_CACHE_SEGUNDOS = 60
+
+# Caché de la representación serializada de los programas. Cada entrada se
+# valida con la firma del programa (fecha_actualizacion y
+# version_representacion), que las señales actualizan también al cambiar los
+# perfiles anidados, así que sigue siendo correcta entre procesos aunque la
+# caché sea LocMem
+PROGRAMAS_CACHE_ALIAS = 'default'
+PROGRAMAS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Exportaciones asíncronas: hilos del pool de trabajos y horas durante las
+# que se reutiliza un archivo ya generado si los datos no han cambiado (pasado
+# ese tiempo, el comando limpiar_exportaciones borra el trabajo y su archivo)
+EXPORTACION_WORKERS = int(os.getenv('EXPORTACION_WORKERS', 2))
+EXPORTACION_ASINCRONA = True
+EXPORTACION_CACHE_HORAS = 24
+
+# Versiones comprimidas del audio y vídeo de las sesiones (sesion/versiones_medios.py).
+# Sin ffmpeg en el servidor no se generan y se sirven los archivos originales
+MEDIOS_FFMPEG = os.getenv('FFMPEG', 'ffmpeg')
+MEDIOS_FFPROBE = os.getenv('FFPROBE', 'ffprobe')
+MEDIOS_WORKERS = int(os.getenv('MEDIOS_WORKERS', 1))
+MEDIOS_PROCESAMIENTO_ASINCRONO = True
+MEDIOS_TIEMPO_MAXIMO_SEGUNDOS = 60 * 60
+
+# Subidas por trozos reanudables (sesion/subidas.py): tamaño máximo del archivo,
+# tamaño de trozo recomendado y horas sin actividad tras las que se descartan
+MEDIOS_SUBIDA_TAMANO_MAXIMO = 4 * 1024 ** 3
+MEDIOS_SUBIDA_TAMANO_TROZO = 8 * 1024 ** 2
+MEDIOS_SUBIDA_CADUCIDAD_HORAS = 24
+
 # Tamaño máximo de archivo (10MB)
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760
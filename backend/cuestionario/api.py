@@ -8,7 +8,7 @@ from .serializers import CuestionarioSerializer, RespuestaCuestionarioSerializer
 from programa.models import Programa
 from usuario.models import Participante
 from programa.models import InscripcionPrograma, EstadoInscripcion
-from config.enums import TipoCuestionario, MomentoCuestionario
+from config.enums import TipoCuestionario, MomentoCuestionario, etiquetas
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -38,7 +38,7 @@ def cuestionario_list(request, pk):
         # Verificar que no existe un cuestionario del mismo momento
         momento = request.data.get('momento')
 
-        if not momento or momento not in [choice[0] for choice in MomentoCuestionario.choices]:
+        if not momento or momento not in etiquetas(MomentoCuestionario):
             return Response(
                 {'error': 'El momento del cuestionario debe ser "pre" o "post"'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -52,7 +52,7 @@ def cuestionario_list(request, pk):
         
         # Validar el tipo de cuestionario
         tipo_cuestionario = request.data.get('tipo_cuestionario')
-        if not tipo_cuestionario or tipo_cuestionario not in [choice[0] for choice in TipoCuestionario.choices]:
+        if not tipo_cuestionario or tipo_cuestionario not in etiquetas(TipoCuestionario):
             return Response(
                 {'error': 'Tipo de cuestionario no válido'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,68 @@
+"""
+Respuestas numéricas por ítem.
+
+RespuestaCuestionario.respuestas guarda el JSON tal como lo envía el
+participante: una lista de enteros en los cuestionarios Likert y un diccionario
+{id de pregunta: respuesta} en los demás. Para analizarlas sin decodificar ese
+JSON fila a fila, cada respuesta numérica se copia además en RespuestaItem (una
+fila por ítem) al guardar la respuesta, y los análisis agregan sobre esa tabla
+con SQL o la cargan directamente en una matriz NumPy.
+
+El ítem es la posición del texto en los cuestionarios Likert y la posición de
+la pregunta en `preguntas` en los demás, donde solo se copian las preguntas de
+calificación. Las respuestas de texto o de opciones se quedan solo en el JSON.
+"""
+from config.enums import TipoPregunta
+
+
+def valores_por_item(tipo_cuestionario, preguntas, respuestas):
+    """
+    Lista de (ítem, valor) de las respuestas numéricas de `respuestas`. No
+    depende de los modelos para poder usarse también en las migraciones.
+    """
+    if tipo_cuestionario == 'likert':
+        if not isinstance(respuestas, list):
+            return []
+        num_items = len(preguntas[0]['textos']) if preguntas else len(respuestas)
+        return [
+            (item, float(valor)) for item, valor in enumerate(respuestas[:num_items])
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool)
+        ]
+
+    if not isinstance(respuestas, dict):
+        return []
+    valores = []
+    for item, pregunta in enumerate(preguntas):
+        if not isinstance(pregunta, dict) or pregunta.get('tipo') != TipoPregunta.CALIFICACION:
+            continue
+        valor = respuestas.get(str(pregunta.get('id')))
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            valores.append((item, float(valor)))
+    return valores
+
+
+def items_de(respuesta):
+    """Filas de RespuestaItem (sin guardar) de `respuesta`"""
+    from .models import RespuestaItem
+    cuestionario = respuesta.cuestionario
+    return [
+        RespuestaItem(
+            respuesta=respuesta, cuestionario_id=respuesta.cuestionario_id,
+            participante_id=respuesta.participante_id, item=item, valor=valor
+        )
+        for item, valor in valores_por_item(cuestionario.tipo_cuestionario, cuestionario.preguntas, respuesta.respuestas)
+    ]
+
+
+def sincronizar_items(respuestas):
+    """
+    Vuelve a generar las filas por ítem de `respuestas` con un borrado y una
+    inserción por lotes. RespuestaCuestionario.save() lo hace para cada
+    respuesta; tras un bulk_create hay que llamarlo a mano.
+    """
+    from .models import RespuestaItem
+    respuestas = list(respuestas)
+    RespuestaItem.objects.filter(respuesta__in=respuestas).delete()
+    RespuestaItem.objects.bulk_create(
+        [fila for respuesta in respuestas for fila in items_de(respuesta)], batch_size=1000
+    )
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuestionario', '0003_initial'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='respuestacuestionario',
+            index=models.Index(fields=['cuestionario', 'participante', 'fecha_respuesta'], name='respuesta_cuest_part_idx'),
+        ),
+    ]
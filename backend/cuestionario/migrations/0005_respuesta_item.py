@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuestionario', '0004_indices_filtros'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespuestaItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item', models.PositiveSmallIntegerField()),
+                ('valor', models.FloatField()),
+                ('cuestionario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cuestionario.cuestionario')),
+                ('participante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='usuario.participante')),
+                ('respuesta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='cuestionario.respuestacuestionario')),
+            ],
+            options={
+                'verbose_name': 'Respuesta por ítem',
+                'verbose_name_plural': 'Respuestas por ítem',
+                'indexes': [models.Index(fields=['cuestionario', 'item'], name='respuesta_item_cuest_idx')],
+                'constraints': [models.UniqueConstraint(fields=('respuesta', 'item'), name='respuesta_item_uniq')],
+            },
+        ),
+    ]
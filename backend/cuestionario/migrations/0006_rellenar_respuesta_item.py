@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:35
+
+from django.db import migrations
+from cuestionario.items import valores_por_item
+
+# Respuestas leídas por lote; cada lote se confirma por separado
+TAMANO_LOTE = 2000
+
+
+def rellenar_items(apps, schema_editor):
+    """Copia por ítem las respuestas numéricas de las respuestas existentes, por lotes de id"""
+    Cuestionario = apps.get_model('cuestionario', 'Cuestionario')
+    RespuestaCuestionario = apps.get_model('cuestionario', 'RespuestaCuestionario')
+    RespuestaItem = apps.get_model('cuestionario', 'RespuestaItem')
+    cuestionarios = {}
+
+    ultimo_id = 0
+    while True:
+        lote = list(
+            RespuestaCuestionario.objects.filter(pk__gt=ultimo_id, items__isnull=True)
+            .order_by('pk').values_list('pk', 'cuestionario_id', 'participante_id', 'respuestas')[:TAMANO_LOTE]
+        )
+        if not lote:
+            break
+        faltan = {cuestionario_id for _, cuestionario_id, _, _ in lote} - cuestionarios.keys()
+        cuestionarios.update(
+            (pk, (tipo, preguntas))
+            for pk, tipo, preguntas in Cuestionario.objects.filter(pk__in=faltan).values_list(
+                'pk', 'tipo_cuestionario', 'preguntas'
+            )
+        )
+        RespuestaItem.objects.bulk_create([
+            RespuestaItem(
+                respuesta_id=pk, cuestionario_id=cuestionario_id, participante_id=participante_id,
+                item=item, valor=valor
+            )
+            for pk, cuestionario_id, participante_id, respuestas in lote
+            for item, valor in valores_por_item(*cuestionarios[cuestionario_id], respuestas)
+        ], batch_size=1000)
+        ultimo_id = lote[-1][0]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('cuestionario', '0005_respuesta_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_items, migrations.RunPython.noop),
+    ]
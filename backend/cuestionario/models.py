@@ -3,7 +3,8 @@ from programa.models import Programa
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from usuario.models import Participante
-from config.enums import MomentoCuestionario, TipoCuestionario
+from config.enums import MomentoCuestionario, TipoCuestionario, etiqueta
+from .items import sincronizar_items
 
 class Cuestionario(models.Model):
     programa = models.ForeignKey(
@@ -49,10 +50,10 @@ class Cuestionario(models.Model):
         return f"{self.titulo} - {self.get_momento_display()}"
 
     def get_momento_display(self):
-        return dict(MomentoCuestionario.choices).get(self.momento, self.momento)
+        return etiqueta(MomentoCuestionario, self.momento)
 
     def get_tipo_cuestionario_display(self):
-        return dict(TipoCuestionario.choices).get(self.tipo_cuestionario, self.tipo_cuestionario)
+        return etiqueta(TipoCuestionario, self.tipo_cuestionario)
 
 class RespuestaCuestionario(models.Model):
     cuestionario = models.ForeignKey(
@@ -68,11 +69,53 @@ class RespuestaCuestionario(models.Model):
     respuestas = models.JSONField(default=dict)
     fecha_respuesta = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Copia por ítem de las respuestas numéricas para los análisis (ver items.py)
+        sincronizar_items([self])
+
     class Meta:
         unique_together = ['cuestionario', 'participante']
+        indexes = [
+            # Agregados de progreso y estadísticas por (cuestionario, participante): solo índice
+            models.Index(
+                fields=['cuestionario', 'participante', 'fecha_respuesta'],
+                name='respuesta_cuest_part_idx'
+            ),
+        ]
         verbose_name = 'Respuesta de Cuestionario'
         verbose_name_plural = 'Respuestas de Cuestionarios'
         db_table = 'cuestionario_respuestacuestionario'
 
     def __str__(self):
         return f"Respuesta de {self.participante} a {self.cuestionario}"
+
+
+class RespuestaItem(models.Model):
+    """
+    Respuesta numérica a un ítem, copiada de RespuestaCuestionario.respuestas
+    al guardarla. El cuestionario y el participante se repiten para agregar por
+    ítem sin unir con la respuesta.
+    """
+    respuesta = models.ForeignKey(
+        RespuestaCuestionario,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    cuestionario = models.ForeignKey(Cuestionario, on_delete=models.CASCADE, related_name='+')
+    participante = models.ForeignKey(Participante, on_delete=models.CASCADE, related_name='+')
+    item = models.PositiveSmallIntegerField()
+    valor = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['respuesta', 'item'], name='respuesta_item_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['cuestionario', 'item'], name='respuesta_item_cuest_idx'),
+        ]
+        verbose_name = 'Respuesta por ítem'
+        verbose_name_plural = 'Respuestas por ítem'
+
+    def __str__(self):
+        return f"Ítem {self.item} = {self.valor} ({self.respuesta_id})"
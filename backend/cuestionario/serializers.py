@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Cuestionario, RespuestaCuestionario
-from config.enums import TipoPregunta, TipoCuestionario
+from config.enums import TipoPregunta, TipoCuestionario, etiquetas
 
 class CuestionarioSerializer(serializers.ModelSerializer):
     momento_display = serializers.CharField(source='get_momento_display', read_only=True)
@@ -52,7 +52,7 @@ class CuestionarioSerializer(serializers.ModelSerializer):
             if 'texto' not in pregunta:
                 raise serializers.ValidationError("Falta el campo requerido: texto")
 
-            if pregunta['tipo'] not in [choice[0] for choice in TipoPregunta.choices]:
+            if pregunta['tipo'] not in etiquetas(TipoPregunta):
                 raise serializers.ValidationError(f"Tipo de pregunta inválido: {pregunta['tipo']}")
 
             if pregunta['tipo'] in ['SELECT', 'CHECKBOX']:
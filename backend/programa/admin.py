@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Programa, InscripcionPrograma
+from .models import Programa, InscripcionPrograma, ProgresoParticipante, TrabajoExportacion
 
 @admin.register(Programa)
 class ProgramaAdmin(admin.ModelAdmin):
@@ -14,3 +14,15 @@ class InscripcionProgramaAdmin(admin.ModelAdmin):
     list_display = ('programa', 'participante', 'fecha_inicio', 'fecha_fin', 'estado_inscripcion')
     list_filter = ('estado_inscripcion', 'fecha_inicio')
     search_fields = ('programa__nombre', 'participante__usuario__email')
+
+@admin.register(ProgresoParticipante)
+class ProgresoParticipanteAdmin(admin.ModelAdmin):
+    list_display = ('programa', 'participante', 'sesiones_completadas', 'minutos_practica', 'cuestionarios_completados', 'ultima_actividad')
+    list_filter = ('programa',)
+    readonly_fields = ('fecha_actualizacion',)
+
+@admin.register(TrabajoExportacion)
+class TrabajoExportacionAdmin(admin.ModelAdmin):
+    list_display = ('programa', 'tipo', 'formato', 'estado', 'progreso', 'fecha_creacion', 'fecha_finalizacion')
+    list_filter = ('estado', 'tipo', 'formato')
+    readonly_fields = ('firma', 'fecha_creacion', 'fecha_inicio', 'fecha_finalizacion')
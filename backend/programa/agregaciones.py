@@ -0,0 +1,103 @@
+"""
+Capa de agregación para las estadísticas de programas.
+
+Todas las funciones calculan sus contadores con un número fijo de consultas
+agrupadas, independientemente de cuántos programas o participantes haya.
+"""
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from sesion.models import DiarioSesion
+from cuestionario.models import RespuestaCuestionario
+from .models import InscripcionPrograma
+
+
+def subconsulta_conteo(queryset, campo_agrupacion):
+    """
+    Devuelve una expresión que cuenta las filas de `queryset` agrupadas por
+    `campo_agrupacion`, pensada para usarse con OuterRef dentro de annotate().
+    Si no hay filas devuelve 0 en lugar de NULL.
+    """
+    conteo = (
+        queryset
+        .order_by()
+        .values(campo_agrupacion)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(conteo, output_field=IntegerField()),
+        Value(0),
+        output_field=IntegerField()
+    )
+
+
+def huella(queryset, campo_fecha):
+    """
+    Resume `queryset` en su número de filas y su última fecha `campo_fecha`
+    con un único agregado. Cambia al crear, modificar o borrar filas, así que
+    sirve para saber si un resultado calculado a partir de ellas sigue siendo
+    válido sin mantener un contador en cada escritura.
+    """
+    resumen = queryset.order_by().aggregate(total=Count('pk'), ultima=Max(campo_fecha))
+    ultima = resumen['ultima'].isoformat() if resumen['ultima'] else '-'
+    return f"{resumen['total']}@{ultima}"
+
+
+def anotar_estadisticas_programas(programas):
+    """
+    Anota cada programa del queryset con sus contadores:
+    - num_participantes: inscripciones en el programa
+    - num_sesiones_completadas: diarios de sesión registrados
+    - num_respuestas_pre / num_respuestas_post: respuestas a cada cuestionario
+
+    Se resuelve en una única consulta con subconsultas correlacionadas.
+    """
+    return programas.annotate(
+        num_participantes=subconsulta_conteo(
+            InscripcionPrograma.objects.filter(programa=OuterRef('pk')),
+            'programa'
+        ),
+        num_sesiones_completadas=subconsulta_conteo(
+            DiarioSesion.objects.filter(programa=OuterRef('pk')),
+            'programa'
+        ),
+        num_respuestas_pre=subconsulta_conteo(
+            RespuestaCuestionario.objects.filter(cuestionario=OuterRef('cuestionario_pre')),
+            'cuestionario'
+        ),
+        num_respuestas_post=subconsulta_conteo(
+            RespuestaCuestionario.objects.filter(cuestionario=OuterRef('cuestionario_post')),
+            'cuestionario'
+        ),
+    )
+
+
+def estadisticas_investigador(investigador):
+    """
+    Calcula las estadísticas del dashboard de un investigador.
+    Devuelve los totales globales y la lista de estadísticas por programa.
+    """
+    programas = anotar_estadisticas_programas(
+        investigador.programas.all()
+    ).only('id', 'nombre', 'estado_publicacion', 'creado_por', 'cuestionario_pre', 'cuestionario_post')
+
+    programas_stats = []
+    for programa in programas:
+        programas_stats.append({
+            'id': programa.id,
+            'nombre': programa.nombre,
+            'estado': programa.estado_publicacion,
+            'participantes': programa.num_participantes,
+            'sesiones_completadas': programa.num_sesiones_completadas,
+            'respuestas_pre': programa.num_respuestas_pre,
+            'respuestas_post': programa.num_respuestas_post,
+            'total_cuestionarios': programa.num_respuestas_pre + programa.num_respuestas_post
+        })
+
+    return {
+        'total_programas': len(programas_stats),
+        'participantes_activos': sum(p['participantes'] for p in programas_stats),
+        'sesiones_completadas': sum(p['sesiones_completadas'] for p in programas_stats),
+        'cuestionarios_respondidos': sum(p['total_cuestionarios'] for p in programas_stats),
+        'programas_stats': programas_stats
+    }
@@ -0,0 +1,32 @@
+"""
+Almacenamiento de los archivos de las exportaciones.
+
+Los archivos exportados contienen los datos de todos los participantes de un
+programa, así que no se guardan en MEDIA_ROOT (que el servidor web sirve sin
+autenticación) sino en EXPORTACIONES_ROOT, y solo se descargan con la vista
+de descarga, que comprueba que el investigador es el creador del programa.
+"""
+import os
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+
+
+class AlmacenamientoExportaciones(FileSystemStorage):
+    """FileSystemStorage en EXPORTACIONES_ROOT en lugar de MEDIA_ROOT"""
+
+    # Se leen del ajuste en cada uso para seguir los cambios de EXPORTACIONES_ROOT en los tests
+    @property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.EXPORTACIONES_ROOT)
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError('Los archivos de las exportaciones solo se sirven con la vista de descarga')
+
+
+def almacenamiento_exportaciones():
+    """Almacenamiento de TrabajoExportacion.archivo (STORAGES['exportaciones'])"""
+    return storages['exportaciones']
@@ -0,0 +1,210 @@
+"""
+Análisis de cuestionarios Likert de un programa.
+
+Las respuestas de cada cuestionario se cargan con una única consulta sobre
+las respuestas por ítem (cuestionario/items.py), sin decodificar el JSON de
+cada respuesta, en una matriz NumPy (participantes × ítems, NaN si falta la
+respuesta) y todas las estadísticas se calculan de forma vectorizada sobre
+ella. El resultado se guarda en caché con una clave que incluye la fecha de
+modificación de los cuestionarios pre y post y la huella de sus respuestas
+(agregaciones.huella: número de respuestas y fecha de la última), de modo que
+se recalcula solo cuando cambian esos cuestionarios o sus respuestas; los
+diarios y los cambios en otros datos del programa no lo invalidan.
+"""
+import numpy as np
+from django.core.cache import cache
+from cuestionario.models import RespuestaCuestionario
+from .agregaciones import huella
+
+ANALISIS_CACHE_SEGUNDOS = 60 * 60 * 24
+
+
+def _redondear(valor):
+    """Convierte escalares de NumPy a float redondeado; NaN o infinito pasan a None"""
+    valor = float(valor)
+    return round(valor, 4) if np.isfinite(valor) else None
+
+
+def _lista(valores):
+    return [_redondear(valor) for valor in valores]
+
+
+def es_likert(cuestionario):
+    return cuestionario is not None and cuestionario.tipo_cuestionario == 'likert'
+
+
+def matriz_respuestas(cuestionario):
+    """
+    Devuelve (ids de participante, matriz participantes × ítems) de un
+    cuestionario Likert. Si un participante respondió varias veces se usa su
+    última respuesta.
+    """
+    num_items = len(cuestionario.preguntas[0]['textos'])
+    # LEFT JOIN con los ítems: quien respondió sin valores numéricos queda como fila de NaN
+    filas = list(
+        RespuestaCuestionario.objects.filter(
+            cuestionario=cuestionario
+        ).order_by('participante_id', 'fecha_respuesta').values_list('participante_id', 'items__item', 'items__valor')
+    )
+    participantes = np.array([fila[0] for fila in filas], dtype=np.int64)
+    items = np.array([-1 if fila[1] is None else fila[1] for fila in filas], dtype=np.int64)
+    valores = np.array([np.nan if fila[2] is None else fila[2] for fila in filas], dtype=float)
+
+    ids, filas_matriz = np.unique(participantes, return_inverse=True)
+    matriz = np.full((len(ids), num_items), np.nan)
+    validos = (items >= 0) & (items < num_items)
+    matriz[filas_matriz[validos], items[validos]] = valores[validos]
+    return ids, matriz
+
+
+def _descriptivos(matriz, eje=0):
+    """Media, desviación típica muestral y n por columna ignorando los NaN"""
+    validos = ~np.isnan(matriz)
+    n = validos.sum(axis=eje)
+    suma = np.where(validos, matriz, 0).sum(axis=eje)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = suma / n
+        desviaciones = np.where(validos, matriz - np.expand_dims(media, eje), 0)
+        varianza = (desviaciones ** 2).sum(axis=eje) / (n - 1)
+    return media, np.sqrt(varianza), n
+
+
+def totales(matriz):
+    """Puntuación total por participante; NaN si no respondió todos los ítems"""
+    return matriz.sum(axis=1)
+
+
+def analizar_cuestionario(cuestionario):
+    ids, matriz = matriz_respuestas(cuestionario)
+    textos = cuestionario.preguntas[0]['textos']
+    media, desviacion, n = _descriptivos(matriz)
+    puntuaciones = totales(matriz)
+    media_total, desviacion_total, n_total = _descriptivos(puntuaciones[:, np.newaxis])
+
+    return {
+        'id': cuestionario.id,
+        'nombre': cuestionario.titulo,
+        'etiquetas': cuestionario.preguntas[0]['etiquetas'],
+        'n_participantes': int(len(ids)),
+        'items': [
+            {'texto': texto, 'media': m, 'desviacion': d, 'n': int(k)}
+            for texto, m, d, k in zip(textos, _lista(media), _lista(desviacion), n)
+        ],
+        'total': {
+            'media': _redondear(media_total[0]),
+            'desviacion': _redondear(desviacion_total[0]),
+            'n': int(n_total[0])
+        },
+        'totales': {
+            f"P{participante_id}": total
+            for participante_id, total in zip(ids.tolist(), _lista(puntuaciones))
+        }
+    }, ids, matriz
+
+
+def _comparacion_pareada(pre, post):
+    """
+    Diferencias post - pre por columna para participantes con ambas medidas.
+    Devuelve media y desviación de las diferencias, t pareada y tamaños del
+    efecto d_z (media / desviación de las diferencias) y d_av (media /
+    promedio de las desviaciones pre y post).
+    """
+    diferencias = post - pre
+    media, desviacion, n = _descriptivos(diferencias)
+    _, desviacion_pre, _ = _descriptivos(np.where(np.isnan(diferencias), np.nan, pre))
+    _, desviacion_post, _ = _descriptivos(np.where(np.isnan(diferencias), np.nan, post))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = media / (desviacion / np.sqrt(n))
+        cohen_dz = media / desviacion
+        cohen_d_av = media / ((desviacion_pre + desviacion_post) / 2)
+    return diferencias, media, desviacion, n, t, cohen_dz, cohen_d_av
+
+
+def comparar_pre_post(ids_pre, matriz_pre, ids_post, matriz_post, textos):
+    """Comparación pareada por ítem y de la puntuación total entre pre y post"""
+    comunes, indices_pre, indices_post = np.intersect1d(ids_pre, ids_post, return_indices=True)
+    pre = matriz_pre[indices_pre]
+    post = matriz_post[indices_post]
+
+    _, media, desviacion, n, t, cohen_dz, cohen_d_av = _comparacion_pareada(pre, post)
+    items = [
+        {
+            'texto': texto,
+            'media_diferencia': valores[0],
+            'desviacion_diferencia': valores[1],
+            'n': int(n_item),
+            't': valores[2],
+            'cohen_dz': valores[3],
+            'cohen_d_av': valores[4]
+        }
+        for texto, n_item, *valores in zip(
+            textos, n, _lista(media), _lista(desviacion), _lista(t), _lista(cohen_dz), _lista(cohen_d_av)
+        )
+    ]
+
+    total_pre = totales(pre)[:, np.newaxis]
+    total_post = totales(post)[:, np.newaxis]
+    diferencias, media, desviacion, n, t, cohen_dz, cohen_d_av = _comparacion_pareada(total_pre, total_post)
+    media_pre, _, _ = _descriptivos(np.where(np.isnan(diferencias), np.nan, total_pre))
+    media_post, _, _ = _descriptivos(np.where(np.isnan(diferencias), np.nan, total_post))
+
+    return {
+        'n_pares': int(len(comunes)),
+        'items': items,
+        'total': {
+            'media_pre': _redondear(media_pre[0]),
+            'media_post': _redondear(media_post[0]),
+            'media_diferencia': _redondear(media[0]),
+            'desviacion_diferencia': _redondear(desviacion[0]),
+            'n': int(n[0]),
+            't': _redondear(t[0]),
+            'cohen_dz': _redondear(cohen_dz[0]),
+            'cohen_d_av': _redondear(cohen_d_av[0])
+        },
+        'diferencias': {
+            f"P{participante_id}": diferencia
+            for participante_id, diferencia in zip(comunes.tolist(), _lista(diferencias[:, 0]))
+        }
+    }
+
+
+def calcular_analisis(programa):
+    pre = programa.cuestionario_pre
+    post = programa.cuestionario_post
+    resultado = {'pre': None, 'post': None, 'comparacion': None}
+
+    if es_likert(pre):
+        resultado['pre'], ids_pre, matriz_pre = analizar_cuestionario(pre)
+    if es_likert(post):
+        resultado['post'], ids_post, matriz_post = analizar_cuestionario(post)
+
+    # Solo se comparan cuestionarios con el mismo número de ítems
+    if resultado['pre'] and resultado['post'] and matriz_pre.shape[1] == matriz_post.shape[1]:
+        resultado['comparacion'] = comparar_pre_post(
+            ids_pre, matriz_pre, ids_post, matriz_post, pre.preguntas[0]['textos']
+        )
+
+    return resultado
+
+
+def _version_cuestionario(cuestionario):
+    return f"{cuestionario.pk}@{cuestionario.fecha_actualizacion.isoformat()}" if cuestionario else None
+
+
+def analisis_programa(programa):
+    """Análisis Likert del programa, recalculado solo si cambian sus respuestas o sus cuestionarios"""
+    respuestas = huella(
+        RespuestaCuestionario.objects.filter(
+            cuestionario_id__in=[programa.cuestionario_pre_id, programa.cuestionario_post_id]
+        ),
+        'fecha_respuesta'
+    )
+    clave = (
+        f"analisis_likert:{programa.pk}:{_version_cuestionario(programa.cuestionario_pre)}:"
+        f"{_version_cuestionario(programa.cuestionario_post)}:{respuestas}"
+    )
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = calcular_analisis(programa)
+        cache.set(clave, resultado, ANALISIS_CACHE_SEGUNDOS)
+    return resultado
@@ -4,13 +4,15 @@ from .programa import (
     programa_detail,
     programa_publicar,
     programa_duplicar,
+    programa_duplicar_lote,
     programa_abandonar,
     programa_enrolar,
+    programa_enrolar_masivo,
     mis_programas_completados,
     programa_inscripciones,
     obtener_participantes_programa
 )
-from .cuestionarios import programa_cuestionarios_y_respuestas
+from .cuestionarios import programa_cuestionarios_y_respuestas, programa_analisis_likert
 from .diarios import programa_diarios_sesion
 from .estadisticas import (
     investigador_estadisticas,
@@ -18,21 +20,32 @@ from .estadisticas import (
     programa_estadisticas_progreso
 )
 from .exportacion import exportar_datos_programa
+from .trabajos_exportacion import (
+    programa_exportacion_crear,
+    exportacion_detail,
+    exportacion_descargar
+)
 
 __all__ = [
     'programa_list_create',
     'programa_detail',
     'programa_publicar',
     'programa_duplicar',
+    'programa_duplicar_lote',
     'programa_abandonar',
     'programa_cuestionarios_y_respuestas',
+    'programa_analisis_likert',
     'programa_diarios_sesion',
     'investigador_estadisticas',
     'programa_estadisticas',
     'programa_estadisticas_progreso',
     'exportar_datos_programa',
+    'programa_exportacion_crear',
+    'exportacion_detail',
+    'exportacion_descargar',
     'mi_programa',
     'programa_enrolar',
+    'programa_enrolar_masivo',
     'mis_programas_completados',
     'programa_inscripciones',
     'obtener_participantes_programa'
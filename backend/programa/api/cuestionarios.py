@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from usuario.permissions import IsInvestigador
 from django.shortcuts import get_object_or_404
 from ..models import Programa
+from ..analisis_likert import analisis_programa
 from cuestionario.models import RespuestaCuestionario
 
 @api_view(['GET'])
@@ -101,4 +102,32 @@ def programa_cuestionarios_y_respuestas(request, pk):
         return Response(
             {'error': 'Error al obtener los cuestionarios y respuestas'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
\ No newline at end of file
+        ) 
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsInvestigador])
+def programa_analisis_likert(request, pk):
+    """
+    Análisis de los cuestionarios Likert pre y post de un programa:
+    - Por cuestionario: media y desviación de cada ítem y puntuación total por participante
+    - Comparación pareada pre/post: diferencias, t pareada y tamaños del efecto (d_z y d_av)
+    """
+    try:
+        programa = get_object_or_404(
+            Programa.objects.select_related('cuestionario_pre', 'cuestionario_post'), pk=pk
+        )
+
+        if programa.creado_por_id != request.user.perfil_investigador.id:
+            return Response(
+                {'error': 'No tienes permiso para ver este programa'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        return Response(analisis_programa(programa))
+
+    except Exception as e:
+        print(f"Error al analizar los cuestionarios: {str(e)}")
+        return Response(
+            {'error': 'Error al analizar los cuestionarios'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -4,11 +4,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from usuario.permissions import IsInvestigador
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
-from ..models import Programa, InscripcionPrograma
+from django.db.models import Count, Sum
+from ..models import Programa, InscripcionPrograma, ProgresoParticipante
+from ..agregaciones import estadisticas_investigador
 from sesion.models import DiarioSesion
 from cuestionario.models import RespuestaCuestionario
-from config.enums import EstadoInscripcion
+from config.enums import EstadoInscripcion, etiqueta
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsInvestigador])
@@ -19,48 +20,8 @@ def investigador_estadisticas(request):
     por participantes en todos los programas del investigador.
     """
     try:
-        programas = Programa.objects.filter(creado_por=request.user.perfil_investigador)
-        total_programas = programas.count()
-        
-        participantes_activos = InscripcionPrograma.objects.filter(
-            programa__creado_por=request.user.perfil_investigador,
-        ).count()
-        
-        total_sesiones_completadas = DiarioSesion.objects.filter(
-            sesion__programa__creado_por=request.user.perfil_investigador
-        ).count()
-        
-        total_cuestionarios_respondidos = RespuestaCuestionario.objects.filter(
-            Q(cuestionario__programas_pre__creado_por=request.user.perfil_investigador) | 
-            Q(cuestionario__programas_post__creado_por=request.user.perfil_investigador)
-        ).count()
-        
-        programas_stats = []
-        for programa in programas:
-            participantes_programa = programa.inscripciones.count()
-            
-            sesiones_completadas_programa = DiarioSesion.objects.filter(
-                sesion__programa=programa
-            ).count()
-            
-            respuestas_pre = RespuestaCuestionario.objects.filter(
-                cuestionario=programa.cuestionario_pre
-            ).count() if programa.cuestionario_pre else 0
-            
-            respuestas_post = RespuestaCuestionario.objects.filter(
-                cuestionario=programa.cuestionario_post
-            ).count() if programa.cuestionario_post else 0
-            
-            programas_stats.append({
-                'id': programa.id,
-                'nombre': programa.nombre,
-                'estado': programa.estado_publicacion,
-                'participantes': participantes_programa,
-                'sesiones_completadas': sesiones_completadas_programa,
-                'respuestas_pre': respuestas_pre,
-                'respuestas_post': respuestas_post,
-                'total_cuestionarios': respuestas_pre + respuestas_post
-            })
+        estadisticas = estadisticas_investigador(request.user.perfil_investigador)
+        programas_stats = estadisticas['programas_stats']
         
         programas_destacados = sorted(
             programas_stats, 
@@ -69,10 +30,10 @@ def investigador_estadisticas(request):
         )[:3]
         
         return Response({
-            'total_programas': total_programas,
-            'participantes_activos': participantes_activos,
-            'sesiones_completadas': total_sesiones_completadas,
-            'cuestionarios_respondidos': total_cuestionarios_respondidos,
+            'total_programas': estadisticas['total_programas'],
+            'participantes_activos': estadisticas['participantes_activos'],
+            'sesiones_completadas': estadisticas['sesiones_completadas'],
+            'cuestionarios_respondidos': estadisticas['cuestionarios_respondidos'],
             'programas_stats': programas_stats,
             'programas_destacados': programas_destacados
         })
@@ -103,29 +64,23 @@ def programa_estadisticas(request, pk):
         total_participantes = inscripciones.count()
         
         sesiones_totales = programa.sesiones.count()
-        sesiones_completadas = DiarioSesion.objects.filter(
-            sesion__programa=programa
-        ).count()
-        
-        minutos_totales = 0
-        diarios = DiarioSesion.objects.filter(
-            sesion__programa=programa
-        ).select_related('sesion')
-        
-        for diario in diarios:
-            if diario.sesion.duracion_estimada:
-                minutos_totales += diario.sesion.duracion_estimada
+        diarios = DiarioSesion.objects.filter(programa=programa)
+        totales_diarios = diarios.aggregate(total=Count('pk'), minutos=Sum('duracion_estimada'))
+        sesiones_completadas = totales_diarios['total']
+        minutos_totales = totales_diarios['minutos'] or 0
         
         porcentaje_completado = round((sesiones_completadas / (sesiones_totales * total_participantes) * 100) if total_participantes > 0 else 0, 2)
         
         diarios_detalle = []
-        for diario in diarios:
+        for diario in diarios.select_related('sesion').only(
+            'id', 'participante_id', 'sesion_id', 'sesion__titulo', 'semana', 'fecha_creacion', 'valoracion', 'comentario'
+        ):
             diarios_detalle.append({
                 'id': diario.id,
-                'participante_id': diario.participante.id,
-                'sesion_id': diario.sesion.id,
+                'participante_id': diario.participante_id,
+                'sesion_id': diario.sesion_id,
                 'sesion_titulo': diario.sesion.titulo,
-                'semana': diario.sesion.semana,
+                'semana': diario.semana,
                 'fecha_creacion': diario.fecha_creacion,
                 'valoracion': diario.valoracion,
                 'comentario': diario.comentario
@@ -146,12 +101,12 @@ def programa_estadisticas(request, pk):
             
             respuestas_pre = RespuestaCuestionario.objects.filter(
                 cuestionario=programa.cuestionario_pre
-            ).select_related('participante')
+            )
             
             for respuesta in respuestas_pre:
                 cuestionarios_detalle['pre']['respuestas'].append({
                     'id': respuesta.id,
-                    'participante_id': respuesta.participante.id,
+                    'participante_id': respuesta.participante_id,
                     'fecha_respuesta': respuesta.fecha_respuesta,
                     'respuestas': respuesta.respuestas
                 })
@@ -166,12 +121,12 @@ def programa_estadisticas(request, pk):
             
             respuestas_post = RespuestaCuestionario.objects.filter(
                 cuestionario=programa.cuestionario_post
-            ).select_related('participante')
+            )
             
             for respuesta in respuestas_post:
                 cuestionarios_detalle['post']['respuestas'].append({
                     'id': respuesta.id,
-                    'participante_id': respuesta.participante.id,
+                    'participante_id': respuesta.participante_id,
                     'fecha_respuesta': respuesta.fecha_respuesta,
                     'respuestas': respuesta.respuestas
                 })
@@ -206,7 +161,13 @@ def programa_estadisticas_progreso(request, pk):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        inscripciones = InscripcionPrograma.objects.filter(programa=programa).select_related('participante')
+        inscripciones = InscripcionPrograma.objects.filter(programa=programa).only(
+            'participante', 'estado_inscripcion'
+        )
+        progresos = {
+            progreso.participante_id: progreso
+            for progreso in ProgresoParticipante.objects.filter(programa=programa)
+        }
         
         total_sesiones = programa.sesiones.count()
         total_cuestionarios = 2 if programa.tiene_cuestionarios else 0
@@ -214,74 +175,23 @@ def programa_estadisticas_progreso(request, pk):
         progreso_participantes = {}
         
         for inscripcion in inscripciones:
-            try:
-                participante = inscripcion.participante
-                id_anonimo = f"P{participante.id}"
-                
-                sesiones_completadas = DiarioSesion.objects.filter(
-                    sesion__programa=programa,
-                    participante=participante
-                ).count()
-                
-                minutos_practica = 0
-                diarios = DiarioSesion.objects.filter(
-                    sesion__programa=programa,
-                    participante=participante
-                ).select_related('sesion')
-                
-                for diario in diarios:
-                    if diario.sesion.duracion_estimada:
-                        minutos_practica += diario.sesion.duracion_estimada
-                
-                cuestionarios_completados = 0
-                if programa.cuestionario_pre:
-                    if RespuestaCuestionario.objects.filter(
-                        cuestionario=programa.cuestionario_pre,
-                        participante=participante
-                    ).exists():
-                        cuestionarios_completados += 1
-                
-                if programa.cuestionario_post:
-                    if RespuestaCuestionario.objects.filter(
-                        cuestionario=programa.cuestionario_post,
-                        participante=participante
-                    ).exists():
-                        cuestionarios_completados += 1
-                
-                estado = inscripcion.estado_inscripcion
-                estado_inscripcion_display = str(dict(EstadoInscripcion.choices).get(estado, estado))
-                
-                ultima_actividad = None
-                ultimo_diario = DiarioSesion.objects.filter(
-                    sesion__programa=programa,
-                    participante=participante
-                ).order_by('-fecha_creacion').first()
-                
-                ultima_respuesta = RespuestaCuestionario.objects.filter(
-                    cuestionario__programa=programa,
-                    participante=participante
-                ).order_by('-fecha_respuesta').first()
-                
-                if ultimo_diario and ultima_respuesta:
-                    ultima_actividad = max(ultimo_diario.fecha_creacion, ultima_respuesta.fecha_respuesta)
-                elif ultimo_diario:
-                    ultima_actividad = ultimo_diario.fecha_creacion
-                elif ultima_respuesta:
-                    ultima_actividad = ultima_respuesta.fecha_respuesta
-                
-                progreso_participantes[id_anonimo] = {
-                    'estado': estado,
-                    'estado_inscripcion_display': estado_inscripcion_display,
-                    'sesiones_completadas': sesiones_completadas,
-                    'total_sesiones': total_sesiones,
-                    'cuestionarios_completados': cuestionarios_completados,
-                    'total_cuestionarios': total_cuestionarios,
-                    'minutos_practica': minutos_practica,
-                    'ultima_actividad': ultima_actividad.strftime('%Y-%m-%d %H:%M') if ultima_actividad else 'N/A'
-                }
-            except Exception as e:
-                print(f"Error procesando participante {participante.id}: {str(e)}")
-                continue
+            id_anonimo = f"P{inscripcion.participante_id}"
+            progreso = progresos.get(inscripcion.participante_id) or ProgresoParticipante()
+            
+            estado = inscripcion.estado_inscripcion
+            estado_inscripcion_display = etiqueta(EstadoInscripcion, estado)
+            ultima_actividad = progreso.ultima_actividad
+            
+            progreso_participantes[id_anonimo] = {
+                'estado': estado,
+                'estado_inscripcion_display': estado_inscripcion_display,
+                'sesiones_completadas': progreso.sesiones_completadas,
+                'total_sesiones': total_sesiones,
+                'cuestionarios_completados': progreso.cuestionarios_completados,
+                'total_cuestionarios': total_cuestionarios,
+                'minutos_practica': progreso.minutos_practica,
+                'ultima_actividad': ultima_actividad.strftime('%Y-%m-%d %H:%M') if ultima_actividad else 'N/A'
+            }
         
         return Response({
             'programa_id': programa.id,
@@ -8,304 +8,631 @@ from django.shortcuts import get_object_or_404
 from ..models import Programa, InscripcionPrograma
 from sesion.models import DiarioSesion, Sesion
 from cuestionario.models import RespuestaCuestionario
+from ..progreso import calcular_progreso_esperado
 from config.enums import (
-    TipoContexto, EnfoqueMetodologico, EstadoPublicacion, 
+    TipoContexto, EnfoqueMetodologico, EstadoPublicacion,
     EstadoInscripcion, EtiquetaPractica, Genero, NivelEducativo,
-    ExperienciaMindfulness
+    ExperienciaMindfulness, etiquetas
 )
 import csv
+import importlib.util
 import json
 import xlsxwriter
 import zipfile
-from io import BytesIO, StringIO
-from django.http import HttpResponse
+from io import BytesIO
+from django.http import HttpResponse, StreamingHttpResponse
 from datetime import datetime
 
-def generar_archivo_participantes(programa, formato):
-    """Genera el archivo de participantes en el formato especificado"""
-    if not programa:
-        return None
+# Número de filas que se leen de la base de datos en cada lote al exportar
+TAMANO_LOTE_EXPORTACION = 2000
+
+ENCABEZADOS_PARTICIPANTES = [
+    'ID Participante',
+    'Género',
+    'Edad',
+    'Ocupación',
+    'Nivel Educativo',
+    'Ubicación',
+    'Experiencia Mindfulness',
+    'Condiciones de Salud',
+    'Estado del Programa',
+    'Sesiones Completadas',
+    'Cuestionarios Completados',
+    'Minutos de Práctica',
+    'Última Actividad'
+]
+
+CAMPOS_PARTICIPANTES = [
+    'id_participante',
+    'genero',
+    'edad',
+    'ocupacion',
+    'nivel_educativo',
+    'ubicacion',
+    'experiencia_mindfulness',
+    'condiciones_salud',
+    'estado_programa',
+    'sesiones_completadas',
+    'cuestionarios_completados',
+    'minutos_practica',
+    'ultima_actividad'
+]
+
+ENCABEZADOS_DIARIOS = [
+    'Semana',
+    'Sesión',
+    'Tipo de Práctica',
+    'ID Participante',
+    'Valoración',
+    'Comentario',
+    'Fecha'
+]
+
+CAMPOS_DIARIOS = ['semana', 'sesion', 'tipo_practica', 'id_participante', 'valoracion', 'comentario', 'fecha']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+EXTENSIONES = {
+    'csv': 'csv',
+    'excel': 'xlsx',
+    'json': 'json',
+    'parquet': 'parquet'
+}
+
+# Formatos que se generan por partes; el resto se construye completo en memoria
+FORMATOS_STREAMING = ('csv', 'json')
+
+TIPOS_EXPORTACION = ('todos', 'cuestionarios', 'diarios', 'participantes')
+
+# Tipos de exportación que se entregan como ZIP con varios archivos
+TIPOS_ZIP = ('todos', 'cuestionarios')
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer que devuelve la línea escrita en lugar de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+class _BufferZip:
+    """
+    Destino no posicionable para zipfile. Acumula los bytes escritos hasta que
+    se consumen con vaciar(), de modo que el ZIP se puede emitir por partes.
+    """
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def stream_csv(encabezados, filas):
+    """Genera un CSV (UTF-8 con BOM) línea a línea."""
+    writer = csv.writer(_Eco())
+    yield ('\ufeff' + writer.writerow(encabezados)).encode('utf-8')
+    for fila in filas:
+        yield writer.writerow(fila).encode('utf-8')
 
-    # Datos de participantes
-    participantes_data = []
-    inscripciones = InscripcionPrograma.objects.filter(programa=programa).select_related('participante__usuario')
-    
-    if not inscripciones.exists():
-        return None
+
+def stream_json_lista(elementos):
+    """Genera una lista JSON elemento a elemento."""
+    yield b'['
+    separador = b''
+    for elemento in elementos:
+        yield separador + json.dumps(elemento, ensure_ascii=False).encode('utf-8')
+        separador = b', '
+    yield b']'
+
+
+def stream_json_objeto(cabecera, clave, contenido, es_lista):
+    """
+    Genera un objeto JSON con los campos fijos de `cabecera` seguidos de
+    `clave`, cuyo valor (lista u objeto) se emite elemento a elemento.
+    """
+    prefijo = json.dumps(cabecera, ensure_ascii=False)[:-1]
+    if cabecera:
+        prefijo += ', '
+    yield (prefijo + json.dumps(clave) + ': ').encode('utf-8')
+    if es_lista:
+        yield from stream_json_lista(contenido)
+    else:
+        yield b'{'
+        separador = ''
+        for subclave, valor in contenido:
+            yield (separador + json.dumps(subclave) + ': ' + json.dumps(valor, ensure_ascii=False)).encode('utf-8')
+            separador = ', '
+        yield b'}'
+    yield b'}'
+
+
+def stream_zip(archivos):
+    """
+    Genera un ZIP a partir de un iterable de (nombre, iterable de bytes),
+    emitiendo los datos comprimidos a medida que se escriben.
+    """
+    buffer = _BufferZip()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for nombre, contenido in archivos:
+            with zip_file.open(nombre, 'w', force_zip64=True) as destino:
+                for trozo in contenido:
+                    destino.write(trozo)
+                    datos = buffer.vaciar()
+                    if datos:
+                        yield datos
+            datos = buffer.vaciar()
+            if datos:
+                yield datos
+    yield buffer.vaciar()
+
+
+def cargar_datos_participantes(programa):
+    """
+    Carga en bloque los datos de progreso de todos los participantes del
+    programa con un número fijo de consultas, independiente del número de
+    participantes. Devuelve (progresos, cuestionarios_respondidos):
+    - progresos: {participante_id: {sesiones_completadas, minutos_practica, ultima_actividad, ...}}
+    - cuestionarios_respondidos: {participante_id: número de cuestionarios pre/post respondidos}
+    """
+    progresos = {
+        participante_id: datos
+        for (_, participante_id), datos in calcular_progreso_esperado(programa).items()
+    }
+
+    cuestionarios = [
+        cuestionario_id
+        for cuestionario_id in (programa.cuestionario_pre_id, programa.cuestionario_post_id)
+        if cuestionario_id
+    ]
+    cuestionarios_respondidos = {}
+    if cuestionarios:
+        respondidos = RespuestaCuestionario.objects.filter(
+            cuestionario__in=cuestionarios
+        ).order_by().values_list('participante', 'cuestionario').distinct()
+        for participante_id, _ in respondidos:
+            cuestionarios_respondidos[participante_id] = cuestionarios_respondidos.get(participante_id, 0) + 1
+
+    return progresos, cuestionarios_respondidos
+
+
+def registros_participantes(programa):
+    """
+    Genera los datos de cada participante del programa con sus tipos
+    originales (enteros, fechas, None si no hay valor). Es la base de las
+    exportaciones de texto (filas_participantes) y de Parquet.
+    """
+    inscripciones = InscripcionPrograma.objects.filter(
+        programa=programa
+    ).order_by('-fecha_inicio', 'id').values(
+        'estado_inscripcion',
+        'participante_id',
+        'participante__experienciaMindfulness',
+        'participante__condicionesSalud',
+        'participante__usuario__fechaNacimiento',
+        'participante__usuario__genero',
+        'participante__usuario__nivelEducativo',
+        'participante__usuario__ocupacion',
+        'participante__usuario__ubicacion'
+    )
 
     # Calcular totales del programa
     total_sesiones = programa.sesiones.count()
     total_cuestionarios = 2 if programa.tiene_cuestionarios else 0
 
-    for inscripcion in inscripciones:
+    progresos, cuestionarios_respondidos = cargar_datos_participantes(programa)
+    sin_progreso = {'sesiones_completadas': 0, 'minutos_practica': 0, 'ultima_actividad': None}
+
+    # Etiquetas de los enums
+    generos = etiquetas(Genero)
+    niveles_educativos = etiquetas(NivelEducativo)
+    experiencias = etiquetas(ExperienciaMindfulness)
+    estados_inscripcion = etiquetas(EstadoInscripcion)
+
+    hoy = datetime.now().date()
+
+    for inscripcion in inscripciones.iterator(chunk_size=TAMANO_LOTE_EXPORTACION):
+        participante_id = inscripcion['participante_id']
         try:
-            participante = inscripcion.participante
-            usuario = participante.usuario
-            
             # Calcular edad si fechaNacimiento está disponible
-            edad = None
-            if hasattr(usuario, 'fechaNacimiento') and usuario.fechaNacimiento:
-                edad = (datetime.now().date() - usuario.fechaNacimiento).days // 365
-            
-            # Obtener valores display de los enums y convertir a string
-            genero_display = str(dict(Genero.choices).get(usuario.genero, usuario.genero)) if hasattr(usuario, 'genero') else 'No especificado'
-            nivel_educativo_display = str(dict(NivelEducativo.choices).get(usuario.nivelEducativo, usuario.nivelEducativo)) if hasattr(usuario, 'nivelEducativo') else 'No especificado'
-            experiencia_mindfulness_display = str(dict(ExperienciaMindfulness.choices).get(participante.experienciaMindfulness, participante.experienciaMindfulness)) if hasattr(participante, 'experienciaMindfulness') else 'No especificado'
-            estado_inscripcion_display = str(dict(EstadoInscripcion.choices).get(inscripcion.estado_inscripcion, inscripcion.estado_inscripcion))
-            
-            # Calcular datos de progreso
-            sesiones_completadas = DiarioSesion.objects.filter(
-                sesion__programa=programa,
-                participante=participante
-            ).count()
-            
-            minutos_practica = 0
-            diarios = DiarioSesion.objects.filter(
-                sesion__programa=programa,
-                participante=participante
-            ).select_related('sesion')
-            
-            for diario in diarios:
-                if diario.sesion.duracion_estimada:
-                    minutos_practica += diario.sesion.duracion_estimada
-            
-            cuestionarios_completados = 0
-            if programa.cuestionario_pre:
-                if RespuestaCuestionario.objects.filter(
-                    cuestionario=programa.cuestionario_pre,
-                    participante=participante
-                ).exists():
-                    cuestionarios_completados += 1
-            
-            if programa.cuestionario_post:
-                if RespuestaCuestionario.objects.filter(
-                    cuestionario=programa.cuestionario_post,
-                    participante=participante
-                ).exists():
-                    cuestionarios_completados += 1
-            
-            ultima_actividad = None
-            ultimo_diario = DiarioSesion.objects.filter(
-                sesion__programa=programa,
-                participante=participante
-            ).order_by('-fecha_creacion').first()
-            
-            ultima_respuesta = RespuestaCuestionario.objects.filter(
-                cuestionario__programa=programa,
-                participante=participante
-            ).order_by('-fecha_respuesta').first()
-            
-            if ultimo_diario and ultima_respuesta:
-                ultima_actividad = max(ultimo_diario.fecha_creacion, ultima_respuesta.fecha_respuesta)
-            elif ultimo_diario:
-                ultima_actividad = ultimo_diario.fecha_creacion
-            elif ultima_respuesta:
-                ultima_actividad = ultima_respuesta.fecha_respuesta
-
-            participantes_data.append({
-                'id_participante': f"P{participante.id}",
+            fecha_nacimiento = inscripcion['participante__usuario__fechaNacimiento']
+
+            genero = inscripcion['participante__usuario__genero']
+            nivel_educativo = inscripcion['participante__usuario__nivelEducativo']
+            experiencia = inscripcion['participante__experienciaMindfulness']
+            estado = inscripcion['estado_inscripcion']
+            progreso = progresos.get(participante_id, sin_progreso)
+
+            yield {
+                'id_participante': f"P{participante_id}",
                 # Datos demográficos
-                'genero': genero_display,
-                'edad': f"{edad} años" if edad is not None else 'No especificado',
-                'ocupacion': str(usuario.ocupacion) if hasattr(usuario, 'ocupacion') and usuario.ocupacion else 'No especificado',
-                'nivel_educativo': nivel_educativo_display,
-                'ubicacion': str(usuario.ubicacion) if hasattr(usuario, 'ubicacion') and usuario.ubicacion else 'No especificado',
-                'experiencia_mindfulness': experiencia_mindfulness_display,
-                'condiciones_salud': str(participante.condicionesSalud) if hasattr(participante, 'condicionesSalud') and participante.condicionesSalud else 'No especificado',
+                'genero': generos.get(genero, genero),
+                'edad': (hoy - fecha_nacimiento).days // 365 if fecha_nacimiento else None,
+                'ocupacion': inscripcion['participante__usuario__ocupacion'] or None,
+                'nivel_educativo': niveles_educativos.get(nivel_educativo, nivel_educativo),
+                'ubicacion': inscripcion['participante__usuario__ubicacion'] or None,
+                'experiencia_mindfulness': experiencias.get(experiencia, experiencia),
+                'condiciones_salud': inscripcion['participante__condicionesSalud'] or None,
                 # Datos de progreso
-                'estado_programa': estado_inscripcion_display,
-                'sesiones_completadas': f"{sesiones_completadas} / {total_sesiones}",
-                'cuestionarios_completados': f"{cuestionarios_completados} / {total_cuestionarios}",
-                'minutos_practica': f"{minutos_practica} min",
-                'ultima_actividad': ultima_actividad.strftime('%Y-%m-%d %H:%M') if ultima_actividad else 'N/A'
-            })
+                'estado_programa': estados_inscripcion.get(estado, estado),
+                'sesiones_completadas': progreso['sesiones_completadas'],
+                'total_sesiones': total_sesiones,
+                'cuestionarios_completados': cuestionarios_respondidos.get(participante_id, 0),
+                'total_cuestionarios': total_cuestionarios,
+                'minutos_practica': progreso['minutos_practica'],
+                'ultima_actividad': progreso['ultima_actividad']
+            }
         except Exception as e:
-            print(f"Error procesando participante {inscripcion.participante.id}: {str(e)}")
+            print(f"Error procesando participante {participante_id}: {str(e)}")
             continue
-    
+
+
+def filas_participantes(programa):
+    """Genera los datos de exportación de cada participante del programa"""
+    for registro in registros_participantes(programa):
+        edad = registro['edad']
+        ultima_actividad = registro['ultima_actividad']
+        yield {
+            'id_participante': registro['id_participante'],
+            # Datos demográficos
+            'genero': str(registro['genero']),
+            'edad': f"{edad} años" if edad is not None else 'No especificado',
+            'ocupacion': str(registro['ocupacion'] or 'No especificado'),
+            'nivel_educativo': str(registro['nivel_educativo']),
+            'ubicacion': str(registro['ubicacion'] or 'No especificado'),
+            'experiencia_mindfulness': str(registro['experiencia_mindfulness']),
+            'condiciones_salud': str(registro['condiciones_salud'] or 'No especificado'),
+            # Datos de progreso
+            'estado_programa': str(registro['estado_programa']),
+            'sesiones_completadas': f"{registro['sesiones_completadas']} / {registro['total_sesiones']}",
+            'cuestionarios_completados': f"{registro['cuestionarios_completados']} / {registro['total_cuestionarios']}",
+            'minutos_practica': f"{registro['minutos_practica']} min",
+            'ultima_actividad': ultima_actividad.strftime('%Y-%m-%d %H:%M') if ultima_actividad else 'N/A'
+        }
+
+
+def registros_diarios(programa):
+    """Genera los datos de cada diario del programa con sus tipos originales, ordenados por semana"""
+    diarios = DiarioSesion.objects.filter(
+        programa=programa
+    ).select_related('sesion').order_by('semana', 'sesion_id', 'fecha_creacion', 'id')
+
+    tipos_practica = etiquetas(EtiquetaPractica)
+
+    for diario in diarios.iterator(chunk_size=TAMANO_LOTE_EXPORTACION):
+        sesion = diario.sesion
+        yield {
+            'semana': diario.semana,
+            'sesion': str(sesion.titulo),
+            'tipo_practica': tipos_practica.get(sesion.tipo_practica, sesion.tipo_practica),
+            'id_participante': f"P{diario.participante_id}",
+            'valoracion': diario.valoracion,
+            'comentario': diario.comentario or None,
+            'fecha': diario.fecha_creacion
+        }
+
+
+def filas_diarios(programa):
+    """Genera los datos de exportación de cada diario del programa, ordenados por semana"""
+    for registro in registros_diarios(programa):
+        registro['comentario'] = str(registro['comentario'] or 'Sin comentario')
+        registro['fecha'] = registro['fecha'].strftime('%d/%m/%Y')
+        yield registro
+
+
+def _respuestas_cuestionario(cuestionario):
+    return RespuestaCuestionario.objects.filter(
+        cuestionario=cuestionario
+    ).order_by('participante__id', 'fecha_respuesta').iterator(chunk_size=TAMANO_LOTE_EXPORTACION)
+
+
+def _valores_likert(respuesta, textos):
+    return [
+        str(respuesta.respuestas[i]) if i < len(respuesta.respuestas) else 'N/A'
+        for i in range(len(textos))
+    ]
+
+
+def _valores_regular(respuesta, preguntas):
+    valores = []
+    for pregunta in preguntas:
+        valor_respuesta = respuesta.respuestas.get(str(pregunta['id']), 'N/A')
+        valores.append(str(valor_respuesta) if valor_respuesta is not None else 'N/A')
+    return valores
+
+
+def _cuestionario_de(programa, momento):
+    return programa.cuestionario_pre if momento == 'pre' else programa.cuestionario_post
+
+
+def stream_archivo_participantes(programa, formato):
+    """Genera por partes el archivo CSV o JSON de participantes"""
     if formato == 'json':
-        return json.dumps(participantes_data, ensure_ascii=False).encode('utf-8')
-    
-    elif formato == 'csv':
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Escribir encabezados
-        writer.writerow([
-            'ID Participante',
-            'Género',
-            'Edad',
-            'Ocupación',
-            'Nivel Educativo',
-            'Ubicación',
-            'Experiencia Mindfulness',
-            'Condiciones de Salud',
-            'Estado del Programa',
-            'Sesiones Completadas',
-            'Cuestionarios Completados',
-            'Minutos de Práctica',
-            'Última Actividad'
-        ])
-        
-        # Escribir datos
-        for participante in participantes_data:
-            writer.writerow([
-                participante['id_participante'],
-                participante['genero'],
-                participante['edad'],
-                participante['ocupacion'],
-                participante['nivel_educativo'],
-                participante['ubicacion'],
-                participante['experiencia_mindfulness'],
-                participante['condiciones_salud'],
-                participante['estado_programa'],
-                participante['sesiones_completadas'],
-                participante['cuestionarios_completados'],
-                participante['minutos_practica'],
-                participante['ultima_actividad']
-            ])
-        
-        return output.getvalue().encode('utf-8-sig')
-    
+        return stream_json_lista(filas_participantes(programa))
+    return stream_csv(
+        ENCABEZADOS_PARTICIPANTES,
+        ([fila[campo] for campo in CAMPOS_PARTICIPANTES] for fila in filas_participantes(programa))
+    )
+
+
+def stream_archivo_diarios(programa, formato):
+    """Genera por partes el archivo CSV o JSON de diarios"""
+    if formato == 'json':
+        return stream_json_lista(filas_diarios(programa))
+    return stream_csv(
+        ENCABEZADOS_DIARIOS,
+        ([fila[campo] for campo in CAMPOS_DIARIOS] for fila in filas_diarios(programa))
+    )
+
+
+def stream_archivo_cuestionario(programa, momento, formato):
+    """Genera por partes el archivo CSV o JSON de un cuestionario (pre o post)"""
+    cuestionario = _cuestionario_de(programa, momento)
+
+    if cuestionario.tipo_cuestionario == 'likert':
+        etiquetas = cuestionario.preguntas[0]['etiquetas']
+        textos = cuestionario.preguntas[0]['textos']
+
+        if formato == 'json':
+            return stream_json_objeto(
+                {'tipo': 'likert', 'momento': momento, 'etiquetas': etiquetas, 'textos': textos},
+                'respuestas',
+                (
+                    (f"P{respuesta.participante_id}", respuesta.respuestas)
+                    for respuesta in _respuestas_cuestionario(cuestionario)
+                ),
+                es_lista=False
+            )
+        return stream_csv(
+            ['ID Participante'] + textos,
+            (
+                [f"P{respuesta.participante_id}"] + _valores_likert(respuesta, textos)
+                for respuesta in _respuestas_cuestionario(cuestionario)
+            )
+        )
+
+    preguntas = [str(p['texto']) for p in cuestionario.preguntas]
+
+    if formato == 'json':
+        def datos():
+            for respuesta in _respuestas_cuestionario(cuestionario):
+                fila = {'ID Participante': f"P{respuesta.participante_id}"}
+                fila.update(zip(preguntas, _valores_regular(respuesta, cuestionario.preguntas)))
+                yield fila
+
+        return stream_json_objeto(
+            {'tipo': 'regular', 'momento': momento, 'preguntas': preguntas},
+            'datos',
+            datos(),
+            es_lista=True
+        )
+    return stream_csv(
+        ['ID Participante'] + preguntas,
+        (
+            [f"P{respuesta.participante_id}"] + _valores_regular(respuesta, cuestionario.preguntas)
+            for respuesta in _respuestas_cuestionario(cuestionario)
+        )
+    )
+
+
+def _formato_encabezado(workbook):
+    return workbook.add_format({
+        'bold': True,
+        'bg_color': '#D9E1F2',
+        'border': 1
+    })
+
+
+def parquet_disponible():
+    """pyarrow es opcional: solo se necesita para exportar en formato Parquet"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _pyarrow():
+    import pyarrow
+    import pyarrow.parquet
+    return pyarrow, pyarrow.parquet
+
+
+def escribir_parquet(columnas, registros, metadatos=None):
+    """
+    Escribe `registros` (diccionarios) en un archivo Parquet con las columnas
+    tipadas de `columnas` [(nombre, tipo de pyarrow)], un grupo de filas por
+    cada lote de TAMANO_LOTE_EXPORTACION registros. `metadatos` se guarda en
+    el esquema como JSON. Devuelve los bytes del archivo.
+    """
+    pa, pq = _pyarrow()
+    esquema = pa.schema(columnas)
+    if metadatos:
+        esquema = esquema.with_metadata({
+            clave: json.dumps(valor, ensure_ascii=False) for clave, valor in metadatos.items()
+        })
+
+    salida = pa.BufferOutputStream()
+    with pq.ParquetWriter(salida, esquema) as writer:
+        lote = []
+        for registro in registros:
+            lote.append(registro)
+            if len(lote) == TAMANO_LOTE_EXPORTACION:
+                writer.write_table(pa.Table.from_pylist(lote, schema=esquema))
+                lote = []
+        if lote:
+            writer.write_table(pa.Table.from_pylist(lote, schema=esquema))
+    return salida.getvalue().to_pybytes()
+
+
+def _entero_o_nulo(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def generar_parquet_participantes(programa):
+    pa, _ = _pyarrow()
+    return escribir_parquet([
+        ('id_participante', pa.string()),
+        ('genero', pa.string()),
+        ('edad', pa.int16()),
+        ('ocupacion', pa.string()),
+        ('nivel_educativo', pa.string()),
+        ('ubicacion', pa.string()),
+        ('experiencia_mindfulness', pa.string()),
+        ('condiciones_salud', pa.string()),
+        ('estado_programa', pa.string()),
+        ('sesiones_completadas', pa.int32()),
+        ('total_sesiones', pa.int32()),
+        ('cuestionarios_completados', pa.int8()),
+        ('total_cuestionarios', pa.int8()),
+        ('minutos_practica', pa.int32()),
+        ('ultima_actividad', pa.timestamp('us', tz='UTC')),
+    ], registros_participantes(programa))
+
+
+def generar_parquet_diarios(programa):
+    pa, _ = _pyarrow()
+    return escribir_parquet([
+        ('semana', pa.int16()),
+        ('sesion', pa.string()),
+        ('tipo_practica', pa.string()),
+        ('id_participante', pa.string()),
+        # valoracion es FloatField en el modelo (admite escalas decimales)
+        ('valoracion', pa.float64()),
+        ('comentario', pa.string()),
+        ('fecha', pa.timestamp('us', tz='UTC')),
+    ], registros_diarios(programa))
+
+
+def generar_parquet_cuestionario(cuestionario, momento):
+    """
+    Likert: una columna int8 por ítem (item_1, item_2...). Resto de tipos: una
+    columna de texto por pregunta (pregunta_<id>). Los textos de las preguntas
+    se guardan en los metadatos del esquema.
+    """
+    pa, _ = _pyarrow()
+    respuestas = _respuestas_cuestionario(cuestionario)
+
+    if cuestionario.tipo_cuestionario == 'likert':
+        textos = cuestionario.preguntas[0]['textos']
+        items = [f'item_{i}' for i in range(1, len(textos) + 1)]
+
+        def registros():
+            for respuesta in respuestas:
+                valores = respuesta.respuestas
+                registro = {'id_participante': f"P{respuesta.participante_id}", 'fecha_respuesta': respuesta.fecha_respuesta}
+                for i, item in enumerate(items):
+                    registro[item] = _entero_o_nulo(valores[i]) if i < len(valores) else None
+                yield registro
+
+        return escribir_parquet(
+            [('id_participante', pa.string())]
+            + [(item, pa.int8()) for item in items]
+            + [('fecha_respuesta', pa.timestamp('us', tz='UTC'))],
+            registros(),
+            {
+                'tipo': 'likert',
+                'momento': momento,
+                'etiquetas': cuestionario.preguntas[0]['etiquetas'],
+                'textos': dict(zip(items, textos))
+            }
+        )
+
+    columnas = [f"pregunta_{p['id']}" for p in cuestionario.preguntas]
+
+    def registros():
+        for respuesta in respuestas:
+            registro = {'id_participante': f"P{respuesta.participante_id}", 'fecha_respuesta': respuesta.fecha_respuesta}
+            for columna, pregunta in zip(columnas, cuestionario.preguntas):
+                valor = respuesta.respuestas.get(str(pregunta['id']))
+                registro[columna] = str(valor) if valor is not None else None
+            yield registro
+
+    return escribir_parquet(
+        [('id_participante', pa.string())]
+        + [(columna, pa.string()) for columna in columnas]
+        + [('fecha_respuesta', pa.timestamp('us', tz='UTC'))],
+        registros(),
+        {
+            'tipo': 'regular',
+            'momento': momento,
+            'preguntas': {columna: str(p['texto']) for columna, p in zip(columnas, cuestionario.preguntas)}
+        }
+    )
+
+
+def generar_archivo_participantes(programa, formato):
+    """Genera el archivo de participantes en el formato especificado"""
+    if not programa:
+        return None
+
+    if not InscripcionPrograma.objects.filter(programa=programa).exists():
+        return None
+
+    if formato in FORMATOS_STREAMING:
+        return b''.join(stream_archivo_participantes(programa, formato))
+
+    elif formato == 'parquet':
+        return generar_parquet_participantes(programa)
+
     elif formato == 'excel':
         output = BytesIO()
         workbook = xlsxwriter.Workbook(output)
-        
-        # Estilos
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D9E1F2',
-            'border': 1
-        })
-        
+        header_format = _formato_encabezado(workbook)
+
         # Crear hoja de participantes
         ws_participantes = workbook.add_worksheet('Participantes')
-        headers = [
-            'ID Participante',
-            'Género',
-            'Edad',
-            'Ocupación',
-            'Nivel Educativo',
-            'Ubicación',
-            'Experiencia Mindfulness',
-            'Condiciones de Salud',
-            'Estado del Programa',
-            'Sesiones Completadas',
-            'Cuestionarios Completados',
-            'Minutos de Práctica',
-            'Última Actividad'
-        ]
-        
+
         # Escribir encabezados
-        for col, header in enumerate(headers):
+        for col, header in enumerate(ENCABEZADOS_PARTICIPANTES):
             ws_participantes.write(0, col, header, header_format)
-        
+
         # Escribir datos
-        for row, participante in enumerate(participantes_data, start=1):
-            ws_participantes.write(row, 0, str(participante['id_participante']))
-            ws_participantes.write(row, 1, str(participante['genero']))
-            ws_participantes.write(row, 2, str(participante['edad']))
-            ws_participantes.write(row, 3, str(participante['ocupacion']))
-            ws_participantes.write(row, 4, str(participante['nivel_educativo']))
-            ws_participantes.write(row, 5, str(participante['ubicacion']))
-            ws_participantes.write(row, 6, str(participante['experiencia_mindfulness']))
-            ws_participantes.write(row, 7, str(participante['condiciones_salud']))
-            ws_participantes.write(row, 8, str(participante['estado_programa']))
-            ws_participantes.write(row, 9, str(participante['sesiones_completadas']))
-            ws_participantes.write(row, 10, str(participante['cuestionarios_completados']))
-            ws_participantes.write(row, 11, str(participante['minutos_practica']))
-            ws_participantes.write(row, 12, str(participante['ultima_actividad']))
-        
+        for row, participante in enumerate(filas_participantes(programa), start=1):
+            for col, campo in enumerate(CAMPOS_PARTICIPANTES):
+                ws_participantes.write(row, col, str(participante[campo]))
+
         workbook.close()
         return output.getvalue()
 
 def generar_archivo_diarios(programa, formato):
     """Genera el archivo de diarios en el formato especificado"""
-    # Obtener todas las sesiones del programa
-    sesiones = Sesion.objects.filter(programa=programa).order_by('semana', 'id')
-    diarios_data = []
-    
-    for sesion in sesiones:
-        # Obtener los diarios de esta sesión
-        diarios = DiarioSesion.objects.filter(
-            sesion=sesion
-        ).select_related('participante', 'sesion')
-        
-        for diario in diarios:
-            # Obtener valor display del tipo de práctica y convertir a string
-            tipo_practica_display = str(dict(EtiquetaPractica.choices).get(sesion.tipo_practica, sesion.tipo_practica))
-            
-            diarios_data.append({
-                'semana': sesion.semana,
-                'sesion': str(sesion.titulo),
-                'tipo_practica': tipo_practica_display,
-                'id_participante': f"P{diario.participante.id}",
-                'valoracion': diario.valoracion,
-                'comentario': str(diario.comentario) if diario.comentario else 'Sin comentario',
-                'fecha': diario.fecha_creacion.strftime('%d/%m/%Y')
-            })
-    
-    if formato == 'json':
-        return json.dumps(diarios_data, ensure_ascii=False).encode('utf-8')
-    
-    elif formato == 'csv':
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Escribir encabezados
-        writer.writerow([
-            'Semana',
-            'Sesión',
-            'Tipo de Práctica',
-            'ID Participante',
-            'Valoración',
-            'Comentario',
-            'Fecha'
-        ])
-        
-        # Escribir datos
-        for diario in diarios_data:
-            writer.writerow([
-                diario['semana'],
-                diario['sesion'],
-                diario['tipo_practica'],
-                diario['id_participante'],
-                diario['valoracion'],
-                diario['comentario'],
-                diario['fecha']
-            ])
-        
-        return output.getvalue().encode('utf-8-sig')
-    
+    if formato in FORMATOS_STREAMING:
+        return b''.join(stream_archivo_diarios(programa, formato))
+
+    elif formato == 'parquet':
+        return generar_parquet_diarios(programa)
+
     elif formato == 'excel':
         output = BytesIO()
         workbook = xlsxwriter.Workbook(output)
-        
-        # Estilos
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#D9E1F2',
-            'border': 1
-        })
-        
+        header_format = _formato_encabezado(workbook)
+
         # Crear hoja
         ws_diarios = workbook.add_worksheet('Diarios')
-        headers = [
-            'Semana',
-            'Sesión',
-            'Tipo de Práctica',
-            'ID Participante',
-            'Valoración',
-            'Comentario',
-            'Fecha'
-        ]
-        
+
         # Escribir encabezados
-        for col, header in enumerate(headers):
+        for col, header in enumerate(ENCABEZADOS_DIARIOS):
             ws_diarios.write(0, col, header, header_format)
-        
+
         # Escribir datos (asegurándonos de que todos los valores sean del tipo correcto)
-        for row, diario in enumerate(diarios_data, start=1):
+        for row, diario in enumerate(filas_diarios(programa), start=1):
             ws_diarios.write(row, 0, diario['semana'])  # número
             ws_diarios.write(row, 1, str(diario['sesion']))  # string
             ws_diarios.write(row, 2, str(diario['tipo_practica']))  # string
@@ -313,349 +640,199 @@ def generar_archivo_diarios(programa, formato):
             ws_diarios.write(row, 4, diario['valoracion'])  # número
             ws_diarios.write(row, 5, str(diario['comentario']))  # string
             ws_diarios.write(row, 6, str(diario['fecha']))  # string
-        
+
         workbook.close()
         return output.getvalue()
 
 def generar_archivo_cuestionario(programa, momento, formato):
     """Genera el archivo de cuestionario (pre o post) en el formato especificado"""
-    cuestionario = programa.cuestionario_pre if momento == 'pre' else programa.cuestionario_post
-    
+    cuestionario = _cuestionario_de(programa, momento)
+
     if not cuestionario:
         return None
 
+    if formato in FORMATOS_STREAMING:
+        return b''.join(stream_archivo_cuestionario(programa, momento, formato))
+
+    if formato == 'parquet':
+        return generar_parquet_cuestionario(cuestionario, momento)
+
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output)
+    header_format = _formato_encabezado(workbook)
+
+    # Crear hoja
+    nombre_hoja = f'Cuestionario {momento.title()}'
+    ws = workbook.add_worksheet(nombre_hoja)
+
     # Si es un cuestionario tipo Likert
     if cuestionario.tipo_cuestionario == 'likert':
-        # Obtener etiquetas y textos del cuestionario Likert
         etiquetas = cuestionario.preguntas[0]['etiquetas']
         textos = cuestionario.preguntas[0]['textos']
-        
-        # Obtener respuestas
-        respuestas = RespuestaCuestionario.objects.filter(
-            cuestionario=cuestionario
-        ).select_related('participante').order_by('participante__id', 'fecha_respuesta')
-
-        # Preparar datos para exportación
-        datos = []
-        respuestas_por_participante = {}
-        
-        for respuesta in respuestas:
-            participante_id = f"P{respuesta.participante.id}"
-            # Para JSON, mantener el formato original de respuestas por participante
-            if formato == 'json':
-                respuestas_por_participante[participante_id] = respuesta.respuestas
-            else:
-                # Para CSV y Excel, formatear como filas
-                fila = {'ID Participante': participante_id}
-                for i, texto in enumerate(textos):
-                    valor = respuesta.respuestas[i] if i < len(respuesta.respuestas) else 'N/A'
-                    fila[texto] = str(valor)
-                datos.append(fila)
 
-        if formato == 'json':
-            return json.dumps({
-                'tipo': 'likert',
-                'momento': momento,
-                'etiquetas': etiquetas,
-                'textos': textos,
-                'respuestas': respuestas_por_participante
-            }, ensure_ascii=False).encode('utf-8')
-
-        elif formato == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            # Escribir encabezados
-            writer.writerow(['ID Participante'] + textos)
-            # Escribir datos
-            for dato in datos:
-                fila = [dato['ID Participante']]
-                for texto in textos:
-                    fila.append(dato[texto])
-                writer.writerow(fila)
-            return output.getvalue().encode('utf-8-sig')
-
-        elif formato == 'excel':
-            output = BytesIO()
-            workbook = xlsxwriter.Workbook(output)
-            
-            # Estilos
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#D9E1F2',
-                'border': 1
-            })
-            
-            # Crear hoja
-            nombre_hoja = f'Cuestionario {momento.title()}'
-            ws = workbook.add_worksheet(nombre_hoja)
-            
-            # Escribir información de la escala Likert
-            ws.write(0, 0, 'Escala de valoración:', header_format)
-            for i, etiqueta in enumerate(etiquetas, start=1):
-                ws.write(0, i, f"{i}: {etiqueta}")
-            
-            # Escribir encabezados de la tabla (dejando una fila en blanco después de la escala)
-            headers = ['ID Participante'] + textos
-            for col, header in enumerate(headers):
-                ws.write(2, col, str(header), header_format)
-            
-            # Escribir datos
-            for row, dato in enumerate(datos, start=3):
-                ws.write(row, 0, dato['ID Participante'])
-                for col, texto in enumerate(textos, start=1):
-                    ws.write(row, col, dato[texto])
-            
-            workbook.close()
-            return output.getvalue()
-
-    # Para otros tipos de cuestionarios, mantener la lógica existente
+        # Escribir información de la escala Likert
+        ws.write(0, 0, 'Escala de valoración:', header_format)
+        for i, etiqueta in enumerate(etiquetas, start=1):
+            ws.write(0, i, f"{i}: {etiqueta}")
+
+        # Escribir encabezados de la tabla (dejando una fila en blanco después de la escala)
+        headers = ['ID Participante'] + textos
+        for col, header in enumerate(headers):
+            ws.write(2, col, str(header), header_format)
+
+        # Escribir datos
+        for row, respuesta in enumerate(_respuestas_cuestionario(cuestionario), start=3):
+            ws.write(row, 0, f"P{respuesta.participante_id}")
+            for col, valor in enumerate(_valores_likert(respuesta, textos), start=1):
+                ws.write(row, col, valor)
+
+    # Para otros tipos de cuestionarios
     else:
-        preguntas = []
-        indices_preguntas = []
-        
-        for i, p in enumerate(cuestionario.preguntas):
-            preguntas.append(str(p['texto']))
-            indices_preguntas.append(i)
-        
-        respuestas = RespuestaCuestionario.objects.filter(
-            cuestionario=cuestionario
-        ).select_related('participante').order_by('participante__id', 'fecha_respuesta')
-
-        # Preparar datos para exportación
-        datos = []
-        for respuesta in respuestas:
-            fila = {'ID Participante': f"P{respuesta.participante.id}"}
-            for i, pregunta in enumerate(cuestionario.preguntas):
-                if i in indices_preguntas:
-                    pregunta_id = str(pregunta['id'])
-                    valor_respuesta = respuesta.respuestas.get(pregunta_id, 'N/A')
-                    fila[str(pregunta['texto'])] = str(valor_respuesta) if valor_respuesta is not None else 'N/A'
-            datos.append(fila)
+        preguntas = [str(p['texto']) for p in cuestionario.preguntas]
 
-        if formato == 'json':
-            return json.dumps({
-                'tipo': 'regular',
-                'momento': momento,
-                'preguntas': preguntas,
-                'datos': datos
-            }, ensure_ascii=False).encode('utf-8')
+        # Escribir encabezados
+        headers = ['ID Participante'] + preguntas
+        for col, header in enumerate(headers):
+            ws.write(0, col, str(header), header_format)
+
+        # Escribir datos
+        for row, respuesta in enumerate(_respuestas_cuestionario(cuestionario), start=1):
+            ws.write(row, 0, f"P{respuesta.participante_id}")
+            for col, valor in enumerate(_valores_regular(respuesta, cuestionario.preguntas), start=1):
+                ws.write(row, col, valor)
 
-        elif formato == 'csv':
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['ID Participante'] + preguntas)
+    workbook.close()
+    return output.getvalue()
+
+
+def contenido_archivo(tipo, programa, formato, momento=None):
+    """
+    Devuelve el contenido de un archivo de exportación como iterable de bytes.
+    CSV y JSON se generan por partes; Excel y Parquet se generan completos en memoria.
+    """
+    if formato in FORMATOS_STREAMING:
+        if tipo == 'participantes':
+            return stream_archivo_participantes(programa, formato)
+        if tipo == 'diarios':
+            return stream_archivo_diarios(programa, formato)
+        return stream_archivo_cuestionario(programa, momento, formato)
+
+    if tipo == 'participantes':
+        return [generar_archivo_participantes(programa, formato)]
+    if tipo == 'diarios':
+        return [generar_archivo_diarios(programa, formato)]
+    return [generar_archivo_cuestionario(programa, momento, formato)]
+
+
+def archivos_exportacion(programa, tipo_exportacion, formato, fecha):
+    """
+    Genera los pares (nombre, contenido) de los archivos que forman un ZIP de
+    exportación ('todos' o 'cuestionarios').
+    """
+    extension = EXTENSIONES[formato]
+
+    if tipo_exportacion == 'todos':
+        # Agregar participantes
+        if InscripcionPrograma.objects.filter(programa=programa).exists():
+            yield (
+                f'participantes_programa_{programa.id}_{fecha}.{extension}',
+                contenido_archivo('participantes', programa, formato)
+            )
+
+        # Agregar diarios
+        yield (
+            f'diarios_programa_{programa.id}_{fecha}.{extension}',
+            contenido_archivo('diarios', programa, formato)
+        )
+
+    # Agregar cuestionarios pre y post si existen
+    for momento in ('pre', 'post'):
+        if _cuestionario_de(programa, momento):
+            yield (
+                f'cuestionario_{momento}_programa_{programa.id}_{fecha}.{extension}',
+                contenido_archivo('cuestionario', programa, formato, momento)
+            )
+
+
+def validar_exportacion(programa, tipo_exportacion, formato):
+    """
+    Comprueba que la exportación solicitada es válida y que hay datos.
+    Devuelve (mensaje de error, código de estado) o None si se puede exportar.
+    """
+    if formato not in EXTENSIONES:
+        return "Formato no válido. Use 'csv', 'excel', 'json' o 'parquet'", status.HTTP_400_BAD_REQUEST
+
+    if formato == 'parquet' and not parquet_disponible():
+        return "El formato 'parquet' no está disponible en este servidor", status.HTTP_400_BAD_REQUEST
+
+    # Verificar que hay datos para exportar según el tipo
+    if tipo_exportacion == 'participantes':
+        if not InscripcionPrograma.objects.filter(programa=programa).exists():
+            return "El programa no tiene participantes para exportar", status.HTTP_404_NOT_FOUND
+    elif tipo_exportacion == 'diarios':
+        if not DiarioSesion.objects.filter(programa=programa).exists():
+            return "El programa no tiene diarios para exportar", status.HTTP_404_NOT_FOUND
+    elif tipo_exportacion == 'cuestionarios':
+        if not programa.cuestionario_pre and not programa.cuestionario_post:
+            return "El programa no tiene cuestionarios para exportar", status.HTTP_404_NOT_FOUND
+
+    if tipo_exportacion not in TIPOS_EXPORTACION:
+        return (
+            "Tipo de exportación no válido. Use 'todos', 'cuestionarios', 'diarios' o 'participantes'",
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    return None
+
+
+def nombre_exportacion(programa, tipo_exportacion, formato, fecha):
+    """Nombre del archivo que se entrega al descargar una exportación"""
+    if tipo_exportacion in TIPOS_ZIP:
+        nombre_zip = 'datos_completos' if tipo_exportacion == 'todos' else 'cuestionarios'
+        return f'{nombre_zip}_programa_{programa.id}_{fecha}.zip'
+    return f'{tipo_exportacion}_programa_{programa.id}_{fecha}.{EXTENSIONES[formato]}'
+
+
+def content_type_exportacion(tipo_exportacion, formato):
+    return 'application/zip' if tipo_exportacion in TIPOS_ZIP else CONTENT_TYPES[formato]
 
-            for respuesta in respuestas:
-                fila = [f"P{respuesta.participante.id}"]
-                for i, pregunta in enumerate(cuestionario.preguntas):
-                    if i in indices_preguntas:
-                        pregunta_id = str(pregunta['id'])
-                        valor_respuesta = respuesta.respuestas.get(pregunta_id, 'N/A')
-                        fila.append(str(valor_respuesta) if valor_respuesta is not None else 'N/A')
-                writer.writerow(fila)
-
-            return output.getvalue().encode('utf-8-sig')
-
-        elif formato == 'excel':
-            output = BytesIO()
-            workbook = xlsxwriter.Workbook(output)
-            
-            # Estilos
-            header_format = workbook.add_format({
-                'bold': True,
-                'bg_color': '#D9E1F2',
-                'border': 1
-            })
-            
-            # Crear hoja
-            nombre_hoja = f'Cuestionario {momento.title()}'
-            ws = workbook.add_worksheet(nombre_hoja)
-            
-            # Escribir encabezados
-            headers = ['ID Participante'] + preguntas
-            for col, header in enumerate(headers):
-                ws.write(0, col, str(header), header_format)
-            
-            # Escribir datos
-            for row, respuesta in enumerate(respuestas, start=1):
-                ws.write(row, 0, f"P{respuesta.participante.id}")
-                col_index = 1
-                for i, pregunta in enumerate(cuestionario.preguntas):
-                    if i in indices_preguntas:
-                        pregunta_id = str(pregunta['id'])
-                        valor_respuesta = respuesta.respuestas.get(pregunta_id, 'N/A')
-                        ws.write(row, col_index, str(valor_respuesta) if valor_respuesta is not None else 'N/A')
-                        col_index += 1
-            
-            workbook.close()
-            return output.getvalue()
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsInvestigador])
 def exportar_datos_programa(request, pk):
     try:
         programa = get_object_or_404(Programa, pk=pk)
-        
+
         # Verificar que el programa pertenece al investigador actual
         if programa.creado_por != request.user.perfil_investigador:
             return Response(
-                {"error": "No tienes permiso para exportar datos de este programa"}, 
+                {"error": "No tienes permiso para exportar datos de este programa"},
                 status=status.HTTP_403_FORBIDDEN
             )
-        
+
         tipo_exportacion = request.GET.get('tipo', 'todos')
         formato = request.GET.get('formato', 'csv')
         fecha = datetime.now().strftime('%Y%m%d')
-        
-        if formato not in ['csv', 'excel', 'json']:
-            return Response(
-                {"error": "Formato no válido. Use 'csv', 'excel' o 'json'"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
 
-        # Verificar que hay datos para exportar según el tipo
-        if tipo_exportacion == 'participantes':
-            if not InscripcionPrograma.objects.filter(programa=programa).exists():
-                return Response(
-                    {"error": "El programa no tiene participantes para exportar"},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        elif tipo_exportacion == 'diarios':
-            if not DiarioSesion.objects.filter(sesion__programa=programa).exists():
-                return Response(
-                    {"error": "El programa no tiene diarios para exportar"},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        elif tipo_exportacion == 'cuestionarios':
-            if not programa.cuestionario_pre and not programa.cuestionario_post:
-                return Response(
-                    {"error": "El programa no tiene cuestionarios para exportar"},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        
-        extension = {
-            'csv': 'csv',
-            'excel': 'xlsx',
-            'json': 'json'
-        }[formato]
-        
-        if tipo_exportacion == 'todos':
-            # Crear ZIP con todos los datos
-            zip_buffer = BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                # Agregar participantes
-                participantes_data = generar_archivo_participantes(programa, formato)
-                if participantes_data:
-                    zip_file.writestr(f'participantes_programa_{programa.id}_{fecha}.{extension}', participantes_data)
-                
-                # Agregar diarios
-                diarios_data = generar_archivo_diarios(programa, formato)
-                if diarios_data:
-                    zip_file.writestr(f'diarios_programa_{programa.id}_{fecha}.{extension}', diarios_data)
-                
-                # Agregar cuestionario pre si existe
-                if programa.cuestionario_pre:
-                    cuestionario_pre_data = generar_archivo_cuestionario(programa, 'pre', formato)
-                    if cuestionario_pre_data:
-                        zip_file.writestr(f'cuestionario_pre_programa_{programa.id}_{fecha}.{extension}', cuestionario_pre_data)
-                
-                # Agregar cuestionario post si existe
-                if programa.cuestionario_post:
-                    cuestionario_post_data = generar_archivo_cuestionario(programa, 'post', formato)
-                    if cuestionario_post_data:
-                        zip_file.writestr(f'cuestionario_post_programa_{programa.id}_{fecha}.{extension}', cuestionario_post_data)
-            
-            response = HttpResponse(
-                zip_buffer.getvalue(),
-                content_type='application/zip'
-            )
-            response['Content-Disposition'] = f'attachment; filename="datos_completos_programa_{programa.id}_{fecha}.zip"'
-            return response
-        
-        elif tipo_exportacion == 'cuestionarios':
-            # Crear ZIP solo con cuestionarios
-            zip_buffer = BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                # Agregar cuestionario pre si existe
-                if programa.cuestionario_pre:
-                    cuestionario_pre_data = generar_archivo_cuestionario(programa, 'pre', formato)
-                    if cuestionario_pre_data:
-                        zip_file.writestr(f'cuestionario_pre_programa_{programa.id}_{fecha}.{extension}', cuestionario_pre_data)
-                
-                # Agregar cuestionario post si existe
-                if programa.cuestionario_post:
-                    cuestionario_post_data = generar_archivo_cuestionario(programa, 'post', formato)
-                    if cuestionario_post_data:
-                        zip_file.writestr(f'cuestionario_post_programa_{programa.id}_{fecha}.{extension}', cuestionario_post_data)
-            
-            response = HttpResponse(
-                zip_buffer.getvalue(),
-                content_type='application/zip'
-            )
-            response['Content-Disposition'] = f'attachment; filename="cuestionarios_programa_{programa.id}_{fecha}.zip"'
-            return response
-
-        elif tipo_exportacion == 'participantes':
-            # Exportar solo participantes (archivo individual)
-            participantes_data = generar_archivo_participantes(programa, formato)
-            
-            if formato == 'json':
-                response = HttpResponse(
-                    participantes_data,
-                    content_type='application/json; charset=utf-8'
-                )
-                response['Content-Disposition'] = f'attachment; filename="participantes_programa_{programa.id}_{fecha}.json"'
-                return response
-            
-            elif formato == 'csv':
-                response = HttpResponse(
-                    participantes_data,
-                    content_type='text/csv; charset=utf-8'
-                )
-                response['Content-Disposition'] = f'attachment; filename="participantes_programa_{programa.id}_{fecha}.csv"'
-                return response
-            
-            elif formato == 'excel':
-                response = HttpResponse(
-                    participantes_data,
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = f'attachment; filename="participantes_programa_{programa.id}_{fecha}.xlsx"'
-                return response
-
-        elif tipo_exportacion == 'diarios':
-            # Exportar solo diarios (archivo individual)
-            diarios_data = generar_archivo_diarios(programa, formato)
-            
-            if formato == 'json':
-                response = HttpResponse(
-                    diarios_data,
-                    content_type='application/json; charset=utf-8'
-                )
-                response['Content-Disposition'] = f'attachment; filename="diarios_programa_{programa.id}_{fecha}.json"'
-                return response
-            
-            elif formato == 'csv':
-                response = HttpResponse(
-                    diarios_data,
-                    content_type='text/csv; charset=utf-8'
-                )
-                response['Content-Disposition'] = f'attachment; filename="diarios_programa_{programa.id}_{fecha}.csv"'
-                return response
-            
-            elif formato == 'excel':
-                response = HttpResponse(
-                    diarios_data,
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = f'attachment; filename="diarios_programa_{programa.id}_{fecha}.xlsx"'
-                return response
+        error = validar_exportacion(programa, tipo_exportacion, formato)
+        if error:
+            mensaje, codigo = error
+            return Response({"error": mensaje}, status=codigo)
 
+        if tipo_exportacion in TIPOS_ZIP:
+            # Crear el ZIP por partes a medida que se generan los archivos
+            contenido = stream_zip(archivos_exportacion(programa, tipo_exportacion, formato, fecha))
         else:
-            return Response(
-                {"error": "Tipo de exportación no válido. Use 'todos', 'cuestionarios', 'diarios' o 'participantes'"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            # Exportar un archivo individual
+            contenido = contenido_archivo(tipo_exportacion, programa, formato)
+
+        content_type = content_type_exportacion(tipo_exportacion, formato)
+        if formato not in FORMATOS_STREAMING and tipo_exportacion not in TIPOS_ZIP:
+            response = HttpResponse(b''.join(contenido), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(contenido, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{nombre_exportacion(programa, tipo_exportacion, formato, fecha)}"'
+        return response
 
     except Exception as e:
         print(f"Error al exportar datos: {str(e)}")
@@ -663,4 +840,4 @@ def exportar_datos_programa(request, pk):
         return Response(
             {"error": "Error interno del servidor al exportar datos"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        ) 
\ No newline at end of file
+        )
@@ -1,13 +1,43 @@
+import csv
 from rest_framework import permissions, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from ..models import Programa, EstadoPublicacion, InscripcionPrograma, EstadoInscripcion, Participante
-from ..serializers import ProgramaSerializer, ParticipanteSerializer
+from ..serializers import ProgramaSerializer, ProgramaListSerializer, ParticipanteSerializer
+from ..cache_serializacion import serializar_programas, inscripciones_usuario
+from ..inscripcion_masiva import inscribir_participantes, leer_identificadores_csv
+from ..duplicacion import duplicar_programas
+from ..agregaciones import subconsulta_conteo
+from django.db.models import OuterRef
 from django.shortcuts import get_object_or_404
 from cuestionario.models import Cuestionario, RespuestaCuestionario
+from sesion.models import Sesion
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from usuario.permissions import IsInvestigador
+from config.paginacion import CursorFechaCreacionPagination, paginacion_solicitada
+
+
+def _listado_paginado(request, programas):
+    """Página de programas con la representación ligera y la inscripción del usuario"""
+    paginador = CursorFechaCreacionPagination()
+    # Subconsultas correlacionadas: dos JOIN con Count(distinct) multiplicarían
+    # las filas (sesiones × inscripciones) de cada programa
+    pagina = paginador.paginate_queryset(
+        programas.select_related('creado_por__usuario').annotate(
+            total_sesiones=subconsulta_conteo(Sesion.objects.filter(programa=OuterRef('pk')), 'programa'),
+            total_participantes=subconsulta_conteo(
+                InscripcionPrograma.objects.filter(programa=OuterRef('pk')), 'programa'
+            )
+        ),
+        request
+    )
+    datos = ProgramaListSerializer(pagina, many=True).data
+    inscripciones = inscripciones_usuario(request, pagina)
+    for programa, representacion in zip(pagina, datos):
+        representacion['inscripcion_info'] = inscripciones.get(programa.pk)
+    return paginador.get_paginated_response(datos)
 
 
 @api_view(['GET', 'POST'])
@@ -18,8 +48,9 @@ def programa_list_create(request):
             programas = Programa.objects.filter(creado_por=request.user.perfil_investigador)
         else:
             programas = Programa.objects.filter(estado_publicacion=EstadoPublicacion.PUBLICADO)
-        serializer = ProgramaSerializer(programas, many=True, context={'request': request})
-        return Response(serializer.data)
+        if paginacion_solicitada(request):
+            return _listado_paginado(request, programas)
+        return Response(serializar_programas(programas, request))
     
     elif request.method == 'POST':
         if not request.user.is_investigador():
@@ -43,8 +74,7 @@ def programa_detail(request, pk):
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        serializer = ProgramaSerializer(programa)
-        return Response(serializer.data)
+        return Response(serializar_programas([programa])[0])
 
     elif request.method in ['PUT', 'PATCH']:
         if programa.creado_por != request.user.perfil_investigador:
@@ -209,6 +239,51 @@ def programa_enrolar(request, pk):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsInvestigador])
+@parser_classes([JSONParser, MultiPartParser, FormParser])
+def programa_enrolar_masivo(request, pk):
+    """
+    Inscribe en el programa una cohorte de participantes. Acepta una lista
+    `participantes` de identificadores (email, nombre de usuario o id;
+    `id:<n>` fuerza el id) o un CSV `archivo` con ellos en la primera
+    columna. Devuelve el resultado de cada fila y el rendimiento de la
+    operación.
+    """
+    programa = get_object_or_404(Programa, pk=pk)
+
+    if programa.creado_por != request.user.perfil_investigador:
+        return Response(
+            {"error": "No tienes permiso para inscribir participantes en este programa"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if programa.estado_publicacion != EstadoPublicacion.PUBLICADO:
+        return Response(
+            {'error': 'No se puede enrolar en un programa que no está publicado'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    archivo = request.FILES.get('archivo')
+    if archivo is not None:
+        try:
+            identificadores = leer_identificadores_csv(archivo)
+        except (UnicodeDecodeError, csv.Error):
+            return Response({'error': 'El archivo debe ser un CSV en UTF-8'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        identificadores = request.data.get('participantes')
+        if not isinstance(identificadores, list):
+            return Response(
+                {'error': 'Indica una lista de participantes o un archivo CSV'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    if not identificadores:
+        return Response({'error': 'No se ha indicado ningún participante'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(inscribir_participantes(programa, identificadores))
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def programa_publicar(request, pk):
@@ -249,47 +324,54 @@ def programa_duplicar(request, pk):
         )
 
     try:
-        programa_duplicado = Programa.objects.create(
-            nombre=f"Copia de {programa_original.nombre}",
-            descripcion=programa_original.descripcion,
-            tipo_contexto=programa_original.tipo_contexto,
-            enfoque_metodologico=programa_original.enfoque_metodologico,
-            poblacion_objetivo=programa_original.poblacion_objetivo,
-            duracion_semanas=programa_original.duracion_semanas,
-            tiene_cuestionarios=programa_original.tiene_cuestionarios,
-            tiene_diarios=programa_original.tiene_diarios,
-            creado_por=request.user.perfil_investigador,
-            estado_publicacion=EstadoPublicacion.BORRADOR
-        )
+        programa_duplicado, = duplicar_programas([programa_original], request.user.perfil_investigador)
+        serializer = ProgramaSerializer(programa_duplicado)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        for sesion in programa_original.sesiones.all():
-            sesion.pk = None
-            sesion.programa = programa_duplicado
-            sesion.save()
+    except Exception as e:
+        return Response(
+            {"error": f"Error al duplicar el programa: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
 
-        if programa_original.tiene_cuestionarios:
-            if programa_original.cuestionario_pre:
-                cuestionario_pre = programa_original.cuestionario_pre
-                cuestionario_pre.pk = None
-                cuestionario_pre.programa = programa_duplicado
-                cuestionario_pre.save()
-                programa_duplicado.cuestionario_pre = cuestionario_pre
 
-            if programa_original.cuestionario_post:
-                cuestionario_post = programa_original.cuestionario_post
-                cuestionario_post.pk = None
-                cuestionario_post.programa = programa_duplicado
-                cuestionario_post.save()
-                programa_duplicado.cuestionario_post = cuestionario_post
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsInvestigador])
+def programa_duplicar_lote(request):
+    """
+    Duplica varios programas propios (p. ej. una biblioteca de plantillas)
+    en una sola transacción. Recibe la lista de ids en `programas`.
+    """
+    programa_ids = request.data.get('programas')
+    if not isinstance(programa_ids, list) or not programa_ids:
+        return Response({'error': 'Indica la lista de programas a duplicar'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        programa_ids = list(dict.fromkeys(int(programa_id) for programa_id in programa_ids))
+    except (TypeError, ValueError):
+        return Response({'error': 'Los ids de programa deben ser números'}, status=status.HTTP_400_BAD_REQUEST)
 
-        programa_duplicado.save()
+    programas = Programa.objects.in_bulk(programa_ids)
+    if len(programas) != len(programa_ids):
+        return Response(
+            {'error': 'Algunos programas no existen', 'programas_no_encontrados': sorted(set(programa_ids) - programas.keys())},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if any(programa.creado_por_id != request.user.perfil_investigador.id for programa in programas.values()):
+        return Response(
+            {"error": "No tienes permiso para duplicar alguno de los programas"},
+            status=status.HTTP_403_FORBIDDEN
+        )
 
-        serializer = ProgramaSerializer(programa_duplicado)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    try:
+        copias = duplicar_programas(
+            [programas[programa_id] for programa_id in programa_ids],
+            request.user.perfil_investigador
+        )
+        return Response(serializar_programas(copias), status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response(
-            {"error": f"Error al duplicar el programa: {str(e)}"},
+            {"error": f"Error al duplicar los programas: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
@@ -0,0 +1,105 @@
+import os
+import traceback
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from usuario.permissions import IsInvestigador
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from ..models import Programa, TrabajoExportacion
+from ..serializers import TrabajoExportacionSerializer
+from .. import trabajos_exportacion
+from .exportacion import validar_exportacion, content_type_exportacion
+from config.enums import EstadoTrabajoExportacion
+
+
+def _obtener_trabajo(request, trabajo_id):
+    trabajo = get_object_or_404(TrabajoExportacion.objects.select_related('programa'), pk=trabajo_id)
+    if trabajo.programa.creado_por_id != request.user.perfil_investigador.id:
+        return None
+    return trabajo
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsInvestigador])
+def programa_exportacion_crear(request, pk):
+    """
+    Solicita una exportación en segundo plano. Si ya existe una exportación
+    de los mismos datos, se devuelve esa en lugar de generar otra.
+    """
+    try:
+        programa = get_object_or_404(Programa, pk=pk)
+
+        if programa.creado_por != request.user.perfil_investigador:
+            return Response(
+                {"error": "No tienes permiso para exportar datos de este programa"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        tipo_exportacion = request.data.get('tipo', 'todos')
+        formato = request.data.get('formato', 'csv')
+
+        error = validar_exportacion(programa, tipo_exportacion, formato)
+        if error:
+            mensaje, codigo = error
+            return Response({"error": mensaje}, status=codigo)
+
+        trabajo, _ = trabajos_exportacion.solicitar_exportacion(programa, request.user.perfil_investigador, tipo_exportacion, formato)
+        trabajo.refresh_from_db()
+
+        codigo = status.HTTP_200_OK if trabajo.estado == EstadoTrabajoExportacion.COMPLETADO else status.HTTP_202_ACCEPTED
+        return Response(TrabajoExportacionSerializer(trabajo).data, status=codigo)
+
+    except Exception as e:
+        print(f"Error al solicitar la exportación: {str(e)}")
+        print(traceback.format_exc())
+        return Response(
+            {"error": "Error interno del servidor al exportar datos"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsInvestigador])
+def exportacion_detail(request, trabajo_id):
+    """Devuelve el estado y el progreso de un trabajo de exportación"""
+    trabajo = _obtener_trabajo(request, trabajo_id)
+    if trabajo is None:
+        return Response(
+            {"error": "No tienes permiso para ver esta exportación"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(TrabajoExportacionSerializer(trabajo).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsInvestigador])
+def exportacion_descargar(request, trabajo_id):
+    """Descarga el archivo de un trabajo de exportación completado"""
+    trabajo = _obtener_trabajo(request, trabajo_id)
+    if trabajo is None:
+        return Response(
+            {"error": "No tienes permiso para descargar esta exportación"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if trabajo.estado != EstadoTrabajoExportacion.COMPLETADO:
+        return Response(
+            {"error": "La exportación todavía no está disponible", "estado": trabajo.estado},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    ruta = trabajos_exportacion.ruta_archivo(trabajo)
+    if not os.path.exists(ruta):
+        return Response(
+            {"error": "El archivo de la exportación ya no existe. Solicítela de nuevo"},
+            status=status.HTTP_410_GONE
+        )
+
+    return FileResponse(
+        open(ruta, 'rb'),
+        as_attachment=True,
+        filename=trabajo.nombre_archivo,
+        content_type=content_type_exportacion(trabajo.tipo, trabajo.formato)
+    )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProgramaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'programa'
+
+    def ready(self):
+        from . import signals
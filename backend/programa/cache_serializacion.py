@@ -0,0 +1,98 @@
+"""
+Caché de la representación serializada de los programas.
+
+Cada programa se guarda con la clave `programa_serializado:<versión>:<id>`
+junto a una firma (fecha_actualizacion y version_representacion). Una entrada
+solo se usa si su firma coincide con la fila leída de la base de datos, y las
+señales de programa/signals.py la eliminan cuando cambian el programa, sus
+sesiones, cuestionarios, inscripciones o los perfiles que se muestran
+anidados. Los diarios y respuestas no forman parte de la representación, así
+que no la invalidan.
+
+La parte que depende del usuario (inscripcion_info) no se guarda: se calcula
+en cada petición con una única consulta para todos los programas.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from .models import Programa, InscripcionPrograma
+from .serializers import ProgramaSerializer, datos_inscripcion
+
+# Cambiar al modificar los campos de ProgramaSerializer para descartar las entradas antiguas
+VERSION_REPRESENTACION = 1
+
+
+def _cache():
+    return caches[settings.PROGRAMAS_CACHE_ALIAS]
+
+
+def clave_programa(programa_id):
+    return f'programa_serializado:{VERSION_REPRESENTACION}:{programa_id}'
+
+
+def firma_programa(programa):
+    return (programa.fecha_actualizacion.isoformat(), programa.version_representacion)
+
+
+def invalidar_programas(programa_ids):
+    programa_ids = list(programa_ids)
+    if programa_ids:
+        _cache().delete_many([clave_programa(programa_id) for programa_id in programa_ids])
+
+
+def _serializar_sin_cache(programa_ids):
+    programas = Programa.objects.filter(pk__in=programa_ids).select_related(
+        'cuestionario_pre', 'cuestionario_post', 'creado_por__usuario'
+    ).prefetch_related('sesiones', 'participantes__usuario', 'creado_por__programas')
+    return {
+        programa.pk: (firma_programa(programa), dict(ProgramaSerializer(programa).data))
+        for programa in programas
+    }
+
+
+def inscripciones_usuario(request, programas):
+    """inscripcion_info del usuario de la petición para cada programa, con una sola consulta"""
+    if not (request and request.user.is_authenticated and hasattr(request.user, 'perfil_participante')):
+        return {}
+    por_id = {programa.pk: programa for programa in programas}
+    inscripciones = InscripcionPrograma.objects.filter(
+        participante=request.user.perfil_participante,
+        programa__in=list(por_id)
+    )
+    return {
+        inscripcion.programa_id: datos_inscripcion(inscripcion, por_id[inscripcion.programa_id])
+        for inscripcion in inscripciones
+    }
+
+
+def serializar_programas(programas, request=None):
+    """
+    Devuelve la misma lista que ProgramaSerializer(programas, many=True).data
+    leyendo de la caché las representaciones que siguen siendo válidas.
+    """
+    programas = list(programas)
+    cache = _cache()
+    guardados = cache.get_many([clave_programa(programa.pk) for programa in programas])
+
+    datos = {}
+    pendientes = []
+    for programa in programas:
+        entrada = guardados.get(clave_programa(programa.pk))
+        if entrada and entrada[0] == firma_programa(programa):
+            datos[programa.pk] = entrada[1]
+        else:
+            pendientes.append(programa.pk)
+
+    if pendientes:
+        nuevos = _serializar_sin_cache(pendientes)
+        cache.set_many(
+            {clave_programa(programa_id): entrada for programa_id, entrada in nuevos.items()},
+            settings.PROGRAMAS_CACHE_TIMEOUT
+        )
+        datos.update({programa_id: representacion for programa_id, (_, representacion) in nuevos.items()})
+
+    inscripciones = inscripciones_usuario(request, programas)
+    return [
+        dict(datos[programa.pk], inscripcion_info=inscripciones.get(programa.pk))
+        for programa in programas
+        if programa.pk in datos
+    ]
@@ -0,0 +1,81 @@
+"""
+Duplicación de programas.
+
+Un programa (o una biblioteca de plantillas entera) se duplica en una sola
+transacción con un bulk_create por tabla: programas, sesiones y cuestionarios
+pre/post. El número de consultas no depende del número de programas ni de
+sesiones. Las copias se crean en borrador, a nombre del investigador que
+duplica, con el nombre "Copia de <original>".
+
+Las sesiones copiadas comparten los archivos de audio y vídeo del original:
+se guardan por contenido (ver sesion/almacenamiento.py) y una copia en disco
+sería idéntica.
+"""
+from django.db import transaction
+from config.enums import EstadoPublicacion
+from cuestionario.models import Cuestionario
+from sesion.models import Sesion
+from .models import Programa
+from .signals import invalidar_representacion
+
+# Campos del programa que se copian tal cual
+CAMPOS_COPIADOS = [
+    'descripcion', 'tipo_contexto', 'enfoque_metodologico', 'poblacion_objetivo',
+    'duracion_semanas', 'tiene_cuestionarios', 'tiene_diarios',
+]
+
+
+def _copia(instancia, programa):
+    """Copia sin guardar de una sesión o cuestionario, asignada a `programa`"""
+    instancia.pk = None
+    instancia._state.adding = True
+    instancia.programa = programa
+    return instancia
+
+
+def duplicar_programas(programas, investigador):
+    """Duplica `programas` para `investigador`. Devuelve las copias en el mismo orden."""
+    originales = list(programas)
+    with transaction.atomic():
+        copias = Programa.objects.bulk_create([
+            Programa(
+                nombre=f'Copia de {original.nombre}',
+                creado_por=investigador,
+                estado_publicacion=EstadoPublicacion.BORRADOR,
+                **{campo: getattr(original, campo) for campo in CAMPOS_COPIADOS}
+            )
+            for original in originales
+        ])
+        copia_de = {original.pk: copia for original, copia in zip(originales, copias)}
+
+        Sesion.objects.bulk_create([
+            _copia(sesion, copia_de[sesion.programa_id])
+            for sesion in Sesion.objects.filter(programa__in=originales).order_by('programa_id', 'semana')
+        ])
+
+        # Solo los cuestionarios pre y post de los programas que los usan
+        cuestionarios = {
+            (original.pk, campo): getattr(original, f'{campo}_id')
+            for original in originales if original.tiene_cuestionarios
+            for campo in ('cuestionario_pre', 'cuestionario_post')
+            if getattr(original, f'{campo}_id')
+        }
+        originales_cuestionario = Cuestionario.objects.in_bulk(set(cuestionarios.values()))
+        nuevos = {
+            clave: _copia(originales_cuestionario[cuestionario_id], copia_de[clave[0]])
+            for clave, cuestionario_id in cuestionarios.items()
+        }
+        Cuestionario.objects.bulk_create(nuevos.values())
+        for (original_id, campo), cuestionario in nuevos.items():
+            setattr(copia_de[original_id], campo, cuestionario)
+        if nuevos:
+            Programa.objects.bulk_update(
+                {copia_de[original_id] for original_id, _ in nuevos},
+                ['cuestionario_pre', 'cuestionario_post']
+            )
+
+    # bulk_create no emite post_save: el investigador anidado en sus programas
+    # serializados incluye la lista de programas, que ha cambiado (también
+    # para los demás procesos, ver signals.invalidar_representacion)
+    invalidar_representacion(investigador.programas.values_list('pk', flat=True))
+    return copias
@@ -0,0 +1,206 @@
+"""
+Inscripción masiva de participantes en un programa.
+
+Los identificadores (email, nombre de usuario o id de participante) se
+procesan por lotes. Los emails se comparan sin distinguir mayúsculas. Un texto
+solo de dígitos puede ser un nombre de usuario (p. ej. un número de
+estudiante) o un id: se busca de ambas formas y, si corresponde a dos
+participantes distintos, se informa como ambiguo. Con el prefijo `id:` (o un
+entero en JSON) se toma siempre como id.
+
+Cada lote resuelve sus participantes con una consulta, comprueba con otra
+quién ya está inscrito en el programa o tiene otro programa en progreso, y
+crea inscripciones y filas de `participantes` con bulk_create en su propia
+transacción: un lote fallido no deshace los anteriores.
+
+bulk_create no emite post_save ni m2m_changed, así que la versión de la
+representación del programa y su caché serializada se actualizan aquí una vez
+por lote. Las inscripciones no crean filas de progreso (aparecen con el primer
+diario o respuesta), por lo que ProgresoParticipante no se toca.
+"""
+import csv
+import io
+import time
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from config.enums import EstadoInscripcion, ResultadoInscripcionMasiva
+from usuario.models import Participante
+from .models import Programa, InscripcionPrograma
+from .cache_serializacion import invalidar_programas
+from .signals import incrementar_version_representacion
+
+TAMANO_LOTE = 1000
+
+# Primera fila de un CSV que se toma como cabecera y no como identificador
+CABECERAS_CSV = {'email', 'username', 'identificador', 'participante', 'participante_id', 'id'}
+
+
+def leer_identificadores_csv(archivo):
+    """Identificadores de la primera columna de un CSV (bytes o texto), sin cabecera ni filas vacías"""
+    contenido = archivo.read()
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig')
+    identificadores = []
+    for numero, fila in enumerate(csv.reader(io.StringIO(contenido))):
+        valor = fila[0].strip() if fila else ''
+        if not valor or (numero == 0 and valor.lower() in CABECERAS_CSV):
+            continue
+        identificadores.append(valor)
+    return identificadores
+
+
+def _clave(identificador):
+    """('id' | 'email' | 'username' | 'username_o_id', valor normalizado) de un identificador"""
+    if isinstance(identificador, int) and not isinstance(identificador, bool):
+        return 'id', identificador
+    identificador = str(identificador).strip()
+    if identificador.lower().startswith('id:') and identificador[3:].strip().isdigit():
+        return 'id', int(identificador[3:])
+    if '@' in identificador:
+        return 'email', identificador.lower()
+    if identificador.isdigit():
+        return 'username_o_id', identificador
+    return 'username', identificador
+
+
+def _resolver(claves):
+    """
+    ({clave: participante_id}, claves ambiguas) de las claves de un lote, con
+    una consulta. Las claves 'username_o_id' que corresponden a dos
+    participantes distintos no se resuelven: se devuelven en el conjunto de
+    ambiguas.
+    """
+    por_tipo = {'id': set(), 'email': set(), 'username': set()}
+    for tipo, valor in claves:
+        if tipo == 'username_o_id':
+            por_tipo['username'].add(valor)
+            por_tipo['id'].add(int(valor))
+        else:
+            por_tipo[tipo].add(valor)
+
+    resueltos = {}
+    for participante_id, username, email in Participante.objects.annotate(
+        email_normalizado=Lower('usuario__email')
+    ).filter(
+        Q(pk__in=por_tipo['id'])
+        | Q(usuario__username__in=por_tipo['username'])
+        | Q(email_normalizado__in=por_tipo['email'])
+    ).values_list(
+        'pk', 'usuario__username', 'email_normalizado'
+    ):
+        resueltos[('id', participante_id)] = participante_id
+        resueltos[('username', username)] = participante_id
+        resueltos[('email', email)] = participante_id
+
+    ambiguas = set()
+    for tipo, valor in claves:
+        if tipo == 'username_o_id':
+            candidatos = {resueltos.get(('username', valor)), resueltos.get(('id', int(valor)))} - {None}
+            if len(candidatos) > 1:
+                ambiguas.add((tipo, valor))
+            elif candidatos:
+                resueltos[(tipo, valor)] = candidatos.pop()
+    return resueltos, ambiguas
+
+
+def _inscribir_lote(programa, participante_ids):
+    """
+    Inscribe en una transacción los participantes que no estén ya en el
+    programa ni tengan otro en progreso. Devuelve {participante_id: resultado}.
+    """
+    resultados = {}
+    with transaction.atomic():
+        for participante_id, programa_id in InscripcionPrograma.objects.filter(
+            Q(programa=programa) | Q(estado_inscripcion=EstadoInscripcion.EN_PROGRESO),
+            participante_id__in=participante_ids
+        ).values_list('participante_id', 'programa_id'):
+            if programa_id == programa.pk:
+                resultados[participante_id] = ResultadoInscripcionMasiva.YA_INSCRITO
+            else:
+                resultados.setdefault(participante_id, ResultadoInscripcionMasiva.EN_OTRO_PROGRAMA)
+
+        nuevos = [participante_id for participante_id in participante_ids if participante_id not in resultados]
+        if nuevos:
+            InscripcionPrograma.objects.bulk_create([
+                InscripcionPrograma(
+                    programa=programa,
+                    participante_id=participante_id,
+                    estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+                )
+                for participante_id in nuevos
+            ])
+            # Mismo cálculo que InscripcionPrograma.calcular_fecha_fin, en una sentencia
+            InscripcionPrograma.objects.filter(
+                programa=programa, participante_id__in=nuevos, fecha_fin__isnull=True
+            ).update(fecha_fin=F('fecha_inicio') + timedelta(weeks=programa.duracion_semanas))
+            Programa.participantes.through.objects.bulk_create(
+                [
+                    Programa.participantes.through(programa=programa, participante_id=participante_id)
+                    for participante_id in nuevos
+                ],
+                ignore_conflicts=True
+            )
+            incrementar_version_representacion(pk=programa.pk)
+            resultados.update(dict.fromkeys(nuevos, ResultadoInscripcionMasiva.INSCRITO))
+    return resultados
+
+
+def inscribir_participantes(programa, identificadores, tamano_lote=TAMANO_LOTE):
+    """
+    Inscribe en `programa` los participantes de `identificadores`.
+    Devuelve {'resultados': [{'identificador', 'participante_id', 'resultado'}],
+    'resumen': {resultado: total}, 'total', 'duracion_s', 'filas_por_segundo'}.
+    """
+    inicio = time.perf_counter()
+    resultados = []
+    vistos = set()
+    hay_inscritos = False
+
+    for desde in range(0, len(identificadores), tamano_lote):
+        lote = [(identificador, _clave(identificador)) for identificador in identificadores[desde:desde + tamano_lote]]
+        resueltos, ambiguas = _resolver({clave for _, clave in lote})
+
+        filas = []
+        pendientes = []
+        for identificador, clave in lote:
+            participante_id = resueltos.get(clave)
+            if clave in ambiguas:
+                resultado = ResultadoInscripcionMasiva.AMBIGUO
+            elif participante_id is None:
+                resultado = ResultadoInscripcionMasiva.NO_ENCONTRADO
+            elif participante_id in vistos:
+                resultado = ResultadoInscripcionMasiva.DUPLICADO
+            else:
+                vistos.add(participante_id)
+                pendientes.append(participante_id)
+                resultado = None
+            filas.append({'identificador': identificador, 'participante_id': participante_id, 'resultado': resultado})
+
+        if pendientes:
+            try:
+                por_participante = _inscribir_lote(programa, pendientes)
+            except IntegrityError:
+                # Inscripción concurrente de alguno de los participantes: se informa el lote entero
+                por_participante = dict.fromkeys(pendientes, ResultadoInscripcionMasiva.ERROR)
+            hay_inscritos |= ResultadoInscripcionMasiva.INSCRITO in por_participante.values()
+            for fila in filas:
+                if fila['resultado'] is None:
+                    fila['resultado'] = por_participante[fila['participante_id']]
+        resultados.extend(filas)
+
+    if hay_inscritos:
+        invalidar_programas([programa.pk])
+
+    duracion = time.perf_counter() - inicio
+    resumen = {resultado.value: 0 for resultado in ResultadoInscripcionMasiva}
+    for fila in resultados:
+        resumen[fila['resultado']] += 1
+    return {
+        'resultados': resultados,
+        'resumen': resumen,
+        'total': len(resultados),
+        'duracion_s': round(duracion, 3),
+        'filas_por_segundo': round(len(resultados) / duracion) if duracion else len(resultados),
+    }
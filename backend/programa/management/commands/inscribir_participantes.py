@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from config.enums import EstadoPublicacion, ResultadoInscripcionMasiva
+from programa.models import Programa
+from programa.inscripcion_masiva import TAMANO_LOTE, inscribir_participantes, leer_identificadores_csv
+
+
+class Command(BaseCommand):
+    help = 'Inscribe en un programa publicado una cohorte de participantes (email, nombre de usuario o id)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('programa', type=int, help='ID del programa')
+        parser.add_argument('identificadores', nargs='*', help='Identificadores de los participantes')
+        parser.add_argument('--archivo', help='CSV con los identificadores en la primera columna')
+        parser.add_argument('--batch-size', type=int, default=TAMANO_LOTE, help='Participantes por transacción')
+
+    def handle(self, *args, **options):
+        try:
+            programa = Programa.objects.get(pk=options['programa'])
+        except Programa.DoesNotExist:
+            raise CommandError(f"El programa {options['programa']} no existe")
+        if programa.estado_publicacion != EstadoPublicacion.PUBLICADO:
+            raise CommandError('No se puede enrolar en un programa que no está publicado')
+
+        identificadores = list(options['identificadores'])
+        if options['archivo']:
+            with open(options['archivo'], encoding='utf-8-sig') as archivo:
+                identificadores += leer_identificadores_csv(archivo)
+        if not identificadores:
+            raise CommandError('No se ha indicado ningún participante')
+
+        informe = inscribir_participantes(programa, identificadores, tamano_lote=options['batch_size'])
+
+        # Con -v 2 se listan también las filas inscritas, no solo las incidencias
+        for fila in informe['resultados']:
+            if fila['resultado'] != ResultadoInscripcionMasiva.INSCRITO or options['verbosity'] > 1:
+                self.stdout.write(f"{fila['identificador']}: {fila['resultado']}")
+
+        resumen = ', '.join(f'{resultado}: {total}' for resultado, total in informe['resumen'].items() if total)
+        self.stdout.write(self.style.SUCCESS(
+            f"{informe['total']} filas en {informe['duracion_s']} s "
+            f"({informe['filas_por_segundo']} filas/s). {resumen}"
+        ))
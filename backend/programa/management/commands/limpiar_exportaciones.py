@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from programa.trabajos_exportacion import limpiar_exportaciones
+
+
+class Command(BaseCommand):
+    help = 'Borra las exportaciones caducadas o sustituidas por otra más reciente y los archivos sin trabajo'
+
+    def handle(self, *args, **options):
+        borrados = limpiar_exportaciones()
+        self.stdout.write(self.style.SUCCESS(
+            f"{borrados['trabajos']} trabajos de exportación y {borrados['archivos']} archivos sin trabajo borrados"
+        ))
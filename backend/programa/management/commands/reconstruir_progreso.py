@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from programa.models import Programa
+from programa.progreso import reconstruir_progreso
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero la tabla de progreso de participantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--programa', type=int, help='ID del programa a reconstruir (por defecto, todos)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tamaño de lote para las inserciones')
+
+    def handle(self, *args, **options):
+        programa = None
+        if options['programa']:
+            try:
+                programa = Programa.objects.get(pk=options['programa'])
+            except Programa.DoesNotExist:
+                raise CommandError(f"El programa {options['programa']} no existe")
+
+        total = reconstruir_progreso(programa, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Progreso reconstruido: {total} filas'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from programa.models import Programa
+from programa.progreso import verificar_progreso, reconstruir_progreso
+
+
+class Command(BaseCommand):
+    help = 'Comprueba que la tabla de progreso coincide con los diarios y respuestas registrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--programa', type=int, help='ID del programa a verificar (por defecto, todos)')
+        parser.add_argument('--reparar', action='store_true', help='Reconstruye el progreso si se encuentran discrepancias')
+
+    def handle(self, *args, **options):
+        programa = None
+        if options['programa']:
+            try:
+                programa = Programa.objects.get(pk=options['programa'])
+            except Programa.DoesNotExist:
+                raise CommandError(f"El programa {options['programa']} no existe")
+
+        discrepancias = verificar_progreso(programa)
+        if not discrepancias:
+            self.stdout.write(self.style.SUCCESS('La tabla de progreso es consistente'))
+            return
+
+        for discrepancia in discrepancias:
+            self.stdout.write(
+                f"Programa {discrepancia['programa_id']} / participante {discrepancia['participante_id']}: "
+                f"{discrepancia['diferencias']}"
+            )
+
+        if options['reparar']:
+            total = reconstruir_progreso(programa)
+            self.stdout.write(self.style.SUCCESS(f'Progreso reconstruido: {total} filas'))
+        else:
+            raise CommandError(f'Se encontraron {len(discrepancias)} discrepancias en la tabla de progreso')
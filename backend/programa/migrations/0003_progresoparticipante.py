@@ -0,0 +1,66 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_progreso(apps, schema_editor):
+    """Genera el progreso inicial a partir de los diarios y respuestas existentes."""
+    from django.db.models import Count, Max, Sum
+
+    DiarioSesion = apps.get_model('sesion', 'DiarioSesion')
+    RespuestaCuestionario = apps.get_model('cuestionario', 'RespuestaCuestionario')
+    ProgresoParticipante = apps.get_model('programa', 'ProgresoParticipante')
+
+    progresos = {}
+    for agregado in DiarioSesion.objects.order_by().values('sesion__programa', 'participante').annotate(
+        total=Count('pk'), minutos=Sum('sesion__duracion_estimada'), ultima=Max('fecha_creacion')
+    ):
+        progresos[(agregado['sesion__programa'], agregado['participante'])] = ProgresoParticipante(
+            programa_id=agregado['sesion__programa'],
+            participante_id=agregado['participante'],
+            sesiones_completadas=agregado['total'],
+            minutos_practica=agregado['minutos'] or 0,
+            ultima_actividad=agregado['ultima']
+        )
+
+    for agregado in RespuestaCuestionario.objects.order_by().values('cuestionario__programa', 'participante').annotate(
+        total=Count('pk'), ultima=Max('fecha_respuesta')
+    ):
+        clave = (agregado['cuestionario__programa'], agregado['participante'])
+        progreso = progresos.setdefault(clave, ProgresoParticipante(programa_id=clave[0], participante_id=clave[1]))
+        progreso.cuestionarios_completados = agregado['total']
+        if progreso.ultima_actividad is None or agregado['ultima'] > progreso.ultima_actividad:
+            progreso.ultima_actividad = agregado['ultima']
+
+    ProgresoParticipante.objects.bulk_create(progresos.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuestionario', '0003_initial'),
+        ('sesion', '0002_initial'),
+        ('programa', '0002_initial'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgresoParticipante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sesiones_completadas', models.PositiveIntegerField(default=0)),
+                ('minutos_practica', models.PositiveIntegerField(default=0)),
+                ('cuestionarios_completados', models.PositiveIntegerField(default=0)),
+                ('ultima_actividad', models.DateTimeField(blank=True, null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('participante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progresos', to='usuario.participante')),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progresos', to='programa.programa')),
+            ],
+            options={
+                'unique_together': {('programa', 'participante')},
+            },
+        ),
+        migrations.RunPython(poblar_progreso, migrations.RunPython.noop),
+    ]
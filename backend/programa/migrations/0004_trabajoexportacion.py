@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0003_progresoparticipante'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programa',
+            name='version_datos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='TrabajoExportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=20)),
+                ('formato', models.CharField(max_length=10)),
+                ('firma', models.CharField(db_index=True, max_length=255)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('progreso', models.PositiveSmallIntegerField(default=0)),
+                ('archivo', models.FileField(blank=True, upload_to='exportaciones/')),
+                ('nombre_archivo', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_finalizacion', models.DateTimeField(blank=True, null=True)),
+                ('programa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_exportacion', to='programa.programa')),
+                ('solicitado_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_exportacion', to='usuario.investigador')),
+            ],
+            options={
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
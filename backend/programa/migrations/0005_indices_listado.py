@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cuestionario', '0003_initial'),
+        ('programa', '0004_trabajoexportacion'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='programa',
+            index=models.Index(fields=['creado_por', '-fecha_creacion', '-id'], name='programa_creador_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='programa',
+            index=models.Index(fields=['estado_publicacion', '-fecha_creacion', '-id'], name='programa_estado_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0005_indices_listado'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inscripcionprograma',
+            index=models.Index(fields=['participante', 'estado_inscripcion'], name='inscripcion_part_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcionprograma',
+            index=models.Index(condition=models.Q(('estado_inscripcion', 'en_progreso')), fields=['participante', 'programa'], name='inscripcion_en_progreso_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0006_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='programa',
+            name='version_representacion',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
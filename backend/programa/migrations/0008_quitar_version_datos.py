@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0007_version_representacion'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='programa',
+            name='version_datos',
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:10
+
+import os
+import programa.almacenamiento
+from django.conf import settings
+from django.db import migrations, models
+
+
+def borrar_exportaciones_en_media(apps, schema_editor):
+    """
+    Los archivos generados hasta ahora están en MEDIA_ROOT/exportaciones/, que
+    se sirve sin autenticación. Son regenerables: se borran con sus trabajos.
+    """
+    TrabajoExportacion = apps.get_model('programa', 'TrabajoExportacion')
+    for nombre in TrabajoExportacion.objects.exclude(archivo='').values_list('archivo', flat=True):
+        ruta = os.path.join(settings.MEDIA_ROOT, nombre)
+        if nombre.startswith('exportaciones/') and os.path.exists(ruta):
+            os.remove(ruta)
+    TrabajoExportacion.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0008_quitar_version_datos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoexportacion',
+            name='archivo',
+            field=models.FileField(blank=True, storage=programa.almacenamiento.almacenamiento_exportaciones, upload_to=''),
+        ),
+        migrations.RunPython(borrar_exportaciones_en_media, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,23 @@
 from django.db import models
+from django.db.models import Count, Max, Min
 from usuario.models import Participante, Investigador
 from django.utils import timezone
 from datetime import timedelta
+from config.seguimiento_campos import SeguimientoCamposMixin, SIN_CARGAR
 from config.enums import (
     TipoContexto, EnfoqueMetodologico,
-    EstadoPublicacion, EstadoInscripcion
+    EstadoPublicacion, EstadoInscripcion, EstadoTrabajoExportacion, etiqueta
 )
+from .almacenamiento import almacenamiento_exportaciones
 
-class Programa(models.Model):
+# Cambios de estado de publicación permitidos
+TRANSICIONES_PUBLICACION = {
+    EstadoPublicacion.BORRADOR: {EstadoPublicacion.PUBLICADO},
+    EstadoPublicacion.PUBLICADO: set(),
+}
+
+
+class Programa(SeguimientoCamposMixin, models.Model):
     # Identificación y Metadatos Generales
     nombre = models.CharField(max_length=255)
     descripcion = models.TextField()
@@ -63,6 +73,9 @@ class Programa(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     fecha_publicacion = models.DateTimeField(null=True, blank=True)
+    # Se incrementa cuando cambian los datos anidados en su representación
+    # (sesiones, cuestionarios, participantes o perfiles; ver cache_serializacion.py)
+    version_representacion = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.nombre
@@ -70,7 +83,6 @@ class Programa(models.Model):
     def publicar(self):
         if self.estado_publicacion == EstadoPublicacion.BORRADOR:
             self.estado_publicacion = EstadoPublicacion.PUBLICADO
-            self.fecha_publicacion = timezone.now()
             self.save()
 
     def puede_ser_publicado(self):
@@ -78,7 +90,7 @@ class Programa(models.Model):
 
     # Comprobar si tiene todos los campos requeridos
     def puede_ser_publicado1(self):
-        # Verificar campos requeridos
+        # Verificar campos requeridos (creado_por_id: sin cargar el investigador)
         campos_requeridos = [
             self.nombre,
             self.descripcion,
@@ -86,7 +98,7 @@ class Programa(models.Model):
             self.enfoque_metodologico,
             self.poblacion_objetivo,
             self.duracion_semanas,
-            self.creado_por
+            self.creado_por_id
         ]
         
         if not all(campos_requeridos):
@@ -95,23 +107,23 @@ class Programa(models.Model):
         return True
 
     # Comprobar si tiene todas las sesiones
-    def puede_ser_publicado2(self):            
-        # Verificar sesiones
-        sesiones_requeridas = set(range(1, self.duracion_semanas + 1))
-        sesiones_existentes = set(self.sesiones.values_list('semana', flat=True))
-        
-        if sesiones_requeridas != sesiones_existentes:
-            return False
-                
-        return True
+    def puede_ser_publicado2(self):
+        # Las semanas 1..duracion_semanas, sin huecos: semana es única por programa,
+        # así que basta con el número de sesiones y la primera y última semana
+        if 'sesiones' in getattr(self, '_prefetched_objects_cache', {}):
+            semanas = [sesion.semana for sesion in self.sesiones.all()]
+            resumen = {'total': len(semanas), 'primera': min(semanas, default=None), 'ultima': max(semanas, default=None)}
+        else:
+            resumen = self.sesiones.aggregate(total=Count('pk'), primera=Min('semana'), ultima=Max('semana'))
+        if not self.duracion_semanas:
+            return resumen['total'] == 0
+        return resumen == {'total': self.duracion_semanas, 'primera': 1, 'ultima': self.duracion_semanas}
 
     # Comprobar si tiene los cuestionarios necesarios según el tipo de evaluación
     def puede_ser_publicado3(self):
         if self.estado_publicacion == EstadoPublicacion.PUBLICADO:
             if self.tiene_cuestionarios:
-                tiene_pre = self.cuestionario_pre is not None
-                tiene_post = self.cuestionario_post is not None
-                if not (tiene_pre and tiene_post):
+                if not (self.cuestionario_pre_id and self.cuestionario_post_id):
                     return False
                 
         return True
@@ -122,44 +134,75 @@ class Programa(models.Model):
     def puede_enviar_cuestionarios(self):
         return self.estado_publicacion == EstadoPublicacion.PUBLICADO
 
+    def _aplicar_transicion(self, estado_anterior):
+        """Valida el cambio de estado de publicación (ver TRANSICIONES_PUBLICACION)"""
+        if self.estado_publicacion == estado_anterior:
+            return
+        if self.estado_publicacion not in TRANSICIONES_PUBLICACION.get(estado_anterior, ()):
+            raise ValueError(
+                f"No se puede pasar un programa de {etiqueta(EstadoPublicacion, estado_anterior)} "
+                f"a {etiqueta(EstadoPublicacion, self.estado_publicacion)}"
+            )
+        if self.estado_publicacion == EstadoPublicacion.PUBLICADO:
+            # Si estamos intentando publicar, verificar que se puede publicar
+            if not self.puede_ser_publicado1():
+                raise ValueError("No se puede publicar el programa. Asegúrese de que tiene todos los campos requeridos.")
+            
+            if not self.puede_ser_publicado2():
+                raise ValueError("No se puede publicar el programa. Asegúrese de que tiene todas las sesiones necesarias.")
+            
+            if not self.puede_ser_publicado3():
+                raise ValueError("No se puede publicar el programa. Asegúrese de que tiene los cuestionarios necesarios.")
+
+            self.fecha_publicacion = timezone.now()
+
     def save(self, *args, **kwargs):
         if not self.pk:  # Si es un nuevo programa
             # Forzar que los programas nuevos siempre se creen como BORRADOR
             self.estado_publicacion = EstadoPublicacion.BORRADOR
             self.fecha_publicacion = None
             super().save(*args, **kwargs)
-        else:  # Si el programa ya existe
-            programa_original = Programa.objects.get(pk=self.pk)
-            if programa_original.estado_publicacion == EstadoPublicacion.BORRADOR and self.estado_publicacion == EstadoPublicacion.PUBLICADO:
-                # Si estamos intentando publicar, verificar que se puede publicar
-                if not self.puede_ser_publicado1():
-                    raise ValueError("No se puede publicar el programa. Asegúrese de que tiene todos los campos requeridos.")
-                
-                if not self.puede_ser_publicado2():
-                    raise ValueError("No se puede publicar el programa. Asegúrese de que tiene todas las sesiones necesarias.")
-                
-                if not self.puede_ser_publicado3():
-                    raise ValueError("No se puede publicar el programa. Asegúrese de que tiene los cuestionarios necesarios.")
+            return
 
-                self.fecha_publicacion = timezone.now()
-                super().save(*args, **kwargs)
-            elif programa_original.estado_publicacion == EstadoPublicacion.BORRADOR and self.participantes.exists():
-                # Si el programa está en borrador y tiene participantes, no permitir guardar
-                raise ValueError("No se pueden agregar participantes a un programa en borrador")
-            else:
-                super().save(*args, **kwargs)
+        # El estado anterior sale de la instantánea de carga; solo se consulta
+        # para instancias que no se han cargado de la base de datos
+        estado_anterior = self.valor_cargado('estado_publicacion')
+        if estado_anterior is SIN_CARGAR:
+            estado_anterior = Programa.objects.filter(pk=self.pk).values_list('estado_publicacion', flat=True).get()
+        self._aplicar_transicion(estado_anterior)
+
+        if kwargs.get('update_fields') is not None and self.estado_publicacion != estado_anterior:
+            kwargs['update_fields'] = list(kwargs['update_fields']) + ['fecha_publicacion']
+        elif 'update_fields' not in kwargs:
+            # Solo las columnas modificadas. version_representacion solo se
+            # modifica con actualizaciones atómicas (ver signals.py); no se
+            # sobrescribe con el valor cargado en memoria
+            modificados = [campo for campo in self.campos_modificados() if campo != 'version_representacion']
+            if not modificados:
+                return
+            kwargs['update_fields'] = modificados + ['fecha_actualizacion']
+
+        if self.estado_publicacion == EstadoPublicacion.BORRADOR and self.participantes.exists():
+            # Si el programa está en borrador y tiene participantes, no permitir guardar
+            raise ValueError("No se pueden agregar participantes a un programa en borrador")
+        super().save(*args, **kwargs)
 
     def get_tipo_contexto_display(self):
-        return dict(TipoContexto.choices).get(self.tipo_contexto, self.tipo_contexto)
+        return etiqueta(TipoContexto, self.tipo_contexto)
 
     def get_enfoque_metodologico_display(self):
-        return dict(EnfoqueMetodologico.choices).get(self.enfoque_metodologico, self.enfoque_metodologico)
+        return etiqueta(EnfoqueMetodologico, self.enfoque_metodologico)
 
     def get_estado_publicacion_display(self):
-        return dict(EstadoPublicacion.choices).get(self.estado_publicacion, self.estado_publicacion)
+        return etiqueta(EstadoPublicacion, self.estado_publicacion)
 
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Listados paginados por cursor (config/paginacion.py)
+            models.Index(fields=['creado_por', '-fecha_creacion', '-id'], name='programa_creador_fecha_idx'),
+            models.Index(fields=['estado_publicacion', '-fecha_creacion', '-id'], name='programa_estado_fecha_idx'),
+        ]
 
 class InscripcionPrograma(models.Model):
     programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='inscripciones')
@@ -171,6 +214,15 @@ class InscripcionPrograma(models.Model):
     class Meta:
         unique_together = ('programa', 'participante')
         ordering = ['-fecha_inicio']
+        indexes = [
+            models.Index(fields=['participante', 'estado_inscripcion'], name='inscripcion_part_estado_idx'),
+            # Inscripción activa del participante: solo las filas en progreso
+            models.Index(
+                fields=['participante', 'programa'],
+                condition=models.Q(estado_inscripcion=EstadoInscripcion.EN_PROGRESO),
+                name='inscripcion_en_progreso_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.participante} - {self.programa}"
@@ -208,4 +260,59 @@ class InscripcionPrograma(models.Model):
             self.save()
 
     def get_estado_inscripcion_display(self):
-        return dict(EstadoInscripcion.choices).get(self.estado_inscripcion, self.estado_inscripcion)
+        return etiqueta(EstadoInscripcion, self.estado_inscripcion)
+
+class ProgresoParticipante(models.Model):
+    """
+    Progreso materializado de un participante en un programa.
+    Se mantiene incrementalmente al registrar diarios de sesión y respuestas
+    a cuestionarios (ver programa/progreso.py y programa/signals.py).
+    """
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='progresos')
+    participante = models.ForeignKey(Participante, on_delete=models.CASCADE, related_name='progresos')
+    sesiones_completadas = models.PositiveIntegerField(default=0)
+    minutos_practica = models.PositiveIntegerField(default=0)
+    cuestionarios_completados = models.PositiveIntegerField(default=0)
+    ultima_actividad = models.DateTimeField(null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('programa', 'participante')
+
+    def __str__(self):
+        return f"Progreso de {self.participante} en {self.programa}"
+
+
+class TrabajoExportacion(models.Model):
+    """
+    Exportación de datos de un programa generada en segundo plano.
+    El archivo resultante se guarda en EXPORTACIONES_ROOT (fuera de MEDIA_ROOT)
+    y se reutiliza mientras la firma de los datos no cambie (ver
+    programa/trabajos_exportacion.py). Al borrar el trabajo se borra su archivo.
+    """
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='trabajos_exportacion')
+    solicitado_por = models.ForeignKey(Investigador, on_delete=models.CASCADE, related_name='trabajos_exportacion')
+    tipo = models.CharField(max_length=20)
+    formato = models.CharField(max_length=10)
+    firma = models.CharField(max_length=255, db_index=True)
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoTrabajoExportacion.choices,
+        default=EstadoTrabajoExportacion.PENDIENTE
+    )
+    progreso = models.PositiveSmallIntegerField(default=0)
+    archivo = models.FileField(storage=almacenamiento_exportaciones, blank=True)
+    nombre_archivo = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_finalizacion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"Exportación {self.tipo} ({self.formato}) de {self.programa}"
+
+    def get_estado_display(self):
+        return etiqueta(EstadoTrabajoExportacion, self.estado)
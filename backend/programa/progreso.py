@@ -0,0 +1,303 @@
+"""
+Mantenimiento de la tabla materializada ProgresoParticipante.
+
+Los diarios de sesión y las respuestas a cuestionarios actualizan el progreso
+de forma incremental al crearse. Al eliminarse, las filas afectadas se
+recalculan al confirmar la transacción, una sola vez por par (programa,
+participante) aunque un borrado en cascada elimine miles de diarios. La
+reconstrucción completa y la verificación de consistencia usan consultas
+agrupadas.
+"""
+import threading
+import weakref
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from sesion.models import DiarioSesion
+from cuestionario.models import Cuestionario, RespuestaCuestionario
+from .agregaciones import subconsulta_conteo
+from .models import Programa, ProgresoParticipante
+
+CAMPOS_PROGRESO = ['sesiones_completadas', 'minutos_practica', 'cuestionarios_completados', 'ultima_actividad']
+
+
+def _actualizar_ultima_actividad(fecha):
+    return Greatest(Coalesce(F('ultima_actividad'), Value(fecha)), Value(fecha))
+
+
+def registrar_diario(diario):
+    """Suma un diario de sesión recién creado al progreso del participante."""
+    progreso, _ = ProgresoParticipante.objects.get_or_create(
+        programa_id=diario.programa_id,
+        participante_id=diario.participante_id
+    )
+    ProgresoParticipante.objects.filter(pk=progreso.pk).update(
+        sesiones_completadas=F('sesiones_completadas') + 1,
+        minutos_practica=F('minutos_practica') + (diario.duracion_estimada or 0),
+        ultima_actividad=_actualizar_ultima_actividad(diario.fecha_creacion)
+    )
+
+
+def registrar_diarios(diarios):
+    """
+    Suma al progreso diarios creados con bulk_create (que no emite post_save):
+    una actualización por cada par (programa, participante).
+    """
+    totales = {}
+    for diario in diarios:
+        total = totales.setdefault((diario.programa_id, diario.participante_id), {'sesiones': 0, 'minutos': 0, 'ultima': None})
+        total['sesiones'] += 1
+        total['minutos'] += diario.duracion_estimada or 0
+        if total['ultima'] is None or diario.fecha_creacion > total['ultima']:
+            total['ultima'] = diario.fecha_creacion
+
+    for (programa_id, participante_id), total in totales.items():
+        progreso, _ = ProgresoParticipante.objects.get_or_create(programa_id=programa_id, participante_id=participante_id)
+        ProgresoParticipante.objects.filter(pk=progreso.pk).update(
+            sesiones_completadas=F('sesiones_completadas') + total['sesiones'],
+            minutos_practica=F('minutos_practica') + total['minutos'],
+            ultima_actividad=_actualizar_ultima_actividad(total['ultima'])
+        )
+
+
+def registrar_respuesta(respuesta):
+    """Suma una respuesta a cuestionario recién creada al progreso del participante."""
+    progreso, _ = ProgresoParticipante.objects.get_or_create(
+        programa_id=respuesta.cuestionario.programa_id,
+        participante_id=respuesta.participante_id
+    )
+    ProgresoParticipante.objects.filter(pk=progreso.pk).update(
+        cuestionarios_completados=F('cuestionarios_completados') + 1,
+        ultima_actividad=_actualizar_ultima_actividad(respuesta.fecha_respuesta)
+    )
+
+
+def recalcular_progreso(programa_id, participante_id):
+    """
+    Recalcula desde cero la fila de progreso de un participante en un programa.
+    No crea la fila si no existe (p. ej. durante un borrado en cascada).
+    """
+    diarios = DiarioSesion.objects.filter(
+        programa=OuterRef('programa'),
+        participante=OuterRef('participante')
+    ).order_by().values('participante')
+    respuestas = RespuestaCuestionario.objects.filter(
+        cuestionario__programa=OuterRef('programa'),
+        participante=OuterRef('participante')
+    ).order_by().values('participante')
+
+    ultimo_diario = Subquery(diarios.annotate(ultima=Max('fecha_creacion')).values('ultima'))
+    ultima_respuesta = Subquery(respuestas.annotate(ultima=Max('fecha_respuesta')).values('ultima'))
+
+    ProgresoParticipante.objects.filter(
+        programa_id=programa_id,
+        participante_id=participante_id
+    ).update(
+        sesiones_completadas=subconsulta_conteo(diarios, 'participante'),
+        minutos_practica=Coalesce(
+            Subquery(
+                diarios.annotate(total=Sum('duracion_estimada')).values('total'),
+                output_field=IntegerField()
+            ),
+            Value(0)
+        ),
+        cuestionarios_completados=subconsulta_conteo(respuestas, 'participante'),
+        ultima_actividad=Greatest(
+            Coalesce(ultimo_diario, ultima_respuesta),
+            Coalesce(ultima_respuesta, ultimo_diario)
+        )
+    )
+
+
+def recalcular_pares(pares):
+    """
+    Recalcula el progreso de los pares (programa, participante) cuyos diarios
+    se han modificado sin señales (p. ej. al mover una sesión a otro programa
+    con Sesion.save()), creando las filas que falten.
+    """
+    for programa_id, participante_id in pares:
+        ProgresoParticipante.objects.get_or_create(programa_id=programa_id, participante_id=participante_id)
+        recalcular_progreso(programa_id, participante_id)
+
+
+class _RecalculoPendiente:
+    """
+    Callback de on_commit con los pares {(programa_id, participante_id)} y
+    {(cuestionario_id, participante_id)} a recalcular al confirmar la
+    transacción en curso.
+    """
+
+    def __init__(self):
+        self.pares = {'diarios': set(), 'respuestas': set()}
+
+    def __call__(self):
+        if _pendiente() is self:
+            _pendientes.recalculo = None
+        recalcular_pendientes(**self.pares)
+
+
+# Recálculo registrado en la transacción en curso de cada hilo. Se guarda con
+# una referencia débil: el único dueño es la lista de on_commit, así que si
+# Django descarta el callback al deshacer la transacción (o el savepoint en que
+# se registró) la referencia muere y la siguiente llamada registra otro.
+_pendientes = threading.local()
+
+
+def _pendiente():
+    referencia = getattr(_pendientes, 'recalculo', None)
+    return referencia() if referencia is not None else None
+
+
+def _recalculos_pendientes():
+    """
+    Pares pendientes de la transacción en curso. Se registra un solo callback
+    por transacción; el propio callback lo desmarca al ejecutarse.
+    """
+    recalculo = _pendiente()
+    if recalculo is None:
+        recalculo = _RecalculoPendiente()
+        transaction.on_commit(recalculo)
+        _pendientes.recalculo = weakref.ref(recalculo)
+    return recalculo.pares
+
+
+def recalcular_pendientes(diarios, respuestas):
+    """Recalcula cada par afectado una vez; los de programas ya eliminados se omiten"""
+    pares = set(diarios)
+    if respuestas:
+        programas = dict(
+            Cuestionario.objects.filter(pk__in={cuestionario_id for cuestionario_id, _ in respuestas})
+            .values_list('pk', 'programa_id')
+        )
+        pares.update(
+            (programas[cuestionario_id], participante_id)
+            for cuestionario_id, participante_id in respuestas if cuestionario_id in programas
+        )
+    existentes = set(
+        Programa.objects.filter(pk__in={programa_id for programa_id, _ in pares}).values_list('pk', flat=True)
+    )
+    for programa_id, participante_id in pares:
+        if programa_id in existentes:
+            recalcular_progreso(programa_id, participante_id)
+
+
+def _programar_recalculo(tipo, par):
+    if not transaction.get_connection().in_atomic_block:
+        recalcular_pendientes(**{'diarios': set(), 'respuestas': set(), tipo: {par}})
+        return
+    _recalculos_pendientes()[tipo].add(par)
+
+
+def descartar_diario(diario):
+    _programar_recalculo('diarios', (diario.programa_id, diario.participante_id))
+
+
+def descartar_respuesta(respuesta):
+    _programar_recalculo('respuestas', (respuesta.cuestionario_id, respuesta.participante_id))
+
+
+def calcular_progreso_esperado(programa=None):
+    """
+    Calcula el progreso de todos los participantes a partir de los datos
+    originales, con dos consultas agrupadas.
+    Devuelve un diccionario {(programa_id, participante_id): {campo: valor}}.
+    """
+    diarios = DiarioSesion.objects.all()
+    respuestas = RespuestaCuestionario.objects.all()
+    if programa is not None:
+        diarios = diarios.filter(programa=programa)
+        respuestas = respuestas.filter(cuestionario__programa=programa)
+
+    progresos = {}
+
+    def fila(programa_id, participante_id):
+        return progresos.setdefault((programa_id, participante_id), {
+            'sesiones_completadas': 0,
+            'minutos_practica': 0,
+            'cuestionarios_completados': 0,
+            'ultima_actividad': None
+        })
+
+    agregados_diarios = diarios.order_by().values('programa', 'participante').annotate(
+        total=Count('pk'),
+        minutos=Sum('duracion_estimada'),
+        ultima=Max('fecha_creacion')
+    )
+    for agregado in agregados_diarios:
+        datos = fila(agregado['programa'], agregado['participante'])
+        datos['sesiones_completadas'] = agregado['total']
+        datos['minutos_practica'] = agregado['minutos'] or 0
+        datos['ultima_actividad'] = agregado['ultima']
+
+    agregados_respuestas = respuestas.order_by().values('cuestionario__programa', 'participante').annotate(
+        total=Count('pk'),
+        ultima=Max('fecha_respuesta')
+    )
+    for agregado in agregados_respuestas:
+        datos = fila(agregado['cuestionario__programa'], agregado['participante'])
+        datos['cuestionarios_completados'] = agregado['total']
+        if datos['ultima_actividad'] is None or agregado['ultima'] > datos['ultima_actividad']:
+            datos['ultima_actividad'] = agregado['ultima']
+
+    return progresos
+
+
+@transaction.atomic
+def reconstruir_progreso(programa=None, batch_size=1000):
+    """
+    Borra y vuelve a generar las filas de progreso (de un programa o de todos).
+    Devuelve el número de filas creadas.
+    """
+    existentes = ProgresoParticipante.objects.all()
+    if programa is not None:
+        existentes = existentes.filter(programa=programa)
+    existentes.delete()
+
+    progresos = calcular_progreso_esperado(programa)
+    ProgresoParticipante.objects.bulk_create(
+        [
+            ProgresoParticipante(programa_id=programa_id, participante_id=participante_id, **datos)
+            for (programa_id, participante_id), datos in progresos.items()
+        ],
+        batch_size=batch_size
+    )
+    return len(progresos)
+
+
+def verificar_progreso(programa=None):
+    """
+    Compara la tabla materializada con el progreso calculado desde los datos
+    originales. Devuelve una lista de discrepancias; vacía si es consistente.
+    """
+    esperados = calcular_progreso_esperado(programa)
+    almacenados = ProgresoParticipante.objects.all()
+    if programa is not None:
+        almacenados = almacenados.filter(programa=programa)
+
+    vacio = {'sesiones_completadas': 0, 'minutos_practica': 0, 'cuestionarios_completados': 0, 'ultima_actividad': None}
+    discrepancias = []
+    vistos = set()
+    for progreso in almacenados.values('programa_id', 'participante_id', *CAMPOS_PROGRESO):
+        clave = (progreso['programa_id'], progreso['participante_id'])
+        vistos.add(clave)
+        esperado = esperados.get(clave, vacio)
+        diferencias = {
+            campo: {'almacenado': progreso[campo], 'esperado': esperado[campo]}
+            for campo in CAMPOS_PROGRESO
+            if progreso[campo] != esperado[campo]
+        }
+        if diferencias:
+            discrepancias.append({'programa_id': clave[0], 'participante_id': clave[1], 'diferencias': diferencias})
+
+    for clave, esperado in esperados.items():
+        if clave not in vistos:
+            discrepancias.append({
+                'programa_id': clave[0],
+                'participante_id': clave[1],
+                'diferencias': {
+                    campo: {'almacenado': None, 'esperado': esperado[campo]}
+                    for campo in CAMPOS_PROGRESO
+                }
+            })
+
+    return discrepancias
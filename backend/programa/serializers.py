@@ -1,11 +1,23 @@
 from rest_framework import serializers
-from .models import Programa, InscripcionPrograma
+from .models import Programa, InscripcionPrograma, TrabajoExportacion
+from django.urls import reverse
 from usuario.serializers import ParticipanteSerializer, InvestigadorSerializer, UsuarioSerializer
 from sesion.serializers import SesionSerializer
 from django.utils import timezone
 from cuestionario.serializers import CuestionarioSerializer
 from rest_framework.exceptions import ValidationError
-from config.enums import TipoContexto, EnfoqueMetodologico, EstadoPublicacion, EstadoInscripcion
+from config.enums import TipoContexto, EnfoqueMetodologico, EstadoPublicacion, EstadoInscripcion, EstadoTrabajoExportacion
+
+def datos_inscripcion(inscripcion, programa):
+    """Resumen de la inscripción del usuario que se muestra junto a cada programa"""
+    fecha_inicio = inscripcion.fecha_inicio
+    fecha_fin = inscripcion.fecha_fin or (fecha_inicio + timezone.timedelta(weeks=programa.duracion_semanas))
+    return {
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'estado_inscripcion': inscripcion.estado_inscripcion,
+        'es_completado': inscripcion.estado_inscripcion == EstadoInscripcion.COMPLETADO
+    }
 
 class InscripcionProgramaSerializer(serializers.ModelSerializer):
     participante = ParticipanteSerializer(read_only=True)
@@ -64,14 +76,7 @@ class ProgramaSerializer(serializers.ModelSerializer):
             ).first()
             
             if inscripcion:
-                fecha_inicio = inscripcion.fecha_inicio
-                fecha_fin = inscripcion.fecha_fin or (fecha_inicio + timezone.timedelta(weeks=obj.duracion_semanas))
-                return {
-                    'fecha_inicio': fecha_inicio,
-                    'fecha_fin': fecha_fin,
-                    'estado_inscripcion': inscripcion.estado_inscripcion,
-                    'es_completado': inscripcion.estado_inscripcion == EstadoInscripcion.COMPLETADO
-                }
+                return datos_inscripcion(inscripcion, obj)
         return None
 
     def get_tiene_cuestionarios_completos(self, obj):
@@ -86,6 +91,42 @@ class ProgramaSerializer(serializers.ModelSerializer):
                 )
         return value
 
+class ProgramaListSerializer(serializers.ModelSerializer):
+    """
+    Representación ligera para los listados paginados: sin sesiones,
+    participantes ni cuestionarios anidados. Espera el queryset anotado con
+    total_sesiones y total_participantes y con select_related('creado_por__usuario').
+    """
+    creado_por_nombre = serializers.SerializerMethodField()
+    tipo_contexto_display = serializers.CharField(source='get_tipo_contexto_display', read_only=True)
+    enfoque_metodologico_display = serializers.CharField(source='get_enfoque_metodologico_display', read_only=True)
+    estado_publicacion_display = serializers.CharField(source='get_estado_publicacion_display', read_only=True)
+    total_sesiones = serializers.IntegerField(read_only=True)
+    total_participantes = serializers.IntegerField(read_only=True)
+    tiene_cuestionarios_completos = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Programa
+        fields = [
+            'id', 'nombre', 'descripcion',
+            'tipo_contexto', 'tipo_contexto_display',
+            'enfoque_metodologico', 'enfoque_metodologico_display',
+            'poblacion_objetivo', 'duracion_semanas',
+            'tiene_cuestionarios', 'tiene_diarios',
+            'estado_publicacion', 'estado_publicacion_display',
+            'creado_por', 'creado_por_nombre',
+            'total_sesiones', 'total_participantes', 'tiene_cuestionarios_completos',
+            'fecha_creacion', 'fecha_actualizacion', 'fecha_publicacion'
+        ]
+        read_only_fields = fields
+
+    def get_creado_por_nombre(self, obj):
+        usuario = obj.creado_por.usuario
+        return f"{usuario.nombre} {usuario.apellidos}".strip()
+
+    def get_tiene_cuestionarios_completos(self, obj):
+        return obj.cuestionario_pre_id is not None and obj.cuestionario_post_id is not None
+
 class ParticipantesProgramaSerializer(serializers.ModelSerializer):
     participantes = serializers.SerializerMethodField()
 
@@ -97,3 +138,21 @@ class ParticipantesProgramaSerializer(serializers.ModelSerializer):
         # Obtenemos los usuarios asociados a los participantes del programa
         usuarios = [participante.usuario for participante in obj.participantes.all()]
         return UsuarioSerializer(usuarios, many=True).data
+
+class TrabajoExportacionSerializer(serializers.ModelSerializer):
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    url_descarga = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TrabajoExportacion
+        fields = [
+            'id', 'programa', 'tipo', 'formato', 'estado', 'estado_display', 'progreso',
+            'nombre_archivo', 'error', 'fecha_creacion', 'fecha_inicio', 'fecha_finalizacion',
+            'url_descarga'
+        ]
+        read_only_fields = fields
+
+    def get_url_descarga(self, obj):
+        if obj.estado != EstadoTrabajoExportacion.COMPLETADO:
+            return None
+        return reverse('programa-exportacion-descargar', args=[obj.id])
@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from sesion.models import Sesion, DiarioSesion
+from cuestionario.models import Cuestionario, RespuestaCuestionario
+from usuario.models import Usuario, Investigador, Participante
+from .models import Programa, InscripcionPrograma, TrabajoExportacion
+from .almacenamiento import almacenamiento_exportaciones
+from .cache_serializacion import invalidar_programas
+from . import progreso
+
+
+def incrementar_version_representacion(**filtros):
+    """
+    Marca como modificados los datos anidados en la representación del
+    programa que cumple `filtros` con una única sentencia UPDATE, sin pasar
+    por Programa.save().
+    """
+    Programa.objects.filter(**filtros).update(version_representacion=F('version_representacion') + 1)
+
+
+# Los diarios y respuestas solo actualizan el progreso: las exportaciones y el
+# análisis Likert comprueban si siguen siendo válidos al pedirlos (ver
+# agregaciones.huella), sin escribir en la fila del programa
+
+@receiver(post_save, sender=DiarioSesion)
+def diario_guardado(sender, instance, created, **kwargs):
+    if created:
+        progreso.registrar_diario(instance)
+
+
+@receiver(post_delete, sender=DiarioSesion)
+def diario_eliminado(sender, instance, **kwargs):
+    # El progreso se recalcula al confirmar, una vez por par (ver progreso.py)
+    progreso.descartar_diario(instance)
+
+
+@receiver(post_save, sender=RespuestaCuestionario)
+def respuesta_guardada(sender, instance, created, **kwargs):
+    if created:
+        progreso.registrar_respuesta(instance)
+
+
+@receiver(post_delete, sender=RespuestaCuestionario)
+def respuesta_eliminada(sender, instance, **kwargs):
+    progreso.descartar_respuesta(instance)
+
+
+@receiver(post_save, sender=InscripcionPrograma)
+@receiver(post_delete, sender=InscripcionPrograma)
+@receiver(post_save, sender=Sesion)
+@receiver(post_delete, sender=Sesion)
+@receiver(post_save, sender=Cuestionario)
+@receiver(post_delete, sender=Cuestionario)
+def datos_programa_modificados(sender, instance, **kwargs):
+    invalidar_representacion([instance.programa_id])
+
+
+# Invalidación de la caché de programas serializados (ver cache_serializacion.py)
+
+def invalidar_representacion(programa_ids):
+    """
+    Descarta la representación cacheada de los programas. Además de borrar
+    las entradas (solo alcanza a este proceso con LocMem) se incrementa
+    version_representacion, que forma parte de la firma, para que los demás
+    procesos tampoco usen su copia.
+    """
+    programa_ids = list(programa_ids)
+    if programa_ids:
+        incrementar_version_representacion(pk__in=programa_ids)
+        invalidar_programas(programa_ids)
+
+
+@receiver(post_save, sender=Programa)
+@receiver(post_delete, sender=Programa)
+def programa_modificado(sender, instance, created=True, **kwargs):
+    # Al guardarlo cambia fecha_actualizacion, que ya forma parte de la firma
+    invalidar_programas([instance.pk])
+    if not created:
+        return
+    # El investigador anidado incluye la lista de ids de sus programas, que
+    # solo cambia al crear o eliminar uno (post_delete no envía `created`)
+    invalidar_representacion(
+        Programa.objects.filter(creado_por_id=instance.creado_por_id).exclude(pk=instance.pk).values_list('pk', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Programa.participantes.through)
+def participantes_programa_modificados(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if isinstance(instance, Programa):
+        invalidar_representacion([instance.pk])
+    elif pk_set:
+        invalidar_representacion(pk_set)
+    elif action == 'pre_clear':
+        invalidar_representacion(instance.programas_inscritos.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_modificado(sender, instance, created, update_fields=None, **kwargs):
+    # Los inicios de sesión solo actualizan last_login, que no se muestra
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    invalidar_representacion(
+        Programa.objects.filter(
+            Q(creado_por__usuario=instance) | Q(participantes__usuario=instance)
+        ).values_list('pk', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Investigador)
+def investigador_modificado(sender, instance, created, **kwargs):
+    if not created:
+        invalidar_representacion(instance.programas.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Participante)
+def participante_modificado(sender, instance, created, **kwargs):
+    if not created:
+        invalidar_representacion(instance.programas_inscritos.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=TrabajoExportacion)
+def trabajo_exportacion_eliminado(sender, instance, **kwargs):
+    # Al confirmar: si la transacción se deshace, el trabajo sigue usando su archivo
+    if instance.archivo:
+        nombre = instance.archivo.name
+        transaction.on_commit(lambda: almacenamiento_exportaciones().delete(nombre))
@@ -0,0 +1,231 @@
+"""
+Trabajos de exportación en segundo plano.
+
+Las exportaciones se generan en un pool de hilos local (sin broker externo) y
+el archivo resultante se escribe en EXPORTACIONES_ROOT (ver almacenamiento.py),
+que no se sirve como media: solo se descarga con la vista autenticada. Cada
+trabajo guarda una firma de los datos del programa; mientras la firma no
+cambie se reutiliza el trabajo existente en lugar de generar el archivo de
+nuevo.
+
+Al borrar un trabajo (también en cascada con su programa) se borra su archivo.
+Los trabajos caducados o sustituidos por otro más reciente los elimina
+limpiar_exportaciones() (comando limpiar_exportaciones).
+"""
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from config.enums import EstadoTrabajoExportacion
+from sesion.models import DiarioSesion
+from cuestionario.models import RespuestaCuestionario
+from .agregaciones import huella
+from .almacenamiento import almacenamiento_exportaciones
+from .models import Programa, TrabajoExportacion
+from .api.exportacion import (
+    TIPOS_ZIP, archivos_exportacion, contenido_archivo, nombre_exportacion, stream_zip
+)
+
+# Un trabajo pendiente o en proceso más antiguo que esto se considera perdido
+# (p. ej. el proceso se reinició) y no se reutiliza
+TIEMPO_MAXIMO_TRABAJO = timedelta(hours=1)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EXPORTACION_WORKERS,
+                thread_name_prefix='exportacion'
+            )
+    return _executor
+
+
+def firma_datos(programa, tipo, formato):
+    """
+    Identifica el estado de los datos exportados. Cambia al editar el programa
+    (fecha_actualizacion), sus sesiones, cuestionarios, inscripciones o perfiles
+    (version_representacion, ver signals.py) o sus diarios y respuestas, cuya
+    huella se calcula aquí con un agregado de cada tabla.
+    """
+    diarios = huella(DiarioSesion.objects.filter(programa=programa), 'fecha_actualizacion')
+    respuestas = huella(RespuestaCuestionario.objects.filter(cuestionario__programa=programa), 'fecha_respuesta')
+    return (
+        f"{programa.pk}:{tipo}:{formato}:{programa.fecha_actualizacion.isoformat()}:"
+        f"{programa.version_representacion}:{diarios}:{respuestas}"
+    )
+
+
+def ruta_archivo(trabajo):
+    return almacenamiento_exportaciones().path(trabajo.archivo.name)
+
+
+def buscar_trabajo_reutilizable(programa, firma):
+    """Devuelve un trabajo con la misma firma que se puede reutilizar, o None."""
+    ahora = timezone.now()
+    trabajos = TrabajoExportacion.objects.filter(
+        programa=programa,
+        firma=firma,
+        fecha_creacion__gte=ahora - timedelta(hours=settings.EXPORTACION_CACHE_HORAS)
+    ).exclude(estado=EstadoTrabajoExportacion.ERROR)
+
+    for trabajo in trabajos:
+        if trabajo.estado == EstadoTrabajoExportacion.COMPLETADO:
+            if trabajo.archivo and os.path.exists(ruta_archivo(trabajo)):
+                return trabajo
+        elif trabajo.fecha_creacion >= ahora - TIEMPO_MAXIMO_TRABAJO:
+            return trabajo
+    return None
+
+
+def solicitar_exportacion(programa, investigador, tipo, formato):
+    """
+    Crea un trabajo de exportación y lo encola, o reutiliza uno existente si
+    los datos no han cambiado. Devuelve (trabajo, reutilizado).
+    """
+    with transaction.atomic():
+        # Bloquear la fila del programa: dos solicitudes simultáneas no crean
+        # dos trabajos para los mismos datos, la segunda reutiliza el primero
+        Programa.objects.select_for_update().only('pk').get(pk=programa.pk)
+        firma = firma_datos(programa, tipo, formato)
+        trabajo = buscar_trabajo_reutilizable(programa, firma)
+        if trabajo:
+            return trabajo, True
+
+        trabajo = TrabajoExportacion.objects.create(
+            programa=programa,
+            solicitado_por=investigador,
+            tipo=tipo,
+            formato=formato,
+            firma=firma
+        )
+    encolar(trabajo.pk)
+    return trabajo, False
+
+
+def encolar(trabajo_id):
+    """
+    Envía el trabajo al pool de hilos una vez confirmada la transacción.
+    Con EXPORTACION_ASINCRONA = False se ejecuta en el momento (tests).
+    """
+    if not settings.EXPORTACION_ASINCRONA:
+        ejecutar_trabajo(trabajo_id)
+        return
+    transaction.on_commit(lambda: _obtener_executor().submit(_ejecutar_en_hilo, trabajo_id))
+
+
+def _ejecutar_en_hilo(trabajo_id):
+    close_old_connections()
+    try:
+        ejecutar_trabajo(trabajo_id)
+    finally:
+        close_old_connections()
+
+
+def _actualizar_progreso(trabajo_id, progreso):
+    TrabajoExportacion.objects.filter(pk=trabajo_id).update(progreso=progreso)
+
+
+def _contenido_trabajo(trabajo, fecha):
+    """Contenido del archivo como iterable de bytes, actualizando el progreso por archivo del ZIP"""
+    programa = trabajo.programa
+    if trabajo.tipo not in TIPOS_ZIP:
+        return contenido_archivo(trabajo.tipo, programa, trabajo.formato)
+
+    archivos = list(archivos_exportacion(programa, trabajo.tipo, trabajo.formato, fecha))
+
+    def con_progreso():
+        for indice, archivo in enumerate(archivos):
+            yield archivo
+            # stream_zip pide el siguiente archivo cuando ha terminado de escribir el anterior
+            _actualizar_progreso(trabajo.pk, (indice + 1) * 99 // len(archivos))
+
+    return stream_zip(con_progreso())
+
+
+def ejecutar_trabajo(trabajo_id):
+    """Genera el archivo de un trabajo de exportación y lo deja listo para descargar."""
+    ruta = ruta_temporal = None
+    try:
+        trabajo = TrabajoExportacion.objects.select_related('programa').get(pk=trabajo_id)
+        trabajo.estado = EstadoTrabajoExportacion.EN_PROCESO
+        trabajo.fecha_inicio = timezone.now()
+        trabajo.save(update_fields=['estado', 'fecha_inicio'])
+
+        fecha = datetime.now().strftime('%Y%m%d')
+        nombre = nombre_exportacion(trabajo.programa, trabajo.tipo, trabajo.formato, fecha)
+        ruta_relativa = f'programa_{trabajo.programa_id}/{trabajo.pk}_{nombre}'
+        ruta = almacenamiento_exportaciones().path(ruta_relativa)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+        # Escribir en un archivo temporal para no servir nunca un archivo a medias
+        ruta_temporal = f'{ruta}.parcial'
+        with open(ruta_temporal, 'wb') as destino:
+            for trozo in _contenido_trabajo(trabajo, fecha):
+                destino.write(trozo)
+        os.replace(ruta_temporal, ruta)
+
+        trabajo.archivo.name = ruta_relativa
+        trabajo.nombre_archivo = nombre
+        trabajo.estado = EstadoTrabajoExportacion.COMPLETADO
+        trabajo.progreso = 100
+        trabajo.fecha_finalizacion = timezone.now()
+        trabajo.save(update_fields=['archivo', 'nombre_archivo', 'estado', 'progreso', 'fecha_finalizacion'])
+
+    except Exception as e:
+        print(f"Error en el trabajo de exportación {trabajo_id}: {str(e)}")
+        print(traceback.format_exc())
+        # No dejar el archivo a medias ni uno que ningún trabajo usa (p. ej.
+        # si el trabajo se borró mientras se generaba)
+        for archivo in (ruta_temporal, ruta):
+            if archivo and os.path.exists(archivo):
+                os.remove(archivo)
+        TrabajoExportacion.objects.filter(pk=trabajo_id).update(
+            estado=EstadoTrabajoExportacion.ERROR,
+            error=str(e),
+            fecha_finalizacion=timezone.now()
+        )
+
+
+def limpiar_exportaciones():
+    """
+    Borra los trabajos caducados (creados hace más de EXPORTACION_CACHE_HORAS,
+    que ya no se reutilizan) y los sustituidos por un trabajo completado más
+    reciente del mismo programa, tipo y formato; post_delete borra sus
+    archivos. Después borra los archivos que no pertenecen a ningún trabajo
+    (p. ej. de un proceso interrumpido), salvo los de trabajos que aún pueden
+    estar generándose. Devuelve {'trabajos': n, 'archivos': n}.
+    """
+    ahora = timezone.now()
+    sustituto = TrabajoExportacion.objects.filter(
+        programa=OuterRef('programa'),
+        tipo=OuterRef('tipo'),
+        formato=OuterRef('formato'),
+        estado=EstadoTrabajoExportacion.COMPLETADO,
+        fecha_creacion__gt=OuterRef('fecha_creacion')
+    )
+    _, borrados = TrabajoExportacion.objects.filter(
+        Q(fecha_creacion__lt=ahora - timedelta(hours=settings.EXPORTACION_CACHE_HORAS)) | Q(Exists(sustituto))
+    ).delete()
+
+    almacenamiento = almacenamiento_exportaciones()
+    usados = set(TrabajoExportacion.objects.exclude(archivo='').values_list('archivo', flat=True))
+    limite = (ahora - TIEMPO_MAXIMO_TRABAJO).timestamp()
+    archivos = 0
+    for directorio, _, nombres in os.walk(almacenamiento.location):
+        for nombre in nombres:
+            ruta = os.path.join(directorio, nombre)
+            relativo = os.path.relpath(ruta, almacenamiento.location).replace(os.sep, '/')
+            if relativo not in usados and os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+                archivos += 1
+    return {'trabajos': borrados.get(TrabajoExportacion._meta.label, 0), 'archivos': archivos}
@@ -8,8 +8,10 @@ urlpatterns = [
     path('', api.programa_list_create, name='programa-list-create'),
     path('<int:pk>/', api.programa_detail, name='programa-detail'),
     path('<int:pk>/duplicar/', api.programa_duplicar, name='programa-duplicar'),
+    path('duplicar/', api.programa_duplicar_lote, name='programa-duplicar-lote'),
     path('<int:pk>/publicar/', api.programa_publicar, name='programa-publicar'),
     path('<int:pk>/enrolar/', api.programa_enrolar, name='programa-enrolar'),
+    path('<int:pk>/enrolar-masivo/', api.programa_enrolar_masivo, name='programa-enrolar-masivo'),
     path('<int:pk>/abandonar/', api.programa_abandonar, name='programa-abandonar'),
     path('mi-programa/', api.mi_programa, name='mi-programa'),
     path('mis-completados/', api.mis_programas_completados, name='mis_programas-completados'),
@@ -21,7 +23,11 @@ urlpatterns = [
     path('<int:pk>/estadisticas-progreso/', api.programa_estadisticas_progreso, name='programa-estadisticas-progreso'),
     path('<int:pk>/participantes/', api.obtener_participantes_programa, name='listar-participantes-programa'),
     path('<int:pk>/cuestionarios-y-respuestas/', api.programa_cuestionarios_y_respuestas, name='programa-cuestionarios-y-respuestas'),
+    path('<int:pk>/analisis-likert/', api.programa_analisis_likert, name='programa-analisis-likert'),
     path('<int:pk>/diarios-sesion/', api.programa_diarios_sesion, name='programa-diarios-sesion'),
     path('<int:pk>/exportar/', exportar_datos_programa, name='programa-exportar'),
+    path('<int:pk>/exportaciones/', api.programa_exportacion_crear, name='programa-exportacion-crear'),
+    path('exportaciones/<int:trabajo_id>/', api.exportacion_detail, name='programa-exportacion-detail'),
+    path('exportaciones/<int:trabajo_id>/descargar/', api.exportacion_descargar, name='programa-exportacion-descargar'),
 ]
 
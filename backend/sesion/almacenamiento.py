@@ -0,0 +1,103 @@
+"""
+Almacenamiento direccionado por contenido del audio y el vídeo de las sesiones.
+
+Cada archivo se guarda con el SHA-256 de su contenido como nombre:
+`audio/3f/3fa9…e1.mp3`. Subir dos veces el mismo audio (en otro programa, o
+tras duplicar uno) escribe un único archivo en disco; la segunda subida solo
+calcula el hash y devuelve el nombre existente.
+
+El hash se calcula mientras el archivo se escribe en un temporal dentro de
+MEDIA_ROOT, que después se renombra (o se descarta si el contenido ya
+existía): el archivo se lee una sola vez y nunca queda uno a medias con el
+nombre definitivo.
+
+El número de referencias de cada archivo es el número de sesiones que lo
+usan (ver medios.py); se borra al eliminar la última.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from django.core.files.storage import FileSystemStorage, storages
+
+# Directorio de los temporales de subida, relativo a MEDIA_ROOT
+DIRECTORIO_TEMPORAL = '.subidas'
+
+_NOMBRE_CONTENIDO = re.compile(r'^(?:.+/)?([0-9a-f]{2})/([0-9a-f]{64})(?:\.\w+)?$')
+
+
+def almacenamiento_medios():
+    """Almacenamiento de Sesion.contenido_audio y contenido_video (STORAGES['medios'])"""
+    return storages['medios']
+
+
+def nombre_contenido(directorio, resumen, extension):
+    """Nombre de un archivo a partir del hash de su contenido"""
+    return f'{directorio}/{resumen[:2]}/{resumen}{extension.lower()}'
+
+
+def resumen_de(nombre):
+    """SHA-256 contenido en el nombre `nombre`, o None si no es un nombre por contenido"""
+    coincidencia = _NOMBRE_CONTENIDO.match(nombre or '')
+    if coincidencia and coincidencia.group(2).startswith(coincidencia.group(1)):
+        return coincidencia.group(2)
+    return None
+
+
+class AlmacenamientoContenido(FileSystemStorage):
+    """FileSystemStorage que nombra los archivos por el SHA-256 de su contenido"""
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo lo decide el contenido en _save()
+        return name
+
+    def _save(self, name, content):
+        directorio, nombre_subido = os.path.split(name)
+        temporales = self.path(DIRECTORIO_TEMPORAL)
+        os.makedirs(temporales, exist_ok=True)
+
+        resumen = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=temporales, delete=False) as temporal:
+            try:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for trozo in content.chunks():
+                    resumen.update(trozo)
+                    temporal.write(trozo)
+            except BaseException:
+                temporal.close()
+                os.remove(temporal.name)
+                raise
+
+        return self.colocar(temporal.name, directorio, resumen.hexdigest(), os.path.splitext(nombre_subido)[1])
+
+    def marcar_reutilizado(self, nombre):
+        """
+        Actualiza la fecha de modificación de un archivo existente que va a
+        usar otra sesión. Hasta que esa sesión se guarde nadie lo referencia;
+        liberar_archivos() (medios.py) no borra los archivos modificados hace
+        poco, de modo que no se pierde si a la vez se elimina su última sesión.
+        """
+        try:
+            os.utime(self.path(nombre))
+        except FileNotFoundError:
+            pass
+
+    def colocar(self, ruta_temporal, directorio, resumen, extension):
+        """
+        Mueve a su nombre por contenido el archivo `ruta_temporal` (dentro de
+        MEDIA_ROOT), cuyo SHA-256 es `resumen`, o lo descarta si ese contenido
+        ya estaba guardado. Devuelve el nombre.
+        """
+        nombre = nombre_contenido(directorio, resumen, extension)
+        ruta = self.path(nombre)
+        if os.path.exists(ruta):
+            # Contenido ya almacenado: no se vuelve a escribir
+            os.remove(ruta_temporal)
+            self.marcar_reutilizado(nombre)
+            return nombre
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        os.replace(ruta_temporal, ruta)
+        if self.file_permissions_mode is not None:
+            os.chmod(ruta, self.file_permissions_mode)
+        return nombre
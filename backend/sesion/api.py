@@ -1,23 +1,41 @@
+import posixpath
 from rest_framework import permissions, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes, parser_classes
-from .models import Sesion, DiarioSesion, EtiquetaPractica, TipoContenido, Escala
+from rest_framework.decorators import api_view, permission_classes, parser_classes, throttle_classes
+from rest_framework.throttling import UserRateThrottle
+from .models import Sesion, DiarioSesion, SubidaMedio, EtiquetaPractica, TipoContenido, Escala
 from .serializers import (
     SesionSerializer, 
     SesionDetalleSerializer, 
     DiarioSesionSerializer,
+    DiarioSesionListSerializer,
+    DiarioSesionLoteSerializer,
     EtiquetaPracticaSerializer,
     TipoContenidoSerializer,
-    EscalaSerializer
+    EscalaSerializer,
+    SubidaMedioSerializer
 )
 from programa.models import Programa, InscripcionPrograma, EstadoPublicacion, EstadoInscripcion
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError
-import os
-from django.conf import settings
+from config.paginacion import CursorFechaCreacionPagination, paginacion_solicitada
+from .disponibilidad import calcular_disponibilidad
+from .medios import CAMPOS_TRANSMISION, directorio_versiones, eliminar_archivo, uso_por_investigador
+from .transmision import responder_archivo
+from . import diarios_lote, subidas, versiones_medios
+from django.db import IntegrityError
+from autenticacion.sanitizacion import sin_sanitizar
+
+# Diarios máximos por envío por lotes
+MAX_DIARIOS_LOTE = 100
+
+class MediosUserRateThrottle(UserRateThrottle):
+    scope = 'medios'
+    rate = '600/minute'  # un reproductor pide muchos tramos al avanzar o retroceder
 
 def validate_url(url):
     if not url:
@@ -41,6 +59,7 @@ def validate_audio_file(file):
         return True
     return file.name.lower().endswith(('.mp3', '.wav', '.ogg', '.m4a'))
 
+@sin_sanitizar('contenido_url')
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser, JSONParser])
@@ -55,28 +74,17 @@ def sesion_list_create(request):
                 programa = Programa.objects.get(id=programa_id)
                 queryset = queryset.filter(programa=programa)
                 
-                # Si el usuario es participante, mostrar solo sesiones disponibles
+                # Si el usuario es participante, mostrar solo las sesiones de su semana en curso
                 if request.user.is_participante():
-                    inscripciones = InscripcionPrograma.objects.filter(
-                        participante=request.user.perfil_participante,
-                        estado_inscripcion=EstadoInscripcion.EN_PROGRESO,
-                        programa=programa
+                    sesiones = list(queryset.order_by('semana'))
+                    disponibilidad = calcular_disponibilidad(
+                        request.user.perfil_participante, programa, sesiones=sesiones
                     )
-                    
-                    # Filtrar por semanas disponibles según la fecha de inscripción
-                    ahora = timezone.now()
-                    sesiones_disponibles = []
-                    
-                    for sesion in queryset:
-                        for inscripcion in inscripciones:
-                            fecha_inicio_semana = inscripcion.fecha_inicio + timezone.timedelta(weeks=sesion.semana-1)
-                            fecha_fin_semana = fecha_inicio_semana + timezone.timedelta(weeks=1)
-                            if fecha_inicio_semana <= ahora <= fecha_fin_semana:
-                                sesiones_disponibles.append(sesion.id)
-                                break
-                    
-                    if sesiones_disponibles:
-                        queryset = queryset.filter(id__in=sesiones_disponibles)
+                    en_semana = [sesion for sesion in sesiones if disponibilidad[sesion.id]['en_semana']]
+                    serializer = SesionSerializer(en_semana or sesiones, many=True)
+                    if request.query_params.get('incluir') == 'disponibilidad':
+                        return Response({'sesiones': serializer.data, 'disponibilidad': disponibilidad})
+                    return Response(serializer.data)
                 
                 # Si el usuario es investigador, mostrar solo sesiones de sus programas
                 elif request.user.is_investigador():
@@ -144,7 +152,8 @@ def sesion_list_create(request):
         serializer = SesionSerializer(data=request.data)
         if serializer.is_valid():
             try:
-                serializer.save()
+                sesion = serializer.save()
+                versiones_medios.solicitar(sesion)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             except Exception as e:
                 print("Error al guardar la sesión:", str(e))
@@ -156,6 +165,7 @@ def sesion_list_create(request):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@sin_sanitizar('contenido_url')
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 @parser_classes([MultiPartParser, FormParser, JSONParser])
@@ -166,7 +176,7 @@ def sesion_detail(request, pk):
         return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
-        serializer = SesionDetalleSerializer(sesion)
+        serializer = SesionDetalleSerializer(sesion, context={'request': request})
         return Response(serializer.data)
 
     elif request.method in ['PUT', 'PATCH']:
@@ -213,18 +223,13 @@ def sesion_detail(request, pk):
             tipo_anterior = request.data.get('tipo_contenido_anterior')
             
             # Eliminar archivos físicos si existen
+            # Los archivos compartidos con copias del programa se conservan
             if tipo_anterior == 'audio' and sesion.contenido_audio:
-                try:
-                    os.remove(os.path.join(settings.MEDIA_ROOT, str(sesion.contenido_audio)))
-                except:
-                    pass
+                eliminar_archivo(sesion, 'contenido_audio')
                 sesion.contenido_audio = None
             
             elif tipo_anterior == 'video' and sesion.contenido_video:
-                try:
-                    os.remove(os.path.join(settings.MEDIA_ROOT, str(sesion.contenido_video)))
-                except:
-                    pass
+                eliminar_archivo(sesion, 'contenido_video')
                 sesion.contenido_video = None
             
             # Limpiar campos en la base de datos
@@ -240,7 +245,7 @@ def sesion_detail(request, pk):
         serializer = SesionSerializer(sesion, data=request.data, partial=partial)
 
         if serializer.is_valid():
-            serializer.save()
+            versiones_medios.solicitar(serializer.save())
             return Response(serializer.data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -266,19 +271,7 @@ def sesion_detail(request, pk):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Eliminar archivos físicos si existen
-        if sesion.contenido_audio:
-            try:
-                os.remove(os.path.join(settings.MEDIA_ROOT, str(sesion.contenido_audio)))
-            except:
-                pass
-        
-        if sesion.contenido_video:
-            try:
-                os.remove(os.path.join(settings.MEDIA_ROOT, str(sesion.contenido_video)))
-            except:
-                pass
-        
+        # Los archivos sin otras referencias se borran al confirmar (ver signals.py)
         sesion.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -312,6 +305,12 @@ def diario_sesion_list_create(request):
             diarios = DiarioSesion.objects.filter(participante=request.user.perfil_participante)
         else:
             diarios = DiarioSesion.objects.none()
+
+        if paginacion_solicitada(request):
+            paginador = CursorFechaCreacionPagination()
+            pagina = paginador.paginate_queryset(diarios.select_related('sesion'), request)
+            return paginador.get_paginated_response(DiarioSesionListSerializer(pagina, many=True).data)
+
         serializer = DiarioSesionSerializer(diarios, many=True)
         return Response(serializer.data)
     
@@ -349,6 +348,52 @@ def diario_sesion_list_create(request):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def diario_sesion_lote(request):
+    """
+    Registra varios diarios en una transacción. Cada diario lleva una `clave`
+    de idempotencia: reenviar el lote no duplica los diarios ya guardados.
+    """
+    if not request.user.is_participante():
+        return Response(
+            {"error": "Solo los participantes pueden crear diarios"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    serializer = DiarioSesionLoteSerializer(
+        data=request.data.get('diarios'), many=True, allow_empty=False, max_length=MAX_DIARIOS_LOTE
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        resultados, no_encontradas = diarios_lote.registrar_diarios(
+            request.user.perfil_participante, serializer.validated_data
+        )
+    except IntegrityError:
+        # Otro envío del mismo lote se ha guardado a la vez; reintentarlo es seguro
+        return Response(
+            {"error": "El lote coincide con otro envío en curso, inténtalo de nuevo"},
+            status=status.HTTP_409_CONFLICT
+        )
+    if no_encontradas:
+        return Response(
+            {"error": "Algunas sesiones no existen", "sesiones_no_encontradas": sorted(no_encontradas)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    creado = any(resultado == diarios_lote.CREADO for resultado, _ in resultados)
+    return Response(
+        {
+            'resultados': [
+                {'clave': entrada['clave'], 'resultado': resultado, 'diario': DiarioSesionListSerializer(diario).data}
+                for entrada, (resultado, diario) in zip(serializer.validated_data, resultados)
+            ]
+        },
+        status=status.HTTP_201_CREATED if creado else status.HTTP_200_OK
+    )
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([permissions.IsAuthenticated])
 def diario_sesion_detail(request, pk):
@@ -412,3 +457,190 @@ def diario_info(request, sesion_id):
         return Response(serializer.data)
     except DiarioSesion.DoesNotExist:
         return Response(None, status=status.HTTP_200_OK)
+
+def _puede_reproducir(usuario, sesion):
+    """Solo el investigador creador del programa y los participantes inscritos"""
+    if usuario.is_investigador():
+        return sesion.programa.creado_por_id == usuario.perfil_investigador.id
+    if usuario.is_participante():
+        return InscripcionPrograma.objects.filter(
+            programa_id=sesion.programa_id,
+            participante=usuario.perfil_participante,
+            estado_inscripcion__in=[EstadoInscripcion.EN_PROGRESO, EstadoInscripcion.COMPLETADO]
+        ).exists()
+    return usuario.is_admin()
+
+def _archivo_reproducible(request, pk, tipo):
+    """(archivo, None) del medio `tipo` de la sesión, o (None, respuesta de error)"""
+    campo = CAMPOS_TRANSMISION.get(tipo)
+    if campo is None:
+        return None, Response({"error": "Tipo de medio no válido"}, status=status.HTTP_404_NOT_FOUND)
+    sesion = get_object_or_404(Sesion.objects.select_related('programa'), pk=pk)
+    if not _puede_reproducir(request.user, sesion):
+        return None, Response(
+            {"error": "No tienes permiso para acceder al contenido de esta sesión"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    archivo = getattr(sesion, campo)
+    if not archivo:
+        return None, Response({"error": "La sesión no tiene este archivo"}, status=status.HTTP_404_NOT_FOUND)
+    return archivo, None
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([MediosUserRateThrottle])
+def sesion_medios(request, pk, tipo):
+    archivo, error = _archivo_reproducible(request, pk, tipo)
+    if error is not None:
+        return error
+    if not archivo.storage.exists(archivo.name):
+        return Response({"error": "La sesión no tiene este archivo"}, status=status.HTTP_404_NOT_FOUND)
+    return responder_archivo(request, archivo.name, archivo.storage)
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([MediosUserRateThrottle])
+def sesion_medios_version(request, pk, tipo, ruta):
+    """Versiones comprimidas del medio: audio .m4a, listas HLS y sus segmentos"""
+    archivo, error = _archivo_reproducible(request, pk, tipo)
+    if error is not None:
+        return error
+    base = directorio_versiones(archivo.name)
+    nombre = posixpath.normpath(posixpath.join(base, ruta))
+    if not nombre.startswith(base + '/') or not archivo.storage.exists(nombre):
+        return Response({"error": "Versión no encontrada"}, status=status.HTTP_404_NOT_FOUND)
+    return responder_archivo(request, nombre, archivo.storage)
+
+def _respuesta_subida(subida, estado=status.HTTP_200_OK):
+    respuesta = Response(SubidaMedioSerializer(subida).data, status=estado)
+    respuesta['Upload-Offset'] = str(subida.recibidos)
+    respuesta['Upload-Length'] = str(subida.tamano)
+    return respuesta
+
+def _sesion_modificable(request, sesion):
+    """Respuesta de error si el usuario no puede cambiar los archivos de la sesión, o None"""
+    if not request.user.is_investigador():
+        return Response(
+            {"error": "Solo los investigadores pueden subir archivos a las sesiones"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if sesion.programa.creado_por_id != request.user.perfil_investigador.id:
+        return Response(
+            {"error": "No tienes permiso para modificar esta sesión"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if sesion.programa.estado_publicacion == EstadoPublicacion.PUBLICADO:
+        return Response(
+            {"error": "No se pueden modificar sesiones de un programa publicado"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return None
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def subida_iniciar(request, pk):
+    """
+    Inicia la subida reanudable de un archivo de la sesión (ver sesion/subidas.py).
+    Si el investigador ya usa ese contenido (mismo SHA-256) se adjunta sin subirlo.
+    """
+    sesion = get_object_or_404(Sesion.objects.select_related('programa'), pk=pk)
+    error = _sesion_modificable(request, sesion)
+    if error is not None:
+        return error
+
+    serializer = SubidaMedioSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    subida = subidas.iniciar(sesion, request.user.perfil_investigador, **serializer.validated_data)
+    respuesta = _respuesta_subida(subida, status.HTTP_201_CREATED)
+    respuesta['Location'] = reverse('subida-detail', args=[subida.pk])
+    return respuesta
+
+def _subida_propia(request, subida_id):
+    """(subida, None) si pertenece al investigador, o (None, respuesta de error)"""
+    subida = get_object_or_404(SubidaMedio.objects.select_related('sesion__programa'), pk=subida_id)
+    if not request.user.is_investigador() or subida.creado_por_id != request.user.perfil_investigador.id:
+        return None, Response(
+            {"error": "No tienes permiso para acceder a esta subida"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return subida, None
+
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([MediosUserRateThrottle])
+def subida_detail(request, subida_id):
+    """
+    Estado de la subida (GET/HEAD), envío de un trozo (PATCH) o cancelación (DELETE).
+    El trozo va en el cuerpo sin codificar, con su posición en la cabecera
+    Upload-Offset; se escribe a disco por bloques según se lee de la petición.
+    """
+    subida, error = _subida_propia(request, subida_id)
+    if error is not None:
+        return error
+
+    if request.method in ('GET', 'HEAD'):
+        return _respuesta_subida(subida)
+
+    if request.method == 'DELETE':
+        subidas.cancelar(subida)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        desplazamiento = int(request.META['HTTP_UPLOAD_OFFSET'])
+        longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+    except (KeyError, ValueError):
+        return Response(
+            {"error": "La cabecera Upload-Offset es obligatoria y debe ser un número"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        subidas.escribir_trozo(subida, desplazamiento, request.stream, longitud)
+    except subidas.DesplazamientoIncorrecto as e:
+        respuesta = Response(
+            {"error": "El trozo no continúa lo ya recibido", "recibidos": e.recibidos},
+            status=status.HTTP_409_CONFLICT
+        )
+        respuesta['Upload-Offset'] = str(e.recibidos)
+        return respuesta
+    except subidas.SubidaNoValida as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return _respuesta_subida(subida)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def subida_finalizar(request, subida_id):
+    """Comprueba el SHA-256 del archivo recibido y lo adjunta a la sesión"""
+    subida, error = _subida_propia(request, subida_id)
+    if error is not None:
+        return error
+    error = _sesion_modificable(request, subida.sesion)
+    if error is not None:
+        return error
+    try:
+        subidas.finalizar(subida, request.data.get('sha256') or '')
+    except subidas.SubidaNoValida as e:
+        return Response({"error": str(e), "recibidos": subida.recibidos}, status=status.HTTP_400_BAD_REQUEST)
+    return _respuesta_subida(subida)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def medios_uso(request):
+    """Espacio en disco de los medios del investigador (de todos, para un administrador)"""
+    if request.user.is_investigador():
+        investigador_id = request.user.perfil_investigador.id
+        uso = uso_por_investigador([investigador_id]).get(investigador_id, {
+            'archivos': 0, 'referencias': 0, 'bytes': 0, 'bytes_exclusivos': 0,
+            'bytes_versiones': 0, 'bytes_sin_deduplicar': 0,
+        })
+        return Response(uso)
+    if request.user.is_admin():
+        uso = uso_por_investigador()
+        return Response([
+            {'investigador': investigador_id, **datos}
+            for investigador_id, datos in sorted(uso.items(), key=lambda item: -item[1]['bytes'])
+        ])
+    return Response(
+        {"error": "Solo los investigadores pueden consultar el espacio de sus medios"},
+        status=status.HTTP_403_FORBIDDEN
+    )
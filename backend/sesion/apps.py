@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SesionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sesion'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,100 @@
+"""
+Envío por lotes de diarios de sesión (clientes que practican sin conexión).
+
+Cada diario del lote lleva una clave de idempotencia generada por el cliente.
+Un reintento con una clave ya guardada devuelve el diario existente sin
+crear otro, y un diario para una sesión que el participante ya completó se
+descarta, como haría la restricción única (participante, sesion). Los diarios
+nuevos se insertan con un único bulk_create dentro de una transacción.
+
+bulk_create no emite post_save, así que el progreso de los participantes se
+actualiza aquí, y la finalización de la inscripción (última sesión de un
+programa sin cuestionarios) se comprueba una vez por lote.
+"""
+from django.db import transaction
+from django.utils import timezone
+from config.enums import EstadoInscripcion
+from programa.models import InscripcionPrograma
+from programa import progreso
+from .models import Sesion, DiarioSesion
+
+# Resultado de cada diario del lote
+CREADO = 'creado'
+REPETIDO = 'repetido'    # misma clave de idempotencia que un diario ya guardado
+EXISTENTE = 'existente'  # la sesión ya tiene un diario del participante
+
+
+def _completar_inscripciones(participante, diarios):
+    """Marca como completadas las inscripciones cuya última sesión está entre `diarios`"""
+    programas = {diario.programa_id for diario in diarios if not diario.sesion.programa.tiene_cuestionarios}
+    if not programas:
+        return
+    ultima_sesion = {}
+    for programa_id, sesion_id in Sesion.objects.filter(programa_id__in=programas).order_by(
+        'programa_id', 'semana', 'id'
+    ).values_list('programa_id', 'id'):
+        ultima_sesion[programa_id] = sesion_id
+
+    completados = {diario.programa_id for diario in diarios if diario.sesion_id == ultima_sesion.get(diario.programa_id)}
+    # save() y no update(): post_save actualiza la representación y la caché del programa
+    for inscripcion in InscripcionPrograma.objects.filter(
+        participante=participante,
+        programa_id__in=completados,
+        estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+    ):
+        inscripcion.estado_inscripcion = EstadoInscripcion.COMPLETADO
+        inscripcion.fecha_fin = timezone.now()
+        inscripcion.save()
+
+
+def registrar_diarios(participante, entradas):
+    """
+    Registra los diarios validados de `entradas` ({'clave', 'sesion_id',
+    'valoracion', 'comentario'}) en una transacción. Devuelve
+    ([(resultado, diario)] en el orden de las entradas, {sesion_id no encontrada}).
+    Si falta alguna sesión no se guarda nada.
+    """
+    sesiones = Sesion.objects.select_related('programa').in_bulk({entrada['sesion_id'] for entrada in entradas})
+    no_encontradas = {entrada['sesion_id'] for entrada in entradas} - sesiones.keys()
+    if no_encontradas:
+        return [], no_encontradas
+
+    with transaction.atomic():
+        guardados = list(
+            DiarioSesion.objects.select_related('sesion').filter(participante=participante, sesion_id__in=sesiones.keys())
+        )
+        por_clave = {diario.clave_idempotencia: diario for diario in guardados if diario.clave_idempotencia}
+        por_sesion = {diario.sesion_id: diario for diario in guardados}
+        # Claves reenviadas para una sesión que no está en este lote
+        claves_pendientes = {entrada['clave'] for entrada in entradas} - por_clave.keys()
+        if claves_pendientes:
+            for diario in DiarioSesion.objects.select_related('sesion').filter(
+                participante=participante, clave_idempotencia__in=claves_pendientes
+            ):
+                por_clave[diario.clave_idempotencia] = diario
+
+        resultados = []
+        nuevos = []
+        for entrada in entradas:
+            if entrada['clave'] in por_clave:
+                resultados.append((REPETIDO, por_clave[entrada['clave']]))
+            elif entrada['sesion_id'] in por_sesion:
+                resultados.append((EXISTENTE, por_sesion[entrada['sesion_id']]))
+            else:
+                diario = DiarioSesion(
+                    participante=participante,
+                    sesion=sesiones[entrada['sesion_id']],
+                    valoracion=entrada['valoracion'],
+                    comentario=entrada.get('comentario'),
+                    clave_idempotencia=entrada['clave']
+                )
+                nuevos.append(diario)
+                por_clave[entrada['clave']] = por_sesion[entrada['sesion_id']] = diario
+                resultados.append((CREADO, diario))
+
+        if nuevos:
+            DiarioSesion.objects.bulk_create(nuevos)
+            progreso.registrar_diarios(nuevos)
+            _completar_inscripciones(participante, nuevos)
+
+    return resultados, set()
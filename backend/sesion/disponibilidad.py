@@ -0,0 +1,55 @@
+"""
+Disponibilidad de las sesiones de un programa para un participante.
+
+Una sesión está disponible si el participante tiene una inscripción en
+progreso en el programa, la fecha actual cae en la semana de la sesión
+(contada desde el inicio de la inscripción), aún no ha escrito su diario y
+ha completado la sesión de la semana anterior, si existe.
+
+calcular_disponibilidad carga una sola vez la inscripción, las sesiones y los
+diarios del participante en el programa (tres consultas, sin importar el
+número de sesiones) y evalúa todas las semanas en memoria.
+"""
+from django.utils import timezone
+from programa.models import InscripcionPrograma
+from config.enums import EstadoInscripcion
+from .models import Sesion, DiarioSesion
+
+SEMANA = timezone.timedelta(weeks=1)
+
+
+def calcular_disponibilidad(participante, programa, sesiones=None, ahora=None):
+    """
+    Devuelve {sesion_id: {'disponible', 'en_semana', 'completada'}} para cada
+    sesión del programa. `sesiones` evita volver a consultarlas si ya están
+    cargadas (deben ser todas las del programa).
+    """
+    if sesiones is None:
+        sesiones = Sesion.objects.filter(programa=programa).only('id', 'semana')
+    sesiones = list(sesiones)
+    ahora = ahora or timezone.now()
+
+    inscripcion = InscripcionPrograma.objects.filter(
+        participante=participante,
+        programa=programa,
+        estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+    ).only('fecha_inicio').first()
+    completadas = set(
+        DiarioSesion.objects.filter(participante=participante, programa=programa).values_list('sesion_id', flat=True)
+    )
+    sesion_por_semana = {sesion.semana: sesion.id for sesion in sesiones}
+
+    disponibilidad = {}
+    for sesion in sesiones:
+        en_semana = False
+        if inscripcion is not None:
+            inicio_semana = inscripcion.fecha_inicio + SEMANA * (sesion.semana - 1)
+            en_semana = inicio_semana <= ahora <= inicio_semana + SEMANA
+        completada = sesion.id in completadas
+        anterior = sesion_por_semana.get(sesion.semana - 1)
+        disponibilidad[sesion.id] = {
+            'disponible': en_semana and not completada and (anterior is None or anterior in completadas),
+            'en_semana': en_semana,
+            'completada': completada,
+        }
+    return disponibilidad
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from sesion.medios import deduplicar_existentes, recolectar_huerfanos
+from sesion.subidas import limpiar_caducadas
+
+
+class Command(BaseCommand):
+    help = 'Borra los archivos de audio y vídeo que no usa ninguna sesión y deduplica los anteriores al almacenamiento por contenido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deduplicar', action='store_true', help='Pasa los archivos con nombre de subida al almacenamiento por contenido')
+        parser.add_argument('--simular', action='store_true', help='Solo informa de lo que se borraría')
+
+    def handle(self, *args, **options):
+        if options['deduplicar'] and not options['simular']:
+            resultado = deduplicar_existentes()
+            self.stdout.write(f"{resultado['migrados']} archivos migrados a {resultado['archivos']} archivos por contenido")
+
+        if not options['simular']:
+            self.stdout.write(f"{limpiar_caducadas()} subidas reanudables caducadas descartadas")
+
+        borrados = recolectar_huerfanos(simular=options['simular'])
+        accion = 'Se borrarían' if options['simular'] else 'Borrados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {borrados['archivos']} archivos sin referencias ({borrados['bytes'] / 1e6:.1f} MB)"
+        ))
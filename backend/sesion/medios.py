@@ -0,0 +1,232 @@
+"""
+Archivos de audio y vídeo de las sesiones.
+
+Los archivos se guardan por contenido (ver almacenamiento.py): las sesiones
+con el mismo audio, las copias de un programa duplicado o las subidas
+repetidas, comparten un único archivo. Sus referencias son las sesiones que
+lo usan; solo se borra del disco cuando no queda ninguna (signals.py).
+"""
+import os
+import shutil
+import time
+from django.db.models import Q, Sum
+from .almacenamiento import DIRECTORIO_TEMPORAL, almacenamiento_medios, resumen_de
+from .models import Sesion, VersionMedio
+
+CAMPOS_MEDIOS = ('contenido_audio', 'contenido_video')
+
+# Directorios de los archivos de las sesiones (upload_to de cada campo)
+DIRECTORIOS_MEDIOS = ('audio', 'video')
+
+# Un archivo sin referencias más reciente que esto puede ser una subida (o un
+# contenido reutilizado) cuya sesión aún no se ha guardado: ni la recolección
+# ni liberar_archivos() lo borran
+ANTIGUEDAD_MINIMA_HUERFANOS = 60 * 60
+
+# Campo de cada tipo de medio transmitido en /api/sesiones/<pk>/medios/<tipo>/
+CAMPOS_TRANSMISION = {'audio': 'contenido_audio', 'video': 'contenido_video'}
+
+
+def directorio_versiones(nombre):
+    """Directorio (relativo al almacenamiento) de las versiones comprimidas del archivo `nombre`"""
+    return f'{nombre}.versiones'
+
+
+def modificado_recientemente(storage, nombre):
+    """Indica si el archivo se ha escrito o reutilizado hace menos de ANTIGUEDAD_MINIMA_HUERFANOS"""
+    try:
+        return os.path.getmtime(storage.path(nombre)) > time.time() - ANTIGUEDAD_MINIMA_HUERFANOS
+    except FileNotFoundError:
+        return False
+
+
+def archivo_en_uso(nombre, excluir=None):
+    """Indica si alguna sesión (salvo `excluir`) usa el archivo `nombre`"""
+    sesiones = Sesion.objects.filter(Q(contenido_audio=nombre) | Q(contenido_video=nombre))
+    if excluir is not None:
+        sesiones = sesiones.exclude(pk=excluir.pk)
+    return sesiones.exists()
+
+
+def eliminar_archivo(sesion, campo):
+    """Borra del disco el archivo de `campo` si ninguna otra sesión lo comparte"""
+    archivo = getattr(sesion, campo)
+    if archivo and not archivo_en_uso(archivo.name, excluir=sesion) \
+            and not modificado_recientemente(archivo.storage, archivo.name):
+        try:
+            archivo.storage.delete(archivo.name)
+        except OSError:
+            pass
+        eliminar_versiones(archivo.storage, archivo.name)
+
+
+def eliminar_versiones(storage, nombre):
+    """Borra las versiones comprimidas del archivo `nombre` (ver versiones_medios.py)"""
+    VersionMedio.objects.filter(archivo_origen=nombre).delete()
+    shutil.rmtree(storage.path(directorio_versiones(nombre)), ignore_errors=True)
+
+
+def liberar_archivos(nombres):
+    """
+    Borra los archivos de `nombres` (y sus versiones) que ya no usa ninguna
+    sesión. Los modificados hace poco pueden estar a punto de usarse (ver
+    AlmacenamientoContenido.marcar_reutilizado): los borrará limpiar_medios.
+    """
+    almacenamiento = almacenamiento_medios()
+    for nombre in set(nombres):
+        if not archivo_en_uso(nombre) and not modificado_recientemente(almacenamiento, nombre):
+            almacenamiento.delete(nombre)
+            eliminar_versiones(almacenamiento, nombre)
+
+
+def uso_por_investigador(investigadores=None):
+    """
+    Espacio en disco de los medios de cada investigador:
+    {investigador_id: {'archivos', 'referencias', 'bytes', 'bytes_exclusivos',
+    'bytes_versiones', 'bytes_sin_deduplicar'}}.
+
+    Un archivo cuenta una vez por investigador aunque lo usen varias de sus
+    sesiones; `bytes_exclusivos` son los de archivos que no usa ningún otro
+    investigador y `bytes_sin_deduplicar` lo que ocuparía una copia por sesión.
+    """
+    sesiones = Sesion.objects.filter(Q(contenido_audio__gt='') | Q(contenido_video__gt=''))
+    if investigadores is not None:
+        sesiones = sesiones.filter(programa__creado_por__in=investigadores)
+    referencias = {}
+    for investigador_id, audio, video in sesiones.values_list('programa__creado_por_id', 'contenido_audio', 'contenido_video'):
+        for nombre in (audio, video):
+            if nombre:
+                referencias.setdefault(investigador_id, []).append(nombre)
+    nombres = {nombre for lista in referencias.values() for nombre in lista}
+
+    # Quién más usa cada archivo, para separar lo exclusivo de lo compartido
+    usuarios = {}
+    for investigador_id, audio, video in Sesion.objects.filter(
+        Q(contenido_audio__in=nombres) | Q(contenido_video__in=nombres)
+    ).values_list('programa__creado_por_id', 'contenido_audio', 'contenido_video'):
+        for nombre in (audio, video):
+            if nombre in nombres:
+                usuarios.setdefault(nombre, set()).add(investigador_id)
+    versiones = dict(
+        VersionMedio.objects.filter(archivo_origen__in=nombres).order_by()
+        .values('archivo_origen').annotate(total=Sum('tamano_bytes')).values_list('archivo_origen', 'total')
+    )
+    almacenamiento = almacenamiento_medios()
+    tamanos = {}
+    for nombre in nombres:
+        try:
+            tamanos[nombre] = almacenamiento.size(nombre)
+        except OSError:
+            tamanos[nombre] = 0
+
+    uso = {}
+    for investigador_id, lista in referencias.items():
+        propios = set(lista)
+        uso[investigador_id] = {
+            'archivos': len(propios),
+            'referencias': len(lista),
+            'bytes': sum(tamanos[nombre] for nombre in propios),
+            'bytes_exclusivos': sum(tamanos[nombre] for nombre in propios if usuarios[nombre] == {investigador_id}),
+            'bytes_versiones': sum(versiones.get(nombre) or 0 for nombre in propios),
+            'bytes_sin_deduplicar': sum(tamanos[nombre] for nombre in lista),
+        }
+    return uso
+
+
+def nombres_referenciados():
+    """Nombres de todos los archivos que usa alguna sesión"""
+    nombres = set()
+    for audio, video in Sesion.objects.values_list('contenido_audio', 'contenido_video'):
+        nombres.update(nombre for nombre in (audio, video) if nombre)
+    return nombres
+
+
+def deduplicar_existentes():
+    """
+    Pasa al almacenamiento por contenido los archivos guardados con su nombre
+    de subida (anteriores a almacenamiento.py). Las sesiones con archivos
+    idénticos pasan a compartir uno; las versiones ya generadas se conservan.
+    Devuelve {'migrados', 'archivos'}: archivos migrados y archivos resultantes.
+    """
+    almacenamiento = almacenamiento_medios()
+    resultantes = set()
+    migrados = 0
+    for nombre in sorted(nombres_referenciados()):
+        if resumen_de(nombre) or not almacenamiento.exists(nombre):
+            continue
+        with almacenamiento.open(nombre) as original:
+            nuevo = almacenamiento.save(nombre, original)
+        for campo in CAMPOS_MEDIOS:
+            Sesion.objects.filter(**{campo: nombre}).update(**{campo: nuevo})
+
+        anterior, destino = directorio_versiones(nombre), directorio_versiones(nuevo)
+        versiones = list(VersionMedio.objects.filter(archivo_origen=nombre))
+        if versiones and not VersionMedio.objects.filter(archivo_origen=nuevo).exists() \
+                and os.path.isdir(almacenamiento.path(anterior)):
+            os.makedirs(os.path.dirname(almacenamiento.path(destino)), exist_ok=True)
+            os.replace(almacenamiento.path(anterior), almacenamiento.path(destino))
+            for version in versiones:
+                version.archivo_origen = nuevo
+                version.archivo = destino + version.archivo[len(anterior):]
+            VersionMedio.objects.bulk_update(versiones, ['archivo_origen', 'archivo'])
+        else:
+            eliminar_versiones(almacenamiento, nombre)
+        almacenamiento.delete(nombre)
+        resultantes.add(nuevo)
+        migrados += 1
+    return {'migrados': migrados, 'archivos': len(resultantes)}
+
+
+def recolectar_huerfanos(simular=False):
+    """
+    Borra los archivos de audio y vídeo, las versiones y los temporales de
+    subida que no usa ninguna sesión (p. ej. tras reemplazar un archivo).
+    Devuelve {'archivos', 'bytes'} borrados (o que se borrarían si `simular`).
+    """
+    almacenamiento = almacenamiento_medios()
+    referenciados = nombres_referenciados()
+    limite = time.time() - ANTIGUEDAD_MINIMA_HUERFANOS
+    borrados = {'archivos': 0, 'bytes': 0}
+    # Archivos sin referencias que aún no se borran por recientes (y sus versiones)
+    conservados = set()
+
+    def borrar(ruta):
+        """Borra el archivo si es antiguo; devuelve si se ha borrado (o se borraría)"""
+        estado = os.stat(ruta)
+        if estado.st_mtime > limite:
+            return False
+        borrados['archivos'] += 1
+        borrados['bytes'] += estado.st_size
+        if not simular:
+            os.remove(ruta)
+        return True
+
+    for directorio in DIRECTORIOS_MEDIOS + (DIRECTORIO_TEMPORAL,):
+        raiz = almacenamiento.path(directorio)
+        for actual, subdirectorios, archivos in os.walk(raiz):
+            relativo = os.path.relpath(actual, almacenamiento.path('')).replace(os.sep, '/')
+            for subdirectorio in [d for d in subdirectorios if d.endswith('.versiones')]:
+                subdirectorios.remove(subdirectorio)
+                origen = f'{relativo}/{subdirectorio[:-len(".versiones")]}'
+                if origen not in referenciados:
+                    rutas = [
+                        os.path.join(ruta_actual, contenido)
+                        for ruta_actual, _, contenidos in os.walk(os.path.join(actual, subdirectorio))
+                        for contenido in contenidos
+                    ]
+                    # Con algún archivo reciente (versiones en curso) se conserva el directorio entero
+                    if any(os.stat(ruta).st_mtime > limite for ruta in rutas):
+                        conservados.add(origen)
+                        continue
+                    for ruta in rutas:
+                        borrar(ruta)
+                    if not simular:
+                        eliminar_versiones(almacenamiento, origen)
+            for archivo in archivos:
+                nombre = f'{relativo}/{archivo}'
+                if directorio == DIRECTORIO_TEMPORAL or nombre not in referenciados:
+                    if not borrar(os.path.join(actual, archivo)):
+                        conservados.add(nombre)
+    if not simular:
+        VersionMedio.objects.exclude(archivo_origen__in=referenciados | conservados).delete()
+    return borrados
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sesion', '0002_initial'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diariosesion',
+            index=models.Index(fields=['participante', '-fecha_creacion', '-id'], name='diario_participante_fecha_idx'),
+        ),
+    ]
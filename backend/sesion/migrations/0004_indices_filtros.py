@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sesion', '0003_indices_listado'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diariosesion',
+            index=models.Index(fields=['sesion', 'participante', 'fecha_creacion'], name='diario_sesion_participante_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diariosesion',
+            index=models.Index(fields=['sesion', 'fecha_creacion', 'id'], name='diario_sesion_fecha_idx'),
+        ),
+    ]
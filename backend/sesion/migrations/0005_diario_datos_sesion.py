@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0006_indices_filtros'),
+        ('sesion', '0004_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diariosesion',
+            name='duracion_estimada',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='diariosesion',
+            name='programa',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='diarios', to='programa.programa'),
+        ),
+        migrations.AddField(
+            model_name='diariosesion',
+            name='semana',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:54
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# Diarios actualizados por sentencia; cada lote se confirma por separado
+TAMANO_LOTE = 10000
+
+
+def rellenar_datos_sesion(apps, schema_editor):
+    """Copia programa, semana y duración de la sesión en los diarios existentes, por lotes de id"""
+    Sesion = apps.get_model('sesion', 'Sesion')
+    DiarioSesion = apps.get_model('sesion', 'DiarioSesion')
+    sesion = Sesion.objects.filter(pk=OuterRef('sesion_id'))
+
+    ultimo_id = 0
+    while True:
+        ids = list(
+            DiarioSesion.objects.filter(pk__gt=ultimo_id, programa__isnull=True)
+            .order_by('pk').values_list('pk', flat=True)[:TAMANO_LOTE]
+        )
+        if not ids:
+            break
+        DiarioSesion.objects.filter(pk__gte=ids[0], pk__lte=ids[-1], programa__isnull=True).update(
+            programa=Subquery(sesion.values('programa')[:1]),
+            semana=Subquery(sesion.values('semana')[:1]),
+            duracion_estimada=Subquery(sesion.values('duracion_estimada')[:1]),
+        )
+        ultimo_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('sesion', '0005_diario_datos_sesion'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_datos_sesion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0006_indices_filtros'),
+        ('sesion', '0006_rellenar_diario_datos_sesion'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='diariosesion',
+            options={'ordering': ['semana', 'fecha_creacion']},
+        ),
+        migrations.RemoveIndex(
+            model_name='diariosesion',
+            name='diario_sesion_participante_idx',
+        ),
+        migrations.AlterField(
+            model_name='diariosesion',
+            name='programa',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='diarios', to='programa.programa'),
+        ),
+        migrations.AlterField(
+            model_name='diariosesion',
+            name='semana',
+            field=models.PositiveIntegerField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='diariosesion',
+            index=models.Index(fields=['programa', 'participante', 'fecha_creacion', 'duracion_estimada'], name='diario_programa_part_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diariosesion',
+            index=models.Index(fields=['programa', 'semana', 'sesion', 'fecha_creacion', 'id'], name='diario_programa_semana_idx'),
+        ),
+    ]
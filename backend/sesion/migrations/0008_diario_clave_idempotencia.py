@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programa', '0006_indices_filtros'),
+        ('sesion', '0007_diario_datos_sesion_obligatorios'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diariosesion',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='diariosesion',
+            constraint=models.UniqueConstraint(condition=models.Q(('clave_idempotencia__isnull', False)), fields=('participante', 'clave_idempotencia'), name='diario_clave_idempotencia_uniq'),
+        ),
+    ]
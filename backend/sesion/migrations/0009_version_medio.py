@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sesion', '0008_diario_clave_idempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionMedio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo_origen', models.CharField(max_length=255)),
+                ('calidad', models.CharField(max_length=20)),
+                ('archivo', models.CharField(blank=True, max_length=255)),
+                ('bitrate_kbps', models.PositiveIntegerField()),
+                ('tamano_bytes', models.PositiveBigIntegerField(default=0)),
+                ('duracion_segundos', models.FloatField(blank=True, null=True)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completado', 'Completado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_finalizacion', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['archivo_origen', 'bitrate_kbps'],
+                'constraints': [models.UniqueConstraint(fields=('archivo_origen', 'calidad'), name='version_medio_origen_calidad_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:27
+
+import sesion.almacenamiento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sesion', '0009_version_medio'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sesion',
+            name='contenido_audio',
+            field=models.FileField(blank=True, db_index=True, help_text='Archivo de audio', null=True, storage=sesion.almacenamiento.almacenamiento_medios, upload_to='audio/'),
+        ),
+        migrations.AlterField(
+            model_name='sesion',
+            name='contenido_video',
+            field=models.FileField(blank=True, db_index=True, help_text='Archivo de video', null=True, storage=sesion.almacenamiento.almacenamiento_medios, upload_to='video/'),
+        ),
+    ]
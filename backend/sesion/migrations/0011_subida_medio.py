@@ -0,0 +1,33 @@
+# Generated by Django 5.1.7 on 2026-10-18 15:32
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sesion', '0010_medios_por_contenido'),
+        ('usuario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaMedio',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(help_text="'audio' o 'video'", max_length=10)),
+                ('nombre_archivo', models.CharField(max_length=255)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('recibidos', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('estado', models.CharField(choices=[('en_curso', 'En curso'), ('completada', 'Completada')], default='en_curso', max_length=20)),
+                ('archivo', models.CharField(blank=True, max_length=255)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('creado_por', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas_medios', to='usuario.investigador')),
+                ('sesion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to='sesion.sesion')),
+            ],
+        ),
+    ]
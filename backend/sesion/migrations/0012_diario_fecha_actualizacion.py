@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 16:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sesion', '0011_subida_medio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diariosesion',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
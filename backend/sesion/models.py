@@ -1,8 +1,9 @@
+import uuid
 from django.db import models
-from programa.models import Programa, InscripcionPrograma, EstadoInscripcion
-from usuario.models import Participante
-from django.utils import timezone
-from config.enums import EtiquetaPractica, TipoContenido, Escala
+from programa.models import Programa
+from usuario.models import Participante, Investigador
+from .almacenamiento import almacenamiento_medios
+from config.enums import EtiquetaPractica, TipoContenido, Escala, EstadoVersionMedio, EstadoSubidaMedio, etiqueta
 
 class Sesion(models.Model):
     programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='sesiones')
@@ -29,8 +30,12 @@ class Sesion(models.Model):
     )
     contenido_temporizador = models.PositiveIntegerField(blank=True, null=True, help_text="Duración del temporizador en minutos")
     contenido_url = models.URLField(blank=True, null=True, help_text="URL para contenido externo o cargado")
-    contenido_audio = models.FileField(upload_to='audio/', blank=True, null=True, help_text="Archivo de audio")
-    contenido_video = models.FileField(upload_to='video/', blank=True, null=True, help_text="Archivo de video")
+    contenido_audio = models.FileField(
+        upload_to='audio/', storage=almacenamiento_medios, blank=True, null=True, db_index=True, help_text="Archivo de audio"
+    )
+    contenido_video = models.FileField(
+        upload_to='video/', storage=almacenamiento_medios, blank=True, null=True, db_index=True, help_text="Archivo de video"
+    )
     video_fondo = models.CharField(max_length=100, blank=True, null=True, help_text="Nombre del video de fondo para el temporizador")
     
     class Meta:
@@ -39,55 +44,109 @@ class Sesion(models.Model):
     
     def __str__(self):
         return f"{self.programa.nombre} - Semana {self.semana}: {self.titulo}"
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Mantener la copia de los datos de la sesión en sus diarios
+            desactualizados = self.diarios.exclude(
+                programa_id=self.programa_id, semana=self.semana, duracion_estimada=self.duracion_estimada
+            )
+            pares = set(desactualizados.values_list('programa_id', 'participante_id'))
+            if pares:
+                desactualizados.update(programa_id=self.programa_id, semana=self.semana, duracion_estimada=self.duracion_estimada)
+                # El UPDATE no emite señales: el progreso del programa anterior y del nuevo se recalcula aquí
+                from programa.progreso import recalcular_pares
+                recalcular_pares(pares | {(self.programa_id, participante_id) for _, participante_id in pares})
     
     def get_tipo_practica_display(self):
-        return dict(EtiquetaPractica.choices).get(self.tipo_practica, self.tipo_practica)
+        return etiqueta(EtiquetaPractica, self.tipo_practica)
     
     def get_tipo_contenido_display(self):
-        return dict(TipoContenido.choices).get(self.tipo_contenido, self.tipo_contenido)
+        return etiqueta(TipoContenido, self.tipo_contenido)
     
-    def esta_disponible_para(self, usuario):
-        """Verifica si la sesión está disponible para un usuario."""
-        # Verificar si el usuario está inscrito en el programa
-        inscripcion = InscripcionPrograma.objects.filter(
-            participante=usuario,
-            programa=self.programa,
-            estado_inscripcion=EstadoInscripcion.EN_PROGRESO
-        ).first()
-        
-        if not inscripcion:
-            return False
-            
-        # Calcular la fecha de inicio de la semana
-        fecha_inicio_semana = inscripcion.fecha_inicio + timezone.timedelta(weeks=self.semana-1)
-        fecha_fin_semana = fecha_inicio_semana + timezone.timedelta(weeks=1)
-        
-        # Verificar si estamos en la semana correcta
-        ahora = timezone.now()
-        if not (fecha_inicio_semana <= ahora <= fecha_fin_semana):
-            return False
-            
-        # Verificar si ya existe un diario para esta sesión
-        if DiarioSesion.objects.filter(participante=usuario, sesion=self).exists():
-            return False
-            
-        # Verificar si la sesión anterior está completada
-        if self.semana > 1:
-            sesion_anterior = Sesion.objects.filter(
-                programa=self.programa,
-                semana=self.semana - 1
-            ).first()
-            
-            if sesion_anterior:
-                diario_anterior = DiarioSesion.objects.filter(
-                    participante=usuario,
-                    sesion=sesion_anterior
-                ).exists()
-                
-                if not diario_anterior:
-                    return False
-        
-        return True
+    def get_tipo_escala_display(self):
+        return etiqueta(Escala, self.tipo_escala)
+    
+    def esta_disponible_para(self, participante):
+        """Verifica si la sesión está disponible para un participante (ver sesion/disponibilidad.py)."""
+        from .disponibilidad import calcular_disponibilidad
+        disponibilidad = calcular_disponibilidad(participante, self.programa_id)
+        return disponibilidad.get(self.id, {}).get('disponible', False)
+
+
+class VersionMedio(models.Model):
+    """
+    Versión comprimida de un archivo de audio o vídeo de una sesión, generada
+    en segundo plano (ver sesion/versiones_medios.py). Se asocia al nombre del
+    archivo original y no a la sesión: las copias de un programa que comparten
+    el archivo comparten también sus versiones.
+    """
+    archivo_origen = models.CharField(max_length=255)
+    calidad = models.CharField(max_length=20)
+    # Ruta relativa a MEDIA_ROOT; en vídeo, la lista de reproducción HLS de la variante
+    archivo = models.CharField(max_length=255, blank=True)
+    bitrate_kbps = models.PositiveIntegerField()
+    tamano_bytes = models.PositiveBigIntegerField(default=0)
+    duracion_segundos = models.FloatField(null=True, blank=True)
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoVersionMedio.choices,
+        default=EstadoVersionMedio.PENDIENTE
+    )
+    error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_finalizacion = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['archivo_origen', 'bitrate_kbps']
+        constraints = [
+            models.UniqueConstraint(fields=['archivo_origen', 'calidad'], name='version_medio_origen_calidad_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.archivo_origen} ({self.calidad})"
+
+
+class SubidaMedio(models.Model):
+    """
+    Subida por trozos, reanudable, del audio o vídeo de una sesión (ver
+    sesion/subidas.py). Los trozos se escriben en un archivo parcial que al
+    finalizar se comprueba con su SHA-256 y pasa al almacenamiento por contenido.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    sesion = models.ForeignKey(Sesion, on_delete=models.CASCADE, related_name='subidas')
+    creado_por = models.ForeignKey(Investigador, on_delete=models.CASCADE, related_name='subidas_medios')
+    tipo = models.CharField(max_length=10, help_text="'audio' o 'video'")
+    nombre_archivo = models.CharField(max_length=255)
+    tamano = models.PositiveBigIntegerField()
+    recibidos = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    estado = models.CharField(
+        max_length=20,
+        choices=EstadoSubidaMedio.choices,
+        default=EstadoSubidaMedio.EN_CURSO
+    )
+    # Nombre en el almacenamiento del archivo ya adjuntado a la sesión
+    archivo = models.CharField(max_length=255, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Subida {self.pk} ({self.recibidos}/{self.tamano} bytes)"
+
+
+class DiarioSesionManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no llama a save(): copiar aquí los datos de la sesión,
+        # con una sola consulta para las sesiones que no estén ya cargadas
+        objs = list(objs)
+        sin_cargar = {diario.sesion_id for diario in objs if not DiarioSesion.sesion.is_cached(diario)}
+        sesiones = Sesion.objects.only('programa_id', 'semana', 'duracion_estimada').in_bulk(sin_cargar) if sin_cargar else {}
+        for diario in objs:
+            diario.copiar_datos_sesion(sesiones.get(diario.sesion_id))
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 class DiarioSesion(models.Model):
@@ -96,10 +155,51 @@ class DiarioSesion(models.Model):
     valoracion = models.FloatField()  # Usamos float por si hay escalas decimales en el futuro
     comentario = models.TextField(blank=True, null=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Forma parte de la huella de los datos exportados (programa/trabajos_exportacion.py)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    # Copia de los datos de la sesión para consultar por programa sin JOIN con
+    # Sesion. La rellena save() (o bulk_create) y Sesion.save() la mantiene.
+    programa = models.ForeignKey(Programa, on_delete=models.CASCADE, related_name='diarios', editable=False)
+    semana = models.PositiveIntegerField(editable=False)
+    duracion_estimada = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    # Clave que envía el cliente en los envíos por lotes para reconocer reintentos
+    clave_idempotencia = models.CharField(max_length=64, blank=True, null=True, editable=False)
+
+    objects = DiarioSesionManager()
 
     class Meta:
         unique_together = ('participante', 'sesion')
-        ordering = ['sesion__semana', 'fecha_creacion']
+        ordering = ['semana', 'fecha_creacion']
+        indexes = [
+            # Listado paginado por cursor de los diarios del participante
+            models.Index(fields=['participante', '-fecha_creacion', '-id'], name='diario_participante_fecha_idx'),
+            # Agregados de progreso y estadísticas por (programa, participante): solo índice
+            models.Index(
+                fields=['programa', 'participante', 'fecha_creacion', 'duracion_estimada'],
+                name='diario_programa_part_idx'
+            ),
+            # Diarios del programa por semana (exportación)
+            models.Index(fields=['programa', 'semana', 'sesion', 'fecha_creacion', 'id'], name='diario_programa_semana_idx'),
+            # Diarios de una sesión en orden de creación
+            models.Index(fields=['sesion', 'fecha_creacion', 'id'], name='diario_sesion_fecha_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['participante', 'clave_idempotencia'],
+                condition=models.Q(clave_idempotencia__isnull=False),
+                name='diario_clave_idempotencia_uniq'
+            ),
+        ]
+
+    def copiar_datos_sesion(self, sesion=None):
+        sesion = sesion or self.sesion
+        self.programa_id = sesion.programa_id
+        self.semana = sesion.semana
+        self.duracion_estimada = sesion.duracion_estimada
+
+    def save(self, *args, **kwargs):
+        self.copiar_datos_sesion()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Diario de {self.participante.usuario.nombre} {self.participante.usuario.apellidos} en Semana {self.sesion.semana}"
@@ -1,5 +1,10 @@
 from rest_framework import serializers
-from .models import Sesion, DiarioSesion
+from django.urls import reverse
+from django.conf import settings
+from .models import Sesion, DiarioSesion, SubidaMedio
+from .medios import CAMPOS_TRANSMISION
+from .versiones_medios import recomendar
+from .subidas import extension_admitida
 from usuario.serializers import ParticipanteSerializer
 from config.enums import EtiquetaPractica, TipoContenido, Escala
 
@@ -76,9 +81,13 @@ class SesionDetalleSerializer(serializers.ModelSerializer):
         fields = '__all__'
     
     def get_disponible(self, obj):
+        # Con varias sesiones, la vista pasa en el contexto la disponibilidad ya calculada
+        disponibilidad = self.context.get('disponibilidad')
+        if disponibilidad is not None:
+            return disponibilidad.get(obj.id, {}).get('disponible', False)
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_participante():
-            return obj.esta_disponible_para(request.user)
+            return obj.esta_disponible_para(request.user.perfil_participante)
         return False
     
     def to_representation(self, instance):
@@ -87,6 +96,16 @@ class SesionDetalleSerializer(serializers.ModelSerializer):
         representation['tipo_contenido_display'] = instance.get_tipo_contenido_display()
         representation['tipo_escala_display'] = instance.get_tipo_escala_display()
         representation['tipo_escala'] = instance.tipo_escala
+        # Direcciones de transmisión (con tramos y permisos) de los archivos de la sesión
+        representation['medios'] = {
+            tipo: reverse('sesion-medios', args=[instance.pk, tipo])
+            for tipo, campo in CAMPOS_TRANSMISION.items()
+            if getattr(instance, campo)
+        }
+        request = self.context.get('request')
+        if request is not None and representation['medios']:
+            # Versión más ligera adecuada al cliente (ver sesion/versiones_medios.py)
+            representation['medio_recomendado'] = recomendar(instance, request)
         return representation
 
 class DiarioSesionSerializer(serializers.ModelSerializer):
@@ -106,3 +125,54 @@ class DiarioSesionSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         return super().create(validated_data)
+
+class DiarioSesionLoteSerializer(serializers.Serializer):
+    """Diario de un envío por lotes; la sesión se comprueba para todo el lote a la vez"""
+    clave = serializers.CharField(max_length=64)
+    sesion_id = serializers.IntegerField()
+    valoracion = serializers.FloatField()
+    comentario = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+class DiarioSesionListSerializer(serializers.ModelSerializer):
+    """Representación ligera para el listado paginado de diarios (sin la sesión anidada)"""
+    sesion_titulo = serializers.CharField(source='sesion.titulo', read_only=True)
+    sesion_semana = serializers.IntegerField(source='semana', read_only=True)
+    programa = serializers.IntegerField(source='programa_id', read_only=True)
+
+    class Meta:
+        model = DiarioSesion
+        fields = ['id', 'sesion', 'sesion_titulo', 'sesion_semana', 'programa', 'valoracion', 'comentario', 'fecha_creacion']
+        read_only_fields = fields
+
+class SubidaMedioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SubidaMedio
+        fields = [
+            'id', 'sesion', 'tipo', 'nombre_archivo', 'tamano', 'recibidos', 'sha256',
+            'estado', 'archivo', 'fecha_creacion', 'fecha_actualizacion'
+        ]
+        read_only_fields = ['id', 'sesion', 'recibidos', 'estado', 'archivo', 'fecha_creacion', 'fecha_actualizacion']
+
+    def validate_tamano(self, value):
+        if value <= 0 or value > settings.MEDIOS_SUBIDA_TAMANO_MAXIMO:
+            raise serializers.ValidationError(
+                f"El tamaño debe estar entre 1 y {settings.MEDIOS_SUBIDA_TAMANO_MAXIMO} bytes"
+            )
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise serializers.ValidationError("El SHA-256 debe tener 64 caracteres hexadecimales")
+        return value
+
+    def validate(self, data):
+        if data['tipo'] not in ('audio', 'video'):
+            raise serializers.ValidationError({'tipo': "El tipo debe ser 'audio' o 'video'"})
+        if not extension_admitida(data['tipo'], data['nombre_archivo']):
+            if data['tipo'] == 'audio':
+                mensaje = 'Solo se permiten archivos de audio en formato MP3, WAV, OGG o M4A'
+            else:
+                mensaje = 'Solo se permiten archivos de video en formato MP4'
+            raise serializers.ValidationError({'nombre_archivo': mensaje})
+        return data
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .medios import CAMPOS_MEDIOS, liberar_archivos
+from .models import Sesion
+
+
+@receiver(post_delete, sender=Sesion)
+def sesion_eliminada(sender, instance, **kwargs):
+    # También al borrar un programa entero (borrado en cascada). Se espera a
+    # confirmar la transacción para no perder archivos si se deshace
+    nombres = [getattr(instance, campo).name for campo in CAMPOS_MEDIOS if getattr(instance, campo)]
+    if nombres:
+        transaction.on_commit(lambda: liberar_archivos(nombres))
@@ -0,0 +1,208 @@
+"""
+Subidas por trozos, reanudables, del audio y el vídeo de las sesiones.
+
+Un vídeo de una sesión puede ocupar varios GB; subido en una sola petición
+multipart, un corte de conexión obliga a repetirlo entero. El protocolo es:
+
+1. iniciar(): el cliente declara el tipo, el nombre, el tamaño y (si lo
+   conoce) el SHA-256 del archivo. Si ese contenido ya está guardado y lo usa
+   alguna sesión del mismo investigador, se adjunta sin transferir nada.
+2. escribir_trozo(): cada trozo lleva su desplazamiento (cabecera
+   Upload-Offset) y se escribe en un archivo parcial en bloques de
+   MEDIA_TAMANO_BLOQUE bytes, sin cargarlo entero en memoria. Si el
+   desplazamiento no coincide con lo recibido hasta ahora se rechaza y el
+   cliente reanuda desde `recibidos`.
+3. finalizar(): con todos los bytes recibidos se calcula el SHA-256 del
+   archivo parcial, se compara con el declarado y el archivo pasa al
+   almacenamiento por contenido (ver almacenamiento.py) y a la sesión.
+
+Las subidas sin actividad durante MEDIOS_SUBIDA_CADUCIDAD_HORAS se descartan
+con limpiar_caducadas() (comando limpiar_medios).
+"""
+import hashlib
+import os
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from config.enums import EstadoSubidaMedio
+from .almacenamiento import almacenamiento_medios, nombre_contenido
+from .medios import CAMPOS_TRANSMISION, liberar_archivos
+from .models import Sesion, SubidaMedio
+from . import versiones_medios
+
+# Directorio de los archivos parciales, relativo a MEDIA_ROOT
+DIRECTORIO_PARCIALES = '.subidas_reanudables'
+
+# Extensiones admitidas para cada tipo (las mismas que en la subida multipart)
+EXTENSIONES = {
+    'audio': ('.mp3', '.wav', '.ogg', '.m4a'),
+    'video': ('.mp4',),
+}
+
+
+class SubidaNoValida(Exception):
+    """La subida no puede continuar o finalizar en su estado actual"""
+
+
+class DesplazamientoIncorrecto(Exception):
+    """El trozo no empieza donde termina lo ya recibido"""
+
+    def __init__(self, recibidos):
+        super().__init__(f'Se esperaba el desplazamiento {recibidos}')
+        self.recibidos = recibidos
+
+
+def ruta_parcial(subida):
+    return almacenamiento_medios().path(f'{DIRECTORIO_PARCIALES}/{subida.pk}.parte')
+
+
+def extension_admitida(tipo, nombre_archivo):
+    return tipo in EXTENSIONES and nombre_archivo.lower().endswith(EXTENSIONES[tipo])
+
+
+def _directorio(tipo):
+    # upload_to del campo de la sesión, sin la barra final
+    return Sesion._meta.get_field(CAMPOS_TRANSMISION[tipo]).upload_to.rstrip('/')
+
+
+def _contenido_propio(subida):
+    """Nombre del contenido declarado si ya lo usa alguna sesión del investigador"""
+    if not subida.sha256:
+        return None
+    extension = os.path.splitext(subida.nombre_archivo)[1]
+    nombre = nombre_contenido(_directorio(subida.tipo), subida.sha256, extension)
+    usado = Sesion.objects.filter(
+        Q(contenido_audio=nombre) | Q(contenido_video=nombre),
+        programa__creado_por=subida.creado_por
+    ).exists()
+    almacenamiento = almacenamiento_medios()
+    if usado and almacenamiento.exists(nombre):
+        almacenamiento.marcar_reutilizado(nombre)
+        return nombre
+    return None
+
+
+def adjuntar(subida, nombre):
+    """Asigna el archivo `nombre` a la sesión de la subida y la marca completada"""
+    sesion = subida.sesion
+    campo = CAMPOS_TRANSMISION[subida.tipo]
+    anterior = getattr(sesion, campo).name if getattr(sesion, campo) else None
+    setattr(sesion, campo, nombre)
+    sesion.tipo_contenido = subida.tipo
+    sesion.save(update_fields=[campo, 'tipo_contenido'])
+
+    subida.archivo = nombre
+    subida.recibidos = subida.tamano
+    subida.estado = EstadoSubidaMedio.COMPLETADA
+    subida.save(update_fields=['archivo', 'recibidos', 'estado', 'fecha_actualizacion'])
+
+    if anterior and anterior != nombre:
+        transaction.on_commit(lambda: liberar_archivos([anterior]))
+    versiones_medios.solicitar(sesion)
+
+
+def iniciar(sesion, investigador, tipo, nombre_archivo, tamano, sha256=''):
+    """Crea la subida (completada ya si su contenido es conocido)"""
+    subida = SubidaMedio.objects.create(
+        sesion=sesion, creado_por=investigador, tipo=tipo,
+        nombre_archivo=nombre_archivo, tamano=tamano, sha256=sha256.lower()
+    )
+    nombre = _contenido_propio(subida)
+    if nombre:
+        adjuntar(subida, nombre)
+    return subida
+
+
+def escribir_trozo(subida, desplazamiento, flujo, longitud):
+    """
+    Escribe en el archivo parcial los `longitud` bytes de `flujo` a partir de
+    `desplazamiento`. Devuelve los bytes recibidos en total.
+    """
+    if subida.estado != EstadoSubidaMedio.EN_CURSO:
+        raise SubidaNoValida('La subida ya está completada')
+    if desplazamiento != subida.recibidos:
+        raise DesplazamientoIncorrecto(subida.recibidos)
+    if desplazamiento + longitud > subida.tamano:
+        raise SubidaNoValida('El trozo supera el tamaño declarado del archivo')
+
+    ruta = ruta_parcial(subida)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    escritos = 0
+    with open(ruta, 'r+b' if os.path.exists(ruta) else 'wb') as parcial:
+        # Lo que quede tras `desplazamiento` es de un trozo interrumpido
+        parcial.truncate(desplazamiento)
+        parcial.seek(desplazamiento)
+        while escritos < longitud:
+            bloque = flujo.read(min(settings.MEDIA_TAMANO_BLOQUE, longitud - escritos))
+            if not bloque:
+                break
+            parcial.write(bloque)
+            escritos += len(bloque)
+
+    # Solo avanza si nadie ha escrito otro trozo con el mismo desplazamiento entretanto
+    actualizadas = SubidaMedio.objects.filter(pk=subida.pk, recibidos=desplazamiento).update(
+        recibidos=desplazamiento + escritos, fecha_actualizacion=timezone.now()
+    )
+    if not actualizadas:
+        subida.refresh_from_db(fields=['recibidos'])
+        raise DesplazamientoIncorrecto(subida.recibidos)
+    subida.recibidos = desplazamiento + escritos
+    if escritos < longitud:
+        raise SubidaNoValida('El trozo llegó incompleto')
+    return subida.recibidos
+
+
+def finalizar(subida, sha256=''):
+    """
+    Comprueba el archivo recibido y lo adjunta a la sesión. Si el SHA-256 no
+    coincide con el declarado se descarta lo recibido y hay que subirlo de nuevo.
+    """
+    if subida.estado == EstadoSubidaMedio.COMPLETADA:
+        return subida
+    if subida.recibidos != subida.tamano:
+        raise SubidaNoValida(f'Faltan {subida.tamano - subida.recibidos} bytes por recibir')
+
+    ruta = ruta_parcial(subida)
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as parcial:
+        for bloque in iter(lambda: parcial.read(settings.MEDIA_TAMANO_BLOQUE), b''):
+            resumen.update(bloque)
+    resumen = resumen.hexdigest()
+
+    esperado = (sha256 or subida.sha256).lower()
+    if esperado and esperado != resumen:
+        os.remove(ruta)
+        subida.recibidos = 0
+        subida.save(update_fields=['recibidos', 'fecha_actualizacion'])
+        raise SubidaNoValida('El SHA-256 del archivo recibido no coincide')
+
+    nombre = almacenamiento_medios().colocar(
+        ruta, _directorio(subida.tipo), resumen, os.path.splitext(subida.nombre_archivo)[1]
+    )
+    subida.sha256 = resumen
+    subida.save(update_fields=['sha256'])
+    adjuntar(subida, nombre)
+    return subida
+
+
+def cancelar(subida):
+    """Borra la subida y su archivo parcial"""
+    try:
+        os.remove(ruta_parcial(subida))
+    except FileNotFoundError:
+        pass
+    subida.delete()
+
+
+def limpiar_caducadas():
+    """
+    Borra las subidas sin actividad reciente: las en curso con su archivo
+    parcial y las completadas, que ya no hacen falta. Devuelve cuántas.
+    """
+    limite = timezone.now() - timedelta(hours=settings.MEDIOS_SUBIDA_CADUCIDAD_HORAS)
+    caducadas = list(SubidaMedio.objects.filter(fecha_actualizacion__lt=limite))
+    for subida in caducadas:
+        cancelar(subida)
+    return len(caducadas)
@@ -0,0 +1,148 @@
+"""
+Transmisión del audio y el vídeo de las sesiones.
+
+Los reproductores piden los archivos por tramos (cabecera Range) para poder
+saltar a cualquier punto de una meditación sin descargarla entera. Este
+módulo responde:
+
+- 200 con el archivo completo mediante FileResponse, que el servidor WSGI
+  puede enviar con sendfile (wsgi.file_wrapper) sin pasar por Python.
+- 206 con un único tramo, leído en bloques de MEDIA_TAMANO_BLOQUE bytes.
+- 416 si el tramo pedido está fuera del archivo.
+- 304 / 412 según If-None-Match / If-Modified-Since / If-Match, con un ETag
+  calculado a partir del tamaño y la fecha de modificación.
+
+Si se configura MEDIA_X_ACCEL_REDIRECT, la respuesta solo lleva la cabecera
+X-Accel-Redirect y nginx se encarga de los tramos y las condiciones.
+"""
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Tipos que mimetypes no conoce o confunde (.ts) de las versiones generadas
+TIPOS_CONTENIDO = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+    '.m4a': 'audio/mp4',
+}
+
+
+class RangoNoSatisfacible(Exception):
+    """El tramo pedido no se solapa con el archivo"""
+
+
+def interpretar_rango(cabecera, tamano):
+    """
+    Devuelve (inicio, fin) inclusivos del tramo pedido en `cabecera`, o None
+    si no hay cabecera, no es válida o pide varios tramos (se sirve entero).
+    Lanza RangoNoSatisfacible si el tramo empieza después del final.
+    """
+    if not cabecera:
+        return None
+    coincidencia = _RANGO.match(cabecera.strip())
+    if not coincidencia:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        if not fin:
+            return None
+        sufijo = int(fin)
+        if sufijo == 0 or tamano == 0:
+            raise RangoNoSatisfacible()
+        return max(tamano - sufijo, 0), tamano - 1
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        return None
+    if inicio >= tamano:
+        raise RangoNoSatisfacible()
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    return inicio, fin
+
+
+def _leer_tramo(archivo, inicio, longitud, tamano_bloque):
+    try:
+        archivo.seek(inicio)
+        while longitud > 0:
+            bloque = archivo.read(min(tamano_bloque, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+    finally:
+        archivo.close()
+
+
+def _aplicar_cabeceras(respuesta, content_type, etag, modificado):
+    respuesta['Content-Type'] = content_type
+    respuesta['Accept-Ranges'] = 'bytes'
+    respuesta['ETag'] = etag
+    respuesta['Last-Modified'] = http_date(modificado)
+    respuesta['Cache-Control'] = f'private, max-age={settings.MEDIA_CACHE_SEGUNDOS}'
+    return respuesta
+
+
+def tipo_contenido(nombre):
+    return TIPOS_CONTENIDO.get(os.path.splitext(nombre)[1].lower()) or mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+
+
+def responder_archivo(request, nombre, storage=default_storage):
+    """Respuesta HTTP para el archivo `nombre` de `storage` según las cabeceras de `request`"""
+    content_type = tipo_contenido(nombre)
+
+    if settings.MEDIA_X_ACCEL_REDIRECT:
+        respuesta = HttpResponse(content_type=content_type)
+        respuesta['X-Accel-Redirect'] = settings.MEDIA_X_ACCEL_REDIRECT.rstrip('/') + '/' + nombre
+        return respuesta
+
+    tamano = storage.size(nombre)
+    modificado = int(storage.get_modified_time(nombre).timestamp())
+    etag = f'"{tamano:x}-{modificado:x}"'
+
+    cabeceras = _aplicar_cabeceras(HttpResponse(), content_type, etag, modificado)
+    condicional = get_conditional_response(request, etag=etag, last_modified=modificado, response=cabeceras)
+    if condicional is not cabeceras:
+        return condicional
+
+    # If-Range: el tramo solo vale si el cliente tiene la versión actual
+    rango_cabecera = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range.strip() not in (etag, http_date(modificado)):
+        rango_cabecera = None
+
+    try:
+        rango = interpretar_rango(rango_cabecera, tamano)
+    except RangoNoSatisfacible:
+        respuesta = _aplicar_cabeceras(HttpResponse(status=416), content_type, etag, modificado)
+        respuesta['Content-Range'] = f'bytes */{tamano}'
+        return respuesta
+
+    if request.method == 'HEAD':
+        respuesta = cabeceras
+        if rango is not None:
+            respuesta.status_code = 206
+            respuesta['Content-Range'] = f'bytes {rango[0]}-{rango[1]}/{tamano}'
+        respuesta['Content-Length'] = str(tamano if rango is None else rango[1] - rango[0] + 1)
+        return respuesta
+
+    if rango is None:
+        respuesta = FileResponse(storage.open(nombre, 'rb'), content_type=content_type)
+        respuesta.block_size = settings.MEDIA_TAMANO_BLOQUE
+        return _aplicar_cabeceras(respuesta, content_type, etag, modificado)
+
+    inicio, fin = rango
+    longitud = fin - inicio + 1
+    respuesta = StreamingHttpResponse(
+        _leer_tramo(storage.open(nombre, 'rb'), inicio, longitud, settings.MEDIA_TAMANO_BLOQUE),
+        status=206,
+    )
+    respuesta['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+    respuesta['Content-Length'] = str(longitud)
+    return _aplicar_cabeceras(respuesta, content_type, etag, modificado)
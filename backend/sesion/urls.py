@@ -6,12 +6,21 @@ urlpatterns = [
     # Sesiones
     path('', api.sesion_list_create, name='sesion-list-create'),
     path('<int:pk>/', api.sesion_detail, name='sesion-detail'),
+    path('<int:pk>/medios/<str:tipo>/', api.sesion_medios, name='sesion-medios'),
+    path('<int:pk>/medios/<str:tipo>/<path:ruta>', api.sesion_medios_version, name='sesion-medios-version'),
     path('tipos-practica/', api.tipos_practica, name='tipos-practica'),
     path('tipos-contenido/', api.tipos_contenido, name='tipos-contenido'),
     path('tipos-escala/', api.tipos_escala, name='tipos-escala'),
+    path('medios/uso/', api.medios_uso, name='medios-uso'),
+
+    # Subidas reanudables por trozos
+    path('<int:pk>/subidas/', api.subida_iniciar, name='subida-iniciar'),
+    path('subidas/<uuid:subida_id>/', api.subida_detail, name='subida-detail'),
+    path('subidas/<uuid:subida_id>/finalizar/', api.subida_finalizar, name='subida-finalizar'),
     
     # Diarios de sesión
     path('diario/', api.diario_sesion_list_create, name='diario-sesion-list-create'),
+    path('diario/lote/', api.diario_sesion_lote, name='diario-sesion-lote'),
     path('diario/<int:pk>/', api.diario_sesion_detail, name='diario-sesion-detail'),
     path('<int:sesion_id>/diario_info/', api.diario_info, name='diario-info'),
 ]
@@ -0,0 +1,311 @@
+"""
+Versiones comprimidas del audio y el vídeo de las sesiones.
+
+Los archivos se suben tal cual (un WAV de una meditación puede ocupar cientos
+de MB). Tras guardar la sesión, un pool de hilos local ejecuta ffmpeg sobre
+el original y escribe junto a él, en `<archivo>.versiones/`:
+
+- audio: AAC a 48 kbit/s en mono (voz) y a 96 kbit/s en estéreo (.m4a).
+- vídeo: variantes HLS a 360p y 720p (sin ampliar el original), con
+  segmentos de SEGUNDOS_SEGMENTO segundos y una lista maestra master.m3u8.
+
+Cada versión guarda su tamaño, su bitrate real y la duración del original.
+recomendar() elige para cada cliente la versión más ligera adecuada, de modo
+que completar una sesión descargue los menos bytes posibles. Mientras no hay
+versiones (o sin ffmpeg en el servidor) se recomienda el archivo original.
+"""
+import json
+import os
+import shutil
+import subprocess
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+from config.enums import EstadoVersionMedio, TipoContenido
+from .almacenamiento import almacenamiento_medios
+from .medios import CAMPOS_TRANSMISION, directorio_versiones
+from .models import VersionMedio
+
+PERFILES_AUDIO = {
+    'audio_48k': {'bitrate': 48, 'canales': 1},
+    'audio_96k': {'bitrate': 96, 'canales': 2},
+}
+PERFILES_VIDEO = {
+    'hls_360p': {'bitrate': 800, 'altura': 360},
+    'hls_720p': {'bitrate': 2500, 'altura': 720},
+}
+BITRATE_AUDIO_VIDEO = 96
+SEGUNDOS_SEGMENTO = 6
+LISTA_MAESTRA = 'master.m3u8'
+
+# Parte del ancho de banda declarado por el cliente (cabecera Downlink) que
+# puede ocupar la versión elegida
+FRACCION_ANCHO_BANDA = 0.5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.MEDIOS_WORKERS,
+                thread_name_prefix='versiones_medios'
+            )
+    return _executor
+
+
+def ffmpeg_disponible():
+    """ffmpeg es opcional: sin él se sirven siempre los archivos originales"""
+    return shutil.which(settings.MEDIOS_FFMPEG) is not None and shutil.which(settings.MEDIOS_FFPROBE) is not None
+
+
+def solicitar(sesion):
+    """
+    Encola la generación de versiones de los archivos de `sesion` que aún no
+    las tienen. Devuelve las versiones creadas.
+    """
+    if not ffmpeg_disponible():
+        return []
+    creadas = []
+    for tipo, campo in CAMPOS_TRANSMISION.items():
+        archivo = getattr(sesion, campo)
+        if not archivo or VersionMedio.objects.filter(archivo_origen=archivo.name).exists():
+            continue
+        perfiles = PERFILES_VIDEO if tipo == 'video' else PERFILES_AUDIO
+        creadas += VersionMedio.objects.bulk_create([
+            VersionMedio(archivo_origen=archivo.name, calidad=calidad, bitrate_kbps=perfil['bitrate'])
+            for calidad, perfil in perfiles.items()
+        ], ignore_conflicts=True)
+        encolar(archivo.name)
+    return creadas
+
+
+def encolar(nombre):
+    """
+    Envía el archivo al pool de hilos una vez confirmada la transacción.
+    Con MEDIOS_PROCESAMIENTO_ASINCRONO = False se procesa en el momento (tests).
+    """
+    if not settings.MEDIOS_PROCESAMIENTO_ASINCRONO:
+        generar_versiones(nombre)
+        return
+    transaction.on_commit(lambda: _obtener_executor().submit(_generar_en_hilo, nombre))
+
+
+def _generar_en_hilo(nombre):
+    close_old_connections()
+    try:
+        generar_versiones(nombre)
+    finally:
+        close_old_connections()
+
+
+def _ejecutar(comando):
+    return subprocess.run(
+        comando, check=True, capture_output=True, timeout=settings.MEDIOS_TIEMPO_MAXIMO_SEGUNDOS
+    ).stdout
+
+
+def analizar(ruta):
+    """Duración en segundos, altura del vídeo (0 si no tiene) y si tiene pista de audio"""
+    salida = json.loads(_ejecutar([
+        settings.MEDIOS_FFPROBE, '-v', 'error', '-show_entries', 'format=duration:stream=codec_type,height',
+        '-of', 'json', ruta
+    ]))
+    pistas = salida.get('streams', [])
+    return {
+        'duracion': float(salida.get('format', {}).get('duration') or 0) or None,
+        'altura': max((pista.get('height') or 0 for pista in pistas if pista.get('codec_type') == 'video'), default=0),
+        'audio': any(pista.get('codec_type') == 'audio' for pista in pistas),
+    }
+
+
+def comando_audio(origen, directorio, versiones):
+    """Una sola decodificación del original para todas las versiones de audio"""
+    comando = [settings.MEDIOS_FFMPEG, '-nostdin', '-y', '-i', origen]
+    for version in versiones:
+        perfil = PERFILES_AUDIO[version.calidad]
+        comando += [
+            '-map', '0:a:0', '-c:a', 'aac', '-b:a', f"{perfil['bitrate']}k", '-ac', str(perfil['canales']),
+            '-movflags', '+faststart', os.path.join(directorio, f'{version.calidad}.m4a'),
+        ]
+    return comando
+
+
+def comando_hls(origen, directorio, versiones, con_audio):
+    """Todas las variantes HLS en una pasada, con los cortes de segmento alineados"""
+    escalados = ';'.join(
+        f"[v{indice}]scale=-2:{PERFILES_VIDEO[version.calidad]['altura']}[s{indice}]"
+        for indice, version in enumerate(versiones)
+    )
+    divisiones = ''.join(f'[v{indice}]' for indice in range(len(versiones)))
+    comando = [
+        settings.MEDIOS_FFMPEG, '-nostdin', '-y', '-i', origen,
+        '-filter_complex', f'[0:v]split={len(versiones)}{divisiones};{escalados}',
+    ]
+    mapa = []
+    for indice, version in enumerate(versiones):
+        comando += ['-map', f'[s{indice}]'] + (['-map', '0:a:0'] if con_audio else [])
+        comando += [f'-b:v:{indice}', f"{PERFILES_VIDEO[version.calidad]['bitrate']}k"]
+        mapa.append(f'v:{indice},a:{indice},name:{version.calidad}' if con_audio else f'v:{indice},name:{version.calidad}')
+    comando += [
+        '-c:v', 'libx264', '-preset', 'veryfast', '-sc_threshold', '0',
+        '-force_key_frames', f'expr:gte(t,n_forced*{SEGUNDOS_SEGMENTO})',
+    ]
+    if con_audio:
+        comando += ['-c:a', 'aac', '-b:a', f'{BITRATE_AUDIO_VIDEO}k', '-ac', '2']
+    comando += [
+        '-f', 'hls', '-hls_time', str(SEGUNDOS_SEGMENTO), '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(directorio, '%v', '%05d.ts'),
+        '-var_stream_map', ' '.join(mapa), os.path.join(directorio, '%v', 'index.m3u8'),
+    ]
+    return comando
+
+
+def _tamano(ruta):
+    """Bytes de un archivo o de todos los archivos de un directorio (variante HLS)"""
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta)
+    return sum(entrada.stat().st_size for entrada in os.scandir(ruta) if entrada.is_file())
+
+
+def _escribir_lista_maestra(directorio, versiones):
+    lineas = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for version in versiones:
+        lineas += [f'#EXT-X-STREAM-INF:BANDWIDTH={version.bitrate_kbps * 1000}', f'{version.calidad}/index.m3u8']
+    with open(os.path.join(directorio, LISTA_MAESTRA), 'w') as lista:
+        lista.write('\n'.join(lineas) + '\n')
+
+
+def generar_versiones(nombre):
+    """Genera las versiones pendientes del archivo `nombre` y guarda su tamaño y duración"""
+    versiones = list(VersionMedio.objects.filter(archivo_origen=nombre, estado=EstadoVersionMedio.PENDIENTE))
+    if not versiones:
+        return
+    VersionMedio.objects.filter(pk__in=[version.pk for version in versiones]).update(estado=EstadoVersionMedio.EN_PROCESO)
+    directorio_relativo = directorio_versiones(nombre)
+    almacenamiento = almacenamiento_medios()
+    directorio = almacenamiento.path(directorio_relativo)
+    try:
+        origen = almacenamiento.path(nombre)
+        os.makedirs(directorio, exist_ok=True)
+        info = analizar(origen)
+
+        if versiones[0].calidad in PERFILES_VIDEO:
+            # No ampliar: solo las variantes que no superan la altura del original
+            descartadas = [v for v in versiones[1:] if PERFILES_VIDEO[v.calidad]['altura'] > info['altura']]
+            versiones = [v for v in versiones if v not in descartadas]
+            VersionMedio.objects.filter(pk__in=[version.pk for version in descartadas]).delete()
+            _ejecutar(comando_hls(origen, directorio, versiones, info['audio']))
+            archivos = {version.pk: f'{version.calidad}/index.m3u8' for version in versiones}
+        else:
+            _ejecutar(comando_audio(origen, directorio, versiones))
+            archivos = {version.pk: f'{version.calidad}.m4a' for version in versiones}
+
+        for version in versiones:
+            ruta = os.path.join(directorio, archivos[version.pk])
+            version.archivo = f'{directorio_relativo}/{archivos[version.pk]}'
+            version.tamano_bytes = _tamano(ruta if version.calidad in PERFILES_AUDIO else os.path.dirname(ruta))
+            version.duracion_segundos = info['duracion']
+            if info['duracion']:
+                version.bitrate_kbps = round(version.tamano_bytes * 8 / info['duracion'] / 1000)
+            version.estado = EstadoVersionMedio.COMPLETADO
+            version.fecha_finalizacion = timezone.now()
+        if versiones[0].calidad in PERFILES_VIDEO:
+            _escribir_lista_maestra(directorio, versiones)
+        VersionMedio.objects.bulk_update(
+            versiones, ['archivo', 'tamano_bytes', 'duracion_segundos', 'bitrate_kbps', 'estado', 'fecha_finalizacion']
+        )
+
+    except Exception as e:
+        print(f"Error al generar las versiones de {nombre}: {str(e)}")
+        print(traceback.format_exc())
+        shutil.rmtree(directorio, ignore_errors=True)
+        VersionMedio.objects.filter(pk__in=[version.pk for version in versiones]).update(
+            estado=EstadoVersionMedio.ERROR,
+            error=str(e),
+            fecha_finalizacion=timezone.now()
+        )
+
+
+def preferencias_cliente(request):
+    """Calidad pedida (?calidad=baja|alta) y las pistas Save-Data y Downlink (Mbit/s) del cliente"""
+    parametros = getattr(request, 'query_params', request.GET)
+    try:
+        ancho_banda = float(request.META.get('HTTP_DOWNLINK', ''))
+    except ValueError:
+        ancho_banda = None
+    return {
+        'calidad': parametros.get('calidad'),
+        'ahorro_datos': request.META.get('HTTP_SAVE_DATA', '').strip().lower() == 'on',
+        'ancho_banda_mbps': ancho_banda,
+    }
+
+
+def elegir_version(versiones, calidad=None, ahorro_datos=False, ancho_banda_mbps=None):
+    """
+    La versión más ligera salvo que el cliente pida calidad alta o declare
+    ancho de banda para una mejor. `versiones` ordenadas por bitrate creciente.
+    """
+    if not versiones:
+        return None
+    if calidad == 'alta':
+        return versiones[-1]
+    if calidad == 'baja' or ahorro_datos or not ancho_banda_mbps:
+        return versiones[0]
+    presupuesto = ancho_banda_mbps * 1000 * FRACCION_ANCHO_BANDA
+    asumibles = [version for version in versiones if version.bitrate_kbps <= presupuesto]
+    return asumibles[-1] if asumibles else versiones[0]
+
+
+def recomendar(sesion, request):
+    """
+    Medio que debe reproducir el cliente para `sesion`: la versión elegida por
+    elegir_version o, si aún no hay versiones, el archivo original. None si la
+    sesión no tiene audio ni vídeo.
+    """
+    tipo = 'video' if sesion.tipo_contenido == TipoContenido.VIDEO else 'audio'
+    archivo = getattr(sesion, CAMPOS_TRANSMISION[tipo])
+    if not archivo:
+        tipo = 'audio' if tipo == 'video' else 'video'
+        archivo = getattr(sesion, CAMPOS_TRANSMISION[tipo])
+        if not archivo:
+            return None
+
+    versiones = list(VersionMedio.objects.filter(
+        archivo_origen=archivo.name, estado=EstadoVersionMedio.COMPLETADO
+    ).order_by('bitrate_kbps'))
+    version = elegir_version(versiones, **preferencias_cliente(request))
+    if version is None:
+        try:
+            tamano = archivo.size
+        except OSError:
+            tamano = None
+        return {
+            'tipo': tipo,
+            'calidad': 'original',
+            'url': reverse('sesion-medios', args=[sesion.pk, tipo]),
+            'tamano_bytes': tamano,
+            'bitrate_kbps': None,
+            'duracion_segundos': None,
+        }
+
+    base = directorio_versiones(archivo.name) + '/'
+    recomendado = {
+        'tipo': tipo,
+        'calidad': version.calidad,
+        'url': reverse('sesion-medios-version', args=[sesion.pk, tipo, version.archivo[len(base):]]),
+        'tamano_bytes': version.tamano_bytes,
+        'bitrate_kbps': version.bitrate_kbps,
+        'duracion_segundos': version.duracion_segundos,
+    }
+    if tipo == 'video' and len(versiones) > 1:
+        # Los reproductores HLS pueden adaptar la variante durante la reproducción
+        recomendado['lista_maestra'] = reverse('sesion-medios-version', args=[sesion.pk, tipo, LISTA_MAESTRA])
+    return recomendado
@@ -16,6 +16,16 @@ from config.enums import RoleUsuario, EstadoPublicacion, MomentoCuestionario
 
 Usuario = get_user_model()
 
+pytest_plugins = ['tests.presupuesto_consultas']
+
+@pytest.fixture(autouse=True)
+def limpiar_caches():
+    """Vacía las cachés en memoria para que no se compartan datos entre tests."""
+    from django.core.cache import caches
+    yield
+    for cache in caches.all():
+        cache.clear()
+
 @pytest.fixture
 def api_client():
     """Cliente API para tests."""
@@ -0,0 +1,40 @@
+"""
+Plugin de pytest para limitar el número de consultas SQL de los endpoints.
+
+Se registra en conftest.py (pytest_plugins) y ofrece la fixture
+`presupuesto_consultas`:
+
+    def test_listado(self, authenticated_client_investigador, presupuesto_consultas):
+        with presupuesto_consultas(8):
+            authenticated_client_investigador.get('/api/programas/')
+
+El test falla si dentro del bloque se ejecutan más consultas que el
+presupuesto, o más consultas repetidas (misma huella, ver
+config/consultas_sql.py) que `duplicadas`. El mensaje de error incluye el
+resumen de las consultas repetidas para localizar el N+1.
+"""
+from contextlib import contextmanager
+import pytest
+from config.consultas_sql import RegistroConsultas
+
+
+@pytest.fixture
+def presupuesto_consultas():
+    @contextmanager
+    def comprobar(maximo, duplicadas=None):
+        with RegistroConsultas() as registro:
+            yield registro
+
+        if registro.total > maximo:
+            pytest.fail(
+                f'Presupuesto de consultas superado: {registro.total} > {maximo}\n{registro.resumen()}',
+                pytrace=False
+            )
+        repetidas = sum(veces - 1 for veces in registro.duplicadas.values())
+        if duplicadas is not None and repetidas > duplicadas:
+            pytest.fail(
+                f'Demasiadas consultas repetidas: {repetidas} > {duplicadas}\n{registro.resumen()}',
+                pytrace=False
+            )
+
+    return comprobar
@@ -233,4 +233,196 @@ class TestAutenticacionAPI:
         url = reverse('delete-account')
         response = api_client.delete(url)
         
-        assert response.status_code == status.HTTP_401_UNAUTHORIZED 
\ No newline at end of file
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED 
+
+@pytest.mark.django_db
+class TestAutenticacionJWTCacheada:
+    """Tests para la validación única del token y la caché del usuario autenticado."""
+
+    url = '/api/auth/me/'
+
+    def consultas_usuario(self, client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = client.get(self.url)
+        assert response.status_code == status.HTTP_200_OK
+        return response, [q for q in contexto.captured_queries if 'FROM "usuario_usuario"' in q['sql']]
+
+    def test_usuario_se_consulta_una_vez_y_se_cachea(self, authenticated_client_participante):
+        """Test el usuario se carga con una sola consulta y las siguientes peticiones usan la caché."""
+        response, consultas = self.consultas_usuario(authenticated_client_participante)
+        assert len(consultas) == 1
+        assert response.data['perfil_participante'] is not None
+
+        _, consultas = self.consultas_usuario(authenticated_client_participante)
+        assert consultas == []
+
+    def test_cambio_de_rol_invalida_la_cache(self, authenticated_client_participante, usuario_participante):
+        """Test cambiar el rol del usuario se refleja en la siguiente petición."""
+        self.consultas_usuario(authenticated_client_participante)
+
+        usuario_participante.role = RoleUsuario.INVESTIGADOR
+        usuario_participante.save()
+        Investigador.objects.create(usuario=usuario_participante)
+
+        response, consultas = self.consultas_usuario(authenticated_client_participante)
+        assert len(consultas) == 1
+        assert response.data['role'] == RoleUsuario.INVESTIGADOR
+        assert response.data['perfil_investigador'] is not None
+
+    def test_usuario_desactivado_rechazado(self, authenticated_client_participante, usuario_participante):
+        """Test un usuario desactivado no puede autenticarse aunque estuviera cacheado (debe fallar)."""
+        self.consultas_usuario(authenticated_client_participante)
+
+        usuario_participante.is_active = False
+        usuario_participante.save()
+
+        response = authenticated_client_participante.get(self.url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_usuario_eliminado_rechazado(self, authenticated_client_participante, usuario_participante):
+        """Test el token de un usuario eliminado deja de ser válido (debe fallar)."""
+        self.consultas_usuario(authenticated_client_participante)
+
+        usuario_participante.delete()
+
+        response = authenticated_client_participante.get(self.url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_token_invalido(self, api_client):
+        """Test un token manipulado devuelve 401 (debe fallar)."""
+        api_client.credentials(HTTP_AUTHORIZATION='Bearer no.es.un.token')
+
+        response = api_client.get(self.url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()['error'] == 'Token inválido o expirado'
+
+
+@pytest.mark.django_db
+class TestDataSanitizationMiddleware:
+    """Tests para la sanitización de los datos de entrada."""
+
+    def test_sanitizar_texto(self):
+        """Test se escapa el HTML y se eliminan javascript: y los atributos de evento."""
+        from autenticacion.sanitizacion import sanitizar_texto
+
+        assert sanitizar_texto('Hola, ¿qué tal?') == 'Hola, ¿qué tal?'
+        assert sanitizar_texto('<script>alert(1)</script>') == '&lt;script&gt;alert(1)&lt;/script&gt;'
+        assert sanitizar_texto('JavaScript:alert(1)') == 'alert(1)'
+        assert sanitizar_texto('<img onerror = "x">') == '&lt;img  &quot;x&quot;&gt;'
+        assert sanitizar_texto("Tom & Jerry's") == 'Tom &amp; Jerry&#x27;s'
+
+    def test_sanitizar_sin_cambios_devuelve_el_mismo_objeto(self):
+        """Test si no hay nada que sanitizar no se copia ninguna estructura."""
+        from autenticacion.sanitizacion import sanitizar
+
+        datos = {'preguntas': [{'texto': '¿Cómo estás?', 'opciones': [1, 2, 3]}], 'activo': True}
+
+        assert sanitizar(datos) is datos
+
+    def test_sanitizar_copia_solo_lo_modificado(self):
+        """Test solo se copian los contenedores en el camino de un texto modificado."""
+        from autenticacion.sanitizacion import sanitizar
+
+        datos = {
+            'titulo': '<b>Pre</b>',
+            'preguntas': [{'texto': 'Uno'}, {'texto': 'Dos & tres'}],
+            'etiquetas': ['a', 'b']
+        }
+
+        resultado = sanitizar(datos)
+
+        assert resultado == {
+            'titulo': '&lt;b&gt;Pre&lt;/b&gt;',
+            'preguntas': [{'texto': 'Uno'}, {'texto': 'Dos &amp; tres'}],
+            'etiquetas': ['a', 'b']
+        }
+        assert datos['titulo'] == '<b>Pre</b>'
+        assert datos['preguntas'][1]['texto'] == 'Dos & tres'
+        assert resultado['etiquetas'] is datos['etiquetas']
+        assert resultado['preguntas'][0] is datos['preguntas'][0]
+        assert resultado['preguntas'][1] is not datos['preguntas'][1]
+
+    def test_sanitizar_campos_excluidos(self):
+        """Test los campos excluidos se dejan tal cual a cualquier profundidad."""
+        from autenticacion.sanitizacion import sanitizar
+
+        datos = {'url': 'https://a.com/?x=1&y=2', 'sesion': {'url': 'https://b.com/?z=<3>'}, 'nota': '<i>'}
+
+        resultado = sanitizar(datos, frozenset(['url']))
+
+        assert resultado['url'] == 'https://a.com/?x=1&y=2'
+        assert resultado['sesion'] is datos['sesion']
+        assert resultado['nota'] == '&lt;i&gt;'
+
+    def test_sanitizar_estructuras_muy_anidadas(self):
+        """Test el recorrido iterativo admite anidamientos que agotarían la recursión."""
+        from autenticacion.sanitizacion import sanitizar
+
+        datos = interior = []
+        for _ in range(5000):
+            siguiente = []
+            interior.append(siguiente)
+            interior = siguiente
+        interior.append('<b>')
+
+        resultado = sanitizar(datos)
+
+        for _ in range(5000):
+            resultado = resultado[0]
+        assert resultado == ['&lt;b&gt;']
+
+    def test_cuerpo_json_sanitizado_en_la_api(self, authenticated_client_participante, participante):
+        """Test los textos enviados a la API se guardan sanitizados."""
+        response = authenticated_client_participante.put(
+            reverse('update-profile'),
+            {'ocupacion': '<b onclick="x()">Docente</b>', 'telefono': '123456789'},
+            format='json'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        participante.usuario.refresh_from_db()
+        assert participante.usuario.ocupacion == '&lt;b &quot;x()&quot;&gt;Docente&lt;/b&gt;'
+        assert participante.usuario.telefono == '123456789'
+
+    def test_cuerpo_json_sin_cambios_no_se_recodifica(self):
+        """Test un cuerpo que no necesita sanitizarse se deja intacto."""
+        from django.test import RequestFactory
+        from autenticacion.middleware import DataSanitizationMiddleware
+
+        cuerpo = '{"nombre": "José",  "edad": 30}'.encode('utf-8')
+        request = RequestFactory().post('/api/x/', cuerpo, content_type='application/json')
+
+        DataSanitizationMiddleware(lambda r: None).process_view(request, lambda r: None, (), {})
+
+        assert request.body == cuerpo
+
+    def test_vista_excluida(self):
+        """Test @sin_sanitizar excluye la vista completa o solo los campos indicados."""
+        import json
+        from django.test import RequestFactory
+        from autenticacion.middleware import DataSanitizationMiddleware
+        from autenticacion.sanitizacion import sin_sanitizar
+
+        middleware = DataSanitizationMiddleware(lambda r: None)
+        cuerpo = {'url': 'https://a.com/?x=1&y=2', 'nota': '<i>'}
+
+        request = RequestFactory().post('/api/x/', cuerpo, content_type='application/json')
+        middleware.process_view(request, sin_sanitizar()(lambda r: None), (), {})
+        assert json.loads(request.body) == cuerpo
+
+        request = RequestFactory().post('/api/x/', cuerpo, content_type='application/json')
+        middleware.process_view(request, sin_sanitizar('url')(lambda r: None), (), {})
+        assert json.loads(request.body) == {'url': 'https://a.com/?x=1&y=2', 'nota': '&lt;i&gt;'}
+
+    def test_json_invalido(self, authenticated_client_participante):
+        """Test un cuerpo JSON mal formado devuelve 400 (debe fallar)."""
+        response = authenticated_client_participante.put(
+            reverse('update-profile'), '{"nombre": ', content_type='application/json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'error': 'Invalid JSON data'}
@@ -1,7 +1,9 @@
+import importlib
 import pytest
+from django.apps import apps
 from django.urls import reverse
 from rest_framework import status
-from cuestionario.models import Cuestionario, RespuestaCuestionario
+from cuestionario.models import Cuestionario, RespuestaCuestionario, RespuestaItem
 from programa.models import InscripcionPrograma, Programa
 from config.enums import MomentoCuestionario, TipoCuestionario, EstadoInscripcion, EstadoPublicacion
 
@@ -342,4 +344,58 @@ class TestCuestionarioParticipanteAPI:
                 response = api_client.post(url, {})
             else:
                 response = api_client.get(url)
-            assert response.status_code == status.HTTP_401_UNAUTHORIZED 
\ No newline at end of file
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED 
+
+
+@pytest.mark.django_db
+class TestRespuestasPorItem:
+    """Tests para la copia por ítem de las respuestas numéricas."""
+
+    def items(self, respuesta):
+        return list(RespuestaItem.objects.filter(respuesta=respuesta).order_by('item').values_list('item', 'valor'))
+
+    def test_likert_al_guardar(self, programa_borrador, participante):
+        """Test cada respuesta Likert genera una fila por ítem, también al modificarla."""
+        cuestionario = Cuestionario.objects.create(
+            programa=programa_borrador, momento=MomentoCuestionario.PRE, tipo_cuestionario='likert',
+            titulo='Likert', preguntas=[{'etiquetas': ['1', '2', '3', '4', '5'], 'textos': ['A', 'B', 'C']}]
+        )
+        respuesta = RespuestaCuestionario.objects.create(
+            cuestionario=cuestionario, participante=participante, respuestas=[4, 2, 5]
+        )
+        assert self.items(respuesta) == [(0, 4.0), (1, 2.0), (2, 5.0)]
+
+        respuesta.respuestas = [1, 1, 1]
+        respuesta.save()
+        assert self.items(respuesta) == [(0, 1.0), (1, 1.0), (2, 1.0)]
+
+    def test_solo_calificaciones_en_cuestionarios_regulares(self, programa_borrador, participante):
+        """Test de un cuestionario regular solo se copian las preguntas de calificación."""
+        cuestionario = Cuestionario.objects.create(
+            programa=programa_borrador, momento=MomentoCuestionario.PRE, titulo='Regular', preguntas=[
+                {'id': 7, 'tipo': 'texto', 'texto': '¿Cómo estás?'},
+                {'id': 9, 'tipo': 'calificacion', 'texto': 'Valora', 'estrellas': {'cantidad': 5}},
+            ]
+        )
+        respuesta = RespuestaCuestionario.objects.create(
+            cuestionario=cuestionario, participante=participante, respuestas={'7': 'Bien', '9': 4}
+        )
+
+        assert self.items(respuesta) == [(1, 4.0)]
+
+    def test_migracion_rellena_respuestas_existentes(self, programa_borrador, participante):
+        """Test la migración de relleno copia por lotes las respuestas sin ítems."""
+        cuestionario = Cuestionario.objects.create(
+            programa=programa_borrador, momento=MomentoCuestionario.POST, tipo_cuestionario='likert',
+            titulo='Likert', preguntas=[{'etiquetas': ['1', '2', '3', '4', '5'], 'textos': ['A', 'B']}]
+        )
+        respuesta = RespuestaCuestionario.objects.create(
+            cuestionario=cuestionario, participante=participante, respuestas=[3, 5]
+        )
+        RespuestaItem.objects.all().delete()
+
+        migracion = importlib.import_module('cuestionario.migrations.0006_rellenar_respuesta_item')
+        migracion.rellenar_items(apps, None)
+        migracion.rellenar_items(apps, None)
+
+        assert self.items(respuesta) == [(0, 3.0), (1, 5.0)]
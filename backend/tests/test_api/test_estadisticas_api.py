@@ -0,0 +1,421 @@
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from programa.models import Programa, InscripcionPrograma, ProgresoParticipante
+from programa.progreso import verificar_progreso
+from sesion.models import Sesion, DiarioSesion
+from cuestionario.models import Cuestionario, RespuestaCuestionario
+from config.enums import EstadoPublicacion, MomentoCuestionario
+from tests.test_settings import CACHES as TEST_CACHES
+
+
+def crear_programas_con_actividad(investigador, participante, cantidad):
+    """Crea `cantidad` programas con una sesión, un diario y respuestas pre/post."""
+    programas = Programa.objects.bulk_create([
+        Programa(
+            nombre=f'Programa {i}',
+            descripcion='Programa para estadísticas',
+            duracion_semanas=1,
+            creado_por=investigador,
+            estado_publicacion=EstadoPublicacion.BORRADOR
+        )
+        for i in range(cantidad)
+    ])
+    sesiones = Sesion.objects.bulk_create([
+        Sesion(programa=programa, titulo='Sesión 1', semana=1)
+        for programa in programas
+    ])
+    cuestionarios_pre = Cuestionario.objects.bulk_create([
+        Cuestionario(programa=programa, momento=MomentoCuestionario.PRE, titulo='Pre')
+        for programa in programas
+    ])
+    cuestionarios_post = Cuestionario.objects.bulk_create([
+        Cuestionario(programa=programa, momento=MomentoCuestionario.POST, titulo='Post')
+        for programa in programas
+    ])
+    for programa, pre, post in zip(programas, cuestionarios_pre, cuestionarios_post):
+        programa.cuestionario_pre = pre
+        programa.cuestionario_post = post
+    Programa.objects.bulk_update(programas, ['cuestionario_pre', 'cuestionario_post'])
+
+    InscripcionPrograma.objects.bulk_create([
+        InscripcionPrograma(programa=programa, participante=participante)
+        for programa in programas
+    ])
+    DiarioSesion.objects.bulk_create([
+        DiarioSesion(participante=participante, sesion=sesion, valoracion=4)
+        for sesion in sesiones
+    ])
+    RespuestaCuestionario.objects.bulk_create([
+        RespuestaCuestionario(cuestionario=cuestionario, participante=participante, respuestas={})
+        for cuestionario in cuestionarios_pre + cuestionarios_post
+    ])
+    return programas
+
+
+@pytest.mark.django_db
+class TestInvestigadorEstadisticasAPI:
+    """Tests para el endpoint de estadísticas del investigador."""
+
+    url = '/api/programas/estadisticas/'
+
+    def test_estadisticas_contadores(self, authenticated_client_investigador, investigador, participante):
+        """Test los contadores globales y por programa son correctos."""
+        crear_programas_con_actividad(investigador, participante, 3)
+
+        response = authenticated_client_investigador.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total_programas'] == 3
+        assert response.data['participantes_activos'] == 3
+        assert response.data['sesiones_completadas'] == 3
+        assert response.data['cuestionarios_respondidos'] == 6
+        assert len(response.data['programas_destacados']) == 3
+        for programa_stats in response.data['programas_stats']:
+            assert programa_stats['participantes'] == 1
+            assert programa_stats['sesiones_completadas'] == 1
+            assert programa_stats['respuestas_pre'] == 1
+            assert programa_stats['respuestas_post'] == 1
+            assert programa_stats['total_cuestionarios'] == 2
+
+    def test_estadisticas_programa_sin_actividad(self, authenticated_client_investigador, programa_borrador):
+        """Test un programa sin actividad devuelve contadores a cero."""
+        response = authenticated_client_investigador.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['programas_stats'][0]['participantes'] == 0
+        assert response.data['programas_stats'][0]['sesiones_completadas'] == 0
+        assert response.data['programas_stats'][0]['total_cuestionarios'] == 0
+
+    def test_estadisticas_forbidden_participante(self, authenticated_client_participante):
+        """Test obtener estadísticas como participante (debe fallar)."""
+        response = authenticated_client_participante.get(self.url)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_estadisticas_numero_consultas_constante(self, authenticated_client_investigador, investigador, participante):
+        """Test el número de consultas no crece con el número de programas (1 a 1000)."""
+        consultas_por_tamano = {}
+        creados = 0
+        # Primera petición para cachear el usuario autenticado
+        authenticated_client_investigador.get(self.url)
+        for tamano in (1, 10, 100, 1000):
+            crear_programas_con_actividad(investigador, participante, tamano - creados)
+            creados = tamano
+
+            with CaptureQueriesContext(connection) as contexto:
+                response = authenticated_client_investigador.get(self.url)
+
+            assert response.status_code == status.HTTP_200_OK
+            assert response.data['total_programas'] == tamano
+            consultas_por_tamano[tamano] = len(contexto.captured_queries)
+
+        assert len(set(consultas_por_tamano.values())) == 1, consultas_por_tamano
+
+
+@pytest.mark.django_db
+class TestProgresoParticipantes:
+    """Tests para la tabla materializada de progreso y su endpoint."""
+
+    @pytest.fixture
+    def programa_con_sesiones(self, programa_borrador, participante, cuestionario_pre, cuestionario_post):
+        programa_borrador.cuestionario_pre = cuestionario_pre
+        programa_borrador.cuestionario_post = cuestionario_post
+        programa_borrador.save()
+        for semana in range(1, 4):
+            Sesion.objects.create(
+                programa=programa_borrador,
+                titulo=f'Sesión {semana}',
+                semana=semana,
+                duracion_estimada=10 * semana
+            )
+        InscripcionPrograma.objects.create(programa=programa_borrador, participante=participante)
+        return programa_borrador
+
+    def test_progreso_se_actualiza_al_crear_diarios_y_respuestas(self, programa_con_sesiones, participante):
+        """Test crear diarios y respuestas actualiza el progreso incrementalmente."""
+        for sesion in programa_con_sesiones.sesiones.filter(semana__lte=2):
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+        respuesta = RespuestaCuestionario.objects.create(
+            cuestionario=programa_con_sesiones.cuestionario_pre,
+            participante=participante,
+            respuestas={'1': 'Bien'}
+        )
+
+        progreso = ProgresoParticipante.objects.get(programa=programa_con_sesiones, participante=participante)
+        assert progreso.sesiones_completadas == 2
+        assert progreso.minutos_practica == 30
+        assert progreso.cuestionarios_completados == 1
+        assert progreso.ultima_actividad == respuesta.fecha_respuesta
+        assert verificar_progreso(programa_con_sesiones) == []
+
+    def test_progreso_se_recalcula_al_eliminar_diario(self, programa_con_sesiones, participante, django_capture_on_commit_callbacks):
+        """Test eliminar un diario recalcula el progreso al confirmar."""
+        diarios = [
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+            for sesion in programa_con_sesiones.sesiones.all()
+        ]
+        with django_capture_on_commit_callbacks(execute=True):
+            diarios[-1].delete()
+
+        progreso = ProgresoParticipante.objects.get(programa=programa_con_sesiones, participante=participante)
+        assert progreso.sesiones_completadas == 2
+        assert progreso.minutos_practica == 30
+        assert progreso.ultima_actividad == diarios[1].fecha_creacion
+        assert verificar_progreso(programa_con_sesiones) == []
+
+    def test_borrado_masivo_recalcula_una_vez_por_participante(
+        self, programa_con_sesiones, participante, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        """Test borrar varios diarios a la vez recalcula el progreso una sola vez al confirmar."""
+        from programa import progreso
+
+        for sesion in programa_con_sesiones.sesiones.all():
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+        llamadas = []
+        original = progreso.recalcular_progreso
+        monkeypatch.setattr(progreso, 'recalcular_progreso', lambda *par: llamadas.append(par) or original(*par))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            DiarioSesion.objects.filter(participante=participante, sesion__semana__gte=2).delete()
+            assert llamadas == []
+
+        assert llamadas == [(programa_con_sesiones.id, participante.id)]
+        assert ProgresoParticipante.objects.get(participante=participante).sesiones_completadas == 1
+        assert verificar_progreso(programa_con_sesiones) == []
+
+    def test_recalculo_tras_deshacer_transaccion(
+        self, programa_con_sesiones, participante, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        """Test un borrado deshecho no deja la transacción siguiente sin su recálculo."""
+        from programa import progreso
+
+        diarios = [
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+            for sesion in programa_con_sesiones.sesiones.order_by('semana')
+        ]
+        llamadas = []
+        original = progreso.recalcular_progreso
+        monkeypatch.setattr(progreso, 'recalcular_progreso', lambda *par: llamadas.append(par) or original(*par))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with pytest.raises(ValueError), transaction.atomic():
+                diarios[0].delete()
+                raise ValueError
+            with transaction.atomic():
+                diarios[1].delete()
+                diarios[2].delete()
+
+        assert llamadas == [(programa_con_sesiones.id, participante.id)]
+        assert ProgresoParticipante.objects.get(participante=participante).sesiones_completadas == 1
+        assert verificar_progreso(programa_con_sesiones) == []
+
+    def test_borrar_programa_no_recalcula(self, programa_con_sesiones, participante, django_capture_on_commit_callbacks, monkeypatch):
+        """Test al borrar el programa entero se omiten los pares de programas que ya no existen."""
+        from programa import progreso
+
+        for sesion in programa_con_sesiones.sesiones.all():
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+        llamadas = []
+        monkeypatch.setattr(progreso, 'recalcular_progreso', lambda *par: llamadas.append(par))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            programa_con_sesiones.delete()
+
+        assert llamadas == []
+
+    def test_estadisticas_progreso_endpoint(self, authenticated_client_investigador, programa_con_sesiones, participante):
+        """Test el endpoint de progreso lee la tabla materializada."""
+        sesion = programa_con_sesiones.sesiones.get(semana=1)
+        DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=4)
+
+        url = f'/api/programas/{programa_con_sesiones.id}/estadisticas-progreso/'
+        response = authenticated_client_investigador.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        progreso = response.data['progreso_participantes'][f'P{participante.id}']
+        assert progreso['sesiones_completadas'] == 1
+        assert progreso['total_sesiones'] == 3
+        assert progreso['minutos_practica'] == 10
+        assert progreso['cuestionarios_completados'] == 0
+        assert progreso['ultima_actividad'] != 'N/A'
+
+    def test_estadisticas_progreso_sin_actividad(self, authenticated_client_investigador, programa_con_sesiones, participante):
+        """Test un participante inscrito sin actividad aparece con progreso vacío."""
+        url = f'/api/programas/{programa_con_sesiones.id}/estadisticas-progreso/'
+        response = authenticated_client_investigador.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        progreso = response.data['progreso_participantes'][f'P{participante.id}']
+        assert progreso['sesiones_completadas'] == 0
+        assert progreso['ultima_actividad'] == 'N/A'
+
+    def test_estadisticas_progreso_numero_consultas_constante(self, authenticated_client_investigador, programa_con_sesiones, participante):
+        """Test el número de consultas no depende del número de participantes."""
+        from tests.utils.helpers import create_test_user
+        from usuario.models import Participante
+
+        url = f'/api/programas/{programa_con_sesiones.id}/estadisticas-progreso/'
+        authenticated_client_investigador.get(url)
+        with CaptureQueriesContext(connection) as contexto_inicial:
+            authenticated_client_investigador.get(url)
+
+        for i in range(20):
+            usuario = create_test_user(username=f'cohorte_{i}', email=f'cohorte_{i}@test.com')
+            otro = Participante.objects.create(usuario=usuario)
+            InscripcionPrograma.objects.create(programa=programa_con_sesiones, participante=otro)
+            DiarioSesion.objects.create(
+                participante=otro,
+                sesion=programa_con_sesiones.sesiones.get(semana=1),
+                valoracion=5
+            )
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = authenticated_client_investigador.get(url)
+
+        assert len(response.data['progreso_participantes']) == 21
+        assert len(contexto.captured_queries) == len(contexto_inicial.captured_queries)
+
+    def test_comandos_reconstruir_y_verificar_progreso(self, programa_con_sesiones, participante):
+        """Test el verificador detecta discrepancias y la reconstrucción las corrige."""
+        sesion = programa_con_sesiones.sesiones.get(semana=2)
+        DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=4)
+        ProgresoParticipante.objects.update(sesiones_completadas=7)
+
+        with pytest.raises(CommandError):
+            call_command('verificar_progreso', stdout=StringIO())
+
+        salida = StringIO()
+        call_command('reconstruir_progreso', stdout=salida)
+        assert 'Progreso reconstruido: 1 filas' in salida.getvalue()
+
+        salida = StringIO()
+        call_command('verificar_progreso', stdout=salida)
+        assert 'consistente' in salida.getvalue()
+        progreso = ProgresoParticipante.objects.get(programa=programa_con_sesiones, participante=participante)
+        assert progreso.sesiones_completadas == 1
+        assert progreso.minutos_practica == 20
+
+
+@pytest.mark.django_db
+class TestAnalisisLikertAPI:
+    """Tests para el análisis de cuestionarios Likert pre/post."""
+
+    @pytest.fixture
+    def programa_likert(self, programa_borrador):
+        preguntas = [{'etiquetas': ['1', '2', '3', '4', '5'], 'textos': ['Calma', 'Atención']}]
+        pre = Cuestionario.objects.create(
+            programa=programa_borrador, momento=MomentoCuestionario.PRE,
+            tipo_cuestionario='likert', titulo='Pre', preguntas=preguntas
+        )
+        post = Cuestionario.objects.create(
+            programa=programa_borrador, momento=MomentoCuestionario.POST,
+            tipo_cuestionario='likert', titulo='Post', preguntas=preguntas
+        )
+        programa_borrador.cuestionario_pre = pre
+        programa_borrador.cuestionario_post = post
+        programa_borrador.save()
+        return programa_borrador
+
+    def responder(self, programa, respuestas_pre, respuestas_post):
+        from tests.utils.helpers import create_test_user
+        from usuario.models import Participante
+
+        participantes = {}
+        for nombre in list(respuestas_pre) + list(respuestas_post):
+            if nombre not in participantes:
+                usuario = create_test_user(username=f'likert_{nombre}', email=f'likert_{nombre}@test.com')
+                participantes[nombre] = Participante.objects.create(usuario=usuario)
+        for cuestionario, respuestas in ((programa.cuestionario_pre, respuestas_pre), (programa.cuestionario_post, respuestas_post)):
+            for nombre, valores in respuestas.items():
+                RespuestaCuestionario.objects.create(
+                    cuestionario=cuestionario, participante=participantes[nombre], respuestas=valores
+                )
+        return participantes
+
+    def url(self, programa):
+        return f'/api/programas/{programa.id}/analisis-likert/'
+
+    def test_analisis_pre_post(self, authenticated_client_investigador, programa_likert):
+        """Test estadísticas por ítem, totales y comparación pareada."""
+        participantes = self.responder(
+            programa_likert,
+            {'a': [2, 3], 'b': [1, 1], 'c': [3, 5]},
+            {'a': [4, 5], 'b': [2, 5], 'd': [5]}
+        )
+
+        response = authenticated_client_investigador.get(self.url(programa_likert))
+
+        assert response.status_code == status.HTTP_200_OK
+        pre = response.data['pre']
+        assert pre['n_participantes'] == 3
+        assert [(item['media'], item['desviacion']) for item in pre['items']] == [(2.0, 1.0), (3.0, 2.0)]
+        assert pre['total'] == {'media': 5.0, 'desviacion': 3.0, 'n': 3}
+        assert pre['totales'][f"P{participantes['c'].id}"] == 8.0
+
+        post = response.data['post']
+        assert post['items'][1]['n'] == 2
+        assert post['totales'][f"P{participantes['d'].id}"] is None
+
+        comparacion = response.data['comparacion']
+        assert comparacion['n_pares'] == 2
+        assert comparacion['items'][0]['media_diferencia'] == 1.5
+        assert comparacion['items'][1]['cohen_dz'] == pytest.approx(2.1213, abs=1e-4)
+        assert comparacion['total']['media_pre'] == 3.5
+        assert comparacion['total']['media_post'] == 8.0
+        assert comparacion['total']['media_diferencia'] == 4.5
+        assert comparacion['total']['cohen_dz'] == pytest.approx(6.364, abs=1e-3)
+        assert comparacion['total']['cohen_d_av'] == pytest.approx(2.5456, abs=1e-3)
+        assert comparacion['diferencias'] == {
+            f"P{participantes['a'].id}": 4.0,
+            f"P{participantes['b'].id}": 5.0
+        }
+
+    def test_analisis_sin_respuestas(self, authenticated_client_investigador, programa_likert):
+        """Test un cuestionario sin respuestas devuelve estadísticas vacías."""
+        response = authenticated_client_investigador.get(self.url(programa_likert))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['pre']['n_participantes'] == 0
+        assert response.data['pre']['items'][0]['media'] is None
+        assert response.data['comparacion']['n_pares'] == 0
+
+    @override_settings(CACHES={
+        **TEST_CACHES, 'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'analisis-likert'}
+    })
+    def test_analisis_cache_hasta_nuevas_respuestas(self, authenticated_client_investigador, programa_likert, monkeypatch):
+        """Test el análisis se sirve desde caché hasta que llega una respuesta nueva."""
+        from programa import analisis_likert
+
+        calculos = []
+        calcular = analisis_likert.calcular_analisis
+        monkeypatch.setattr(analisis_likert, 'calcular_analisis', lambda programa: calculos.append(programa.pk) or calcular(programa))
+        self.responder(programa_likert, {'a': [2, 3]}, {})
+
+        response = authenticated_client_investigador.get(self.url(programa_likert))
+        assert response.data['pre']['n_participantes'] == 1
+        assert len(calculos) == 1
+
+        # Acierto: la matriz de respuestas no se vuelve a cargar
+        with CaptureQueriesContext(connection) as contexto:
+            response = authenticated_client_investigador.get(self.url(programa_likert))
+        assert response.data['pre']['n_participantes'] == 1
+        assert len(calculos) == 1
+        assert not any('cuestionario_respuestaitem' in q['sql'] for q in contexto.captured_queries)
+
+        # Fallo: una respuesta nueva cambia la huella de la clave
+        self.responder(programa_likert, {'b': [4, 4]}, {})
+        response = authenticated_client_investigador.get(self.url(programa_likert))
+        assert response.data['pre']['n_participantes'] == 2
+        assert len(calculos) == 2
+
+    def test_analisis_forbidden_participante(self, authenticated_client_participante, programa_likert):
+        """Test obtener el análisis como participante (debe fallar)."""
+        response = authenticated_client_participante.get(self.url(programa_likert))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,431 @@
+import csv
+import io
+import json
+import zipfile
+import os
+import time
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from programa import trabajos_exportacion
+from programa.api import exportacion
+from programa.models import InscripcionPrograma, TrabajoExportacion
+from sesion.models import Sesion, DiarioSesion
+from cuestionario.models import Cuestionario, RespuestaCuestionario
+from usuario.models import Participante
+from config.enums import MomentoCuestionario, EstadoTrabajoExportacion
+from tests.utils.helpers import create_test_user
+
+
+def contenido_respuesta(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+@pytest.fixture
+def programa_con_datos(programa_borrador, participante):
+    sesiones = [
+        Sesion.objects.create(
+            programa=programa_borrador,
+            titulo=f'Sesión {semana}',
+            semana=semana,
+            duracion_estimada=15
+        )
+        for semana in range(1, 3)
+    ]
+    InscripcionPrograma.objects.create(programa=programa_borrador, participante=participante)
+    for sesion in sesiones:
+        DiarioSesion.objects.create(
+            participante=participante,
+            sesion=sesion,
+            valoracion=4,
+            comentario='Me ha gustado, "mucho"'
+        )
+
+    cuestionario_pre = Cuestionario.objects.create(
+        programa=programa_borrador,
+        momento=MomentoCuestionario.PRE,
+        tipo_cuestionario='personalizado',
+        titulo='Pre',
+        preguntas=[{'id': 1, 'tipo': 'texto', 'texto': '¿Cómo estás?'}]
+    )
+    cuestionario_post = Cuestionario.objects.create(
+        programa=programa_borrador,
+        momento=MomentoCuestionario.POST,
+        tipo_cuestionario='likert',
+        titulo='Post',
+        preguntas=[{'etiquetas': ['1', '2', '3', '4', '5'], 'textos': ['Ítem 1', 'Ítem 2']}]
+    )
+    programa_borrador.cuestionario_pre = cuestionario_pre
+    programa_borrador.cuestionario_post = cuestionario_post
+    programa_borrador.save()
+    RespuestaCuestionario.objects.create(cuestionario=cuestionario_pre, participante=participante, respuestas={'1': 'Bien'})
+    RespuestaCuestionario.objects.create(cuestionario=cuestionario_post, participante=participante, respuestas=[4, 5])
+    return programa_borrador
+
+
+@pytest.mark.django_db
+class TestExportacionAPI:
+    """Tests para la exportación de datos de un programa."""
+
+    def url(self, programa, tipo, formato):
+        return f'/api/programas/{programa.id}/exportar/?tipo={tipo}&formato={formato}'
+
+    def test_exportar_diarios_csv_streaming(self, authenticated_client_investigador, programa_con_datos, participante):
+        """Test exportar diarios en CSV se envía como respuesta streaming."""
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'diarios', 'csv'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        contenido = contenido_respuesta(response).decode('utf-8-sig')
+        filas = list(csv.reader(io.StringIO(contenido)))
+        assert filas[0][0] == 'Semana'
+        assert len(filas) == 3
+        assert filas[1][3] == f'P{participante.id}'
+        assert filas[1][5] == 'Me ha gustado, "mucho"'
+
+    def test_exportar_participantes_json_streaming(self, authenticated_client_investigador, programa_con_datos, participante):
+        """Test exportar participantes en JSON produce un documento válido."""
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'participantes', 'json'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        datos = json.loads(contenido_respuesta(response))
+        assert datos[0]['id_participante'] == f'P{participante.id}'
+        assert datos[0]['sesiones_completadas'] == '2 / 2'
+        assert datos[0]['minutos_practica'] == '30 min'
+
+    def test_exportar_participantes_numero_consultas_constante(
+        self, authenticated_client_investigador, programa_con_datos
+    ):
+        """Test exportar participantes no hace consultas por participante."""
+        url = self.url(programa_con_datos, 'participantes', 'csv')
+        # Primera petición para cachear el usuario autenticado
+        contenido_respuesta(authenticated_client_investigador.get(url))
+        with CaptureQueriesContext(connection) as contexto_inicial:
+            contenido_respuesta(authenticated_client_investigador.get(url))
+
+        sesion = programa_con_datos.sesiones.first()
+        for i in range(10):
+            usuario = create_test_user(username=f'exportado_{i}', email=f'exportado_{i}@test.com')
+            otro = Participante.objects.create(usuario=usuario)
+            InscripcionPrograma.objects.create(programa=programa_con_datos, participante=otro)
+            DiarioSesion.objects.create(participante=otro, sesion=sesion, valoracion=3)
+            RespuestaCuestionario.objects.create(
+                cuestionario=programa_con_datos.cuestionario_pre,
+                participante=otro,
+                respuestas={'1': 'Bien'}
+            )
+
+        with CaptureQueriesContext(connection) as contexto:
+            contenido = contenido_respuesta(authenticated_client_investigador.get(url)).decode('utf-8-sig')
+
+        filas = list(csv.reader(io.StringIO(contenido)))
+        assert len(filas) == 12
+        assert all(fila[9] == '1 / 2' and fila[10] == '1 / 2' for fila in filas[1:11])
+        assert len(contexto.captured_queries) == len(contexto_inicial.captured_queries)
+
+    def test_exportar_participantes_excel(self, authenticated_client_investigador, programa_con_datos):
+        """Test exportar participantes en Excel devuelve un archivo xlsx."""
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'participantes', 'excel'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('application/vnd.openxmlformats')
+        assert contenido_respuesta(response)[:2] == b'PK'
+
+    @pytest.mark.parametrize('formato', ['csv', 'json', 'excel'])
+    def test_exportar_todos_zip_streaming(self, authenticated_client_investigador, programa_con_datos, formato):
+        """Test exportar todos los datos genera un ZIP válido por partes."""
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'todos', formato))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        zip_file = zipfile.ZipFile(io.BytesIO(contenido_respuesta(response)))
+        assert zip_file.testzip() is None
+        nombres = zip_file.namelist()
+        assert len(nombres) == 4
+        assert nombres[0].startswith('participantes_programa_')
+        assert nombres[1].startswith('diarios_programa_')
+
+    def test_exportar_cuestionarios_json(self, authenticated_client_investigador, programa_con_datos, participante):
+        """Test exportar cuestionarios en JSON mantiene el formato Likert y regular."""
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'cuestionarios', 'json'))
+
+        assert response.status_code == status.HTTP_200_OK
+        zip_file = zipfile.ZipFile(io.BytesIO(contenido_respuesta(response)))
+        pre, post = [json.loads(zip_file.read(nombre)) for nombre in zip_file.namelist()]
+        assert pre['tipo'] == 'regular'
+        assert pre['datos'] == [{'ID Participante': f'P{participante.id}', '¿Cómo estás?': 'Bien'}]
+        assert post['tipo'] == 'likert'
+        assert post['respuestas'] == {f'P{participante.id}': [4, 5]}
+
+    def test_exportar_parquet_conserva_tipos(self, authenticated_client_investigador, programa_con_datos, participante):
+        """Test las exportaciones Parquet mantienen los tipos de las columnas al leerlas."""
+        pa = pytest.importorskip('pyarrow')
+        pq = pytest.importorskip('pyarrow.parquet')
+        pd = pytest.importorskip('pandas')
+
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'diarios', 'parquet'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/vnd.apache.parquet'
+        diarios = pd.read_parquet(io.BytesIO(contenido_respuesta(response)))
+        assert len(diarios) == 2
+        assert diarios['semana'].dtype == 'int16'
+        assert diarios['valoracion'].tolist() == [4.0, 4.0]
+        assert str(diarios['fecha'].dtype) == 'datetime64[us, UTC]'
+        assert diarios['fecha'].iloc[0] == pd.Timestamp(DiarioSesion.objects.order_by('fecha_creacion').first().fecha_creacion)
+        assert diarios['comentario'].iloc[0] == 'Me ha gustado, "mucho"'
+
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'participantes', 'parquet'))
+        tabla = pq.read_table(io.BytesIO(contenido_respuesta(response)))
+        assert tabla.schema.field('sesiones_completadas').type == pa.int32()
+        assert tabla.schema.field('ultima_actividad').type == pa.timestamp('us', tz='UTC')
+        fila = tabla.to_pylist()[0]
+        assert fila['id_participante'] == f'P{participante.id}'
+        assert fila['sesiones_completadas'] == 2
+        assert fila['minutos_practica'] == 30
+        assert fila['cuestionarios_completados'] == 2
+        assert fila['ocupacion'] is None
+
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'cuestionarios', 'parquet'))
+        with zipfile.ZipFile(io.BytesIO(contenido_respuesta(response))) as zip_file:
+            nombre_post = next(nombre for nombre in zip_file.namelist() if nombre.startswith('cuestionario_post'))
+            tabla = pq.read_table(io.BytesIO(zip_file.read(nombre_post)))
+        likert = tabla.to_pandas()
+        assert likert['item_1'].dtype == 'int8'
+        assert likert[['item_1', 'item_2']].values.tolist() == [[4, 5]]
+        assert json.loads(tabla.schema.metadata[b'textos']) == {'item_1': 'Ítem 1', 'item_2': 'Ítem 2'}
+
+    def test_exportar_diarios_sin_datos(self, authenticated_client_investigador, programa_borrador):
+        """Test exportar diarios de un programa sin diarios (debe fallar)."""
+        response = authenticated_client_investigador.get(self.url(programa_borrador, 'diarios', 'csv'))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_exportar_formato_invalido(self, authenticated_client_investigador, programa_borrador):
+        """Test exportar con un formato no soportado (debe fallar)."""
+        response = authenticated_client_investigador.get(self.url(programa_borrador, 'todos', 'pdf'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_exportar_parquet_sin_pyarrow(self, authenticated_client_investigador, programa_con_datos, monkeypatch):
+        """Test exportar en Parquet sin pyarrow instalado (debe fallar)."""
+        monkeypatch.setattr(exportacion, 'parquet_disponible', lambda: False)
+
+        response = authenticated_client_investigador.get(self.url(programa_con_datos, 'diarios', 'parquet'))
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_exportar_forbidden_participante(self, authenticated_client_participante, programa_borrador):
+        """Test exportar como participante (debe fallar)."""
+        response = authenticated_client_participante.get(self.url(programa_borrador, 'todos', 'csv'))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestTrabajosExportacionAPI:
+    """Tests para las exportaciones en segundo plano."""
+
+    def url(self, programa):
+        return f'/api/programas/{programa.id}/exportaciones/'
+
+    def solicitar(self, client, programa, tipo, formato):
+        return client.post(self.url(programa), {'tipo': tipo, 'formato': formato}, format='json')
+
+    def test_crear_y_descargar_exportacion(self, authenticated_client_investigador, programa_con_datos):
+        """Test el archivo generado por el trabajo es igual a la exportación directa."""
+        response = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['estado'] == EstadoTrabajoExportacion.COMPLETADO
+        assert response.data['progreso'] == 100
+
+        detalle = authenticated_client_investigador.get(f"/api/programas/exportaciones/{response.data['id']}/")
+        assert detalle.status_code == status.HTTP_200_OK
+        assert detalle.data['url_descarga'] == response.data['url_descarga']
+
+        descarga = authenticated_client_investigador.get(response.data['url_descarga'])
+        directa = authenticated_client_investigador.get(
+            f'/api/programas/{programa_con_datos.id}/exportar/?tipo=diarios&formato=csv'
+        )
+        assert descarga.status_code == status.HTTP_200_OK
+        assert response.data['nombre_archivo'] in descarga['Content-Disposition']
+        assert contenido_respuesta(descarga) == contenido_respuesta(directa)
+
+    def test_exportacion_zip(self, authenticated_client_investigador, programa_con_datos):
+        """Test exportar todos los datos genera un ZIP con todos los archivos."""
+        response = self.solicitar(authenticated_client_investigador, programa_con_datos, 'todos', 'json')
+        descarga = authenticated_client_investigador.get(response.data['url_descarga'])
+
+        assert descarga['Content-Type'] == 'application/zip'
+        with zipfile.ZipFile(io.BytesIO(contenido_respuesta(descarga))) as zip_file:
+            assert len(zip_file.namelist()) == 4
+
+    def test_reutiliza_exportacion_sin_cambios(
+        self, authenticated_client_investigador, programa_con_datos, participante, django_capture_on_commit_callbacks
+    ):
+        """Test se reutiliza el archivo mientras los datos no cambien."""
+        primera = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+        segunda = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+        otro_formato = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'json')
+
+        assert segunda.data['id'] == primera.data['id']
+        assert otro_formato.data['id'] != primera.data['id']
+
+        sesion = programa_con_datos.sesiones.first()
+        with django_capture_on_commit_callbacks(execute=True):
+            DiarioSesion.objects.filter(sesion=sesion).first().delete()
+        tras_cambio = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+
+        assert tras_cambio.data['id'] != primera.data['id']
+        assert TrabajoExportacion.objects.count() == 3
+
+    def test_diario_modificado_no_reutiliza_exportacion(self, authenticated_client_investigador, programa_con_datos):
+        """Test editar un diario cambia la huella de los datos aunque no cambie el número de diarios."""
+        primera = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+
+        diario = DiarioSesion.objects.filter(programa=programa_con_datos).first()
+        diario.comentario = 'Comentario corregido'
+        diario.save()
+        segunda = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+
+        assert segunda.data['id'] != primera.data['id']
+        descarga = authenticated_client_investigador.get(segunda.data['url_descarga'])
+        assert 'Comentario corregido' in contenido_respuesta(descarga).decode('utf-8')
+
+    def test_exportacion_asincrona_se_encola_al_confirmar(
+        self, authenticated_client_investigador, programa_con_datos, settings, monkeypatch,
+        django_capture_on_commit_callbacks
+    ):
+        """Test en modo asíncrono el trabajo queda pendiente y se envía al pool al confirmar."""
+        settings.EXPORTACION_ASINCRONA = True
+        enviados = []
+
+        class ExecutorFalso:
+            def submit(self, funcion, *args):
+                enviados.append(args)
+
+        monkeypatch.setattr(trabajos_exportacion, '_obtener_executor', lambda: ExecutorFalso())
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.solicitar(authenticated_client_investigador, programa_con_datos, 'participantes', 'csv')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['estado'] == EstadoTrabajoExportacion.PENDIENTE
+        assert response.data['url_descarga'] is None
+        assert enviados == [(response.data['id'],)]
+
+        descarga = authenticated_client_investigador.get(f"/api/programas/exportaciones/{response.data['id']}/descargar/")
+        assert descarga.status_code == status.HTTP_409_CONFLICT
+
+        trabajos_exportacion.ejecutar_trabajo(response.data['id'])
+        detalle = authenticated_client_investigador.get(f"/api/programas/exportaciones/{response.data['id']}/")
+        assert detalle.data['estado'] == EstadoTrabajoExportacion.COMPLETADO
+
+    def test_error_en_generacion_no_deja_archivo_parcial(
+        self, authenticated_client_investigador, programa_con_datos, settings, monkeypatch, tmp_path
+    ):
+        """Test si la generación falla, el trabajo queda en error y se borra el archivo a medias."""
+        def contenido_con_error(trabajo, fecha):
+            yield b'fecha,participante\n'
+            raise RuntimeError('fallo al generar')
+
+        settings.EXPORTACIONES_ROOT = str(tmp_path)
+        monkeypatch.setattr(trabajos_exportacion, '_contenido_trabajo', contenido_con_error)
+        self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+
+        trabajo = TrabajoExportacion.objects.get()
+        directorio = os.path.join(settings.EXPORTACIONES_ROOT, f'programa_{programa_con_datos.id}')
+        assert trabajo.estado == EstadoTrabajoExportacion.ERROR
+        assert trabajo.error == 'fallo al generar'
+        assert os.listdir(directorio) == []
+
+    def test_archivo_eliminado_no_se_reutiliza(self, authenticated_client_investigador, programa_con_datos):
+        """Test si el archivo se borró del disco, la descarga falla y se genera de nuevo."""
+        response = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+        trabajo = TrabajoExportacion.objects.get(pk=response.data['id'])
+        os.remove(trabajos_exportacion.ruta_archivo(trabajo))
+
+        descarga = authenticated_client_investigador.get(response.data['url_descarga'])
+        nueva = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+
+        assert descarga.status_code == status.HTTP_410_GONE
+        assert nueva.data['id'] != response.data['id']
+
+    def test_archivo_fuera_de_media(self, authenticated_client_investigador, programa_con_datos, settings, tmp_path):
+        """Test el archivo se guarda fuera de MEDIA_ROOT y solo se descarga con la vista autenticada."""
+        settings.EXPORTACIONES_ROOT = str(tmp_path / 'exportaciones')
+        response = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+        ruta = trabajos_exportacion.ruta_archivo(TrabajoExportacion.objects.get(pk=response.data['id']))
+
+        assert ruta.startswith(settings.EXPORTACIONES_ROOT)
+        assert not ruta.startswith(os.path.abspath(settings.MEDIA_ROOT))
+        assert os.path.exists(ruta)
+        assert response.data['url_descarga'].endswith(f"/exportaciones/{response.data['id']}/descargar/")
+
+    def test_borrar_programa_borra_archivos(
+        self, authenticated_client_investigador, programa_con_datos, settings, tmp_path, django_capture_on_commit_callbacks
+    ):
+        """Test al borrar el programa se borran en cascada sus trabajos y sus archivos."""
+        settings.EXPORTACIONES_ROOT = str(tmp_path)
+        response = self.solicitar(authenticated_client_investigador, programa_con_datos, 'participantes', 'json')
+        ruta = trabajos_exportacion.ruta_archivo(TrabajoExportacion.objects.get(pk=response.data['id']))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            programa_con_datos.delete()
+
+        assert not TrabajoExportacion.objects.exists()
+        assert not os.path.exists(ruta)
+
+    def test_limpiar_exportaciones(
+        self, authenticated_client_investigador, programa_con_datos, settings, tmp_path, django_capture_on_commit_callbacks
+    ):
+        """Test el comando borra los trabajos caducados y sustituidos y los archivos sin trabajo."""
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        settings.EXPORTACIONES_ROOT = str(tmp_path)
+        caducado = self.solicitar(authenticated_client_investigador, programa_con_datos, 'cuestionarios', 'csv')
+        TrabajoExportacion.objects.filter(pk=caducado.data['id']).update(
+            fecha_creacion=timezone.now() - timedelta(hours=settings.EXPORTACION_CACHE_HORAS + 1)
+        )
+        sustituido = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+        DiarioSesion.objects.filter(programa=programa_con_datos).first().delete()
+        actual = self.solicitar(authenticated_client_investigador, programa_con_datos, 'diarios', 'csv')
+        archivos = {
+            respuesta.data['id']: trabajos_exportacion.ruta_archivo(TrabajoExportacion.objects.get(pk=respuesta.data['id']))
+            for respuesta in (caducado, sustituido, actual)
+        }
+        huerfano = tmp_path / 'programa_0' / '99_perdido.csv.parcial'
+        huerfano.parent.mkdir()
+        huerfano.write_text('a medias')
+        antiguo = time.time() - trabajos_exportacion.TIEMPO_MAXIMO_TRABAJO.total_seconds() - 60
+        os.utime(huerfano, (antiguo, antiguo))
+
+        salida = StringIO()
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('limpiar_exportaciones', stdout=salida)
+
+        assert list(TrabajoExportacion.objects.values_list('pk', flat=True)) == [actual.data['id']]
+        assert [os.path.exists(ruta) for ruta in archivos.values()] == [False, False, True]
+        assert not huerfano.exists()
+        assert '2 trabajos de exportación y 1 archivos sin trabajo borrados' in salida.getvalue()
+
+    def test_crear_exportacion_sin_datos(self, authenticated_client_investigador, programa_borrador):
+        """Test solicitar una exportación sin datos (debe fallar)."""
+        response = self.solicitar(authenticated_client_investigador, programa_borrador, 'diarios', 'csv')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not TrabajoExportacion.objects.exists()
+
+    def test_exportacion_forbidden_participante(self, authenticated_client_participante, programa_borrador):
+        """Test solicitar una exportación como participante (debe fallar)."""
+        response = self.solicitar(authenticated_client_participante, programa_borrador, 'todos', 'csv')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
@@ -0,0 +1,167 @@
+"""
+Tests de los planes de ejecución de las consultas más frecuentes.
+
+Las consultas reales de cada operación se capturan con execute_wrapper y se
+vuelven a lanzar con EXPLAIN (EXPLAIN QUERY PLAN en SQLite). Se comprueba que
+las tablas grandes se leen por índice y no con un recorrido completo. Los
+planes se interpretan tanto en SQLite (la base de datos de los tests) como en
+PostgreSQL; en PostgreSQL se desactiva el recorrido secuencial para que el
+planificador no lo prefiera con las tablas casi vacías de los tests.
+"""
+import re
+import pytest
+from django.db import connection
+from rest_framework import status
+from programa.models import Programa, InscripcionPrograma
+from programa.progreso import calcular_progreso_esperado
+from sesion.models import Sesion, DiarioSesion
+from cuestionario.models import Cuestionario, RespuestaCuestionario
+from config.enums import EstadoInscripcion, EstadoPublicacion, MomentoCuestionario
+
+# Tablas que crecen con el número de participantes
+TABLAS_GRANDES = {
+    InscripcionPrograma._meta.db_table,
+    DiarioSesion._meta.db_table,
+    RespuestaCuestionario._meta.db_table,
+}
+
+_INDICE = {
+    'sqlite': re.compile(r'USING (?:COVERING )?INDEX (\w+)'),
+    'postgresql': re.compile(r'(?:Index (?:Only )?Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)'),
+}
+_RECORRIDO_COMPLETO = {
+    'sqlite': re.compile(r'\bSCAN (\w+)(?! USING)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+def plan(sql, params):
+    """Plan de ejecución de una consulta como texto (una línea por nodo)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return '\n'.join(str(fila[-1]) for fila in cursor.fetchall())
+
+
+def planes_de(funcion):
+    """Ejecuta `funcion` y devuelve [(sql, plan)] de cada SELECT que lanza"""
+    consultas = []
+
+    def capturar(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            consultas.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capturar):
+        funcion()
+    return [(sql, plan(sql, params)) for sql, params in consultas]
+
+
+def indices_usados(planes):
+    return {indice for _, texto in planes for indice in _INDICE[connection.vendor].findall(texto)}
+
+
+def recorridos_completos(planes):
+    """{tabla grande: sql} de las consultas que la recorren entera"""
+    return {
+        tabla: sql
+        for sql, texto in planes
+        for tabla in _RECORRIDO_COMPLETO[connection.vendor].findall(texto)
+        if tabla in TABLAS_GRANDES
+    }
+
+
+@pytest.fixture
+def programa_con_actividad(programa_borrador, participante):
+    """Programa publicado con dos sesiones, cuestionario pre, un diario y una respuesta"""
+    Programa.objects.filter(pk=programa_borrador.pk).update(estado_publicacion=EstadoPublicacion.PUBLICADO)
+    sesiones = [
+        Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=10)
+        for semana in (1, 2)
+    ]
+    cuestionario = Cuestionario.objects.create(
+        programa=programa_borrador,
+        momento=MomentoCuestionario.PRE,
+        tipo_cuestionario='personalizado',
+        titulo='Pre',
+        preguntas=[{'id': 1, 'tipo': 'texto', 'texto': '¿Cómo estás?'}]
+    )
+    Programa.objects.filter(pk=programa_borrador.pk).update(cuestionario_pre=cuestionario)
+    InscripcionPrograma.objects.create(
+        programa=programa_borrador, participante=participante, estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+    )
+    DiarioSesion.objects.create(participante=participante, sesion=sesiones[0], valoracion=4)
+    RespuestaCuestionario.objects.create(cuestionario=cuestionario, participante=participante, respuestas={'1': 'Bien'})
+    programa_borrador.refresh_from_db()
+    return programa_borrador
+
+
+@pytest.mark.django_db
+class TestIndicesConsultas:
+    """Tests de los índices usados por las consultas frecuentes."""
+
+    def test_progreso_agregado_usa_indices_de_cobertura(self, programa_con_actividad):
+        """Los agregados de progreso leen diarios y respuestas por sus índices compuestos."""
+        planes = planes_de(lambda: calcular_progreso_esperado(programa_con_actividad))
+
+        assert {'diario_programa_part_idx', 'respuesta_cuest_part_idx'} <= indices_usados(planes)
+        assert recorridos_completos(planes) == {}
+
+    def test_estadisticas_sin_recorridos_completos(self, authenticated_client_investigador, programa_con_actividad):
+        """Las estadísticas de un programa no recorren enteras las tablas de actividad."""
+        url = f'/api/programas/{programa_con_actividad.id}/estadisticas/'
+        respuestas = []
+        planes = planes_de(lambda: respuestas.append(authenticated_client_investigador.get(url)))
+
+        assert respuestas[0].status_code == status.HTTP_200_OK
+        assert recorridos_completos(planes) == {}
+
+    def test_inscripcion_activa_usa_indice(self, participante, programa_con_actividad):
+        """La inscripción en progreso del participante se busca por índice."""
+        planes = planes_de(lambda: InscripcionPrograma.objects.filter(
+            participante=participante,
+            estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        ).first())
+
+        assert indices_usados(planes) & {'inscripcion_part_estado_idx', 'inscripcion_en_progreso_idx'}
+        assert recorridos_completos(planes) == {}
+
+    def test_disponibilidad_sesion_usa_indices(self, participante, programa_con_actividad):
+        """La comprobación de disponibilidad de una sesión no recorre tablas completas."""
+        sesion = programa_con_actividad.sesiones.get(semana=2)
+        planes = planes_de(lambda: sesion.esta_disponible_para(participante))
+
+        assert planes
+        assert recorridos_completos(planes) == {}
+
+    def test_sesiones_disponibles_participante_sin_recorridos_completos(
+        self, authenticated_client_participante, programa_con_actividad
+    ):
+        """El listado de sesiones disponibles del participante usa índices."""
+        url = f'/api/sesiones/?programa={programa_con_actividad.id}'
+        planes = planes_de(lambda: authenticated_client_participante.get(url))
+
+        assert recorridos_completos(planes) == {}
+
+    def test_diarios_de_sesion_ordenados_usan_indice(self, programa_con_actividad):
+        """Los diarios de una sesión en orden de creación salen del índice sin ordenar aparte."""
+        sesion = programa_con_actividad.sesiones.get(semana=1)
+        planes = planes_de(lambda: list(DiarioSesion.objects.filter(sesion=sesion).order_by('fecha_creacion', 'id')))
+
+        assert 'diario_sesion_fecha_idx' in indices_usados(planes)
+        if connection.vendor == 'sqlite':
+            assert 'TEMP B-TREE' not in planes[0][1]
+
+    @pytest.mark.parametrize('filtro, indice', [
+        ('creado_por', 'programa_creador_fecha_idx'),
+        ('estado_publicacion', 'programa_estado_fecha_idx'),
+    ])
+    def test_listados_programas_usan_indice(self, programa_con_actividad, filtro, indice):
+        """Los listados de programas por creador y por estado usan sus índices compuestos."""
+        valor = getattr(programa_con_actividad, filtro)
+        planes = planes_de(lambda: list(
+            Programa.objects.filter(**{filtro: valor}).order_by('-fecha_creacion', '-id')
+        ))
+
+        assert indice in indices_usados(planes)
@@ -0,0 +1,185 @@
+import pytest
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from programa.models import Programa, InscripcionPrograma
+from sesion.models import Sesion, DiarioSesion
+from cuestionario.models import Cuestionario, RespuestaCuestionario
+from usuario.models import Participante
+from config.enums import RoleUsuario, EstadoPublicacion, MomentoCuestionario
+from config.consultas_sql import RegistroConsultas, huella_consulta
+from tests.utils.helpers import create_test_user
+
+# Número de participantes adicionales con los que se mide cada endpoint
+TAMANOS = [1, 5, 20]
+
+# (rol, url, consultas máximas). El presupuesto no depende del tamaño: un
+# endpoint que necesita más consultas con más participantes tiene un N+1.
+PRESUPUESTOS = [
+    ('investigador', '/api/programas/', 7),
+    ('investigador', '/api/programas/?page_size=10', 2),
+    ('investigador', '/api/programas/{programa}/', 7),
+    ('investigador', '/api/programas/{programa}/inscripciones/', 4),
+    ('investigador', '/api/programas/{programa}/participantes/', 5),
+    ('investigador', '/api/programas/estadisticas/', 2),
+    ('investigador', '/api/programas/{programa}/estadisticas/', 11),
+    ('investigador', '/api/programas/{programa}/estadisticas-progreso/', 6),
+    ('investigador', '/api/programas/{programa}/cuestionarios/', 3),
+    ('investigador', '/api/programas/{programa}/cuestionarios-y-respuestas/', 7),
+    ('investigador', '/api/programas/{programa}/analisis-likert/', 6),
+    ('investigador', '/api/programas/{programa}/diarios-sesion/', 7),
+    ('investigador', '/api/sesiones/?programa={programa}', 7),
+    ('investigador', '/api/sesiones/{sesion}/', 2),
+    ('investigador', '/api/cuestionario/{cuestionario}/', 2),
+    ('participante', '/api/programas/', 8),
+    ('participante', '/api/programas/?page_size=10', 3),
+    ('participante', '/api/programas/mi-programa/', 15),
+    ('participante', '/api/programas/mis-completados/', 2),
+    ('participante', '/api/sesiones/?programa={programa}', 6),
+    ('participante', '/api/sesiones/diario/', 14),
+    ('participante', '/api/sesiones/diario/?page_size=10', 2),
+    ('participante', '/api/sesiones/{sesion}/diario_info/', 7),
+    ('participante', '/api/cuestionario/pre/', 4),
+    ('participante', '/api/cuestionario/post/', 4),
+]
+
+# Endpoints con un N+1 conocido: se espera que superen el presupuesto con más
+# de un participante. Al corregirlos el xfail estricto falla y hay que quitarlos de aquí.
+N_MAS_1_CONOCIDOS = {}
+
+
+def casos_presupuesto():
+    for rol, url, maximo in PRESUPUESTOS:
+        for n in TAMANOS:
+            marcas = []
+            if url in N_MAS_1_CONOCIDOS and n > 1:
+                marcas.append(pytest.mark.xfail(reason=N_MAS_1_CONOCIDOS[url], strict=True))
+            yield pytest.param(rol, url, maximo, n, marks=marcas, id=f'{rol}-{url}-{n}')
+
+
+@pytest.fixture
+def crear_programa_con_participantes(programa_borrador, participante):
+    """
+    Devuelve una función que publica el programa de pruebas con tres sesiones,
+    cuestionarios pre y post y `n` participantes además del de conftest, cada
+    uno con sus diarios. Los `n` adicionales responden además al cuestionario
+    pre; el de conftest no, para que /api/cuestionario/pre/ se lo devuelva.
+    """
+    def crear(n):
+        sesiones = [
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=10)
+            for semana in range(1, 4)
+        ]
+        cuestionario_pre = Cuestionario.objects.create(
+            programa=programa_borrador,
+            momento=MomentoCuestionario.PRE,
+            tipo_cuestionario='personalizado',
+            titulo='Pre',
+            preguntas=[{'id': 1, 'tipo': 'texto', 'texto': '¿Cómo estás?'}]
+        )
+        cuestionario_post = Cuestionario.objects.create(
+            programa=programa_borrador,
+            momento=MomentoCuestionario.POST,
+            tipo_cuestionario='likert',
+            titulo='Post',
+            preguntas=[{'etiquetas': ['1', '2', '3', '4', '5'], 'textos': ['Ítem 1', 'Ítem 2']}]
+        )
+        Programa.objects.filter(pk=programa_borrador.pk).update(
+            cuestionario_pre=cuestionario_pre,
+            cuestionario_post=cuestionario_post,
+            estado_publicacion=EstadoPublicacion.PUBLICADO
+        )
+
+        participantes = [participante] + [
+            Participante.objects.create(
+                usuario=create_test_user(RoleUsuario.PARTICIPANTE, f'participante_{i}', f'participante_{i}@test.com'),
+                experienciaMindfulness='ninguna'
+            )
+            for i in range(n)
+        ]
+        for p in participantes:
+            InscripcionPrograma.objects.create(programa=programa_borrador, participante=p)
+            for sesion in sesiones:
+                DiarioSesion.objects.create(participante=p, sesion=sesion, valoracion=4, comentario='Bien')
+            if p != participante:
+                RespuestaCuestionario.objects.create(cuestionario=cuestionario_pre, participante=p, respuestas={'1': 'Bien'})
+
+        programa_borrador.refresh_from_db()
+        return {'programa': programa_borrador.id, 'sesion': sesiones[0].id, 'cuestionario': cuestionario_pre.id}
+    return crear
+
+
+@pytest.mark.django_db
+class TestPresupuestoConsultas:
+    """Tests del número máximo de consultas SQL por endpoint."""
+
+    @pytest.mark.parametrize('rol,url,maximo,n', casos_presupuesto())
+    def test_endpoint_dentro_del_presupuesto(
+        self, rol, url, maximo, n, api_client, investigador, participante,
+        crear_programa_con_participantes, presupuesto_consultas
+    ):
+        """Test el endpoint no supera su presupuesto de consultas con ningún tamaño de datos."""
+        ids = crear_programa_con_participantes(n)
+        usuario = investigador.usuario if rol == 'investigador' else participante.usuario
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(usuario).access_token}')
+
+        with presupuesto_consultas(maximo):
+            response = api_client.get(url.format(**ids))
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_presupuesto_superado_falla(self, authenticated_client_investigador, programa_borrador, presupuesto_consultas):
+        """Test superar el presupuesto hace fallar el test con el resumen de consultas (debe fallar)."""
+        with pytest.raises(pytest.fail.Exception) as excinfo:
+            with presupuesto_consultas(1):
+                authenticated_client_investigador.get(f'/api/programas/{programa_borrador.id}/')
+
+        assert 'Presupuesto de consultas superado' in str(excinfo.value)
+        assert 'consultas en' in str(excinfo.value)
+
+    def test_consultas_repetidas_por_encima_del_limite(self, programa_borrador, presupuesto_consultas):
+        """Test el límite de consultas repetidas detecta un N+1 aunque el total quepa (debe fallar)."""
+        with pytest.raises(pytest.fail.Exception) as excinfo:
+            with presupuesto_consultas(10, duplicadas=0):
+                for _ in range(3):
+                    Programa.objects.get(pk=programa_borrador.pk)
+
+        assert 'Demasiadas consultas repetidas: 2 > 0' in str(excinfo.value)
+
+
+@pytest.mark.django_db
+class TestConsultasSQLMiddleware:
+    """Tests para el registro de consultas y las cabeceras de depuración."""
+
+    def test_huella_agrupa_parametros_y_listas_in(self):
+        """Test consultas que solo difieren en parámetros o en la longitud de IN comparten huella."""
+        assert huella_consulta('SELECT * FROM t WHERE id IN (%s, %s, %s) LIMIT 21') == \
+            huella_consulta('SELECT  *  FROM t WHERE id IN (%s) LIMIT 1')
+        assert huella_consulta('SELECT "tabla_2"."id" FROM "tabla_2"') == 'SELECT "tabla_2"."id" FROM "tabla_2"'
+
+    def test_registro_cuenta_consultas_y_duplicadas(self, programa_borrador):
+        """Test el registro cuenta consultas, tiempo y huellas repetidas."""
+        with RegistroConsultas() as registro:
+            for _ in range(3):
+                Programa.objects.get(pk=programa_borrador.pk)
+            Sesion.objects.count()
+
+        assert registro.total == 4
+        assert registro.tiempo_ms >= 0
+        assert list(registro.duplicadas.values()) == [3]
+
+    def test_cabeceras_con_debug(self, authenticated_client_investigador, programa_borrador, settings):
+        """Test con CONSULTAS_SQL_CABECERAS la respuesta incluye el resumen de consultas."""
+        settings.CONSULTAS_SQL_CABECERAS = True
+
+        response = authenticated_client_investigador.get(f'/api/programas/{programa_borrador.id}/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert int(response['X-Consultas-SQL']) > 0
+        assert float(response['X-Tiempo-SQL-Ms']) >= 0
+        assert int(response['X-Consultas-Duplicadas']) >= 0
+
+    def test_sin_cabeceras_por_defecto(self, authenticated_client_investigador, programa_borrador):
+        """Test sin DEBUG no se añaden las cabeceras."""
+        response = authenticated_client_investigador.get(f'/api/programas/{programa_borrador.id}/')
+
+        assert 'X-Consultas-SQL' not in response
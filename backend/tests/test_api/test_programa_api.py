@@ -1,4 +1,7 @@
+import os
+import time
 import pytest
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
 from programa.models import Programa, InscripcionPrograma
@@ -359,4 +362,616 @@ class TestProgramaAPI:
                 response = api_client.post(url)
             else:
                 response = api_client.get(url)
-            assert response.status_code == status.HTTP_401_UNAUTHORIZED 
\ No newline at end of file
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED 
+
+@pytest.mark.django_db
+class TestProgramaCacheAPI:
+    """Tests para la caché de programas serializados."""
+
+    url = '/api/programas/'
+
+    def test_listado_desde_cache_igual_que_serializer(self, authenticated_client_participante, participante, programa_publicado):
+        """Test la respuesta servida desde caché coincide con la del serializer."""
+        from rest_framework.test import APIRequestFactory
+        from programa.serializers import ProgramaSerializer
+
+        Programa.objects.filter(pk=programa_publicado.pk).update(estado_publicacion=EstadoPublicacion.PUBLICADO)
+        InscripcionPrograma.objects.create(programa=programa_publicado, participante=participante)
+
+        primera = authenticated_client_participante.get(self.url)
+        segunda = authenticated_client_participante.get(self.url)
+
+        request = APIRequestFactory().get(self.url)
+        request.user = participante.usuario
+        esperado = ProgramaSerializer(
+            Programa.objects.filter(estado_publicacion=EstadoPublicacion.PUBLICADO),
+            many=True,
+            context={'request': request}
+        ).data
+        assert primera.json() == segunda.json()
+        assert segunda.json()[0]['inscripcion_info']['estado_inscripcion'] == EstadoInscripcion.EN_PROGRESO
+        assert {k: v for k, v in segunda.data[0].items() if k != 'inscripcion_info'} == \
+            {k: v for k, v in esperado[0].items() if k != 'inscripcion_info'}
+
+    def test_listado_cacheado_numero_consultas_constante(self, authenticated_client_investigador, investigador):
+        """Test con la caché caliente el número de consultas no depende del número de programas."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from sesion.models import Sesion
+
+        for i in range(5):
+            programa = Programa.objects.create(
+                nombre=f'Programa {i}', descripcion='Descripción', duracion_semanas=2, creado_por=investigador
+            )
+            Sesion.objects.create(programa=programa, titulo='Sesión 1', semana=1)
+
+        authenticated_client_investigador.get(self.url)
+        with CaptureQueriesContext(connection) as contexto_pocos:
+            authenticated_client_investigador.get(self.url)
+
+        for i in range(5, 15):
+            Programa.objects.create(
+                nombre=f'Programa {i}', descripcion='Descripción', duracion_semanas=2, creado_por=investigador
+            )
+        authenticated_client_investigador.get(self.url)
+        with CaptureQueriesContext(connection) as contexto_muchos:
+            response = authenticated_client_investigador.get(self.url)
+
+        assert len(response.data) == 15
+        assert len(contexto_muchos.captured_queries) == len(contexto_pocos.captured_queries)
+
+    def test_cache_se_invalida_con_cambios(self, authenticated_client_investigador, programa_borrador, participante):
+        """Test las sesiones, inscripciones y perfiles modificados se reflejan en el listado."""
+        from sesion.models import Sesion
+
+        url = f'/api/programas/{programa_borrador.id}/'
+        assert authenticated_client_investigador.get(url).data['sesiones'] == []
+
+        Sesion.objects.create(programa=programa_borrador, titulo='Nueva sesión', semana=1)
+        response = authenticated_client_investigador.get(url)
+        assert [sesion['titulo'] for sesion in response.data['sesiones']] == ['Nueva sesión']
+
+        programa_borrador.participantes.add(participante)
+        response = authenticated_client_investigador.get(url)
+        assert [p['id'] for p in response.data['participantes']] == [participante.id]
+
+        usuario = programa_borrador.creado_por.usuario
+        usuario.nombre = 'Dra. Lucía'
+        usuario.save()
+        response = authenticated_client_investigador.get(self.url)
+        assert response.data[0]['creado_por']['nombre_completo_investigador'].startswith('Dra. Lucía')
+
+        otro = Programa.objects.create(
+            nombre='Otro programa', descripcion='Descripción', duracion_semanas=1,
+            creado_por=programa_borrador.creado_por
+        )
+        response = authenticated_client_investigador.get(url)
+        assert otro.id in response.data['creado_por']['programas']
+
+
+    def test_perfil_modificado_invalida_cache_de_otros_procesos(self, authenticated_client_investigador, programa_borrador, monkeypatch):
+        """Test un cambio de perfil cambia la firma aunque el borrado de la entrada no llegue a otro proceso."""
+        from programa import signals
+
+        authenticated_client_investigador.get(self.url)
+        # Con LocMem, delete_many solo alcanza al proceso que guarda el perfil
+        monkeypatch.setattr(signals, 'invalidar_programas', lambda programa_ids: None)
+
+        usuario = programa_borrador.creado_por.usuario
+        usuario.nombre = 'Dra. Lucía'
+        usuario.save()
+
+        response = authenticated_client_investigador.get(self.url)
+        assert response.data[0]['creado_por']['nombre_completo_investigador'].startswith('Dra. Lucía')
+
+    def test_diarios_no_invalidan_la_representacion(self, authenticated_client_investigador, programa_borrador, participante):
+        """Test los diarios y respuestas no cambian la firma del programa cacheado."""
+        from programa.cache_serializacion import clave_programa, firma_programa, _cache
+        from sesion.models import Sesion, DiarioSesion
+
+        sesion = Sesion.objects.create(programa=programa_borrador, titulo='Sesión 1', semana=1)
+        authenticated_client_investigador.get(self.url)
+        programa_borrador.refresh_from_db()
+        firma = firma_programa(programa_borrador)
+
+        DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=4)
+
+        programa_borrador.refresh_from_db()
+        assert firma_programa(programa_borrador) == firma
+        assert _cache().get(clave_programa(programa_borrador.pk))[0] == firma
+
+
+@pytest.mark.django_db
+class TestProgramaPaginacionAPI:
+    """Tests para el listado de programas paginado por cursor."""
+
+    url = '/api/programas/'
+
+    def recorrer(self, client, url):
+        programas = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            programas.extend(response.data['results'])
+            url = response.data['next']
+        return programas
+
+    def test_listado_paginado_recorre_todos(self, authenticated_client_investigador, investigador):
+        """Test las páginas contienen todos los programas una sola vez, del más reciente al más antiguo."""
+        ids = [
+            Programa.objects.create(
+                nombre=f'Programa {i}', descripcion='Descripción', duracion_semanas=2, creado_por=investigador
+            ).id
+            for i in range(7)
+        ]
+
+        response = authenticated_client_investigador.get(self.url, {'page_size': 3})
+        assert len(response.data['results']) == 3
+        assert response.data['previous'] is None
+
+        programas = self.recorrer(authenticated_client_investigador, f'{self.url}?page_size=3')
+        assert [programa['id'] for programa in programas] == ids[::-1]
+
+    def test_listado_paginado_representacion_ligera(self, authenticated_client_investigador, programa_borrador, sesion, participante):
+        """Test la representación ligera no anida sesiones ni participantes pero incluye sus totales."""
+        InscripcionPrograma.objects.create(programa=programa_borrador, participante=participante)
+
+        response = authenticated_client_investigador.get(self.url, {'page_size': 10})
+
+        programa = response.data['results'][0]
+        assert 'sesiones' not in programa
+        assert 'participantes' not in programa
+        assert programa['total_sesiones'] == 1
+        assert programa['total_participantes'] == 1
+        assert programa['creado_por_nombre'] == 'Dr. Ana García'
+        assert programa['inscripcion_info'] is None
+
+    def test_listado_paginado_totales_sin_join(self, authenticated_client_investigador, programa_borrador, participante, usuario_admin):
+        """Test los totales se cuentan con subconsultas: la consulta de la página no une sesiones ni inscripciones."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from sesion.models import Sesion
+        from usuario.models import Participante
+
+        for semana in (1, 2, 3):
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana)
+        for perfil in (participante, Participante.objects.create(usuario=usuario_admin)):
+            InscripcionPrograma.objects.create(programa=programa_borrador, participante=perfil)
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = authenticated_client_investigador.get(self.url, {'page_size': 10})
+
+        programa = response.data['results'][0]
+        assert (programa['total_sesiones'], programa['total_participantes']) == (3, 2)
+        pagina = next(q['sql'] for q in contexto.captured_queries if 'total_sesiones' in q['sql'])
+        assert 'JOIN "sesion_sesion"' not in pagina
+        assert 'JOIN "programa_inscripcionprograma"' not in pagina
+
+    def test_listado_paginado_inscripcion_participante(self, authenticated_client_participante, participante, programa_publicado):
+        """Test el participante ve su inscripción en el listado paginado."""
+        Programa.objects.filter(pk=programa_publicado.pk).update(estado_publicacion=EstadoPublicacion.PUBLICADO)
+        InscripcionPrograma.objects.create(programa=programa_publicado, participante=participante)
+
+        response = authenticated_client_participante.get(self.url, {'page_size': 10})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['inscripcion_info']['estado_inscripcion'] == EstadoInscripcion.EN_PROGRESO
+
+    def test_listado_sin_parametros_no_paginado(self, authenticated_client_investigador, programa_borrador):
+        """Test sin cursor ni page_size se mantiene la lista completa."""
+        response = authenticated_client_investigador.get(self.url)
+
+        assert isinstance(response.data, list)
+
+    def test_listado_paginado_tamano_maximo(self, authenticated_client_investigador, programa_borrador):
+        """Test un page_size mayor que el máximo se limita al máximo."""
+        response = authenticated_client_investigador.get(self.url, {'page_size': 1000})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 1
+
+    def test_listado_paginado_cursor_invalido(self, authenticated_client_investigador, programa_borrador):
+        """Test un cursor manipulado devuelve 404 (debe fallar)."""
+        response = authenticated_client_investigador.get(self.url, {'cursor': 'no-es-un-cursor'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestInscripcionMasivaAPI:
+    """Tests para la inscripción masiva de participantes."""
+
+    @pytest.fixture
+    def programa(self, programa_borrador):
+        Programa.objects.filter(pk=programa_borrador.pk).update(estado_publicacion=EstadoPublicacion.PUBLICADO)
+        programa_borrador.refresh_from_db()
+        return programa_borrador
+
+    @pytest.fixture
+    def cohorte(self):
+        from usuario.models import Usuario, Participante
+        from config.enums import RoleUsuario
+
+        return [
+            Participante.objects.create(usuario=Usuario.objects.create_user(
+                username=f'cohorte_{i}', email=f'cohorte_{i}@test.com', password='testpassword123',
+                nombre='Cohorte', apellidos=str(i), role=RoleUsuario.PARTICIPANTE
+            ))
+            for i in range(4)
+        ]
+
+    def url(self, programa):
+        return f'/api/programas/{programa.id}/enrolar-masivo/'
+
+    def test_inscripcion_masiva_resultados_por_fila(self, authenticated_client_investigador, programa, cohorte, investigador):
+        """Test cada identificador recibe su resultado y solo se inscriben los válidos."""
+        otro = Programa.objects.create(nombre='Otro', descripcion='Otro', duracion_semanas=2, creado_por=investigador)
+        InscripcionPrograma.objects.create(programa=otro, participante=cohorte[2])
+        InscripcionPrograma.objects.create(programa=programa, participante=cohorte[3], estado_inscripcion=EstadoInscripcion.ABANDONADO)
+
+        response = authenticated_client_investigador.post(self.url(programa), {'participantes': [
+            'cohorte_0@test.com', 'cohorte_1', str(cohorte[0].id), cohorte[2].id, 'cohorte_3', 'nadie@test.com'
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [fila['resultado'] for fila in response.data['resultados']] == [
+            'inscrito', 'inscrito', 'duplicado', 'en_otro_programa', 'ya_inscrito', 'no_encontrado'
+        ]
+        assert response.data['resumen']['inscrito'] == 2
+        assert response.data['total'] == 6
+        assert 'filas_por_segundo' in response.data
+        assert set(programa.participantes.values_list('id', flat=True)) == {cohorte[0].id, cohorte[1].id}
+        inscripcion = InscripcionPrograma.objects.get(programa=programa, participante=cohorte[0])
+        assert inscripcion.estado_inscripcion == EstadoInscripcion.EN_PROGRESO
+        assert inscripcion.fecha_fin == inscripcion.fecha_inicio + timezone.timedelta(weeks=programa.duracion_semanas)
+
+
+    def test_usuario_numerico_no_se_toma_como_id(self, authenticated_client_investigador, programa, cohorte):
+        """Test un nombre de usuario de solo dígitos se resuelve por usuario; si choca con un id es ambiguo."""
+        from usuario.models import Usuario, Participante
+        from config.enums import RoleUsuario
+
+        def crear(username):
+            return Participante.objects.create(usuario=Usuario.objects.create_user(
+                username=username, email=f'{username}@test.com', password='testpassword123',
+                nombre='Estudiante', apellidos=username, role=RoleUsuario.PARTICIPANTE
+            ))
+
+        estudiante = crear('20240001')
+        ambiguo = crear(str(cohorte[1].id))
+
+        response = authenticated_client_investigador.post(self.url(programa), {'participantes': [
+            '20240001', str(cohorte[1].id), f'id:{cohorte[1].id}', cohorte[2].id
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [(fila['participante_id'], fila['resultado']) for fila in response.data['resultados']] == [
+            (estudiante.id, 'inscrito'), (None, 'ambiguo'), (cohorte[1].id, 'inscrito'), (cohorte[2].id, 'inscrito')
+        ]
+        assert not InscripcionPrograma.objects.filter(participante=ambiguo).exists()
+
+    def test_email_sin_distinguir_mayusculas(self, authenticated_client_investigador, programa, cohorte):
+        """Test un email con otras mayúsculas encuentra al participante."""
+        response = authenticated_client_investigador.post(self.url(programa), {'participantes': [
+            cohorte[0].usuario.email.upper(), f' {cohorte[1].usuario.email.title()} '
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [(fila['participante_id'], fila['resultado']) for fila in response.data['resultados']] == [
+            (cohorte[0].id, 'inscrito'), (cohorte[1].id, 'inscrito')
+        ]
+
+    def test_inscripcion_masiva_csv_por_lotes(self, authenticated_client_investigador, programa, cohorte, django_assert_max_num_queries):
+        """Test un CSV con cabecera se procesa por lotes con un número de consultas acotado por lote."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from programa.inscripcion_masiva import inscribir_participantes
+
+        contenido = 'email\n' + '\n'.join(p.usuario.email for p in cohorte) + '\n'
+        archivo = SimpleUploadedFile('cohorte.csv', contenido.encode(), content_type='text/csv')
+        response = authenticated_client_investigador.post(self.url(programa), {'archivo': archivo}, format='multipart')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['resumen']['inscrito'] == 4
+        assert programa.participantes.count() == 4
+
+        InscripcionPrograma.objects.filter(programa=programa).delete()
+        programa.participantes.clear()
+        # Dos lotes de dos: seis consultas por lote más el SAVEPOINT y su RELEASE
+        with django_assert_max_num_queries(16):
+            informe = inscribir_participantes(programa, [p.id for p in cohorte], tamano_lote=2)
+        assert informe['resumen']['inscrito'] == 4
+
+    def test_inscripcion_masiva_actualiza_version_y_cache(self, authenticated_client_investigador, programa, cohorte):
+        """Test la inscripción masiva cambia la versión de la representación e invalida la caché del programa."""
+        url = f'/api/programas/{programa.id}/'
+        assert authenticated_client_investigador.get(url).data['participantes'] == []
+        version = programa.version_representacion
+
+        authenticated_client_investigador.post(self.url(programa), {'participantes': [cohorte[0].id]}, format='json')
+
+        programa.refresh_from_db()
+        assert programa.version_representacion > version
+        assert [p['id'] for p in authenticated_client_investigador.get(url).data['participantes']] == [cohorte[0].id]
+
+    def test_inscripcion_masiva_requiere_programa_publicado(self, authenticated_client_investigador, programa_borrador, cohorte):
+        """Test no se puede inscribir en un programa en borrador ni sin lista de participantes."""
+        response = authenticated_client_investigador.post(
+            self.url(programa_borrador), {'participantes': [cohorte[0].id]}, format='json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        Programa.objects.filter(pk=programa_borrador.pk).update(estado_publicacion=EstadoPublicacion.PUBLICADO)
+        response = authenticated_client_investigador.post(self.url(programa_borrador), {'participantes': 'x'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not InscripcionPrograma.objects.exists()
+
+    def test_inscripcion_masiva_participante_prohibida(self, authenticated_client_participante, programa, cohorte):
+        """Test un participante no puede inscribir a otros."""
+        response = authenticated_client_participante.post(
+            self.url(programa), {'participantes': [cohorte[0].id]}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not InscripcionPrograma.objects.exists()
+
+    def test_comando_inscribir_participantes(self, programa, cohorte, tmp_path):
+        """Test el comando inscribe desde un CSV y resume los resultados."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        archivo = tmp_path / 'cohorte.csv'
+        archivo.write_text('username\ncohorte_0\ncohorte_1\ndesconocido\n', encoding='utf-8')
+        salida = StringIO()
+        call_command('inscribir_participantes', programa.id, '--archivo', str(archivo), stdout=salida)
+
+        assert programa.inscripciones.count() == 2
+        assert 'desconocido: no_encontrado' in salida.getvalue()
+        assert 'inscrito: 2' in salida.getvalue()
+
+
+@pytest.mark.django_db
+class TestProgramaDuplicacionAPI:
+    """Tests para la duplicación de programas en bloque."""
+
+    @pytest.fixture
+    def media(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        return tmp_path
+
+    def crear_programa(self, investigador, nombre='Plantilla', semanas=3, audio=None):
+        from sesion.models import Sesion
+
+        programa = Programa.objects.create(
+            nombre=nombre, descripcion='Descripción', duracion_semanas=semanas, creado_por=investigador
+        )
+        for semana in range(1, semanas + 1):
+            Sesion.objects.create(
+                programa=programa, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=10,
+                tipo_contenido='audio' if audio else 'temporizador', contenido_audio=audio
+            )
+        for momento in (MomentoCuestionario.PRE, MomentoCuestionario.POST):
+            cuestionario = Cuestionario.objects.create(
+                programa=programa, momento=momento, tipo_cuestionario='personalizado', titulo=momento,
+                preguntas=[{'id': 1, 'tipo': 'texto', 'texto': '¿Cómo estás?'}]
+            )
+            setattr(programa, f'cuestionario_{momento}', cuestionario)
+        programa.save()
+        return programa
+
+    def test_duplicar_copia_sesiones_y_cuestionarios(self, authenticated_client_investigador, investigador):
+        """Test la copia es un borrador con sus propias sesiones y cuestionarios pre y post."""
+        original = self.crear_programa(investigador)
+
+        response = authenticated_client_investigador.post(f'/api/programas/{original.id}/duplicar/', format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        copia = Programa.objects.get(pk=response.data['id'])
+        assert copia.nombre == 'Copia de Plantilla'
+        assert copia.estado_publicacion == EstadoPublicacion.BORRADOR
+        assert list(copia.sesiones.values_list('semana', flat=True)) == [1, 2, 3]
+        assert copia.cuestionario_pre.programa == copia
+        assert copia.cuestionario_post.programa == copia
+        assert copia.cuestionario_pre.pk != original.cuestionario_pre_id
+        assert original.sesiones.count() == 3
+
+    def test_duplicar_lote_consultas_constantes(self, investigador):
+        """Test duplicar uno o varios programas, con más o menos sesiones, lanza las mismas consultas."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from programa.duplicacion import duplicar_programas
+
+        uno = [self.crear_programa(investigador, semanas=2)]
+        varios = [self.crear_programa(investigador, nombre=f'Plantilla {i}', semanas=8) for i in range(4)]
+
+        with CaptureQueriesContext(connection) as consultas_uno:
+            duplicar_programas(uno, investigador)
+        with CaptureQueriesContext(connection) as consultas_varios:
+            copias = duplicar_programas(varios, investigador)
+
+        assert len(consultas_varios.captured_queries) == len(consultas_uno.captured_queries)
+        assert [copia.nombre for copia in copias] == [f'Copia de Plantilla {i}' for i in range(4)]
+        assert all(copia.sesiones.count() == 8 for copia in copias)
+
+    def test_duplicar_lote_api(self, authenticated_client_investigador, investigador, usuario_admin):
+        """Test el endpoint duplica todos los programas indicados y rechaza los ajenos."""
+        from usuario.models import Investigador
+
+        programas = [self.crear_programa(investigador, nombre=f'Plantilla {i}') for i in range(3)]
+        response = authenticated_client_investigador.post(
+            '/api/programas/duplicar/', {'programas': [p.id for p in programas]}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [p['nombre'] for p in response.data] == [f'Copia de Plantilla {i}' for i in range(3)]
+
+        ajeno = self.crear_programa(Investigador.objects.create(usuario=usuario_admin, experienciaInvestigacion='si'))
+        response = authenticated_client_investigador.post(
+            '/api/programas/duplicar/', {'programas': [programas[0].id, ajeno.id]}, format='json'
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert Programa.objects.filter(nombre__startswith='Copia de').count() == 3
+
+    def test_duplicar_invalida_cache_de_otros_procesos(self, authenticated_client_investigador, investigador, monkeypatch):
+        """Test la lista de programas del investigador se actualiza aunque el borrado de la caché no llegue a otro proceso."""
+        from programa.cache_serializacion import _cache
+
+        original = self.crear_programa(investigador)
+        url = f'/api/programas/{original.id}/'
+        authenticated_client_investigador.get(url)
+        # Con LocMem, delete_many solo alcanza al proceso que duplica
+        monkeypatch.setattr(_cache(), 'delete_many', lambda claves: None)
+
+        response = authenticated_client_investigador.post(f'/api/programas/{original.id}/duplicar/', format='json')
+
+        assert response.data['id'] in authenticated_client_investigador.get(url).data['creado_por']['programas']
+
+    def test_medios_compartidos_no_se_borran_con_la_copia(
+        self, authenticated_client_investigador, investigador, media, django_capture_on_commit_callbacks
+    ):
+        """Test las copias comparten el audio y borrar una sesión solo elimina el archivo sin otras referencias."""
+        from django.core.files.base import ContentFile
+        from sesion.almacenamiento import almacenamiento_medios
+        from sesion.medios import ANTIGUEDAD_MINIMA_HUERFANOS
+        from sesion.models import Sesion
+
+        almacenamiento = almacenamiento_medios()
+        nombre = almacenamiento.save('audio/meditacion.mp3', ContentFile(b'audio'))
+        original = self.crear_programa(investigador, semanas=1, audio=nombre)
+
+        response = authenticated_client_investigador.post(f'/api/programas/{original.id}/duplicar/', format='json')
+        sesion_copia = Sesion.objects.get(programa_id=response.data['id'])
+        assert sesion_copia.contenido_audio.name == nombre
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client_investigador.delete(f'/api/sesiones/{sesion_copia.id}/')
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert almacenamiento.exists(nombre)
+
+        # Fuera del margen en que liberar_archivos() respeta los archivos recién escritos
+        antiguo = time.time() - 2 * ANTIGUEDAD_MINIMA_HUERFANOS
+        os.utime(almacenamiento.path(nombre), (antiguo, antiguo))
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client_investigador.delete(f'/api/sesiones/{original.sesiones.get().id}/')
+        assert not almacenamiento.exists(nombre)
+
+    def test_duplicar_no_copia_archivos(self, authenticated_client_investigador, investigador, media):
+        """Test duplicar un programa varias veces no escribe copias de sus archivos."""
+        from django.core.files.base import ContentFile
+        from sesion.almacenamiento import almacenamiento_medios
+
+        nombre = almacenamiento_medios().save('audio/meditacion.mp3', ContentFile(b'audio'))
+        original = self.crear_programa(investigador, semanas=2, audio=nombre)
+
+        for _ in range(2):
+            authenticated_client_investigador.post(f'/api/programas/{original.id}/duplicar/', format='json')
+
+        assert Programa.objects.count() == 3
+        assert [os.path.join(raiz, archivo) for raiz, _, archivos in os.walk(media / 'audio') for archivo in archivos] \
+            == [str(media / nombre)]
+
+    def test_duplicar_es_atomico(self, investigador, monkeypatch):
+        """Test si falla la copia de los cuestionarios no queda ningún programa ni sesión copiados."""
+        from programa.duplicacion import duplicar_programas
+        from sesion.models import Sesion
+
+        original = self.crear_programa(investigador)
+
+        def fallar(*args, **kwargs):
+            raise RuntimeError('fallo simulado')
+        monkeypatch.setattr(Cuestionario.objects, 'bulk_create', fallar)
+
+        with pytest.raises(RuntimeError):
+            duplicar_programas([original], investigador)
+
+        assert Programa.objects.count() == 1
+        assert Sesion.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestProgramaGuardado:
+    """Tests del guardado de programas con seguimiento de campos y transiciones de estado."""
+
+    @pytest.fixture
+    def programa_completo(self, programa_borrador, cuestionario_pre, cuestionario_post):
+        """Programa en borrador con todas sus sesiones y cuestionarios, listo para publicar"""
+        from sesion.models import Sesion
+
+        Sesion.objects.bulk_create([
+            Sesion(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana)
+            for semana in range(1, programa_borrador.duracion_semanas + 1)
+        ])
+        Programa.objects.filter(pk=programa_borrador.pk).update(
+            cuestionario_pre=cuestionario_pre, cuestionario_post=cuestionario_post
+        )
+        return Programa.objects.get(pk=programa_borrador.pk)
+
+    def test_actualizar_escribe_solo_campos_modificados(self, programa_completo, django_assert_num_queries):
+        """Test guardar un programa publicado lanza un único UPDATE con las columnas modificadas."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        programa_completo.publicar()
+        programa = Programa.objects.get(pk=programa_completo.pk)
+        programa.nombre = 'Nuevo nombre'
+        with CaptureQueriesContext(connection) as consultas:
+            programa.save()
+
+        assert len(consultas.captured_queries) == 1
+        sql = consultas.captured_queries[0]['sql']
+        assert sql.startswith('UPDATE') and '"nombre"' in sql and '"descripcion"' not in sql
+        assert Programa.objects.get(pk=programa.pk).nombre == 'Nuevo nombre'
+
+        with django_assert_num_queries(0):
+            programa.save()
+
+    def test_actualizar_borrador_comprueba_participantes(self, programa_borrador, django_assert_num_queries):
+        """Test un borrador no vuelve a leer su fila: comprueba los participantes y lanza el UPDATE."""
+        programa = Programa.objects.get(pk=programa_borrador.pk)
+        programa.descripcion = 'Otra descripción'
+
+        with django_assert_num_queries(2):
+            programa.save()
+
+    def test_campo_diferido_no_pierde_cambios(self, programa_borrador):
+        """Test leer un campo diferido no descarta los cambios pendientes del resto."""
+        programa = Programa.objects.only('id', 'nombre', 'estado_publicacion').get(pk=programa_borrador.pk)
+        programa.nombre = 'Cambiado'
+        assert programa.descripcion == programa_borrador.descripcion
+
+        programa.save()
+        assert Programa.objects.get(pk=programa.pk).nombre == 'Cambiado'
+
+    def test_publicar_valida_con_una_consulta(self, programa_completo, django_assert_num_queries):
+        """Test publicar lanza la consulta agregada de sesiones y el UPDATE."""
+        with django_assert_num_queries(2):
+            programa_completo.publicar()
+
+        programa_completo.refresh_from_db()
+        assert programa_completo.estado_publicacion == EstadoPublicacion.PUBLICADO
+        assert programa_completo.fecha_publicacion is not None
+
+    def test_publicar_sin_sesiones_completas_falla(self, programa_completo):
+        """Test un hueco en las semanas impide publicar."""
+        programa_completo.sesiones.filter(semana=2).delete()
+
+        with pytest.raises(ValueError, match='sesiones'):
+            programa_completo.publicar()
+        assert Programa.objects.get(pk=programa_completo.pk).estado_publicacion == EstadoPublicacion.BORRADOR
+
+    def test_publicado_no_vuelve_a_borrador(self, programa_completo):
+        """Test la máquina de estados no permite despublicar."""
+        programa_completo.publicar()
+        programa_completo.estado_publicacion = EstadoPublicacion.BORRADOR
+
+        with pytest.raises(ValueError, match='No se puede pasar'):
+            programa_completo.save()
+        assert Programa.objects.get(pk=programa_completo.pk).estado_publicacion == EstadoPublicacion.PUBLICADO
+
+    def test_borrador_con_participantes_no_se_guarda(self, programa_borrador, participante):
+        """Test un borrador con participantes no se guarda y la fila no cambia."""
+        programa_borrador.participantes.add(participante)
+        programa_borrador.nombre = 'Cambiado'
+
+        with pytest.raises(ValueError, match='participantes'):
+            programa_borrador.save()
+        assert Programa.objects.get(pk=programa_borrador.pk).nombre == 'Programa Test'
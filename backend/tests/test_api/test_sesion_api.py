@@ -1,9 +1,22 @@
+import hashlib
+import os
+import subprocess
+import time
 import pytest
+from datetime import timedelta
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
-from sesion.models import Sesion, DiarioSesion
+from sesion.models import Sesion, DiarioSesion, SubidaMedio, VersionMedio
+from sesion.disponibilidad import calcular_disponibilidad
+from sesion.almacenamiento import almacenamiento_medios
+from sesion.medios import (
+    ANTIGUEDAD_MINIMA_HUERFANOS, deduplicar_existentes, directorio_versiones, recolectar_huerfanos
+)
+from sesion import subidas, versiones_medios
 from programa.models import InscripcionPrograma, Programa
-from config.enums import EstadoInscripcion, EtiquetaPractica, TipoContenido, EstadoPublicacion
+from config.enums import EstadoInscripcion, EtiquetaPractica, TipoContenido, EstadoPublicacion, EstadoVersionMedio, EstadoSubidaMedio
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 @pytest.mark.django_db
@@ -45,6 +58,30 @@ class TestSesionAPI:
         assert response.data['titulo'] == 'Nueva Sesión Test'
         assert Sesion.objects.filter(titulo='Nueva Sesión Test').exists()
 
+    def test_sesion_url_con_parametros_no_se_escapa(self, authenticated_client_investigador, programa_borrador):
+        """Test una URL con `&` se guarda y devuelve tal cual al crear y al modificar; el título sí se sanitiza."""
+        url_video = 'https://youtube.com/watch?v=a&t=10'
+        data = {
+            'programa': programa_borrador.id,
+            'titulo': 'Enlace <b>',
+            'semana': 2,
+            'tipo_practica': 'breath',
+            'tipo_contenido': 'enlace',
+            'contenido_url': url_video
+        }
+
+        response = authenticated_client_investigador.post('/api/sesiones/', data, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['contenido_url'] == url_video
+        assert response.data['titulo'] == 'Enlace &lt;b&gt;'
+
+        otra = url_video + '&list=PL1'
+        response = authenticated_client_investigador.patch(
+            f"/api/sesiones/{response.data['id']}/", {'tipo_contenido': 'enlace', 'contenido_url': otra}, format='json'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert Sesion.objects.get(titulo='Enlace &lt;b&gt;').contenido_url == otra
+
     def test_sesion_create_forbidden_participante(self, authenticated_client_participante, programa_borrador):
         """Test crear sesión como participante (debe fallar)."""
         data = {
@@ -208,6 +245,28 @@ class TestDiarioSesionAPI:
         assert response.data['valoracion'] == 4.5
         assert DiarioSesion.objects.filter(participante=participante, sesion=sesion).exists()
 
+    def test_diario_no_escribe_en_el_programa(self, authenticated_client_participante, sesion, participante, programa_borrador):
+        """Test crear y modificar un diario no actualiza la fila del programa."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        InscripcionPrograma.objects.create(
+            programa=programa_borrador,
+            participante=participante,
+            estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        )
+        with CaptureQueriesContext(connection) as contexto:
+            response = authenticated_client_participante.post(
+                '/api/sesiones/diario/', {'sesion_id': sesion.id, 'valoracion': 4}, format='json'
+            )
+            authenticated_client_participante.put(
+                reverse('diario-sesion-detail', kwargs={'pk': response.data['id']}),
+                {'valoracion': 5, 'comentario': 'Mejor'}, format='json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert not [q for q in contexto.captured_queries if q['sql'].startswith('UPDATE "programa_programa"')]
+
     def test_diario_create_forbidden_investigador(self, authenticated_client_investigador, sesion):
         """Test crear diario como investigador (debe fallar)."""
         data = {
@@ -342,4 +401,876 @@ class TestDiarioSesionAPI:
         
         for url in urls:
             response = api_client.get(url)
-            assert response.status_code == status.HTTP_401_UNAUTHORIZED 
\ No newline at end of file
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED 
+    def test_diario_list_paginado(self, authenticated_client_participante, participante, programa_borrador):
+        """Test el listado paginado recorre todos los diarios por cursor con la representación ligera."""
+        sesiones = [
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana)
+            for semana in range(1, 6)
+        ]
+        for sesion in sesiones:
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=4)
+
+        url = '/api/sesiones/diario/?page_size=2'
+        vistos = []
+        while url:
+            response = authenticated_client_participante.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 2
+            vistos.extend(response.data['results'])
+            url = response.data['next']
+
+        assert [diario['sesion_semana'] for diario in vistos] == [5, 4, 3, 2, 1]
+        assert 'participante' not in vistos[0]
+        assert vistos[0]['programa'] == programa_borrador.id
+
+    def test_diario_list_paginado_investigador_vacio(self, authenticated_client_investigador):
+        """Test el listado paginado de un investigador no tiene diarios."""
+        response = authenticated_client_investigador.get('/api/sesiones/diario/', {'page_size': 5})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == []
+        assert response.data['next'] is None
+
+
+@pytest.mark.django_db
+class TestDiarioDatosSesion:
+    """Tests de la copia de programa, semana y duración de la sesión en los diarios."""
+
+    def test_diario_creado_copia_datos_sesion(self, authenticated_client_participante, sesion, participante, programa_borrador):
+        """Test un diario creado por la API guarda el programa, la semana y la duración de su sesión."""
+        InscripcionPrograma.objects.create(
+            programa=programa_borrador,
+            participante=participante,
+            estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        )
+
+        response = authenticated_client_participante.post(
+            '/api/sesiones/diario/', {'sesion_id': sesion.id, 'valoracion': 4}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        diario = DiarioSesion.objects.get(participante=participante, sesion=sesion)
+        assert (diario.programa_id, diario.semana, diario.duracion_estimada) == (programa_borrador.id, 1, 30)
+
+    def test_bulk_create_copia_datos_sesion(self, sesion, participante, programa_borrador):
+        """Test bulk_create también rellena los datos de la sesión."""
+        DiarioSesion.objects.bulk_create([DiarioSesion(participante=participante, sesion=sesion, valoracion=3)])
+
+        assert DiarioSesion.objects.filter(programa=programa_borrador, semana=1, duracion_estimada=30).count() == 1
+
+    def test_bulk_create_carga_sesiones_una_vez(self, programa_borrador, participante, django_assert_num_queries):
+        """Test bulk_create con sesion_id lee todas las sesiones con una consulta, no una por diario."""
+        sesiones = [
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=semana)
+            for semana in (1, 2, 3)
+        ]
+
+        # Las sesiones (in_bulk) y el INSERT
+        with django_assert_num_queries(2):
+            DiarioSesion.objects.bulk_create([
+                DiarioSesion(participante=participante, sesion_id=sesion.id, valoracion=3) for sesion in sesiones
+            ])
+
+        assert list(DiarioSesion.objects.order_by('semana').values_list('programa_id', 'semana', 'duracion_estimada')) == [
+            (programa_borrador.id, semana, semana) for semana in (1, 2, 3)
+        ]
+
+    def test_modificar_sesion_actualiza_diarios(self, sesion, participante, programa_borrador):
+        """Test cambiar la semana o la duración de la sesión actualiza la copia de sus diarios."""
+        DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+
+        sesion.semana = 2
+        sesion.duracion_estimada = 45
+        sesion.save()
+
+        diario = DiarioSesion.objects.get(sesion=sesion)
+        assert (diario.semana, diario.duracion_estimada) == (2, 45)
+
+    def test_modificar_sesion_mantiene_progreso(self, sesion, participante, programa_borrador):
+        """Test cambiar la duración o el programa de la sesión recalcula el progreso de ambos programas."""
+        from programa.models import ProgresoParticipante
+        from programa.progreso import verificar_progreso
+
+        DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+        sesion.duracion_estimada = 45
+        sesion.save()
+        assert ProgresoParticipante.objects.get(programa=programa_borrador, participante=participante).minutos_practica == 45
+
+        otro = Programa.objects.create(
+            nombre='Otro', descripcion='Otro', duracion_semanas=2, creado_por=programa_borrador.creado_por
+        )
+        sesion.programa = otro
+        sesion.save()
+
+        progreso = ProgresoParticipante.objects.get(programa=otro, participante=participante)
+        assert (progreso.sesiones_completadas, progreso.minutos_practica) == (1, 45)
+        assert ProgresoParticipante.objects.get(programa=programa_borrador, participante=participante).sesiones_completadas == 0
+        assert verificar_progreso() == []
+
+    def test_estadisticas_programa_usan_datos_copiados(self, authenticated_client_investigador, sesion, participante, programa_borrador):
+        """Test las estadísticas del programa cuentan diarios y minutos desde la copia."""
+        DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+
+        response = authenticated_client_investigador.get(f'/api/programas/{programa_borrador.id}/estadisticas/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['sesiones_completadas'] == 1
+        assert response.data['minutos_totales_practica'] == 30
+        assert response.data['diarios_detalle'][0]['semana'] == 1
+
+
+@pytest.mark.django_db
+class TestDisponibilidadSesiones:
+    """Tests del cálculo de disponibilidad de todas las sesiones de un programa."""
+
+    @pytest.fixture
+    def sesiones(self, programa_borrador):
+        return [
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana)
+            for semana in (1, 2, 3)
+        ]
+
+    @pytest.fixture
+    def inscripcion_semana_2(self, programa_borrador, participante):
+        """Inscripción en progreso que empezó hace ocho días (segunda semana)"""
+        inscripcion = InscripcionPrograma.objects.create(
+            programa=programa_borrador, participante=participante, estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        )
+        InscripcionPrograma.objects.filter(pk=inscripcion.pk).update(fecha_inicio=timezone.now() - timedelta(days=8))
+        return inscripcion
+
+    def test_disponibilidad_por_semana(self, sesiones, participante, programa_borrador, inscripcion_semana_2):
+        """Test solo está disponible la sesión de la semana en curso si se completó la anterior."""
+        DiarioSesion.objects.create(participante=participante, sesion=sesiones[0], valoracion=4)
+
+        disponibilidad = calcular_disponibilidad(participante, programa_borrador)
+
+        assert disponibilidad == {
+            sesiones[0].id: {'disponible': False, 'en_semana': False, 'completada': True},
+            sesiones[1].id: {'disponible': True, 'en_semana': True, 'completada': False},
+            sesiones[2].id: {'disponible': False, 'en_semana': False, 'completada': False},
+        }
+
+    def test_sesion_anterior_sin_completar(self, sesiones, participante, programa_borrador, inscripcion_semana_2):
+        """Test la sesión de la semana no está disponible si falta el diario de la anterior."""
+        disponibilidad = calcular_disponibilidad(participante, programa_borrador)
+
+        assert disponibilidad[sesiones[1].id] == {'disponible': False, 'en_semana': True, 'completada': False}
+        assert not sesiones[1].esta_disponible_para(participante)
+
+    def test_sin_inscripcion_nada_disponible(self, sesiones, participante, programa_borrador):
+        """Test sin inscripción en progreso ninguna sesión está disponible."""
+        disponibilidad = calcular_disponibilidad(participante, programa_borrador)
+
+        assert not any(estado['disponible'] or estado['en_semana'] for estado in disponibilidad.values())
+
+    def test_consultas_constantes(
+        self, programa_borrador, participante, inscripcion_semana_2, django_assert_num_queries
+    ):
+        """Test el cálculo lanza tres consultas sea cual sea el número de sesiones."""
+        for semana in range(1, 9):
+            sesion = Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana)
+            DiarioSesion.objects.create(participante=participante, sesion=sesion, valoracion=3)
+
+        with django_assert_num_queries(3):
+            disponibilidad = calcular_disponibilidad(participante, programa_borrador)
+        assert len(disponibilidad) == 8
+
+    def test_listado_incluye_disponibilidad(
+        self, authenticated_client_participante, sesiones, participante, programa_borrador, inscripcion_semana_2
+    ):
+        """Test el listado del participante devuelve el mapa de disponibilidad si se pide."""
+        DiarioSesion.objects.create(participante=participante, sesion=sesiones[0], valoracion=4)
+
+        response = authenticated_client_participante.get(
+            f'/api/sesiones/?programa={programa_borrador.id}&incluir=disponibilidad'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [s['id'] for s in response.data['sesiones']] == [sesiones[1].id]
+        assert response.data['disponibilidad'][sesiones[1].id]['disponible'] is True
+        assert response.data['disponibilidad'][sesiones[0].id]['completada'] is True
+
+    def test_listado_sin_disponibilidad_mantiene_formato(
+        self, authenticated_client_participante, sesiones, programa_borrador, inscripcion_semana_2
+    ):
+        """Test sin el parámetro el listado sigue siendo una lista de sesiones."""
+        response = authenticated_client_participante.get(f'/api/sesiones/?programa={programa_borrador.id}')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [s['id'] for s in response.data] == [sesiones[1].id]
+
+
+@pytest.mark.django_db
+class TestDiarioSesionLoteAPI:
+    """Tests del envío por lotes de diarios de sesión."""
+
+    url = '/api/sesiones/diario/lote/'
+
+    @pytest.fixture
+    def sesiones(self, programa_borrador, participante):
+        InscripcionPrograma.objects.create(
+            programa=programa_borrador, participante=participante, estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+        )
+        return [
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana, duracion_estimada=10)
+            for semana in (1, 2, 3)
+        ]
+
+    def lote(self, sesiones, prefijo='clave'):
+        return {'diarios': [
+            {'clave': f'{prefijo}-{sesion.semana}', 'sesion_id': sesion.id, 'valoracion': 4, 'comentario': 'Bien'}
+            for sesion in sesiones
+        ]}
+
+    def test_lote_crea_diarios_y_progreso(self, authenticated_client_participante, sesiones, participante, programa_borrador):
+        """Test el lote crea todos los diarios y actualiza el progreso."""
+        from programa.models import ProgresoParticipante
+        from programa.progreso import verificar_progreso
+
+        response = authenticated_client_participante.post(self.url, self.lote(sesiones[:2]), format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [fila['resultado'] for fila in response.data['resultados']] == ['creado', 'creado']
+        assert [fila['diario']['sesion'] for fila in response.data['resultados']] == [sesiones[0].id, sesiones[1].id]
+        assert DiarioSesion.objects.filter(participante=participante).count() == 2
+        progreso = ProgresoParticipante.objects.get(programa=programa_borrador, participante=participante)
+        assert (progreso.sesiones_completadas, progreso.minutos_practica) == (2, 20)
+        assert verificar_progreso(programa_borrador) == []
+
+    def test_reenvio_lote_es_idempotente(self, authenticated_client_participante, sesiones, participante):
+        """Test reenviar el mismo lote devuelve los diarios guardados sin duplicarlos."""
+        primera = authenticated_client_participante.post(self.url, self.lote(sesiones[:2]), format='json')
+        segunda = authenticated_client_participante.post(self.url, self.lote(sesiones[:2]), format='json')
+
+        assert segunda.status_code == status.HTTP_200_OK
+        assert [fila['resultado'] for fila in segunda.data['resultados']] == ['repetido', 'repetido']
+        assert [fila['diario']['id'] for fila in segunda.data['resultados']] == \
+            [fila['diario']['id'] for fila in primera.data['resultados']]
+        assert DiarioSesion.objects.filter(participante=participante).count() == 2
+
+    def test_sesion_con_diario_no_se_duplica(self, authenticated_client_participante, sesiones, participante):
+        """Test una sesión que ya tiene diario (o que se repite en el lote) no genera otro."""
+        DiarioSesion.objects.create(participante=participante, sesion=sesiones[0], valoracion=2)
+        datos = self.lote(sesiones[:2])
+        datos['diarios'].append({'clave': 'otra', 'sesion_id': sesiones[1].id, 'valoracion': 1})
+
+        response = authenticated_client_participante.post(self.url, datos, format='json')
+
+        assert [fila['resultado'] for fila in response.data['resultados']] == ['existente', 'creado', 'existente']
+        assert DiarioSesion.objects.filter(participante=participante).count() == 2
+
+    def test_ultima_sesion_completa_inscripcion(self, authenticated_client_participante, sesiones, participante, programa_borrador):
+        """Test en un programa sin cuestionarios el diario de la última sesión completa la inscripción."""
+        Programa.objects.filter(pk=programa_borrador.pk).update(tiene_cuestionarios=False)
+
+        authenticated_client_participante.post(self.url, self.lote(sesiones), format='json')
+
+        inscripcion = InscripcionPrograma.objects.get(programa=programa_borrador, participante=participante)
+        assert inscripcion.estado_inscripcion == EstadoInscripcion.COMPLETADO
+
+    def test_sesion_inexistente_no_guarda_nada(self, authenticated_client_participante, sesiones, participante):
+        """Test si una sesión no existe el lote se rechaza entero."""
+        datos = self.lote(sesiones[:1])
+        datos['diarios'].append({'clave': 'x', 'sesion_id': 999999, 'valoracion': 3})
+
+        response = authenticated_client_participante.post(self.url, datos, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['sesiones_no_encontradas'] == [999999]
+        assert not DiarioSesion.objects.filter(participante=participante).exists()
+
+    def test_lote_invalido(self, authenticated_client_participante, sesiones):
+        """Test un lote vacío o con diarios sin clave se rechaza."""
+        response = authenticated_client_participante.post(self.url, {'diarios': []}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        sin_clave = {'diarios': [{'sesion_id': sesiones[0].id, 'valoracion': 3}]}
+        response = authenticated_client_participante.post(self.url, sin_clave, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not DiarioSesion.objects.exists()
+
+    def test_lote_investigador_prohibido(self, authenticated_client_investigador, sesiones):
+        """Test los investigadores no pueden enviar diarios."""
+        response = authenticated_client_investigador.post(self.url, self.lote(sesiones), format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_consultas_no_dependen_del_tamano(
+        self, authenticated_client_participante, sesiones, programa_borrador, django_assert_max_num_queries
+    ):
+        """Test un lote de ocho diarios lanza las mismas consultas que uno de tres."""
+        sesiones += [
+            Sesion.objects.create(programa=programa_borrador, titulo=f'Sesión {semana}', semana=semana)
+            for semana in range(4, 9)
+        ]
+
+        with django_assert_max_num_queries(13):
+            response = authenticated_client_participante.post(self.url, self.lote(sesiones), format='json')
+        assert len(response.data['resultados']) == 8
+
+
+AUDIO = bytes(range(256)) * 4
+
+
+def envejecer(nombre):
+    """Fecha de modificación de un archivo de medios anterior al margen de liberar_archivos()"""
+    antiguo = time.time() - 2 * ANTIGUEDAD_MINIMA_HUERFANOS
+    os.utime(almacenamiento_medios().path(nombre), (antiguo, antiguo))
+
+
+@pytest.fixture
+def sesion_audio(sesion, settings, tmp_path):
+    """Sesión con un archivo de audio de 1 KB en un MEDIA_ROOT temporal."""
+    settings.MEDIA_ROOT = str(tmp_path)
+    sesion.tipo_contenido = TipoContenido.AUDIO
+    sesion.contenido_audio = SimpleUploadedFile('meditacion.mp3', AUDIO, content_type='audio/mpeg')
+    sesion.save()
+    return sesion
+
+
+@pytest.fixture
+def inscrito(participante, sesion_audio):
+    return InscripcionPrograma.objects.create(
+        programa=sesion_audio.programa, participante=participante, estado_inscripcion=EstadoInscripcion.EN_PROGRESO
+    )
+
+
+@pytest.mark.django_db
+class TestSesionMediosAPI:
+    """Tests para la transmisión por tramos del audio de las sesiones."""
+
+    CONTENIDO = AUDIO
+
+    def url(self, sesion, tipo='audio'):
+        return f'/api/sesiones/{sesion.id}/medios/{tipo}/'
+
+    def test_archivo_completo(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test sin cabecera Range se envía el archivo entero."""
+        response = authenticated_client_participante.get(self.url(sesion_audio))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == self.CONTENIDO
+        assert response['Accept-Ranges'] == 'bytes'
+        assert response['Content-Type'] == 'audio/mpeg'
+        assert response['ETag'] and response['Last-Modified']
+
+    @pytest.mark.parametrize('rango, inicio, fin', [
+        ('bytes=100-199', 100, 199),
+        ('bytes=1000-', 1000, 1023),
+        ('bytes=-24', 1000, 1023),
+        ('bytes=1000-5000', 1000, 1023),
+    ])
+    def test_tramo(self, authenticated_client_participante, sesion_audio, inscrito, rango, inicio, fin):
+        """Test un Range válido devuelve 206 con solo el tramo pedido."""
+        response = authenticated_client_participante.get(self.url(sesion_audio), HTTP_RANGE=rango)
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Range'] == f'bytes {inicio}-{fin}/{len(self.CONTENIDO)}'
+        assert response['Content-Length'] == str(fin - inicio + 1)
+        assert b''.join(response.streaming_content) == self.CONTENIDO[inicio:fin + 1]
+
+    def test_tramo_fuera_del_archivo(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test un tramo que empieza tras el final devuelve 416."""
+        response = authenticated_client_participante.get(self.url(sesion_audio), HTTP_RANGE='bytes=5000-')
+
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response['Content-Range'] == f'bytes */{len(self.CONTENIDO)}'
+
+    def test_varios_tramos_se_sirve_entero(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test varios tramos en la misma petición se ignoran y se envía el archivo."""
+        response = authenticated_client_participante.get(self.url(sesion_audio), HTTP_RANGE='bytes=0-1,5-6')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_peticiones_condicionales(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test If-None-Match / If-Modified-Since devuelven 304 y un If-Range obsoleto anula el tramo."""
+        url = self.url(sesion_audio)
+        primera = authenticated_client_participante.get(url)
+
+        response = authenticated_client_participante.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == primera['ETag']
+
+        response = authenticated_client_participante.get(url, HTTP_IF_MODIFIED_SINCE=primera['Last-Modified'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        response = authenticated_client_participante.get(
+            url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=primera['ETag']
+        )
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+
+        response = authenticated_client_participante.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"antiguo"')
+        assert response.status_code == status.HTTP_200_OK
+        assert b''.join(response.streaming_content) == self.CONTENIDO
+
+    def test_head(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test HEAD devuelve las cabeceras del tramo sin cuerpo."""
+        response = authenticated_client_participante.head(self.url(sesion_audio), HTTP_RANGE='bytes=0-9')
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Length'] == '10'
+        assert response.content == b''
+
+    def test_participante_no_inscrito(self, authenticated_client_participante, sesion_audio):
+        """Test un participante sin inscripción activa no puede descargar el audio."""
+        response = authenticated_client_participante.get(self.url(sesion_audio))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_investigador_creador(self, authenticated_client_investigador, sesion_audio):
+        """Test el investigador creador del programa puede descargar el audio."""
+        response = authenticated_client_investigador.get(self.url(sesion_audio), HTTP_RANGE='bytes=0-0')
+
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Length'] == '1'
+
+    def test_sin_archivo(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test un tipo de medio sin archivo o desconocido devuelve 404."""
+        assert authenticated_client_participante.get(self.url(sesion_audio, 'video')).status_code == 404
+        assert authenticated_client_participante.get(self.url(sesion_audio, 'imagen')).status_code == 404
+
+    def test_detalle_incluye_direcciones(self, authenticated_client_participante, sesion_audio, inscrito):
+        """Test el detalle de la sesión enlaza la transmisión de sus archivos."""
+        response = authenticated_client_participante.get(f'/api/sesiones/{sesion_audio.id}/')
+
+        assert response.data['medios'] == {'audio': self.url(sesion_audio)}
+
+
+def ffmpeg_falso(comando):
+    """Sustituye a ffmpeg: escribe archivos de salida de tamaño fijo"""
+    for indice, argumento in enumerate(comando):
+        if argumento.endswith('.m4a'):
+            with open(argumento, 'wb') as salida:
+                salida.write(b'a' * (6000 if '48k' in argumento else 12000))
+        elif argumento == '-var_stream_map':
+            directorio = os.path.dirname(os.path.dirname(comando[-1]))
+            for variante in comando[indice + 1].split():
+                nombre = variante.split('name:')[1]
+                os.makedirs(os.path.join(directorio, nombre))
+                with open(os.path.join(directorio, nombre, 'index.m3u8'), 'w') as lista:
+                    lista.write('#EXTM3U\n00000.ts\n')
+                with open(os.path.join(directorio, nombre, '00000.ts'), 'wb') as segmento:
+                    segmento.write(b'v' * 50000)
+    return b''
+
+
+@pytest.mark.django_db
+class TestVersionesMedios:
+    """Tests para las versiones comprimidas del audio y vídeo de las sesiones."""
+
+    @pytest.fixture
+    def ffmpeg(self, monkeypatch):
+        monkeypatch.setattr(versiones_medios, 'ffmpeg_disponible', lambda: True)
+        monkeypatch.setattr(versiones_medios, '_ejecutar', ffmpeg_falso)
+        monkeypatch.setattr(
+            versiones_medios, 'analizar', lambda ruta: {'duracion': 8.0, 'altura': 480, 'audio': True}
+        )
+
+    def test_sin_ffmpeg_se_recomienda_original(self, authenticated_client_participante, sesion_audio, inscrito, monkeypatch):
+        """Test sin ffmpeg no se generan versiones y se recomienda el archivo original."""
+        monkeypatch.setattr(versiones_medios, 'ffmpeg_disponible', lambda: False)
+
+        assert versiones_medios.solicitar(sesion_audio) == []
+        response = authenticated_client_participante.get(f'/api/sesiones/{sesion_audio.id}/')
+
+        recomendado = response.data['medio_recomendado']
+        assert recomendado['calidad'] == 'original'
+        assert recomendado['tamano_bytes'] == len(AUDIO)
+        assert recomendado['url'] == f'/api/sesiones/{sesion_audio.id}/medios/audio/'
+
+    def test_genera_versiones_audio(self, sesion_audio, ffmpeg):
+        """Test se generan las dos versiones de audio con su tamaño, bitrate real y duración."""
+        versiones_medios.solicitar(sesion_audio)
+
+        versiones = {v.calidad: v for v in VersionMedio.objects.filter(archivo_origen=sesion_audio.contenido_audio.name)}
+        assert set(versiones) == {'audio_48k', 'audio_96k'}
+        assert all(v.estado == EstadoVersionMedio.COMPLETADO for v in versiones.values())
+        assert versiones['audio_48k'].tamano_bytes == 6000
+        assert versiones['audio_48k'].bitrate_kbps == 6  # 6000 bytes en 8 segundos
+        assert versiones['audio_96k'].duracion_segundos == 8.0
+        assert os.path.exists(almacenamiento_medios().path(versiones['audio_48k'].archivo))
+
+        # Una segunda solicitud sobre el mismo archivo no vuelve a procesarlo
+        assert versiones_medios.solicitar(sesion_audio) == []
+
+    def test_subida_encola_versiones(self, authenticated_client_investigador, programa_borrador, settings, tmp_path, ffmpeg):
+        """Test crear una sesión con audio genera sus versiones."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        data = {
+            'programa': programa_borrador.id,
+            'titulo': 'Con audio',
+            'semana': 2,
+            'tipo_contenido': 'audio',
+            'contenido_audio': SimpleUploadedFile('guia.wav', AUDIO, content_type='audio/wav'),
+        }
+        response = authenticated_client_investigador.post('/api/sesiones/', data, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert VersionMedio.objects.filter(estado=EstadoVersionMedio.COMPLETADO).count() == 2
+
+    def test_genera_variantes_hls_sin_ampliar(self, sesion, settings, tmp_path, ffmpeg):
+        """Test un vídeo de 480p solo genera la variante de 360p y la lista maestra."""
+        settings.MEDIA_ROOT = str(tmp_path)
+        sesion.tipo_contenido = TipoContenido.VIDEO
+        sesion.contenido_video = SimpleUploadedFile('sesion.mp4', b'mp4', content_type='video/mp4')
+        sesion.save()
+
+        versiones_medios.solicitar(sesion)
+
+        version = VersionMedio.objects.get(archivo_origen=sesion.contenido_video.name)
+        assert version.calidad == 'hls_360p'
+        assert version.archivo.endswith('.versiones/hls_360p/index.m3u8')
+        assert version.tamano_bytes == os.path.getsize(almacenamiento_medios().path(version.archivo)) + 50000
+        maestra = os.path.join(os.path.dirname(os.path.dirname(almacenamiento_medios().path(version.archivo))), 'master.m3u8')
+        assert 'hls_360p/index.m3u8' in open(maestra).read()
+
+    def test_error_de_ffmpeg(self, sesion_audio, ffmpeg, monkeypatch):
+        """Test si ffmpeg falla las versiones quedan en error y no se deja el directorio."""
+        def fallar(comando):
+            raise subprocess.CalledProcessError(1, comando)
+        monkeypatch.setattr(versiones_medios, '_ejecutar', fallar)
+
+        versiones_medios.solicitar(sesion_audio)
+
+        assert set(VersionMedio.objects.values_list('estado', flat=True)) == {EstadoVersionMedio.ERROR}
+        assert not os.path.exists(almacenamiento_medios().path(directorio_versiones(sesion_audio.contenido_audio.name)))
+
+    @pytest.mark.parametrize('parametros, cabeceras, calidad', [
+        ({}, {}, 'audio_48k'),
+        ({}, {'HTTP_DOWNLINK': '10'}, 'audio_96k'),
+        ({}, {'HTTP_DOWNLINK': '0.15'}, 'audio_48k'),
+        ({}, {'HTTP_DOWNLINK': '10', 'HTTP_SAVE_DATA': 'on'}, 'audio_48k'),
+        ({'calidad': 'alta'}, {}, 'audio_96k'),
+    ])
+    def test_recomendacion_segun_cliente(
+        self, authenticated_client_participante, sesion_audio, inscrito, ffmpeg, parametros, cabeceras, calidad
+    ):
+        """Test se recomienda la versión más ligera salvo que el cliente pueda o pida una mejor."""
+        versiones_medios.solicitar(sesion_audio)
+        VersionMedio.objects.filter(calidad='audio_96k').update(bitrate_kbps=96)
+
+        response = authenticated_client_participante.get(f'/api/sesiones/{sesion_audio.id}/', parametros, **cabeceras)
+
+        recomendado = response.data['medio_recomendado']
+        assert recomendado['calidad'] == calidad
+        assert recomendado['url'] == f'/api/sesiones/{sesion_audio.id}/medios/audio/{calidad}.m4a'
+
+    def test_descargar_version(self, authenticated_client_participante, sesion_audio, inscrito, ffmpeg):
+        """Test las versiones se sirven por tramos y no se sale de su directorio."""
+        versiones_medios.solicitar(sesion_audio)
+        url = f'/api/sesiones/{sesion_audio.id}/medios/audio/'
+
+        response = authenticated_client_participante.get(url + 'audio_48k.m4a', HTTP_RANGE='bytes=0-99')
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response['Content-Type'] == 'audio/mp4'
+
+        response = authenticated_client_participante.get(url + 'audio_48k.m4a/../../meditacion.mp3')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_eliminar_sesion_borra_versiones(
+        self, authenticated_client_investigador, sesion_audio, ffmpeg, django_capture_on_commit_callbacks
+    ):
+        """Test al borrar el archivo original se borran también sus versiones."""
+        versiones_medios.solicitar(sesion_audio)
+        directorio = almacenamiento_medios().path(directorio_versiones(sesion_audio.contenido_audio.name))
+        envejecer(sesion_audio.contenido_audio.name)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client_investigador.delete(f'/api/sesiones/{sesion_audio.id}/')
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not VersionMedio.objects.exists()
+        assert not os.path.exists(directorio)
+
+
+@pytest.mark.django_db
+class TestAlmacenamientoContenido:
+    """Tests para el almacenamiento por contenido del audio y vídeo de las sesiones."""
+
+    @pytest.fixture
+    def media(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        return tmp_path
+
+    def crear_sesion(self, programa, semana, contenido=AUDIO, nombre='meditacion.mp3'):
+        return Sesion.objects.create(
+            programa=programa, titulo=f'Sesión {semana}', semana=semana, tipo_contenido=TipoContenido.AUDIO,
+            contenido_audio=SimpleUploadedFile(nombre, contenido, content_type='audio/mpeg')
+        )
+
+    def archivos(self, media):
+        return sorted(
+            os.path.relpath(os.path.join(raiz, archivo), media).replace(os.sep, '/')
+            for raiz, _, archivos in os.walk(media) for archivo in archivos
+        )
+
+    def test_contenido_repetido_se_guarda_una_vez(self, programa_borrador, media):
+        """Test subir dos veces el mismo audio guarda un único archivo con el hash como nombre."""
+        primera = self.crear_sesion(programa_borrador, 1)
+        segunda = self.crear_sesion(programa_borrador, 2, nombre='Otra copia.MP3')
+        distinta = self.crear_sesion(programa_borrador, 3, contenido=b'otro audio')
+
+        resumen = hashlib.sha256(AUDIO).hexdigest()
+        assert primera.contenido_audio.name == f'audio/{resumen[:2]}/{resumen}.mp3'
+        assert segunda.contenido_audio.name == primera.contenido_audio.name
+        assert distinta.contenido_audio.name != primera.contenido_audio.name
+        assert self.archivos(media) == sorted([primera.contenido_audio.name, distinta.contenido_audio.name])
+
+    def test_borrar_programa_libera_archivos(self, programa_borrador, media, django_capture_on_commit_callbacks):
+        """Test al borrar un programa en cascada se borran los archivos que solo usaban sus sesiones."""
+        otro = Programa.objects.create(
+            nombre='Otro', descripcion='Otro', duracion_semanas=2, creado_por=programa_borrador.creado_por
+        )
+        compartida = self.crear_sesion(otro, 1)
+        for sesion in (self.crear_sesion(programa_borrador, 1), self.crear_sesion(programa_borrador, 2, contenido=b'exclusivo')):
+            envejecer(sesion.contenido_audio.name)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            programa_borrador.delete()
+
+        assert self.archivos(media) == [compartida.contenido_audio.name]
+
+    def test_contenido_reutilizado_no_se_libera(self, programa_borrador, media, django_capture_on_commit_callbacks):
+        """Test un archivo reutilizado por una subida aún sin sesión no se borra al eliminar su última sesión."""
+        sesion = self.crear_sesion(programa_borrador, 1)
+        nombre = sesion.contenido_audio.name
+        envejecer(nombre)
+
+        # Otra subida del mismo contenido, cuya sesión todavía no se ha guardado
+        assert almacenamiento_medios().save('audio/copia.mp3', ContentFile(AUDIO)) == nombre
+        with django_capture_on_commit_callbacks(execute=True):
+            sesion.delete()
+
+        assert self.archivos(media) == [nombre]
+
+    def test_uso_por_investigador(self, authenticated_client_investigador, programa_borrador, media):
+        """Test el uso de disco cuenta cada archivo una vez y separa lo que se ahorra al deduplicar."""
+        self.crear_sesion(programa_borrador, 1)
+        self.crear_sesion(programa_borrador, 2)
+        self.crear_sesion(programa_borrador, 3, contenido=b'x' * 100)
+
+        response = authenticated_client_investigador.get('/api/sesiones/medios/uso/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            'archivos': 2,
+            'referencias': 3,
+            'bytes': len(AUDIO) + 100,
+            'bytes_exclusivos': len(AUDIO) + 100,
+            'bytes_versiones': 0,
+            'bytes_sin_deduplicar': 2 * len(AUDIO) + 100,
+        }
+
+    def test_uso_admin_todos_los_investigadores(self, authenticated_client_admin, programa_borrador, media):
+        """Test un administrador ve el uso de cada investigador."""
+        self.crear_sesion(programa_borrador, 1)
+
+        response = authenticated_client_admin.get('/api/sesiones/medios/uso/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [fila['investigador'] for fila in response.data] == [programa_borrador.creado_por_id]
+
+    def test_recolectar_huerfanos(self, programa_borrador, media):
+        """Test se borran los archivos sin referencias salvo los recién subidos."""
+        usada = self.crear_sesion(programa_borrador, 1)
+        huerfana = almacenamiento_medios().save('audio/huerfana.mp3', ContentFile(b'huerfana'))
+        reciente = almacenamiento_medios().save('audio/reciente.mp3', ContentFile(b'reciente'))
+        antiguo = time.time() - 2 * ANTIGUEDAD_MINIMA_HUERFANOS
+        os.utime(media / huerfana, (antiguo, antiguo))
+
+        assert recolectar_huerfanos(simular=True) == {'archivos': 1, 'bytes': len(b'huerfana')}
+        assert len(self.archivos(media)) == 3
+
+        recolectar_huerfanos()
+        assert self.archivos(media) == sorted([usada.contenido_audio.name, reciente])
+
+    def test_recolectar_versiones_recientes_se_conservan(self, programa_borrador, media):
+        """Test un directorio de versiones sin referencias con algún archivo reciente se conserva entero."""
+        antiguo = time.time() - 2 * ANTIGUEDAD_MINIMA_HUERFANOS
+        origen = 'audio/ab/huerfano.mp3'
+        directorio = media / directorio_versiones(origen)
+        directorio.mkdir(parents=True)
+        for archivo in ('audio_48k.m4a', 'audio_96k.m4a'):
+            (directorio / archivo).write_bytes(b'version')
+        os.utime(directorio / 'audio_48k.m4a', (antiguo, antiguo))
+        VersionMedio.objects.create(
+            archivo_origen=origen, calidad='audio_48k', bitrate_kbps=48,
+            archivo=f'{directorio_versiones(origen)}/audio_48k.m4a'
+        )
+
+        assert recolectar_huerfanos(simular=True) == {'archivos': 0, 'bytes': 0}
+        recolectar_huerfanos()
+
+        assert len(self.archivos(media)) == 2
+        assert VersionMedio.objects.filter(archivo_origen=origen).exists()
+
+        os.utime(directorio / 'audio_96k.m4a', (antiguo, antiguo))
+        assert recolectar_huerfanos(simular=True) == {'archivos': 2, 'bytes': 2 * len(b'version')}
+        recolectar_huerfanos()
+        assert self.archivos(media) == []
+        assert not VersionMedio.objects.exists()
+
+    def test_deduplicar_existentes(self, programa_borrador, media):
+        """Test los archivos anteriores con nombre de subida pasan a un único archivo por contenido."""
+        nombres = [guardar_con_nombre_de_subida(media, f'audio/subida_{i}.mp3') for i in range(2)]
+        sesiones = [
+            Sesion.objects.create(programa=programa_borrador, titulo='S', semana=semana, contenido_audio=nombre)
+            for semana, nombre in enumerate(nombres, start=1)
+        ]
+
+        assert deduplicar_existentes() == {'migrados': 2, 'archivos': 1}
+
+        resumen = hashlib.sha256(AUDIO).hexdigest()
+        for sesion in sesiones:
+            sesion.refresh_from_db()
+            assert sesion.contenido_audio.name == f'audio/{resumen[:2]}/{resumen}.mp3'
+        assert self.archivos(media) == [sesiones[0].contenido_audio.name]
+
+
+def guardar_con_nombre_de_subida(media, nombre):
+    """Guarda AUDIO con su nombre de subida, como antes del almacenamiento por contenido"""
+    os.makedirs(media / os.path.dirname(nombre), exist_ok=True)
+    (media / nombre).write_bytes(AUDIO)
+    return nombre
+
+
+@pytest.mark.django_db
+class TestSubidasReanudables:
+    """Tests para la subida por trozos, reanudable, del audio de las sesiones."""
+
+    CONTENIDO = bytes(range(256)) * 40
+
+    @pytest.fixture(autouse=True)
+    def media(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        settings.MEDIA_TAMANO_BLOQUE = 1000
+        return tmp_path
+
+    def iniciar(self, client, sesion, **datos):
+        return client.post(f'/api/sesiones/{sesion.id}/subidas/', {
+            'tipo': 'audio', 'nombre_archivo': 'Meditación.MP3', 'tamano': len(self.CONTENIDO), **datos
+        }, format='json')
+
+    def enviar(self, client, subida_id, desplazamiento, trozo):
+        return client.patch(
+            f'/api/sesiones/subidas/{subida_id}/', trozo,
+            content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(desplazamiento)
+        )
+
+    def test_subida_por_trozos(self, authenticated_client_investigador, sesion):
+        """Test los trozos se escriben en orden y al finalizar el audio pasa a la sesión."""
+        respuesta = self.iniciar(authenticated_client_investigador, sesion)
+        assert respuesta.status_code == status.HTTP_201_CREATED
+        subida_id = respuesta.data['id']
+        assert respuesta['Location'] == f'/api/sesiones/subidas/{subida_id}/'
+
+        for inicio in range(0, len(self.CONTENIDO), 4000):
+            respuesta = self.enviar(authenticated_client_investigador, subida_id, inicio, self.CONTENIDO[inicio:inicio + 4000])
+            assert respuesta.status_code == status.HTTP_200_OK
+        assert respuesta['Upload-Offset'] == str(len(self.CONTENIDO))
+
+        resumen = hashlib.sha256(self.CONTENIDO).hexdigest()
+        respuesta = authenticated_client_investigador.post(
+            f'/api/sesiones/subidas/{subida_id}/finalizar/', {'sha256': resumen}, format='json'
+        )
+
+        assert respuesta.status_code == status.HTTP_200_OK
+        assert respuesta.data['estado'] == EstadoSubidaMedio.COMPLETADA
+        sesion.refresh_from_db()
+        assert sesion.tipo_contenido == TipoContenido.AUDIO
+        assert sesion.contenido_audio.name == f'audio/{resumen[:2]}/{resumen}.mp3'
+        assert sesion.contenido_audio.read() == self.CONTENIDO
+        assert not os.listdir(almacenamiento_medios().path(subidas.DIRECTORIO_PARCIALES))
+
+    def test_reanudar_tras_desplazamiento_incorrecto(self, authenticated_client_investigador, sesion):
+        """Test un trozo fuera de orden devuelve 409 con lo recibido para reanudar desde ahí."""
+        subida_id = self.iniciar(authenticated_client_investigador, sesion).data['id']
+        self.enviar(authenticated_client_investigador, subida_id, 0, self.CONTENIDO[:3000])
+
+        respuesta = self.enviar(authenticated_client_investigador, subida_id, 6000, self.CONTENIDO[6000:])
+        assert respuesta.status_code == status.HTTP_409_CONFLICT
+        assert respuesta['Upload-Offset'] == '3000'
+
+        estado = authenticated_client_investigador.head(f'/api/sesiones/subidas/{subida_id}/')
+        assert estado['Upload-Offset'] == '3000'
+        self.enviar(authenticated_client_investigador, subida_id, 3000, self.CONTENIDO[3000:])
+        respuesta = authenticated_client_investigador.post(f'/api/sesiones/subidas/{subida_id}/finalizar/')
+
+        assert respuesta.status_code == status.HTTP_200_OK
+        sesion.refresh_from_db()
+        assert sesion.contenido_audio.read() == self.CONTENIDO
+
+    def test_sha256_distinto_descarta_lo_recibido(self, authenticated_client_investigador, sesion):
+        """Test si el SHA-256 no coincide la subida vuelve a empezar y la sesión no cambia."""
+        respuesta = self.iniciar(authenticated_client_investigador, sesion, sha256='0' * 64)
+        subida_id = respuesta.data['id']
+        self.enviar(authenticated_client_investigador, subida_id, 0, self.CONTENIDO)
+
+        respuesta = authenticated_client_investigador.post(f'/api/sesiones/subidas/{subida_id}/finalizar/')
+
+        assert respuesta.status_code == status.HTTP_400_BAD_REQUEST
+        assert respuesta.data['recibidos'] == 0
+        sesion.refresh_from_db()
+        assert not sesion.contenido_audio
+
+    def test_finalizar_incompleta(self, authenticated_client_investigador, sesion):
+        """Test no se puede finalizar sin haber recibido todos los bytes."""
+        subida_id = self.iniciar(authenticated_client_investigador, sesion).data['id']
+        self.enviar(authenticated_client_investigador, subida_id, 0, self.CONTENIDO[:100])
+
+        respuesta = authenticated_client_investigador.post(f'/api/sesiones/subidas/{subida_id}/finalizar/')
+
+        assert respuesta.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_contenido_conocido_no_se_transfiere(self, authenticated_client_investigador, sesion, programa_borrador):
+        """Test si el investigador ya usa el mismo contenido se adjunta al iniciar, sin trozos."""
+        existente = Sesion.objects.create(
+            programa=programa_borrador, titulo='Otra', semana=2, tipo_contenido=TipoContenido.AUDIO,
+            contenido_audio=SimpleUploadedFile('original.mp3', self.CONTENIDO, content_type='audio/mpeg')
+        )
+
+        respuesta = self.iniciar(
+            authenticated_client_investigador, sesion, sha256=hashlib.sha256(self.CONTENIDO).hexdigest().upper()
+        )
+
+        assert respuesta.status_code == status.HTTP_201_CREATED
+        assert respuesta.data['estado'] == EstadoSubidaMedio.COMPLETADA
+        sesion.refresh_from_db()
+        assert sesion.contenido_audio.name == existente.contenido_audio.name
+
+    def test_validaciones_al_iniciar(self, authenticated_client_investigador, sesion, settings):
+        """Test se rechazan extensiones no admitidas y archivos demasiado grandes."""
+        settings.MEDIOS_SUBIDA_TAMANO_MAXIMO = 1000
+
+        assert self.iniciar(authenticated_client_investigador, sesion, tamano=500, nombre_archivo='x.exe').status_code == 400
+        assert self.iniciar(authenticated_client_investigador, sesion).status_code == 400
+
+    def test_cancelar(self, authenticated_client_investigador, sesion):
+        """Test cancelar borra la subida y su archivo parcial."""
+        subida_id = self.iniciar(authenticated_client_investigador, sesion).data['id']
+        self.enviar(authenticated_client_investigador, subida_id, 0, self.CONTENIDO[:100])
+
+        respuesta = authenticated_client_investigador.delete(f'/api/sesiones/subidas/{subida_id}/')
+
+        assert respuesta.status_code == status.HTTP_204_NO_CONTENT
+        assert not SubidaMedio.objects.exists()
+        assert not os.listdir(almacenamiento_medios().path(subidas.DIRECTORIO_PARCIALES))
+
+    def test_limpiar_caducadas(self, sesion, investigador, settings):
+        """Test las subidas sin actividad reciente se descartan."""
+        antigua = subidas.iniciar(sesion, investigador, 'audio', 'a.mp3', 10)
+        reciente = subidas.iniciar(sesion, investigador, 'audio', 'b.mp3', 10)
+        SubidaMedio.objects.filter(pk=antigua.pk).update(
+            fecha_actualizacion=timezone.now() - timedelta(hours=settings.MEDIOS_SUBIDA_CADUCIDAD_HORAS + 1)
+        )
+
+        assert subidas.limpiar_caducadas() == 1
+        assert list(SubidaMedio.objects.values_list('pk', flat=True)) == [reciente.pk]
+
+    def test_solo_el_investigador_creador(self, authenticated_client_participante, sesion):
+        """Test un participante no puede iniciar subidas."""
+        respuesta = self.iniciar(authenticated_client_participante, sesion)
+
+        assert respuesta.status_code == status.HTTP_403_FORBIDDEN
@@ -3,7 +3,9 @@ from django.urls import reverse
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from usuario.models import Participante, Investigador
-from config.enums import RoleUsuario
+from django.utils import translation
+from config.enums import RoleUsuario, Genero, ExperienciaMindfulness, etiqueta, etiquetas
+from usuario.serializers import ParticipanteSerializer
 
 Usuario = get_user_model()
 
@@ -210,4 +212,41 @@ class TestUsuarioAPI:
         response = authenticated_client_investigador.get(url)
         
         # Dependiendo de los permisos configurados, podría ser 403 o 401
-        assert response.status_code in [status.HTTP_403_FORBIDDEN, status.HTTP_401_UNAUTHORIZED] 
\ No newline at end of file
+        assert response.status_code in [status.HTTP_403_FORBIDDEN, status.HTTP_401_UNAUTHORIZED] 
+
+
+class TestEtiquetasEnums:
+    """Tests del registro de etiquetas de config.enums."""
+
+    def test_etiquetas_resueltas_como_texto(self):
+        """Las etiquetas diferidas se devuelven ya traducidas como str."""
+        assert etiqueta(Genero, Genero.NO_BINARIO) == 'No binario'
+        assert type(etiqueta(Genero, Genero.NO_BINARIO)) is str
+        assert set(etiquetas(Genero)) == set(Genero.values)
+
+    def test_valor_desconocido_devuelve_el_valor(self):
+        """Un valor que no es opción del enum se devuelve tal cual (como get_FOO_display)."""
+        assert etiqueta(Genero, 'desconocido') == 'desconocido'
+        assert etiqueta(Genero, None) is None
+
+    def test_registro_inmutable(self):
+        """Los mapas del registro no se pueden modificar."""
+        with pytest.raises(TypeError):
+            etiquetas(Genero)['otro'] = 'Cambiado'
+
+    def test_resueltas_una_vez_por_idioma(self):
+        """El mapa se reutiliza en el mismo idioma y se resuelve de nuevo en otro."""
+        with translation.override('es'):
+            assert etiquetas(Genero) is etiquetas(Genero)
+            en_espanol = etiquetas(Genero)
+        with translation.override('en'):
+            assert etiquetas(Genero) is not en_espanol
+
+    @pytest.mark.django_db
+    def test_serializer_participante_usa_registro(self, participante):
+        """Los campos *_display del serializer salen del registro."""
+        data = ParticipanteSerializer(participante).data
+        assert data['genero_display'] == etiqueta(Genero, participante.usuario.genero)
+        assert data['experiencia_mindfulness_display'] == etiqueta(
+            ExperienciaMindfulness, participante.experienciaMindfulness
+        )
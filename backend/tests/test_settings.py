@@ -48,14 +48,33 @@ EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    'programas': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'programas-tests',
+    },
+    'usuarios': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'usuarios-tests',
     }
 }
 
+# Las cachés de programas y de usuarios autenticados usan LocMem para probar la
+# invalidación (se vacían en cada test)
+PROGRAMAS_CACHE_ALIAS = 'programas'
+AUTH_USUARIO_CACHE_ALIAS = 'usuarios'
+
 # Configuración de media para tests
 MEDIA_ROOT = '/tmp/test_media'
+EXPORTACIONES_ROOT = '/tmp/test_exportaciones'
+
+# Ejecutar los trabajos de exportación en el mismo hilo para que vean la base de datos del test
+EXPORTACION_ASINCRONA = False
+MEDIOS_PROCESAMIENTO_ASINCRONO = False
 
 # Debug False en tests
 DEBUG = False
+CONSULTAS_SQL_CABECERAS = False
 
 # Secret key para tests
 SECRET_KEY = 'test-secret-key-for-tests-only' 
\ No newline at end of file
@@ -7,7 +7,7 @@ from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from config.enums import (
     RoleUsuario, Genero, NivelEducativo,
-    ExperienciaMindfulness, ExperienciaInvestigacion
+    ExperienciaMindfulness, ExperienciaInvestigacion, etiqueta
 )
 
 class Usuario(AbstractUser):
@@ -96,13 +96,13 @@ class Usuario(AbstractUser):
         self._password_changed = True
 
     def get_role_display(self):
-        return dict(RoleUsuario.choices).get(self.role, self.role)
+        return etiqueta(RoleUsuario, self.role)
 
     def get_genero_display(self):
-        return dict(Genero.choices).get(self.genero, self.genero)
+        return etiqueta(Genero, self.genero)
 
     def get_nivel_educativo_display(self):
-        return dict(NivelEducativo.choices).get(self.nivelEducativo, self.nivelEducativo)
+        return etiqueta(NivelEducativo, self.nivelEducativo)
 
 class Investigador(models.Model):
     usuario = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='perfil_investigador')
@@ -118,7 +118,7 @@ class Investigador(models.Model):
         return f"Investigador: {self.usuario.nombre_completo}"
 
     def get_experiencia_investigacion_display(self):
-        return dict(ExperienciaInvestigacion.choices).get(self.experienciaInvestigacion, self.experienciaInvestigacion)
+        return etiqueta(ExperienciaInvestigacion, self.experienciaInvestigacion)
 
 class Participante(models.Model):
     usuario = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='perfil_participante')
@@ -134,5 +134,5 @@ class Participante(models.Model):
         return f"Participante: {self.usuario.nombre_completo}"
 
     def get_experiencia_mindfulness_display(self):
-        return dict(ExperienciaMindfulness.choices).get(self.experienciaMindfulness, self.experienciaMindfulness)
+        return etiqueta(ExperienciaMindfulness, self.experienciaMindfulness)
 
@@ -304,6 +304,20 @@ const Exportar = () => {
                                                         />
                                                         <span className="font-medium">JSON</span>
                                                     </label>
+                                                    <label className={`flex items-center px-4 py-2 border rounded-xl cursor-pointer transition-all ${formato === 'parquet'
+                                                        ? 'border-emerald-400/50 bg-emerald-500/20 text-white'
+                                                        : 'border-white/20 hover:bg-white/10 text-emerald-100'
+                                                        }`}>
+                                                        <input
+                                                            type="radio"
+                                                            name="formato"
+                                                            value="parquet"
+                                                            checked={formato === 'parquet'}
+                                                            onChange={() => setFormato('parquet')}
+                                                            className="h-4 w-4 text-emerald-400 focus:ring-emerald-400 mr-2"
+                                                        />
+                                                        <span className="font-medium">Parquet</span>
+                                                    </label>
                                                 </div>
                                             </div>
 
@@ -25,7 +25,8 @@ const getFileExtension = (formato) => {
     const extensiones = {
         'csv': 'csv',
         'excel': 'xlsx',
-        'json': 'json'
+        'json': 'json',
+        'parquet': 'parquet'
     };
     return extensiones[formato] || 'csv';
 };